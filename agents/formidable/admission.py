@@ -0,0 +1,276 @@
+"""Job admission: a queue and concurrency governor in front of ecs.run_task.
+
+POST /start and /rerun enqueue the job instead of launching it. dispatch()
+then launches waiting jobs while the caps allow:
+
+  ADMISSION_GLOBAL_CAP   jobs running at once across all users   (default 10)
+  ADMISSION_USER_CAP     jobs running at once per user           (default 3)
+
+Order is fair share: the next job comes from the user with the fewest jobs
+running (or admitted this round), oldest first within a user, so one user's
+burst of 50 uploads doesn't hold everyone else behind it. When run_task is
+throttled (or ECS reports no capacity), the job goes back to its place in
+the queue and launches pause with exponential backoff.
+
+A job counts as running from just before launch until its record leaves
+queued/processing (the worker marks it complete/failed) or
+ADMISSION_RUNNING_MAX_AGE passes. Slots are reconciled against job status
+on dispatch, so workers don't need to report back.
+
+Stores, picked by ADMISSION:
+
+  dynamo (default)  ADMISSION_TABLE (kind HASH, sk RANGE); waiting entries are
+                    claimed with a conditional delete, so concurrent Lambda
+                    instances never launch a job twice. Caps are soft under
+                    concurrent dispatch (off by at most the number of
+                    dispatching instances).
+  memory            in-process, for tests and local runs
+  off               launch immediately, as before
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+ADMISSION = os.environ.get("ADMISSION", "dynamo")
+ADMISSION_TABLE = os.environ.get("ADMISSION_TABLE", "formidable-admission")
+ADMISSION_GLOBAL_CAP = int(os.environ.get("ADMISSION_GLOBAL_CAP", "10"))
+ADMISSION_USER_CAP = int(os.environ.get("ADMISSION_USER_CAP", "3"))
+ADMISSION_RUNNING_MAX_AGE = float(os.environ.get("ADMISSION_RUNNING_MAX_AGE", str(3 * 3600)))
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+
+THROTTLE_CODES = {"ThrottlingException", "Throttling", "TooManyRequestsException",
+                  "RequestLimitExceeded", "LimitExceededException"}
+
+
+class Throttled(Exception):
+    """run_task was throttled or ECS had no capacity; retry later."""
+
+
+class LaunchFailed(Exception):
+    """run_task rejected the job for a reason retrying won't fix."""
+
+
+class MemoryAdmissionStore:
+    def __init__(self):
+        self._waiting: dict[str, dict] = {}
+        self._running: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, entry: dict) -> None:
+        with self._lock:
+            self._waiting[entry["job_id"]] = entry
+
+    def waiting(self) -> list[dict]:
+        with self._lock:
+            return sorted(self._waiting.values(), key=lambda e: (e["enqueued_at"], e["job_id"]))
+
+    def claim(self, entry: dict) -> bool:
+        with self._lock:
+            return self._waiting.pop(entry["job_id"], None) is not None
+
+    def remove(self, job_id: str) -> None:
+        with self._lock:
+            self._waiting.pop(job_id, None)
+            self._running.pop(job_id, None)
+
+    def running(self) -> list[dict]:
+        with self._lock:
+            return list(self._running.values())
+
+    def add_running(self, entry: dict) -> None:
+        with self._lock:
+            self._running[entry["job_id"]] = entry
+
+    def release(self, job_id: str) -> None:
+        with self._lock:
+            self._running.pop(job_id, None)
+
+
+class DynamoAdmissionStore:
+    def __init__(self, client, table: str = ADMISSION_TABLE):
+        self.client = client
+        self.table = table
+
+    @staticmethod
+    def _waiting_key(entry: dict) -> dict:
+        return {"kind": {"S": "waiting"},
+                "sk": {"S": f"{entry['enqueued_at']:017.6f}#{entry['job_id']}"}}
+
+    def _put(self, kind_key: dict, entry: dict) -> None:
+        self.client.put_item(TableName=self.table,
+                             Item={**kind_key, "entry": {"S": json.dumps(entry)}})
+
+    def _query(self, kind: str) -> list[dict]:
+        entries, start = [], None
+        while True:
+            args = dict(TableName=self.table, KeyConditionExpression="kind = :k",
+                        ExpressionAttributeValues={":k": {"S": kind}}, ConsistentRead=True)
+            if start:
+                args["ExclusiveStartKey"] = start
+            resp = self.client.query(**args)
+            entries += [json.loads(item["entry"]["S"]) for item in resp.get("Items", [])]
+            start = resp.get("LastEvaluatedKey")
+            if not start:
+                return entries
+
+    def enqueue(self, entry: dict) -> None:
+        self._put(self._waiting_key(entry), entry)
+
+    def waiting(self) -> list[dict]:
+        return self._query("waiting")
+
+    def claim(self, entry: dict) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.delete_item(TableName=self.table, Key=self._waiting_key(entry),
+                                    ConditionExpression="attribute_exists(sk)")
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise
+
+    def remove(self, job_id: str) -> None:
+        for entry in self.waiting():
+            if entry["job_id"] == job_id:
+                self.client.delete_item(TableName=self.table, Key=self._waiting_key(entry))
+        self.release(job_id)
+
+    def running(self) -> list[dict]:
+        return self._query("running")
+
+    def add_running(self, entry: dict) -> None:
+        self._put({"kind": {"S": "running"}, "sk": {"S": entry["job_id"]}}, entry)
+
+    def release(self, job_id: str) -> None:
+        self.client.delete_item(TableName=self.table,
+                                Key={"kind": {"S": "running"}, "sk": {"S": job_id}})
+
+
+def _waiting(entry: dict) -> dict:
+    """A running entry as it was queued (without started_at)."""
+    return {k: v for k, v in entry.items() if k != "started_at"}
+
+
+def fair_order(waiting: list[dict], running: list[dict]) -> list[dict]:
+    """Waiting entries in admission order: fewest running per user first."""
+    load = Counter(e["user_id"] for e in running)
+    queues: dict[str, list[dict]] = {}
+    for entry in waiting:                  # already oldest first
+        queues.setdefault(entry["user_id"], []).append(entry)
+    order = []
+    while queues:
+        user = min(queues, key=lambda u: (load[u], queues[u][0]["enqueued_at"]))
+        order.append(queues[user].pop(0))
+        load[user] += 1
+        if not queues[user]:
+            del queues[user]
+    return order
+
+
+class AdmissionGovernor:
+    """Admits queued jobs through launch(params) within the caps.
+
+    launch raises Throttled to requeue and back off, LaunchFailed (or any
+    other exception) to drop the job and report it through on_failed.
+    active_jobs(entries) returns the ids of those jobs still queued/processing.
+    """
+
+    def __init__(self, store, launch, active_jobs=None, on_failed=None,
+                 global_cap: int = ADMISSION_GLOBAL_CAP, user_cap: int = ADMISSION_USER_CAP,
+                 clock=time.time):
+        self.store = store
+        self.launch = launch
+        self.active_jobs = active_jobs
+        self.on_failed = on_failed
+        self.global_cap = global_cap
+        self.user_cap = user_cap
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.backoff_until = 0.0
+        self._throttles = 0
+
+    def submit(self, job_id: str, user_id: str, params: dict) -> None:
+        self.store.enqueue({"job_id": job_id, "user_id": user_id,
+                            "enqueued_at": self._clock(), "params": params})
+
+    def cancel(self, job_id: str) -> None:
+        self.store.remove(job_id)
+
+    def position(self, job_id: str) -> int | None:
+        """1-based place in admission order, or None if not waiting."""
+        waiting = self.store.waiting()
+        if not any(e["job_id"] == job_id for e in waiting):
+            return None
+        order = fair_order(waiting, self.store.running())
+        return next(i for i, e in enumerate(order, 1) if e["job_id"] == job_id)
+
+    def _reconcile(self) -> list[dict]:
+        running = self.store.running()
+        now = self._clock()
+        stale = {e["job_id"] for e in running
+                 if now - e.get("started_at", now) > ADMISSION_RUNNING_MAX_AGE}
+        if self.active_jobs is not None and running:
+            active = self.active_jobs(running)
+            stale |= {e["job_id"] for e in running if e["job_id"] not in active}
+        for job_id in stale:
+            self.store.release(job_id)
+        return [e for e in running if e["job_id"] not in stale]
+
+    def dispatch(self) -> list[str]:
+        """Launch waiting jobs the caps allow; returns the launched job ids."""
+        with self._lock:
+            if self._clock() < self.backoff_until:
+                return []
+            waiting = self.store.waiting()
+            if not waiting:
+                return []
+            running = self._reconcile()
+            per_user = Counter(e["user_id"] for e in running)
+            launched = []
+            for entry in fair_order(waiting, running):
+                if len(running) >= self.global_cap:
+                    break
+                if per_user[entry["user_id"]] >= self.user_cap:
+                    continue
+                if not self.store.claim(entry):
+                    continue        # another instance took it
+                # The slot is taken before run_task, so a concurrent dispatch
+                # counts it while the launch is in flight.
+                entry = {**entry, "started_at": self._clock()}
+                self.store.add_running(entry)
+                try:
+                    self.launch(entry["params"])
+                except Throttled:
+                    self.store.release(entry["job_id"])
+                    self.store.enqueue(_waiting(entry))
+                    self._throttles += 1
+                    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self._throttles - 1))
+                    self.backoff_until = self._clock() + delay * random.uniform(0.5, 1.0)
+                    break
+                except Exception as error:
+                    self.store.release(entry["job_id"])
+                    if self.on_failed is not None:
+                        self.on_failed(_waiting(entry), error)
+                    continue
+                self._throttles = 0
+                running.append(entry)
+                per_user[entry["user_id"]] += 1
+                launched.append(entry["job_id"])
+            return launched
+
+
+def store_from_env(dynamo_factory):
+    """Admission store configured by ADMISSION (None when off)."""
+    kind = os.environ.get("ADMISSION", ADMISSION)
+    if kind == "off":
+        return None
+    if kind == "memory":
+        return MemoryAdmissionStore()
+    return DynamoAdmissionStore(dynamo_factory(),
+                                os.environ.get("ADMISSION_TABLE", ADMISSION_TABLE))
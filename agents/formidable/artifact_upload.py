@@ -0,0 +1,118 @@
+"""Concurrent artifact upload for the workers' publishing phase.
+
+worker.py and high_worker.py used to upload output.xlsx, every page, every
+crop and the manifests one upload_file call at a time. ArtifactUpload sends
+them from a bounded thread pool instead, in two phases:
+
+  1. every artifact except the manifests, concurrently
+  2. the manifests, in the order given, once phase 1 fully succeeded
+
+A reader that finds crops_manifest.json can therefore fetch every page and
+crop it names. Each upload is retried with backoff; if any still fails,
+publish() raises UploadFailed before the manifests go up, and the worker
+marks the job failed rather than complete.
+
+Each object is stored with a Content-Type: the one passed to add(), else
+the one CONTENT_TYPES gives the key's suffix.
+
+  UPLOAD_CONCURRENCY          files in flight (default 8, under botocore's
+                              10-connection pool so progress writes aren't starved)
+  UPLOAD_MULTIPART_THRESHOLD  bytes above which a file goes multipart (default 16 MiB)
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from boto3.s3.transfer import TransferConfig
+
+log = logging.getLogger(__name__)
+
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", "8"))
+UPLOAD_MULTIPART_THRESHOLD = int(os.environ.get("UPLOAD_MULTIPART_THRESHOLD", str(16 * 1024 * 1024)))
+UPLOAD_ATTEMPTS = 3
+UPLOAD_BACKOFF = 0.5
+
+# Parts of one large file upload use a few threads of their own; small files
+# (nearly everything) go up in a single PUT on the pool thread.
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=UPLOAD_MULTIPART_THRESHOLD,
+                                 multipart_chunksize=8 * 1024 * 1024, max_concurrency=4)
+
+CONTENT_TYPES = {
+    ".json": "application/json",
+    ".png":  "image/png",
+    ".jpg":  "image/jpeg",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class UploadFailed(Exception):
+    """Some artifacts could not be uploaded; the manifests were not published."""
+
+    def __init__(self, failures: dict[str, Exception]):
+        self.failures = failures
+        first_key, first_error = next(iter(failures.items()))
+        super().__init__(f"{len(failures)} artifact upload(s) failed, "
+                         f"e.g. {first_key}: {first_error}")
+
+
+class ArtifactUpload:
+    def __init__(self, s3, bucket: str, max_workers: int = UPLOAD_CONCURRENCY,
+                 attempts: int = UPLOAD_ATTEMPTS, backoff: float = UPLOAD_BACKOFF,
+                 sleep=time.sleep):
+        self.s3 = s3
+        self.bucket = bucket
+        self.max_workers = max_workers
+        self.attempts = attempts
+        self.backoff = backoff
+        self._sleep = sleep
+        self._files: list[tuple[Path, str, str | None]] = []
+        self._last: list[tuple[Path, str, str | None]] = []
+
+    @staticmethod
+    def _entry(path, key: str, content_type: str | None) -> tuple[Path, str, str | None]:
+        return Path(path), key, content_type or CONTENT_TYPES.get(Path(key).suffix.lower())
+
+    def add(self, path, key: str, content_type: str | None = None) -> None:
+        self._files.append(self._entry(path, key, content_type))
+
+    def add_last(self, path, key: str, content_type: str | None = None) -> None:
+        """Upload after everything added with add() succeeded (manifests)."""
+        self._last.append(self._entry(path, key, content_type))
+
+    def __len__(self) -> int:
+        return len(self._files) + len(self._last)
+
+    def _upload(self, path: Path, key: str, content_type: str | None) -> None:
+        extra = {"ContentType": content_type} if content_type else None
+        for attempt in range(1, self.attempts + 1):
+            try:
+                self.s3.upload_file(str(path), self.bucket, key, ExtraArgs=extra,
+                                    Config=TRANSFER_CONFIG)
+                return
+            except Exception as exc:
+                if attempt == self.attempts:
+                    raise
+                log.warning("upload %s failed (attempt %d): %s", key, attempt, exc)
+                self._sleep(self.backoff * 2 ** (attempt - 1))
+
+    def publish(self) -> int:
+        """Upload everything; returns the number of files uploaded."""
+        failures: dict[str, Exception] = {}
+        if self._files:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {key: pool.submit(self._upload, path, key, content_type)
+                           for path, key, content_type in self._files}
+            for key, future in futures.items():
+                if future.exception() is not None:
+                    failures[key] = future.exception()
+        if failures:
+            raise UploadFailed(failures)
+        for path, key, content_type in self._last:
+            try:
+                self._upload(path, key, content_type)
+            except Exception as exc:
+                raise UploadFailed({key: exc}) from exc
+        return len(self)
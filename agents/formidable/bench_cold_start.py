@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for the Lambda handler (no AWS).
+
+Each scenario runs in a fresh interpreter, like a new Lambda instance:
+import main, run the app's startup (the Lambda init phase), then time the
+first and second POST /api/jobs/{id}/start. AWS calls go through real boto3
+clients whose HTTP sends are answered locally after --rtt ms, so client
+construction, signing and per-call round trips are all counted.
+
+    python bench_cold_start.py [--rtt 40] [--profile]
+
+--profile also prints the slowest imports of `import main` (startup profile).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+SCENARIOS = {
+    "lazy, network discovered on /start": {"WARM_START": "0"},
+    "network config from deploy env":     {"WARM_START": "0", "ECS_SUBNET": "subnet-1",
+                                           "ECS_SG_ID": "sg-1"},
+    "deploy env + warm start in init":    {"WARM_START": "1", "ECS_SUBNET": "subnet-1",
+                                           "ECS_SG_ID": "sg-1"},
+}
+
+_EC2 = {
+    "DescribeVpcs": "<vpcSet><item><vpcId>vpc-1</vpcId></item></vpcSet>",
+    "DescribeSubnets": "<subnetSet><item><subnetId>subnet-1</subnetId></item></subnetSet>",
+    "DescribeSecurityGroups": "<securityGroupInfo><item><groupId>sg-1</groupId></item></securityGroupInfo>",
+}
+_JSON = {
+    "GetItem": {"Item": {"user_id": {"S": "dev-user"}, "job_id": {"S": "job"},
+                         "name": {"S": "a.pdf"}, "status": {"S": "uploading"},
+                         "input_key": {"S": "formidable/jobs/job/input.pdf"}}},
+    "UpdateItem": {},
+    "RunTask": {"tasks": [], "failures": []},
+}
+
+
+def _child(rtt: float):
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    from botocore.awsrequest import AWSResponse
+
+    class _Raw:
+        def __init__(self, body):
+            self.body = body
+
+        def stream(self, **kwargs):
+            yield self.body
+
+    def answer(request, event_name, **kwargs):
+        time.sleep(rtt)
+        operation = event_name.rsplit(".", 1)[-1]
+        if operation in _EC2:
+            body = (f"<{operation}Response>{_EC2[operation]}</{operation}Response>").encode()
+        elif operation in _JSON:
+            body = json.dumps(_JSON[operation]).encode()
+        else:  # HeadObject
+            body = b""
+        return AWSResponse(request.url, 200, {"Content-Length": str(len(body))}, _Raw(body))
+
+    make_client = main._client
+
+    def local_client(service):
+        client = make_client(service)
+        client.meta.events.register("before-send", answer)
+        return client
+
+    main._client = local_client
+    from fastapi.testclient import TestClient
+
+    with TestClient(main.app) as client:      # runs the lifespan (Lambda init)
+        initialized = time.perf_counter()
+        first = [time.perf_counter()]
+        assert client.post("/api/jobs/job/start").status_code == 200
+        first.append(time.perf_counter())
+        main._ownership_cache.clear()
+        assert client.post("/api/jobs/job/start").status_code == 200
+        second = time.perf_counter() - first[1]
+    print(json.dumps({"import": imported - started, "init": initialized - imported,
+                      "first": first[1] - first[0], "second": second}))
+
+
+def _profile(top: int = 12):
+    from test_import_budget import import_profile
+    profile = import_profile()
+    print(f"import main: {profile['main'] / 1000:.0f} ms; slowest top-level imports:")
+    direct = {m: us for m, us in profile.items() if "." not in m and m != "main"}
+    for module, us in sorted(direct.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {us / 1000:7.1f} ms  {module}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rtt", type=float, default=40, help="simulated AWS round trip, ms")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.rtt / 1000)
+        return
+    if args.profile:
+        _profile()
+
+    print(f"{'scenario':38} {'import':>8} {'init':>8} {'1st /start':>11} {'2nd /start':>11}")
+    for name, env in SCENARIOS.items():
+        child_env = {k: v for k, v in os.environ.items()
+                     if k not in ("ECS_SUBNET", "ECS_SG_ID", "WARM_START")}
+        child_env.update(env, AWS_ACCESS_KEY_ID="bench", AWS_SECRET_ACCESS_KEY="bench",
+                         AWS_EC2_METADATA_DISABLED="true")
+        runs = []
+        for _ in range(args.runs):
+            out = subprocess.run([sys.executable, __file__, "--child", "--rtt", str(args.rtt)],
+                                 cwd=ROOT, env=child_env, capture_output=True, text=True,
+                                 check=True)
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        best = {k: min(r[k] for r in runs) * 1000 for k in runs[0]}
+        print(f"{name:38} {best['import']:6.0f}ms {best['init']:6.0f}ms "
+              f"{best['first']:9.0f}ms {best['second']:9.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
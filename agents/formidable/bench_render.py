@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Per-form render benchmark: render_page.py subprocesses vs the in-process renderer.
+
+Builds a synthetic scanned form (each page one embedded 300 dpi image, like a
+phone scan), then renders what the High pipeline asks for per page: the
+overview (zoom 3), four quadrant tiles (zoom 8) and eight declared crops
+(zoom 10). Both paths must produce identical pixels.
+
+    python bench_render.py [--pages 4] [--crops 8]
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fitz
+from PIL import Image, ImageChops, ImageDraw
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT / "tools"))
+import pdf_renderer  # noqa: E402
+
+QUADRANTS = [(0, 0, .56, .56), (.44, 0, 1, .56), (0, .44, .56, 1), (.44, .44, 1, 1)]
+
+
+def make_form(path: Path, pages: int) -> None:
+    doc = fitz.open()
+    for number in range(pages):
+        scan = Image.new("RGB", (2480, 3508), "white")
+        draw = ImageDraw.Draw(scan)
+        for row in range(40):
+            y = 300 + row * 75
+            draw.line((150, y, 2330, y), fill="black", width=3)
+            draw.text((180, y + 20), f"page {number + 1} row {row} 12.5 X", fill="navy")
+        page = doc.new_page(width=595, height=842)
+        jpeg = path.with_suffix(f".{number}.jpg")
+        scan.save(jpeg, quality=85)
+        page.insert_image(page.rect, filename=str(jpeg))
+    doc.save(str(path))
+
+
+def requests(pages: int, crops: int):
+    for page in range(1, pages + 1):
+        yield page, None, 3
+        for box in QUADRANTS:
+            yield page, box, 8
+        for i in range(crops):
+            top = .1 + i * .8 / crops
+            yield page, (.05, top, .95, top + .12), 10
+
+
+def via_cli(pdf: Path, out: Path, jobs) -> float:
+    started = time.perf_counter()
+    for i, (page, box, zoom) in enumerate(jobs):
+        cmd = [sys.executable, str(ROOT / "tools" / "render_page.py"), str(pdf),
+               "--page", str(page), "--zoom", str(zoom), "--out", str(out / f"{i}.png")]
+        if box:
+            cmd += ["--bbox", ",".join(str(v) for v in box)]
+        subprocess.run(cmd, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def in_process(pdf: Path, out: Path, jobs) -> float:
+    started = time.perf_counter()
+    for i, (page, box, zoom) in enumerate(jobs):
+        pdf_renderer.render(pdf, out / f"{i}.png", page=page, bbox=box, zoom=zoom)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--crops", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdf = tmp / "input.pdf"
+        make_form(pdf, args.pages)
+        jobs = list(requests(args.pages, args.crops))
+        (tmp / "cli").mkdir()
+        (tmp / "service").mkdir()
+        cli = via_cli(pdf, tmp / "cli", jobs)
+        service = in_process(pdf, tmp / "service", jobs)
+        for i in range(len(jobs)):
+            a = Image.open(tmp / "cli" / f"{i}.png")
+            b = Image.open(tmp / "service" / f"{i}.png")
+            assert a.size == b.size and not ImageChops.difference(a, b).getbbox(), i
+    print(f"{args.pages}-page form, {len(jobs)} renders (identical output):")
+    print(f"  render_page.py per render  {cli:6.2f} s")
+    print(f"  in-process PdfRenderer     {service:6.2f} s   ({cli / service:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,6 +37,13 @@ export S3_PREFIX="formidable"
 
 # DynamoDB — job metadata + user lookup
 export DYNAMO_TABLE="formidable-jobs"
+export JOBS_CREATED_INDEX="user_id-created_at-index"
+# Append-only job progress events (worker → GET /api/jobs/{id}/progress)
+export PROGRESS_EVENTS_TABLE="formidable-job-events"
+# Job admission queue + running slots (POST /start queues, the API admits)
+export ADMISSION_TABLE="formidable-admission"
+export ADMISSION_GLOBAL_CAP=10
+export ADMISSION_USER_CAP=3
 
 # Secrets Manager — codex auth.json
 export SECRET_NAME="formidable/codex-auth"
@@ -60,6 +67,11 @@ export HIGH_FARGATE_TASK_ROLE="${HIGH_WORKER_APP_NAME}-task-role"
 export HIGH_FARGATE_LOG_GROUP="/ecs/${HIGH_WORKER_APP_NAME}"
 export HIGH_FARGATE_CPU=2048
 export HIGH_FARGATE_MEMORY=4096
+# Warm Low worker pool: an ECS service of WORKER_POOL_SIZE tasks running
+# worker.py in MODE=pool, fed by an SQS queue. 0 = one Fargate task per job.
+export WORKER_POOL_SIZE="${WORKER_POOL_SIZE:-0}"
+export WORKER_POOL_SERVICE="${WORKER_APP_NAME}-pool"
+export WORKER_QUEUE_NAME="${WORKER_APP_NAME}-jobs"
 
 # ── Email notifications (AWS SES) ────────────────────────────────────────────
 # Uses the Fargate task's IAM role for auth — no API key needed.
@@ -86,6 +98,21 @@ export PWA_URL="https://fomoscribe.netlify.app"
 _CONFIG_SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 source "${_CONFIG_SCRIPT_DIR}/../../deploy/config.sh"
 
+# Worker network config is resolved here, at deploy time, and passed to the
+# HTTP handler (ECS_SUBNET, ECS_SG_ID) so /start never calls EC2 describe-*.
+ecs_sg_id() {
+  aws ec2 describe-security-groups \
+    --filters "Name=group-name,Values=${ECS_SG_NAME}" "Name=vpc-id,Values=${ECS_VPC_ID}" \
+    --query 'SecurityGroups[0].GroupId' --output text --region "$AWS_REGION" 2>/dev/null || true
+}
+
+# Queue URL the HTTP handler sends Low jobs to; empty while the pool is off.
+worker_queue_url() {
+  [ "$WORKER_POOL_SIZE" -gt 0 ] || return 0
+  aws sqs get-queue-url --queue-name "$WORKER_QUEUE_NAME" --region "$AWS_REGION" \
+    --query QueueUrl --output text 2>/dev/null || true
+}
+
 # API Gateway — reuse the existing shared gateway, do not create
 export APIGW_NAME="form-idable-api"
 
@@ -41,7 +41,10 @@ ROLE_ARN=$(aws iam get-role --role-name "$LAMBDA_ROLE_NAME" --query 'Role.Arn' -
 
 # ── HTTP handler Lambda ────────────────────────────────────────────
 echo "=== Lambda: ${LAMBDA_FUNCTION} (HTTP handler) ==="
-HTTP_ENV="Variables={JOBS_BUCKET=${JOBS_BUCKET},S3_PREFIX=${S3_PREFIX},DYNAMO_TABLE=${DYNAMO_TABLE},ECS_CLUSTER=${ECS_CLUSTER},FARGATE_TASK=${FARGATE_TASK_DEF},FARGATE_TASK_HIGH=${HIGH_FARGATE_TASK_DEF},ECS_SG_NAME=${ECS_SG_NAME},AWS_LWA_REMOVE_BASE_PATH=/prod}"
+ECS_SG_ID="$(ecs_sg_id)"
+[[ "$ECS_SG_ID" == "None" ]] && ECS_SG_ID=""
+WORKER_QUEUE_URL="$(worker_queue_url)"
+HTTP_ENV="Variables={JOBS_BUCKET=${JOBS_BUCKET},S3_PREFIX=${S3_PREFIX},DYNAMO_TABLE=${DYNAMO_TABLE},JOBS_CREATED_INDEX=${JOBS_CREATED_INDEX},PROGRESS_EVENTS_TABLE=${PROGRESS_EVENTS_TABLE},ADMISSION_TABLE=${ADMISSION_TABLE},ADMISSION_GLOBAL_CAP=${ADMISSION_GLOBAL_CAP},ADMISSION_USER_CAP=${ADMISSION_USER_CAP},ECS_CLUSTER=${ECS_CLUSTER},FARGATE_TASK=${FARGATE_TASK_DEF},FARGATE_TASK_HIGH=${HIGH_FARGATE_TASK_DEF},ECS_SG_NAME=${ECS_SG_NAME},ECS_SG_ID=${ECS_SG_ID},ECS_SUBNET=${ECS_SUBNET},WORKER_QUEUE_URL=${WORKER_QUEUE_URL},AWS_LWA_REMOVE_BASE_PATH=/prod}"
 
 if aws lambda get-function --function-name "$LAMBDA_FUNCTION" --region "$AWS_REGION" &>/dev/null; then
   echo "  updating function code..."
@@ -110,6 +113,7 @@ TASK_DEF_ARN=$(aws ecs register-task-definition --region "$AWS_REGION" --cli-inp
         {"name": "CODEX_SECRET_NAME",       "value": "${SECRET_NAME}"},
         {"name": "JOBS_BUCKET",             "value": "${JOBS_BUCKET}"},
         {"name": "AWS_REGION",              "value": "${AWS_REGION}"},
+        {"name": "PROGRESS_EVENTS_TABLE",   "value": "${PROGRESS_EVENTS_TABLE}"},
         {"name": "NOTIFICATION_FROM_EMAIL", "value": "${NOTIFICATION_FROM_EMAIL}"},
         {"name": "PWA_URL",                 "value": "${PWA_URL}"}
       ],
@@ -128,6 +132,68 @@ JSON
 )" --query 'taskDefinition.taskDefinitionArn' --output text)
 echo "  registered: ${TASK_DEF_ARN}"
 
+# ── Warm worker pool (WORKER_POOL_SIZE > 0) ───────────────────────
+# Same image and roles; MODE=pool long-polls the job queue. stopTimeout is
+# Fargate's 120 s maximum, shorter than a codex run: on SIGTERM a worker stops
+# codex, marks its job queued and releases the message (a job already
+# uploading results finishes first).
+if [ "$WORKER_POOL_SIZE" -gt 0 ]; then
+  echo "=== Worker pool: ${WORKER_POOL_SERVICE} (${WORKER_POOL_SIZE} tasks) ==="
+  POOL_TASK_DEF_ARN=$(aws ecs register-task-definition --region "$AWS_REGION" --cli-input-json "$(cat <<JSON
+{
+  "family": "${WORKER_POOL_SERVICE}",
+  "runtimePlatform":{"cpuArchitecture":"X86_64","operatingSystemFamily":"LINUX"},
+  "networkMode": "awsvpc",
+  "requiresCompatibilities": ["FARGATE"],
+  "cpu": "${FARGATE_CPU}",
+  "memory": "${FARGATE_MEMORY}",
+  "executionRoleArn": "${EXEC_ROLE_ARN}",
+  "taskRoleArn": "${TASK_ROLE_ARN}",
+  "containerDefinitions": [
+    {
+      "name": "worker",
+      "image": "${WORKER_ECR_URI}:latest",
+      "essential": true,
+      "stopTimeout": 120,
+      "environment": [
+        {"name": "MODE",                    "value": "pool"},
+        {"name": "WORKER_QUEUE_URL",        "value": "${WORKER_QUEUE_URL}"},
+        {"name": "CODEX_SECRET_NAME",       "value": "${SECRET_NAME}"},
+        {"name": "JOBS_BUCKET",             "value": "${JOBS_BUCKET}"},
+        {"name": "AWS_REGION",              "value": "${AWS_REGION}"},
+        {"name": "PROGRESS_EVENTS_TABLE",   "value": "${PROGRESS_EVENTS_TABLE}"},
+        {"name": "NOTIFICATION_FROM_EMAIL", "value": "${NOTIFICATION_FROM_EMAIL}"},
+        {"name": "PWA_URL",                 "value": "${PWA_URL}"}
+      ],
+      "logConfiguration": {
+        "logDriver": "awslogs",
+        "options": {
+          "awslogs-group":         "${FARGATE_LOG_GROUP}",
+          "awslogs-region":        "${AWS_REGION}",
+          "awslogs-stream-prefix": "pool"
+        }
+      }
+    }
+  ]
+}
+JSON
+)" --query 'taskDefinition.taskDefinitionArn' --output text)
+  POOL_NETWORK="awsvpcConfiguration={subnets=[${ECS_SUBNET}],securityGroups=[${ECS_SG_ID}],assignPublicIp=ENABLED}"
+  POOL_STATUS=$(aws ecs describe-services --cluster "$ECS_CLUSTER" --services "$WORKER_POOL_SERVICE" \
+    --region "$AWS_REGION" --query 'services[0].status' --output text 2>/dev/null || echo "None")
+  if [ "$POOL_STATUS" = "ACTIVE" ]; then
+    aws ecs update-service --cluster "$ECS_CLUSTER" --service "$WORKER_POOL_SERVICE" \
+      --task-definition "$POOL_TASK_DEF_ARN" --desired-count "$WORKER_POOL_SIZE" \
+      --region "$AWS_REGION" --output text >/dev/null
+  else
+    aws ecs create-service --cluster "$ECS_CLUSTER" --service-name "$WORKER_POOL_SERVICE" \
+      --task-definition "$POOL_TASK_DEF_ARN" --desired-count "$WORKER_POOL_SIZE" \
+      --launch-type FARGATE --network-configuration "$POOL_NETWORK" \
+      --region "$AWS_REGION" --output text >/dev/null
+  fi
+  echo "  service: ${WORKER_POOL_SERVICE} → ${POOL_TASK_DEF_ARN}"
+fi
+
 # ── API Gateway invoke permission ──────────────────────────────────
 if [ -f "$SCRIPT_DIR/outputs.env" ]; then
   source "$SCRIPT_DIR/outputs.env"
@@ -41,7 +41,10 @@ docker build --platform linux/arm64 --memory 8g \
 docker tag "$HIGH_WORKER_IMAGE" "${HIGH_WORKER_ECR_URI}:latest"
 docker push "${HIGH_WORKER_ECR_URI}:latest"
 
-HTTP_ENV="Variables={JOBS_BUCKET=${JOBS_BUCKET},S3_PREFIX=${S3_PREFIX},DYNAMO_TABLE=${DYNAMO_TABLE},ECS_CLUSTER=${ECS_CLUSTER},FARGATE_TASK=${FARGATE_TASK_DEF},FARGATE_TASK_HIGH=${HIGH_FARGATE_TASK_DEF},ECS_SG_NAME=${ECS_SG_NAME},AWS_LWA_REMOVE_BASE_PATH=/prod}"
+ECS_SG_ID="$(ecs_sg_id)"
+[[ "$ECS_SG_ID" == "None" ]] && ECS_SG_ID=""
+WORKER_QUEUE_URL="$(worker_queue_url)"
+HTTP_ENV="Variables={JOBS_BUCKET=${JOBS_BUCKET},S3_PREFIX=${S3_PREFIX},DYNAMO_TABLE=${DYNAMO_TABLE},JOBS_CREATED_INDEX=${JOBS_CREATED_INDEX},PROGRESS_EVENTS_TABLE=${PROGRESS_EVENTS_TABLE},ADMISSION_TABLE=${ADMISSION_TABLE},ADMISSION_GLOBAL_CAP=${ADMISSION_GLOBAL_CAP},ADMISSION_USER_CAP=${ADMISSION_USER_CAP},ECS_CLUSTER=${ECS_CLUSTER},FARGATE_TASK=${FARGATE_TASK_DEF},FARGATE_TASK_HIGH=${HIGH_FARGATE_TASK_DEF},ECS_SG_NAME=${ECS_SG_NAME},ECS_SG_ID=${ECS_SG_ID},ECS_SUBNET=${ECS_SUBNET},WORKER_QUEUE_URL=${WORKER_QUEUE_URL},AWS_LWA_REMOVE_BASE_PATH=/prod}"
 if [[ "${HIGH_SKIP_HANDLER:-0}" != "1" ]]; then
   aws lambda update-function-code --function-name "$LAMBDA_FUNCTION" --image-uri "${ECR_URI}:latest" \
     --region "$AWS_REGION" >/dev/null
@@ -63,6 +66,7 @@ aws ecs register-task-definition --region "$AWS_REGION" --cli-input-json "$(cat
     "environment":[
       {"name":"CODEX_SECRET_NAME","value":"${CODEX_SECRET_NAME}"},
       {"name":"JOBS_BUCKET","value":"${JOBS_BUCKET}"},{"name":"AWS_REGION","value":"${AWS_REGION}"},
+      {"name":"PROGRESS_EVENTS_TABLE","value":"${PROGRESS_EVENTS_TABLE}"},
       {"name":"NOTIFICATION_FROM_EMAIL","value":"${NOTIFICATION_FROM_EMAIL}"},{"name":"PWA_URL","value":"${PWA_URL}"}
     ],"logConfiguration":{"logDriver":"awslogs","options":{"awslogs-group":"${HIGH_FARGATE_LOG_GROUP}","awslogs-region":"${AWS_REGION}","awslogs-stream-prefix":"ecs"}}}]
 }
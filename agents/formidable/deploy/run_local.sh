@@ -62,6 +62,7 @@ try:
     input_name = f"input{suffix}"
     shutil.copy(FILE_PATH, str(WORKDIR / input_name))
     shutil.copy("${SERVER_DIR}/tools/render_page.py", str(WORKDIR / "render_page.py"))
+    shutil.copy("${SERVER_DIR}/tools/pdf_renderer.py", str(WORKDIR / "pdf_renderer.py"))
 
     template = open("${SERVER_DIR}/prompts/codex_prompt.md").read()
     prompt   = template.replace("{input_file}", input_name).replace("{render_tool}", "render_page.py")
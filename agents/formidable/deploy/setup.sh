@@ -97,6 +97,110 @@ else
   echo "  active"
 fi
 
+# GET /api/jobs pages through this index newest-first. Only the list-view
+# attributes are projected; corrections stay on the base table.
+echo "→ DynamoDB index: ${JOBS_CREATED_INDEX}"
+GSI_EXISTS=$(aws dynamodb describe-table --table-name "$DYNAMO_TABLE" --region "$AWS_REGION" \
+  --query "Table.GlobalSecondaryIndexes[?IndexName=='${JOBS_CREATED_INDEX}'].IndexName | [0]" \
+  --output text 2>/dev/null || echo "None")
+if [ "$GSI_EXISTS" != "None" ] && [ -n "$GSI_EXISTS" ]; then
+  echo "  already exists"
+else
+  aws dynamodb update-table \
+    --table-name "$DYNAMO_TABLE" \
+    --attribute-definitions \
+      AttributeName=user_id,AttributeType=S \
+      AttributeName=created_at,AttributeType=S \
+    --global-secondary-index-updates "[{\"Create\": {
+      \"IndexName\": \"${JOBS_CREATED_INDEX}\",
+      \"KeySchema\": [{\"AttributeName\": \"user_id\", \"KeyType\": \"HASH\"},
+                    {\"AttributeName\": \"created_at\", \"KeyType\": \"RANGE\"}],
+      \"Projection\": {\"ProjectionType\": \"INCLUDE\", \"NonKeyAttributes\": [
+        \"name\", \"status\", \"review_state\", \"effort\", \"pages\", \"crops\",
+        \"gps\", \"grid_no\", \"date\", \"error\"]}}}]" \
+    --region "$AWS_REGION" \
+    --output text >/dev/null
+  echo "  created (backfilling — GET /api/jobs uses it once ACTIVE)"
+fi
+
+# The index is sparse: a job record without created_at never shows up in
+# GET /api/jobs. Stamp such records with the time of their earliest S3
+# object (the upload), or the epoch so they list last as they used to.
+echo "→ Backfilling created_at on older job records"
+BACKFILLED=0
+while read -r JOB_USER JOB_ID; do
+  [ -n "$JOB_ID" ] || continue
+  CREATED=$(aws s3api list-objects-v2 --bucket "$JOBS_BUCKET" --region "$AWS_REGION" \
+    --prefix "${S3_PREFIX}/jobs/${JOB_ID}/" \
+    --query "sort_by(Contents, &LastModified)[0].LastModified" --output text 2>/dev/null || echo "None")
+  if [ "$CREATED" = "None" ] || [ -z "$CREATED" ]; then
+    CREATED="1970-01-01T00:00:00+00:00"
+  fi
+  aws dynamodb update-item \
+    --table-name "$DYNAMO_TABLE" \
+    --key "{\"user_id\": {\"S\": \"${JOB_USER}\"}, \"job_id\": {\"S\": \"${JOB_ID}\"}}" \
+    --update-expression "SET created_at = :c" \
+    --condition-expression "attribute_not_exists(created_at)" \
+    --expression-attribute-values "{\":c\": {\"S\": \"${CREATED}\"}}" \
+    --region "$AWS_REGION" >/dev/null 2>&1 && BACKFILLED=$((BACKFILLED + 1))
+done < <(aws dynamodb scan \
+  --table-name "$DYNAMO_TABLE" \
+  --filter-expression "attribute_not_exists(created_at)" \
+  --projection-expression "user_id, job_id" \
+  --region "$AWS_REGION" --output json \
+  | python3 -c "
+import json, sys
+for item in json.load(sys.stdin).get('Items', []):
+    print(item['user_id']['S'], item['job_id']['S'])
+")
+echo "  ${BACKFILLED} record(s) stamped"
+
+# Workers append progress events here; GET /api/jobs/{id}/progress reads the newest.
+# Items expire via TTL on expires_at a week after they are written.
+echo "→ DynamoDB table: ${PROGRESS_EVENTS_TABLE}"
+if aws dynamodb describe-table --table-name "$PROGRESS_EVENTS_TABLE" --region "$AWS_REGION" &>/dev/null; then
+  echo "  already exists"
+else
+  aws dynamodb create-table \
+    --table-name "$PROGRESS_EVENTS_TABLE" \
+    --attribute-definitions \
+      AttributeName=job_id,AttributeType=S \
+      AttributeName=seq,AttributeType=N \
+    --key-schema \
+      AttributeName=job_id,KeyType=HASH \
+      AttributeName=seq,KeyType=RANGE \
+    --billing-mode PAY_PER_REQUEST \
+    --region "$AWS_REGION" \
+    --output text >/dev/null
+  aws dynamodb wait table-exists --table-name "$PROGRESS_EVENTS_TABLE" --region "$AWS_REGION"
+  aws dynamodb update-time-to-live \
+    --table-name "$PROGRESS_EVENTS_TABLE" \
+    --time-to-live-specification "Enabled=true,AttributeName=expires_at" \
+    --region "$AWS_REGION" \
+    --output text >/dev/null
+  echo "  created (PAY_PER_REQUEST, TTL on expires_at)"
+fi
+
+# POST /start and /rerun queue jobs here; the API launches them within the
+# ADMISSION_*_CAP limits (see admission.py).
+echo "→ DynamoDB table: ${ADMISSION_TABLE}"
+if aws dynamodb describe-table --table-name "$ADMISSION_TABLE" --region "$AWS_REGION" &>/dev/null; then
+  echo "  already exists"
+else
+  aws dynamodb create-table \
+    --table-name "$ADMISSION_TABLE" \
+    --attribute-definitions \
+      AttributeName=kind,AttributeType=S \
+      AttributeName=sk,AttributeType=S \
+    --key-schema \
+      AttributeName=kind,KeyType=HASH \
+      AttributeName=sk,KeyType=RANGE \
+    --billing-mode PAY_PER_REQUEST \
+    --region "$AWS_REGION" \
+    --output text >/dev/null
+  echo "  created (PAY_PER_REQUEST)"
+fi
+
 # ── 5. Lambda integration (HTTP handler) ────────────────────────
 echo "→ Lambda integration"
 LAMBDA_ARN="arn:aws:lambda:${AWS_REGION}:${AWS_ACCOUNT_ID}:function:${LAMBDA_FUNCTION}"
@@ -152,8 +256,11 @@ create_route "POST /vision/extract"       "true"
 create_route "GET /vision/jobs/{job_id}"  "true"
 # API routes (dashboard + review)
 create_route "GET /api/jobs"                          "true"
+create_route "GET /api/jobs/{job_id}"                 "true"
 create_route "GET /api/jobs/{job_id}/status"          "true"
 create_route "GET /api/jobs/{job_id}/manifest"        "true"
+create_route "GET /api/jobs/{job_id}/bundle"          "true"
+create_route "POST /api/jobs/{job_id}/urls"           "true"
 create_route "GET /api/jobs/{job_id}/pages/{filename}" "true"
 create_route "GET /api/jobs/{job_id}/crops/{filename}" "true"
 create_route "GET /api/jobs/{job_id}/xlsx"             "true"
@@ -163,6 +270,41 @@ create_route "POST /api/jobs/{job_id}/submit"         "true"
 create_route "POST /api/jobs/{job_id}/rerun"          "true"
 create_route "DELETE /api/jobs/{job_id}"              "true"
 
+# Warm Low worker pool queue (used when WORKER_POOL_SIZE > 0). The visibility
+# timeout outlasts a job (CODEX_TIMEOUT + uploads), so a message only
+# reappears this late if its worker died; a worker stopped by ECS releases
+# its message at once.
+echo "→ SQS queue: ${WORKER_QUEUE_NAME}"
+aws sqs create-queue \
+  --queue-name "$WORKER_QUEUE_NAME" \
+  --attributes VisibilityTimeout=1200,ReceiveMessageWaitTimeSeconds=20,MessageRetentionPeriod=86400 \
+  --region "$AWS_REGION" \
+  --output text >/dev/null
+echo "  ok"
+
+# Admission tick: queued jobs are admitted when clients poll /status, and
+# once a minute regardless. Lambda Web Adapter posts the event to /events.
+echo "→ EventBridge rule: formidable-admission-tick"
+RULE_ARN=$(aws events put-rule \
+  --name formidable-admission-tick \
+  --schedule-expression "rate(1 minute)" \
+  --region "$AWS_REGION" \
+  --query RuleArn --output text)
+aws lambda add-permission \
+  --function-name "$LAMBDA_FUNCTION" \
+  --statement-id formidable-admission-tick \
+  --action lambda:InvokeFunction \
+  --principal events.amazonaws.com \
+  --source-arn "$RULE_ARN" \
+  --region "$AWS_REGION" \
+  --output text &>/dev/null || true
+aws events put-targets \
+  --rule formidable-admission-tick \
+  --targets "Id=formidable-api,Arn=${LAMBDA_ARN}" \
+  --region "$AWS_REGION" \
+  --output text >/dev/null
+echo "  ok"
+
 # ── 7. Stage (prod, shared, should already exist) ────────────────
 echo "→ Stage: prod"
 STAGE_EXISTS=$(aws apigatewayv2 get-stages --api-id "$APIGW_ID" --region "$AWS_REGION" \
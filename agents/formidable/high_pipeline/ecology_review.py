@@ -12,13 +12,13 @@ import re
 import statistics
 import sys
 import urllib.parse
-import urllib.request
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
 HERE = Path(__file__).parent
 sys.path.insert(0, str(HERE))
 import canonical  # noqa: E402
+import http_pool  # noqa: E402
 
 GBIF_MATCH = "https://api.gbif.org/v1/species/match"
 GBIF_OCCURRENCE = "https://api.gbif.org/v1/occurrence/search"
@@ -43,9 +43,8 @@ class GBIFClient:
         path = self.cache / f"{key}.json"
         if path.exists():
             return json.loads(path.read_text()), full_url
-        request = urllib.request.Request(full_url, headers={"User-Agent": "Formidable-ecology-review/1"})
-        with urllib.request.urlopen(request, timeout=30) as response:
-            result = json.load(response)
+        result = http_pool.shared().get_json(
+            full_url, {"User-Agent": "Formidable-ecology-review/1"}, timeout=30)
         path.write_text(json.dumps(result, indent=2))
         return result, full_url
 
@@ -0,0 +1,260 @@
+"""Pooled keep-alive HTTP client for provider and GBIF calls.
+
+Every urllib.request.urlopen call opened a new TCP connection and TLS
+handshake. HttpPool keeps idle HTTP/1.1 connections per (scheme, host,
+port) and reuses them, with at most HTTP_MAX_PER_HOST requests in flight to
+one host (callers beyond that wait for a slot).
+
+Failures keep urllib's shape, so existing `except urllib.error.HTTPError`
+handling (e.code, e.read()) is unchanged:
+
+- 408, 409, 429 and 5xx are retried up to HTTP_ATTEMPTS times. The delay
+  honours Retry-After (seconds or HTTP date), else it backs off
+  exponentially with jitter, capped at HTTP_MAX_BACKOFF. The final
+  response is raised as HTTPError.
+- Connection failures are retried the same way, then raised as URLError.
+  A read timeout once the request was sent is raised as TimeoutError
+  without a retry: the provider may still be working, and billing, on it.
+- Idle connections the server has closed are dropped when checked out.
+  If a reused connection fails while the request is still being written,
+  nothing reached the server: it is replaced without counting an attempt.
+  Once the request was sent, a dropped connection is an ordinary failed
+  attempt, since the server may already have acted on it.
+
+  HTTP_MAX_PER_HOST     concurrent requests per host (default 8)
+  HTTP_CONNECT_TIMEOUT  seconds to connect (default 10); read timeouts are per call
+  HTTP_ATTEMPTS         tries per request, including the first (default 4)
+  HTTP_MAX_BACKOFF      longest wait between tries, in seconds (default 60)
+"""
+from __future__ import annotations
+
+import email.utils
+import http.client
+import io
+import json
+import os
+import random
+import select
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+
+HTTP_MAX_PER_HOST = int(os.environ.get("HTTP_MAX_PER_HOST", "8"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_ATTEMPTS = int(os.environ.get("HTTP_ATTEMPTS", "4"))
+HTTP_MAX_BACKOFF = float(os.environ.get("HTTP_MAX_BACKOFF", "60"))
+HTTP_BACKOFF = 1.0
+
+# A reused socket the server closed while it sat idle fails on first use.
+_STALE = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+
+
+class _ConnectFailed(Exception):
+    """Opening a connection failed (including a connect timeout): safe to retry."""
+
+
+def _dropped(connection: http.client.HTTPConnection) -> bool:
+    """An idle connection with something to read has been closed by the server."""
+    try:
+        return bool(select.select([connection.sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+def retryable_status(status: int) -> bool:
+    return status in (408, 409, 429) or status >= 500
+
+
+def retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Seconds to wait from a Retry-After header value, if it has one."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+class Response:
+    def __init__(self, url: str, status: int, reason: str, headers, body: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode())
+
+    def error(self) -> urllib.error.HTTPError:
+        return urllib.error.HTTPError(self.url, self.status, self.reason, self.headers,
+                                      io.BytesIO(self.body))
+
+
+class _Host:
+    def __init__(self, scheme: str, host: str, port: int | None, limit: int, context):
+        self.scheme, self.host, self.port = scheme, host, port
+        self.context = context
+        self.slots = threading.BoundedSemaphore(limit)
+        self.idle: list[http.client.HTTPConnection] = []
+        self.lock = threading.Lock()
+        self.opened = 0
+
+    def connect(self, timeout: float) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            connection = http.client.HTTPSConnection(self.host, self.port, timeout=timeout,
+                                                     context=self.context)
+        else:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        try:
+            connection.connect()
+        except OSError as error:
+            raise _ConnectFailed(error) from error
+        with self.lock:
+            self.opened += 1
+        return connection
+
+    def checkout(self) -> http.client.HTTPConnection | None:
+        with self.lock:
+            while self.idle:
+                connection = self.idle.pop()
+                if not _dropped(connection):
+                    return connection
+                connection.close()
+            return None
+
+    def checkin(self, connection: http.client.HTTPConnection) -> None:
+        with self.lock:
+            self.idle.append(connection)
+
+    def close(self) -> None:
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            connection.close()
+
+
+class HttpPool:
+    def __init__(self, *, max_per_host: int = HTTP_MAX_PER_HOST,
+                 connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+                 attempts: int = HTTP_ATTEMPTS, backoff: float = HTTP_BACKOFF,
+                 max_backoff: float = HTTP_MAX_BACKOFF, sleep=time.sleep):
+        self.max_per_host = max_per_host
+        self.connect_timeout = connect_timeout
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._sleep = sleep
+        self._context = ssl.create_default_context()
+        self._hosts: dict[tuple, _Host] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, parts) -> _Host:
+        key = (parts.scheme, parts.hostname, parts.port)
+        with self._lock:
+            host = self._hosts.get(key)
+            if host is None:
+                host = self._hosts[key] = _Host(parts.scheme, parts.hostname, parts.port,
+                                                self.max_per_host, self._context)
+            return host
+
+    def connections_opened(self, url: str) -> int:
+        return self._host(urllib.parse.urlsplit(url)).opened
+
+    def _delay(self, attempt: int, response: Response | None) -> float:
+        hinted = retry_after(response.headers.get("Retry-After")) if response else None
+        if hinted is None:
+            hinted = self.backoff * 2 ** (attempt - 1) * random.uniform(.5, 1)
+        return min(self.max_backoff, hinted)
+
+    def _send(self, host: _Host, url, method, target, body, headers, timeout) -> Response:
+        """One request on a pooled (or fresh) connection, under the host's slot."""
+        with host.slots:
+            connection = host.checkout()
+            while True:
+                reused = connection is not None
+                if connection is None:
+                    connection = host.connect(self.connect_timeout)
+                connection.sock.settimeout(timeout)
+                try:
+                    connection.request(method, target, body=body, headers=headers)
+                except _STALE:
+                    connection.close()
+                    if not reused:
+                        raise
+                    connection = None
+                    continue
+                except BaseException:
+                    connection.close()
+                    raise
+                try:
+                    response = connection.getresponse()
+                    data = response.read()
+                except BaseException:
+                    connection.close()
+                    raise
+                if response.will_close:
+                    connection.close()
+                else:
+                    host.checkin(connection)
+                return Response(url, response.status, response.reason, response.headers, data)
+
+    def request(self, method: str, url: str, *, body: bytes | None = None,
+                headers: dict | None = None, timeout: float = 600) -> Response:
+        """Send a request; returns a 2xx/3xx Response or raises HTTPError/URLError."""
+        parts = urllib.parse.urlsplit(url)
+        host = self._host(parts)
+        target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        headers = {"Connection": "keep-alive", **(headers or {})}
+        for attempt in range(1, self.attempts + 1):
+            response = None
+            try:
+                response = self._send(host, url, method, target, body, headers, timeout)
+            except _ConnectFailed as error:
+                if attempt == self.attempts:
+                    raise urllib.error.URLError(error.__cause__) from error.__cause__
+            except TimeoutError:
+                raise
+            except (OSError, http.client.HTTPException) as error:
+                if attempt == self.attempts:
+                    raise urllib.error.URLError(error) from error
+            else:
+                if response.status < 400:
+                    return response
+                if not retryable_status(response.status) or attempt == self.attempts:
+                    raise response.error()
+            self._sleep(self._delay(attempt, response))
+        raise AssertionError("unreachable")
+
+    def post_json(self, url: str, payload, headers: dict | None = None, *,
+                  timeout: float = 600):
+        return self.request("POST", url, body=json.dumps(payload).encode(), timeout=timeout,
+                            headers={"Content-Type": "application/json", **(headers or {})}).json()
+
+    def get_json(self, url: str, headers: dict | None = None, *, timeout: float = 30):
+        return self.request("GET", url, headers=headers, timeout=timeout).json()
+
+    def close(self) -> None:
+        with self._lock:
+            hosts = list(self._hosts.values())
+        for host in hosts:
+            host.close()
+
+
+_shared: HttpPool | None = None
+_shared_lock = threading.Lock()
+
+
+def shared() -> HttpPool:
+    """The process-wide pool every provider function goes through."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HttpPool()
+        return _shared
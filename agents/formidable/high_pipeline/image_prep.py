@@ -0,0 +1,186 @@
+"""Per-provider image encoding between rendering and provider calls.
+
+Renders are lossless PNGs of up to 1568 px on the long edge, and a 10x
+declared crop of a phone scan is often 1-3 MB. Base64 makes that a third
+larger again, sent once per reader per model. prepare() re-encodes each
+image for the provider that will read it:
+
+- format and quality per provider (JPEG q90 by default)
+- downscaled to the provider's effective resolution. OpenAI models fit
+  2048 px and then scale the short side to 768 px server-side, so more
+  pixels only cost upload time.
+- converted to grayscale only when the image carries no colour. A red
+  correction or a blue tick keeps its colour.
+
+Encoded files land next to the source in encoded/ and are reused while
+newer than the source. Concurrent readers of one crop share a single
+encode.
+
+  HIGH_IMAGE_ENCODING  png (default: send renders unchanged) | auto
+
+estimate_tokens() applies each provider's published image-token rule. It is
+used for offline reports; measured counts come from provider usage
+(wide_bench.py encoding).
+"""
+from __future__ import annotations
+
+import io
+import math
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Off until measured png-vs-auto runs (wide_bench.py encoding) show no
+# accuracy loss.
+IMAGE_ENCODING = os.environ.get("HIGH_IMAGE_ENCODING", "png")
+
+# A pixel whose channels differ by more than COLOUR_SPREAD is ink colour, not
+# scanner noise; COLOUR_PIXELS of them (a short red tick at render size)
+# keep the image in colour. Counted at full size: thumbnails dilute thin strokes.
+COLOUR_SPREAD = 48
+COLOUR_PIXELS = 32
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    format: str           # png | jpeg | webp
+    quality: int
+    max_long: int         # longest edge the provider keeps
+    max_short: int        # shortest edge the provider keeps
+    grayscale: bool = True
+
+
+PROFILES = {
+    "png": Profile("png", "png", 0, 1 << 16, 1 << 16, grayscale=False),
+    "gemini": Profile("gemini", "jpeg", 90, 3072, 3072),
+    "openai": Profile("openai", "jpeg", 90, 2048, 768),
+    "claude": Profile("claude", "jpeg", 90, 1568, 1568),
+}
+MIME = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+SUFFIX = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+
+
+@dataclass(frozen=True)
+class Prepared:
+    path: Path
+    mime: str
+    bytes: int
+    source_bytes: int
+    width: int
+    height: int
+    grayscale: bool
+
+
+def reader_profile(model_spec: str) -> Profile:
+    """The profile whose server-side scaling applies to this model."""
+    provider, _, model = model_spec.partition(":") if ":" in model_spec else ("", "", model_spec)
+    if provider == "codex":
+        return PROFILES["openai"]
+    if provider == "claude":
+        return PROFILES["claude"]
+    if provider == "openrouter":
+        vendor = model.split("/", 1)[0]
+        return PROFILES[{"anthropic": "claude", "google": "gemini"}.get(vendor, "openai")]
+    if provider == "local":
+        return PROFILES["png"]
+    return PROFILES["gemini"]
+
+
+def profile_for(model_spec: str, encoding: str | None = None) -> Profile:
+    if (encoding or IMAGE_ENCODING) == "png":
+        return PROFILES["png"]
+    return reader_profile(model_spec)
+
+
+def fit(width: int, height: int, profile: Profile) -> tuple[int, int]:
+    scale = min(1.0, profile.max_long / max(width, height),
+                profile.max_short / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def estimate_tokens(model_spec: str, width: int, height: int) -> int:
+    """Input tokens the model bills for one image of this size."""
+    profile = reader_profile(model_spec)
+    if profile.name == "png":
+        return 0
+    width, height = fit(width, height, profile)
+    if profile.name == "openai":
+        return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+    if profile.name == "claude":
+        return math.ceil(width * height / 750)
+    if width <= 384 and height <= 384:
+        return 258
+    return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+
+
+def achromatic(image: Image.Image) -> bool:
+    """True if dropping colour loses nothing a reader could use."""
+    if image.mode in ("1", "L", "LA", "I", "F"):
+        return True
+    pixels = np.asarray(image.convert("RGB"), dtype=np.int16)
+    spread = pixels.max(axis=2) - pixels.min(axis=2)
+    return int((spread > COLOUR_SPREAD).sum()) < COLOUR_PIXELS
+
+
+def encode(image: Image.Image, profile: Profile) -> bytes:
+    size = fit(image.width, image.height, profile)
+    if size != image.size:
+        image = image.resize(size, Image.LANCZOS)
+    grayscale = profile.grayscale and achromatic(image)
+    image = image.convert("L" if grayscale else "RGB")
+    buffer = io.BytesIO()
+    if profile.format == "png":
+        image.save(buffer, "PNG", optimize=True)
+    else:
+        image.save(buffer, profile.format.upper(), quality=profile.quality)
+    return buffer.getvalue()
+
+
+_locks: dict[Path, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def prepare(source, profile: Profile) -> Prepared:
+    """Encode one rendered image for a profile, at most once per source version."""
+    source = Path(source)
+    source_bytes = source.stat().st_size
+    if profile.name == "png":
+        with Image.open(source) as image:
+            return Prepared(source, MIME["png"], source_bytes, source_bytes,
+                            image.width, image.height, image.mode == "L")
+    target = source.parent / "encoded" / f"{source.stem}.{profile.name}{SUFFIX[profile.format]}"
+    with _locks_guard:
+        lock = _locks.setdefault(target, threading.Lock())
+    with lock:
+        if not (target.exists() and target.stat().st_mtime_ns >= source.stat().st_mtime_ns):
+            with Image.open(source) as image:
+                data = encode(image, profile)
+            target.parent.mkdir(exist_ok=True)
+            partial = target.with_suffix(".part")
+            partial.write_bytes(data)
+            partial.replace(target)
+        with Image.open(target) as image:
+            return Prepared(target, MIME[profile.format], target.stat().st_size, source_bytes,
+                            image.width, image.height, image.mode == "L")
+
+
+def prepare_all(images: list[Path], model_spec: str,
+                encoding: str | None = None) -> list[Prepared]:
+    profile = profile_for(model_spec, encoding)
+    return [prepare(image, profile) for image in images]
+
+
+def summary(prepared: list[Prepared], model_spec: str, encoding: str | None = None) -> dict:
+    """Per-call image stats recorded in provider call metadata."""
+    return {
+        "image_encoding": profile_for(model_spec, encoding).name,
+        "image_bytes": sum(item.bytes for item in prepared),
+        "image_source_bytes": sum(item.source_bytes for item in prepared),
+        "image_tokens_est": sum(estimate_tokens(model_spec, item.width, item.height)
+                                for item in prepared),
+    }
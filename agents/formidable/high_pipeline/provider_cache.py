@@ -0,0 +1,198 @@
+"""Content-addressed cache of provider_json responses.
+
+A provider call is fully determined by (model_spec, prompt, schema, image
+bytes, thinking level), so its response is stored under the SHA-256 of
+exactly that. A changed prompt or re-rendered crop is a different key, never
+stale JSON. The same form rerun in a new job hits, whatever its page number
+or tag.
+
+  PROVIDER_CACHE            off (default) | /local/dir | s3://bucket/prefix
+  PROVIDER_CACHE_MAX_BYTES  eviction bound (default 512 MiB on disk, 5 GiB in S3)
+
+Eviction removes the least recently used entries (disk: atime-like mtime
+refreshed on every hit) or the oldest written ones (S3, by LastModified)
+until the cache is under the bound. Disk prunes as it writes; S3 prunes
+once per run since it has to list the prefix.
+
+Cache failures never fail a provider call; they count as misses.
+
+ProviderCache.keys holds every key a run wrote. The high worker stores the
+matching object keys with the job (provider_cache_keys.json), and DELETE
+/api/jobs/{id} removes those entries. Hits are not recorded: an entry another
+job wrote stays until that job is deleted or the entry is evicted. A job
+whose worker died before publishing leaves its entries to eviction.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+DISK_MAX_BYTES = 512 * 1024 * 1024
+S3_MAX_BYTES = 5 * 1024 * 1024 * 1024
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def cache_key(model_spec: str, prompt: str, schema: dict, images: list[Path],
+              thinking: str) -> str:
+    return _sha256(json.dumps({
+        "model": model_spec,
+        "prompt": _sha256(prompt.encode()),
+        "schema": _sha256(json.dumps(schema, sort_keys=True).encode()),
+        "images": [_sha256(Path(image).read_bytes()) for image in images],
+        "thinking": thinking,
+    }, sort_keys=True).encode())
+
+
+class DiskCache:
+    name = "disk"
+
+    def __init__(self, root, max_bytes: int = DISK_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._sizes = {path.stem: path.stat().st_size
+                       for path in self.root.glob("*/*.json")} if self.root.exists() else {}
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(f".{threading.get_ident()}.part")
+        partial.write_bytes(data)
+        partial.replace(path)
+        with self._lock:
+            self._sizes[key] = len(data)
+        if sum(self._sizes.values()) > self.max_bytes:
+            self.prune()
+
+    def prune(self) -> None:
+        with self._lock:
+            total = sum(self._sizes.values())
+            if total <= self.max_bytes:
+                return
+            entries = []
+            for key in self._sizes:
+                try:
+                    entries.append((self._path(key).stat().st_mtime, key))
+                except FileNotFoundError:
+                    entries.append((0, key))
+            for _, key in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._path(key).unlink(missing_ok=True)
+                total -= self._sizes.pop(key)
+                self.evictions += 1
+
+
+class S3Cache:
+    name = "s3"
+
+    def __init__(self, client, bucket: str, prefix: str, max_bytes: int = S3_MAX_BYTES):
+        self.s3 = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/"
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+    def object_key(self, key: str) -> str:
+        return self.prefix + key + ".json"
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            return self.s3.get_object(Bucket=self.bucket, Key=self.object_key(key))["Body"].read()
+        except self.s3.exceptions.NoSuchKey:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        self.s3.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=data,
+                           ContentType="application/json")
+
+    def prune(self) -> None:
+        objects = []
+        for listing in self.s3.get_paginator("list_objects_v2").paginate(
+                Bucket=self.bucket, Prefix=self.prefix):
+            objects.extend(listing.get("Contents") or [])
+        total = sum(item["Size"] for item in objects)
+        doomed = []
+        for item in sorted(objects, key=lambda item: item["LastModified"]):
+            if total <= self.max_bytes:
+                break
+            doomed.append({"Key": item["Key"]})
+            total -= item["Size"]
+        for start in range(0, len(doomed), 1000):
+            self.s3.delete_objects(Bucket=self.bucket,
+                                   Delete={"Objects": doomed[start:start + 1000], "Quiet": True})
+        self.evictions += len(doomed)
+
+
+class ProviderCache:
+    """get/put (raw, meta) responses over a backend, swallowing its errors."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.errors = 0
+        self.keys: set[str] = set()
+
+    def get(self, key: str) -> tuple[dict, dict] | None:
+        try:
+            data = self.backend.get(key)
+        except Exception as error:
+            self._warn("read", error)
+            return None
+        if data is None:
+            return None
+        try:
+            entry = json.loads(data)
+            return entry["raw"], entry["meta"]
+        except (ValueError, KeyError, TypeError) as error:
+            self._warn("decode", error)
+            return None
+
+    def put(self, key: str, raw: dict, meta: dict) -> None:
+        try:
+            self.backend.put(key, json.dumps({"raw": raw, "meta": meta}).encode())
+            self.keys.add(key)
+        except Exception as error:
+            self._warn("write", error)
+
+    def prune(self) -> None:
+        try:
+            self.backend.prune()
+        except Exception as error:
+            self._warn("prune", error)
+
+    def _warn(self, action: str, error: Exception) -> None:
+        self.errors += 1
+        print(f"provider cache {action} failed: {error}", file=sys.stderr, flush=True)
+
+
+def from_env(spec: str | None = None, max_bytes: str | None = None) -> ProviderCache | None:
+    spec = os.environ.get("PROVIDER_CACHE", "off") if spec is None else spec
+    max_bytes = os.environ.get("PROVIDER_CACHE_MAX_BYTES") if max_bytes is None else max_bytes
+    if not spec or spec == "off":
+        return None
+    if spec.startswith("s3://"):
+        import boto3
+        bucket, _, prefix = spec[len("s3://"):].partition("/")
+        return ProviderCache(S3Cache(boto3.client("s3"), bucket, prefix or "provider-cache",
+                                     int(max_bytes or S3_MAX_BYTES)))
+    return ProviderCache(DiskCache(Path(spec).expanduser(), int(max_bytes or DISK_MAX_BYTES)))
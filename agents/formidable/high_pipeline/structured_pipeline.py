@@ -10,6 +10,7 @@ import re
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import urllib.error
 from pathlib import Path
@@ -21,9 +22,29 @@ from PIL import Image, ImageFilter
 HERE = Path(__file__).parent
 sys.path.insert(0, str(HERE))
 import canonical  # noqa: E402
+import image_prep  # noqa: E402
+import provider_cache  # noqa: E402
 import wide_bench  # noqa: E402
 
 
+# Pages run concurrently (structure call, crop rendering, readers), bounded by
+# HIGH_PAGE_CONCURRENCY. Every provider call also takes a slot for its
+# provider, so six pages × two readers never put more than the configured
+# number of calls in flight against one API or codex login:
+#   HIGH_PROVIDER_CONCURRENCY="codex=4,claude=4,gemini=8,openrouter=8"
+PAGE_CONCURRENCY = int(os.environ.get("HIGH_PAGE_CONCURRENCY", "3"))
+PROVIDER_CONCURRENCY = {"codex": 4, "claude": 4, "gemini": 8, "openrouter": 8}
+PROVIDER_CONCURRENCY.update(
+    (name.strip(), int(limit)) for name, _, limit in
+    (item.partition("=") for item in
+     os.environ.get("HIGH_PROVIDER_CONCURRENCY", "").split(",") if "=" in item))
+_provider_slots = {name: threading.BoundedSemaphore(max(1, limit))
+                   for name, limit in PROVIDER_CONCURRENCY.items()}
+
+# Content-addressed provider_json responses (PROVIDER_CACHE; off by default).
+CACHE = provider_cache.from_env()
+
+
 STRUCTURE_SCHEMA = {
     "type": "object",
     "properties": {
@@ -193,18 +214,14 @@ def render_page_inputs(form_dir: Path, page: int) -> tuple[Path, list[Path]]:
     pdf = form_dir / "input.pdf"
     overview = output / f"page_{page}_overview.png"
     if not overview.exists():
-        subprocess.run([sys.executable, str(wide_bench.RENDER), str(pdf), "--page", str(page),
-                        "--zoom", "3", "--out", str(overview)], check=True, capture_output=True)
+        wide_bench.render(pdf, overview, page, zoom=3)
     tiles = []
     regions = [(0, 0, .56, .56), (.44, 0, 1, .56),
                (0, .44, .56, 1), (.44, .44, 1, 1)]
     for index, region in enumerate(regions):
         path = output / f"page_{page}_q{index}.png"
         if not path.exists():
-            box = ",".join(str(value) for value in region)
-            subprocess.run([sys.executable, str(wide_bench.RENDER), str(pdf), "--page", str(page),
-                            "--bbox", box, "--zoom", "8", "--out", str(path)],
-                           check=True, capture_output=True)
+            wide_bench.render(pdf, path, page, bbox=region, zoom=8)
         tiles.append(path)
     return overview, tiles
 
@@ -271,11 +288,7 @@ def render_declared_crops(form_dir: Path, page: int, structure: dict,
         return box
 
     def render(box, destination):
-        subprocess.run([
-            sys.executable, str(wide_bench.RENDER), str(form_dir / "input.pdf"),
-            "--page", str(page), "--bbox", ",".join(str(value) for value in box),
-            "--zoom", "10", "--out", str(destination),
-        ], check=True, capture_output=True)
+        wide_bench.render(form_dir / "input.pdf", destination, page, bbox=box, zoom=10)
 
     paths = []
     for index, (kind, raw_box) in enumerate(regions[:limit]):
@@ -312,7 +325,8 @@ def gemini_json(model: str, prompt: str, images: list[Path], schema: dict,
                 *, thinking: str = "minimal") -> tuple[dict, dict]:
     parts = [{"text": prompt}]
     for image in images:
-        parts.append({"inline_data": {"mime_type": "image/png", "data": wide_bench._b64(image)}})
+        parts.append({"inline_data": {"mime_type": wide_bench._mime(image),
+                                      "data": wide_bench._b64(image)}})
     generation = {
         "temperature": 0,
         "thinkingConfig": {"thinkingLevel": thinking},
@@ -323,7 +337,7 @@ def gemini_json(model: str, prompt: str, images: list[Path], schema: dict,
     payload = {"contents": [{"role": "user", "parts": parts}],
                "generationConfig": generation}
     key = wide_bench._key("gemini")
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}"
+    url = f"{wide_bench.GEMINI_API}/models/{model}:generateContent?key={key}"
     t0 = time.time()
     try:
         response = wide_bench._post(url, payload, {}, timeout=900)
@@ -359,7 +373,7 @@ def openrouter_json(model: str, prompt: str, images: list[Path], schema: dict,
     content = [{"type": "text", "text": prompt}]
     for image in images:
         content.append({"type": "image_url", "image_url": {
-            "url": f"data:image/png;base64,{wide_bench._b64(image)}"}})
+            "url": f"data:{wide_bench._mime(image)};base64,{wide_bench._b64(image)}"}})
     payload = {
         "model": model,
         "temperature": 0,
@@ -377,13 +391,16 @@ def openrouter_json(model: str, prompt: str, images: list[Path], schema: dict,
                "HTTP-Referer": "https://fomoscribe.netlify.app",
                "X-Title": "Formidable high extraction"}
     started = time.time()
+    # The shared HTTP pool already retries 408/409/429/5xx (honouring
+    # Retry-After) and connection failures; this loop covers read timeouts
+    # and malformed structured output.
     retry_delays = (0, 2, 5, 10)
     for attempt, delay in enumerate(retry_delays, start=1):
         if delay:
             time.sleep(delay)
         try:
             response = wide_bench._post(
-                "https://openrouter.ai/api/v1/chat/completions", payload, headers, timeout=900)
+                f"{wide_bench.OPENROUTER_API}/chat/completions", payload, headers, timeout=900)
             message = response["choices"][0]["message"]["content"]
             if isinstance(message, list):
                 message = "".join(part.get("text", "") for part in message
@@ -391,16 +408,15 @@ def openrouter_json(model: str, prompt: str, images: list[Path], schema: dict,
             parsed = json.loads(message)
         except urllib.error.HTTPError as error:
             body = error.read()[:500]
-            retryable = error.code in {408, 409, 429} or error.code >= 500
-            if retryable and attempt < len(retry_delays):
-                continue
             raise RuntimeError(
                 f"OpenRouter {model} failed with HTTP {error.code}: {body!r}") from error
-        except (urllib.error.URLError, TimeoutError, ConnectionError) as error:
+        except urllib.error.URLError as error:
+            raise RuntimeError(f"OpenRouter {model} network failure: {error}") from error
+        except TimeoutError as error:
             if attempt < len(retry_delays):
                 continue
             raise RuntimeError(
-                f"OpenRouter {model} network failure after {attempt} attempts: {error}") from error
+                f"OpenRouter {model} timed out after {attempt} attempts: {error}") from error
         except (KeyError, IndexError, TypeError, json.JSONDecodeError) as error:
             if attempt < len(retry_delays):
                 continue
@@ -531,8 +547,37 @@ def claude_json(model: str, prompt: str, images: list[Path], schema: dict,
     }
 
 
+def provider_name(model_spec: str) -> str:
+    prefix = model_spec.split(":", 1)[0] if ":" in model_spec else ""
+    return prefix if prefix in ("openrouter", "codex", "claude") else "gemini"
+
+
 def provider_json(model_spec: str, prompt: str, images: list[Path], schema: dict,
                   *, thinking: str = "minimal") -> tuple[dict, dict]:
+    # Encode renders for this provider (once per image, shared by readers);
+    # the cache key covers the encoded bytes, so it follows the encoding.
+    prepared = image_prep.prepare_all(images, model_spec)
+    images = [item.path for item in prepared]
+    sent = image_prep.summary(prepared, model_spec)
+    cache = CACHE
+    if cache is not None:
+        key = provider_cache.cache_key(model_spec, prompt, schema, images, thinking)
+        hit = cache.get(key)
+        if hit is not None:
+            raw, meta = hit
+            return raw, {**meta, "cache": "hit", "cached_cost_usd": meta.get("cost_usd"),
+                         "cost_usd": 0, "latency_s": 0, "image_bytes": 0}
+    with _provider_slots[provider_name(model_spec)]:
+        raw, meta = _provider_json(model_spec, prompt, images, schema, thinking=thinking)
+    meta = {**meta, **sent}
+    if cache is not None:
+        cache.put(key, raw, meta)
+        meta = {**meta, "cache": "miss"}
+    return raw, meta
+
+
+def _provider_json(model_spec: str, prompt: str, images: list[Path], schema: dict,
+                   *, thinking: str = "minimal") -> tuple[dict, dict]:
     if model_spec.startswith("openrouter:"):
         return openrouter_json(model_spec.split(":", 1)[1], prompt, images, schema,
                                thinking=thinking)
@@ -657,29 +702,79 @@ def _read_structure(form_dir, output, page_number, schema_model, *, reuse=False)
     return overview, tiles, raw, meta
 
 
-def prepare_structures(form_dir: Path, schema_model: str, tag: str,
-                       page_numbers: list[int] | None = None, *, reuse=False) -> dict:
-    """Run/cache only the sector-agnostic page-structure stage for routing."""
-    output = form_dir / "canonical_outputs" / tag
-    output.mkdir(parents=True, exist_ok=True)
+def _cache_report(calls: list[dict]) -> dict | None:
+    """Hit/miss counts for this run's provider calls, after pruning the cache."""
+    cache = CACHE
+    if cache is None:
+        return None
+    cache.prune()
+    hits = [call for call in calls if call.get("cache") == "hit"]
+    return {
+        "backend": cache.backend.name,
+        "hits": len(hits),
+        "misses": sum(call.get("cache") == "miss" for call in calls),
+        "saved_usd": round(sum(call.get("cached_cost_usd") or 0 for call in hits), 5),
+        "evictions": cache.backend.evictions,
+        "errors": cache.errors,
+    }
+
+
+def _map_pages(work, page_numbers: list[int], *, concurrency: int | None = None,
+               progress_callback=None) -> list:
+    """work(page_number) for every page on a bounded executor.
+
+    Results come back in page_numbers order regardless of completion order;
+    progress_callback(completed, total) counts finished pages, so it only
+    ever increases. The first failure cancels pages that have not started.
+    """
+    workers = max(1, min(concurrency or PAGE_CONCURRENCY, len(page_numbers) or 1))
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="page")
+    try:
+        futures = {executor.submit(work, page_number): page_number
+                   for page_number in page_numbers}
+        for completed, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            future.result()
+            if progress_callback:
+                progress_callback(completed, len(page_numbers))
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _selected_pages(form_dir: Path, page_numbers: list[int] | None) -> tuple[int, list[int]]:
     page_count = fitz.open(form_dir / "input.pdf").page_count
     selected_pages = page_numbers or list(range(1, page_count + 1))
-    calls = []
     for page_number in selected_pages:
         if not 1 <= page_number <= page_count:
             raise ValueError(f"page {page_number} outside 1..{page_count}")
+    return page_count, selected_pages
+
+
+def prepare_structures(form_dir: Path, schema_model: str, tag: str,
+                       page_numbers: list[int] | None = None, *, reuse=False,
+                       page_concurrency: int | None = None) -> dict:
+    """Run/cache only the sector-agnostic page-structure stage for routing."""
+    output = form_dir / "canonical_outputs" / tag
+    output.mkdir(parents=True, exist_ok=True)
+    page_count, selected_pages = _selected_pages(form_dir, page_numbers)
+
+    def structure_page(page_number):
         overview, _tiles, raw, meta = _read_structure(
             form_dir, output, page_number, schema_model, reuse=reuse)
         geometry = refine_structure_geometry(raw, overview)
-        calls.append({"stage": "structure", "page": page_number,
-                      "geometry_refinements": geometry, **meta})
         print(f"page {page_number}/{page_count}: structure has "
               f"{len(raw.get('tables') or [])} tables", flush=True)
+        return {"stage": "structure", "page": page_number,
+                "geometry_refinements": geometry, **meta}
+
+    calls = _map_pages(structure_page, selected_pages, concurrency=page_concurrency)
     report = {
         "form": form_dir.name, "tag": tag, "schema_model": schema_model,
         "pages": selected_pages, "calls": calls,
         "cost_usd": round(sum(call.get("cost_usd") or 0 for call in calls), 5),
         "latency_s": round(sum(call.get("latency_s") or 0 for call in calls), 1),
+        "provider_cache": _cache_report(calls),
     }
     (output / "structure_run.json").write_text(json.dumps(report, indent=2))
     return report
@@ -687,15 +782,24 @@ def prepare_structures(form_dir: Path, schema_model: str, tag: str,
 
 def run(form_dir: Path, schema_model: str, models: list[str], tag: str,
         page_numbers: list[int] | None = None, *, reuse_structure=False,
-        reuse_existing=False, progress_callback=None) -> dict:
+        reuse_existing=False, progress_callback=None,
+        page_concurrency: int | None = None) -> dict:
+    """Structure, crops and independent readings for every page, then resolve.
+
+    Pages are pipelined on a bounded executor (page_concurrency, default
+    HIGH_PAGE_CONCURRENCY) so one page's structure call overlaps another's
+    readers; provider calls are additionally capped per provider. Pages and
+    calls are assembled in page order, and readers attach in declared
+    primary/peer order, so the output does not depend on timing.
+    progress_callback(completed, total) reports finished pages.
+    """
     output = form_dir / "canonical_outputs" / tag
     output.mkdir(parents=True, exist_ok=True)
-    page_count = fitz.open(form_dir / "input.pdf").page_count
-    pages, calls = [], []
-    selected_pages = page_numbers or list(range(1, page_count + 1))
-    for page_number in selected_pages:
-        if not 1 <= page_number <= page_count:
-            raise ValueError(f"page {page_number} outside 1..{page_count}")
+    page_count, selected_pages = _selected_pages(form_dir, page_numbers)
+    started = time.time()
+
+    def read_page(page_number):
+        calls = []
         overview, tiles, raw_structure, meta = _read_structure(
             form_dir, output, page_number, schema_model,
             reuse=reuse_structure or reuse_existing)
@@ -731,11 +835,17 @@ def run(form_dir: Path, schema_model: str, models: list[str], tag: str,
         for model, (raw, meta) in zip(models, responses):
             calls.append({"stage": "extract", "page": page_number, **meta})
             canonical.attach_extraction(page, raw, model)
-        pages.append(page)
         print(f"page {page_number}/{page_count}: {len(page['tables'])} tables, "
               f"{sum(len(t['rows']) for t in page['tables'])} aligned rows", flush=True)
-        if progress_callback:
-            progress_callback(page_number, len(selected_pages))
+        return page, calls
+
+    pages, calls = [], []
+    for page, page_calls in _map_pages(read_page, selected_pages,
+                                       concurrency=page_concurrency,
+                                       progress_callback=progress_callback):
+        pages.append(page)
+        calls.extend(page_calls)
+    wall_s = round(time.time() - started, 1)
 
     document = canonical.new_document(str(form_dir / "input.pdf"), pages, models)
     canonical.resolve(document)
@@ -749,6 +859,10 @@ def run(form_dir: Path, schema_model: str, models: list[str], tag: str,
         "calls": calls,
         "cost_usd": round(sum(call.get("cost_usd") or 0 for call in calls), 5),
         "latency_s": round(sum(call.get("latency_s") or 0 for call in calls), 1),
+        "wall_s": wall_s,
+        "image_bytes": sum(call.get("image_bytes") or 0 for call in calls),
+        "image_source_bytes": sum(call.get("image_source_bytes") or 0 for call in calls),
+        "provider_cache": _cache_report(calls),
         "validation_errors": errors,
         "disagreement": stats,
     }
@@ -829,6 +943,8 @@ def main():
                         help="cache generic structure for routing; do not transcribe values")
     parser.add_argument("--reuse-structure", action="store_true",
                         help="reuse structure JSON+metadata cached by --structure-only")
+    parser.add_argument("--page-concurrency", type=int, default=None,
+                        help=f"pages in flight (default HIGH_PAGE_CONCURRENCY={PAGE_CONCURRENCY})")
     args = parser.parse_args()
     pages = [int(value) for value in args.pages.split(",") if value.strip()]
     form_dir = Path(args.form).resolve()
@@ -836,11 +952,13 @@ def main():
         result = rebuild(form_dir, args.tag)
     elif args.structure_only:
         result = prepare_structures(form_dir, args.schema_model, args.tag,
-                                    pages or None, reuse=args.reuse_structure)
+                                    pages or None, reuse=args.reuse_structure,
+                                    page_concurrency=args.page_concurrency)
     else:
         result = run(form_dir, args.schema_model,
                      [model.strip() for model in args.models.split(",") if model.strip()],
-                     args.tag, pages or None, reuse_structure=args.reuse_structure)
+                     args.tag, pages or None, reuse_structure=args.reuse_structure,
+                     page_concurrency=args.page_concurrency)
     print(json.dumps(result, indent=2))
 
 
@@ -22,8 +22,10 @@ Usage:
           --model gemini-2.5-flash --mode tiled
   python3 wide_bench.py run ... --provider local --endpoint http://localhost:8010/v1
   python3 wide_bench.py run ... --provider textract --model textract --mode oneshot
+  python3 wide_bench.py run ... --encoding auto      # per-provider image encoding
+  python3 wide_bench.py encoding --form forms/health__opd   # bytes/tokens/accuracy png vs auto
 """
-import argparse, base64, csv, io, json, os, sys, time, urllib.request, urllib.error
+import argparse, base64, csv, io, json, os, sys, time, urllib.error
 from pathlib import Path
 
 HERE   = Path(__file__).parent
@@ -32,7 +34,12 @@ GSHEP  = Path.home() / "src/github.com/bprashanth/good-shepherd/agents/formidabl
 RENDER = Path(os.environ.get("FORMIDABLE_RENDER_TOOL", GSHEP / "tools/render_page.py"))
 CFG    = Path.home() / ".config/formidable"
 
+GEMINI_API     = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+OPENROUTER_API = os.environ.get("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
+
 sys.path.insert(0, str(HERE))
+import http_pool                          # noqa: E402  (keep-alive, Retry-After)
+import image_prep                         # noqa: E402  (per-provider encoding)
 import wide_diff                          # noqa: E402  (recall + precision/F1)
 import openpyxl                           # noqa: E402
 
@@ -71,18 +78,48 @@ uncertain value than to omit it.
 
 
 # ── rendering (unchanged mechanics, form-dir aware) ───────────────
+_RENDERER = None
+
+
+def _renderer():
+    """tools/pdf_renderer.py next to RENDER, imported once (None if absent)."""
+    global _RENDERER
+    if _RENDERER is None:
+        tools = str(RENDER.parent)
+        if tools not in sys.path:
+            sys.path.insert(0, tools)
+        try:
+            import pdf_renderer
+            _RENDERER = pdf_renderer
+        except ImportError:
+            _RENDERER = False
+    return _RENDERER or None
+
+
+def render(pdf, dst, page, bbox=None, zoom=1.0):
+    """Render a page (or bbox fractions of it) to dst, in-process when the
+    renderer module is available, else through the render_page.py CLI."""
+    renderer = _renderer()
+    if renderer is not None:
+        renderer.render(pdf, dst, page=page, bbox=bbox, zoom=zoom)
+        return dst
+    import subprocess
+    cmd = [sys.executable, str(RENDER), str(pdf), "--out", str(dst),
+           "--page", str(page), "--zoom", str(zoom)]
+    if bbox:
+        cmd += ["--bbox", ",".join(str(v) for v in bbox)]
+    subprocess.run(cmd, check=True, capture_output=True)
+    return dst
+
+
 def render_pages(form_dir: Path):
-    import subprocess, fitz
+    import fitz
     pdf = form_dir / "input.pdf"
     pages_dir = form_dir / "pages"; pages_dir.mkdir(parents=True, exist_ok=True)
     n = fitz.open(str(pdf)).page_count
     out = []
     for p in range(1, n + 1):
-        dst = pages_dir / f"page_{p}.png"
-        subprocess.run([sys.executable, str(RENDER), str(pdf),
-                        "--out", str(dst), "--page", str(p), "--zoom", "3"],
-                       check=True, capture_output=True)
-        out.append(dst)
+        out.append(render(pdf, pages_dir / f"page_{p}.png", p, zoom=3))
     print(f"rendered {len(out)} pages -> {pages_dir}")
     return out
 
@@ -90,18 +127,15 @@ def render_pages(form_dir: Path):
 def render_tiles(form_dir: Path):
     """Top/bottom halves near the 1568px vision cap — the deterministic
     stand-in for codex's crop/zoom (see FINDINGS_treeplots.md)."""
-    import subprocess, fitz
+    import fitz
     pdf = form_dir / "input.pdf"
     tiles_dir = form_dir / "tiles"; tiles_dir.mkdir(parents=True, exist_ok=True)
     n = fitz.open(str(pdf)).page_count
     out = []
     for p in range(1, n + 1):
         for half, (y0, y1) in enumerate([(0.0, 0.55), (0.45, 1.0)]):
-            dst = tiles_dir / f"page_{p}_h{half}.png"
-            subprocess.run([sys.executable, str(RENDER), str(pdf), "--out", str(dst),
-                            "--page", str(p), "--bbox", f"0,{y0},1,{y1}", "--zoom", "6"],
-                           check=True, capture_output=True)
-            out.append(dst)
+            out.append(render(pdf, tiles_dir / f"page_{p}_h{half}.png", p,
+                              bbox=(0, y0, 1, y1), zoom=6))
     print(f"rendered {len(out)} tiles -> {tiles_dir}")
     return out
 
@@ -115,6 +149,19 @@ def _b64(path):
     return base64.b64encode(Path(path).read_bytes()).decode()
 
 
+def _mime(path):
+    return {".jpg": "image/jpeg", ".jpeg": "image/jpeg",
+            ".webp": "image/webp"}.get(Path(path).suffix.lower(), "image/png")
+
+
+# --encoding: png sends renders as-is; auto re-encodes per provider
+# (image_prep.py). Senders report the bytes they actually uploaded.
+ENCODING = "png"
+def _encoded(pages, spec):
+    prepared = image_prep.prepare_all(pages, spec, ENCODING)
+    return prepared, image_prep.summary(prepared, spec, ENCODING)
+
+
 # ── output parsing -> xlsx (unchanged) ────────────────────────────
 def text_to_xlsx(text, dst):
     wb = openpyxl.Workbook(); wb.remove(wb.active)
@@ -139,18 +186,17 @@ def text_to_xlsx(text, dst):
 
 # ── HTTP helper ───────────────────────────────────────────────────
 def _post(url, payload, headers, timeout=600):
-    req = urllib.request.Request(url, data=json.dumps(payload).encode(),
-                                 headers={"Content-Type": "application/json", **headers})
-    with urllib.request.urlopen(req, timeout=timeout) as r:
-        return json.loads(r.read().decode())
+    """POST JSON over the shared keep-alive pool (retries 429/5xx itself)."""
+    return http_pool.shared().post_json(url, payload, headers, timeout=timeout)
 
 
 # ── providers ─────────────────────────────────────────────────────
 def gemini_oneshot(model, pages, endpoint=None):
     key = _key("gemini")
     parts = [{"text": TRANSCRIBE_PROMPT}]
-    for p in pages:
-        parts.append({"inline_data": {"mime_type": "image/png", "data": _b64(p)}})
+    prepared, images = _encoded(pages, model)
+    for p in prepared:
+        parts.append({"inline_data": {"mime_type": p.mime, "data": _b64(p.path)}})
     # Reasoning off. The knob differs by generation and getting it wrong is
     # expensive: 2.5 takes `thinkingBudget: 0`; 3.5/3.6 REJECT that and need
     # `thinkingLevel: "minimal"`. `includeThoughts: false` only hides thinking
@@ -162,7 +208,7 @@ def gemini_oneshot(model, pages, endpoint=None):
                              if model.startswith(("gemini-3", "gemini-4"))
                              else {"thinkingBudget": 0})
     payload = {"contents": [{"role": "user", "parts": parts}], "generationConfig": gen}
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}"
+    url = f"{GEMINI_API}/models/{model}:generateContent?key={key}"
     t0 = time.time()
     try:
         resp = _post(url, payload, {})
@@ -177,15 +223,16 @@ def gemini_oneshot(model, pages, endpoint=None):
                    for part in resp["candidates"][0]["content"]["parts"])
     um = resp.get("usageMetadata", {})
     return text, {"in_tok": um.get("promptTokenCount"), "out_tok": um.get("candidatesTokenCount"),
-                  "cost_usd": _gemini_cost(model, um), "latency_s": round(dt, 1)}
+                  "cost_usd": _gemini_cost(model, um), "latency_s": round(dt, 1), **images}
 
 
 def openrouter_oneshot(model, pages, endpoint=None):
     key = _key("openrouter")
     content = [{"type": "text", "text": TRANSCRIBE_PROMPT}]
-    for p in pages:
+    prepared, images = _encoded(pages, f"openrouter:{model}")
+    for p in prepared:
         content.append({"type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{_b64(p)}"}})
+                        "image_url": {"url": f"data:{p.mime};base64,{_b64(p.path)}"}})
     payload = {"model": model, "temperature": 0,
                "messages": [{"role": "user", "content": content}],
                "reasoning": {"enabled": False}, "usage": {"include": True}}
@@ -193,11 +240,11 @@ def openrouter_oneshot(model, pages, endpoint=None):
             "HTTP-Referer": "https://formidable.local", "X-Title": "formidable-eval"}
     t0 = time.time()
     try:
-        resp = _post("https://openrouter.ai/api/v1/chat/completions", payload, hdrs)
+        resp = _post(f"{OPENROUTER_API}/chat/completions", payload, hdrs)
     except urllib.error.HTTPError as e:
         if e.code == 400 and b"easoning" in e.read():
             payload.pop("reasoning", None)
-            resp = _post("https://openrouter.ai/api/v1/chat/completions", payload, hdrs)
+            resp = _post(f"{OPENROUTER_API}/chat/completions", payload, hdrs)
         else:
             raise
     dt = time.time() - t0
@@ -207,15 +254,16 @@ def openrouter_oneshot(model, pages, endpoint=None):
     if cost is None:
         cost = _openrouter_cost(resp.get("id"), key)
     return text, {"in_tok": usage.get("prompt_tokens"), "out_tok": usage.get("completion_tokens"),
-                  "cost_usd": cost, "latency_s": round(dt, 1)}
+                  "cost_usd": cost, "latency_s": round(dt, 1), **images}
 
 
 def local_oneshot(model, pages, endpoint="http://localhost:8010/v1"):
     """OpenAI-compatible local endpoint (vLLM / llama.cpp / Ollama). $0/form."""
     content = [{"type": "text", "text": TRANSCRIBE_PROMPT}]
-    for p in pages:
+    prepared, images = _encoded(pages, f"local:{model}")
+    for p in prepared:
         content.append({"type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{_b64(p)}"}})
+                        "image_url": {"url": f"data:{p.mime};base64,{_b64(p.path)}"}})
     # A LoRA-tuned small model reads well but can fail to emit EOS and run off
     # into arithmetic progressions ("37.7,6.4 / 37.8,6.4 / ..."), which destroys
     # precision while leaving recall high. Penalise repetition and cap length.
@@ -229,7 +277,7 @@ def local_oneshot(model, pages, endpoint="http://localhost:8010/v1"):
     text = resp["choices"][0]["message"]["content"]
     usage = resp.get("usage", {})
     return text, {"in_tok": usage.get("prompt_tokens"), "out_tok": usage.get("completion_tokens"),
-                  "cost_usd": 0.0, "latency_s": round(dt, 1)}
+                  "cost_usd": 0.0, "latency_s": round(dt, 1), **images}
 
 
 # Textract: $0.015/page (tables). Detection-only pipeline — no LLM.
@@ -305,11 +353,9 @@ def _openrouter_cost(gen_id, key):
     if not gen_id: return None
     try:
         time.sleep(1)
-        req = urllib.request.Request(
-            f"https://openrouter.ai/api/v1/generation?id={gen_id}",
-            headers={"Authorization": f"Bearer {key}"})
-        with urllib.request.urlopen(req, timeout=30) as r:
-            return json.loads(r.read().decode())["data"].get("total_cost")
+        return http_pool.shared().get_json(
+            f"{OPENROUTER_API}/generation?id={gen_id}",
+            {"Authorization": f"Bearer {key}"}, timeout=30)["data"].get("total_cost")
     except Exception:
         return None
 
@@ -344,6 +390,7 @@ def _send_perpage(sender, model, form_dir, endpoint):
     # so every perpage prompt experiment silently ran the default prompt.
     saved, TRANSCRIBE_PROMPT = TRANSCRIBE_PROMPT, (PROMPT_OVERRIDE or PAGE_PROMPT)
     parts, cost, in_tok, out_tok, t0 = [], 0.0, 0, 0, time.time()
+    images = {}
     try:
         for p in pages:
             pt = [t for t in tiles if t.stem.startswith(f"page_{p}_")]
@@ -361,12 +408,16 @@ def _send_perpage(sender, model, form_dir, endpoint):
             cost += meta.get("cost_usd") or 0
             in_tok += meta.get("in_tok") or 0
             out_tok += meta.get("out_tok") or 0
+            if "image_bytes" in meta:
+                images["image_encoding"] = meta["image_encoding"]
+                for k in ("image_bytes", "image_source_bytes", "image_tokens_est"):
+                    images[k] = images.get(k, 0) + meta[k]
             parts.append(f"### PAGE {p}\n{text}")
     finally:
         TRANSCRIBE_PROMPT = saved
     return "\n".join(parts), {"in_tok": in_tok, "out_tok": out_tok,
                               "cost_usd": round(cost, 5),
-                              "latency_s": round(time.time() - t0, 1)}
+                              "latency_s": round(time.time() - t0, 1), **images}
 
 
 def run_one(form_dir: Path, provider, model, mode="tiled", endpoint=None):
@@ -380,6 +431,8 @@ def run_one(form_dir: Path, provider, model, mode="tiled", endpoint=None):
     assert images, f"run `render`/`tiles` first for {form_dir}"
     out_dir = form_dir / "outputs"; out_dir.mkdir(parents=True, exist_ok=True)
     tag = f"{provider}__{model.replace('/', '_')}__{mode}"
+    if ENCODING != "png":
+        tag += f"__{ENCODING}"
     try:
         if mode == "perpage":
             text, meta = _send_perpage(sender, model, form_dir, endpoint)
@@ -394,7 +447,7 @@ def run_one(form_dir: Path, provider, model, mode="tiled", endpoint=None):
     result = wide_diff.compare(str(form_dir / "golden.xlsx"), str(xlsx))
     m = result["metrics"]
     row = {"form": form_dir.name, "model": model, "provider": provider, "mode": mode,
-           "passed": result["passed"]}
+           "encoding": ENCODING, "passed": result["passed"]}
     # carry EVERY metric the scorer emits; a hard-coded list silently dropped
     # the code_*/all_* buckets when they were added and made v3 look broken
     row.update({k: v for k, v in m.items()
@@ -405,16 +458,59 @@ def run_one(form_dir: Path, provider, model, mode="tiled", endpoint=None):
     return row
 
 
+def encoding_report(form_dir: Path, mode="tiled"):
+    """Bytes/tokens per encoding for this form's images (offline), then the
+    measured bytes, input tokens and accuracy of every `run` that has both a
+    png and an --encoding auto output."""
+    images = _images(form_dir, "tiled" if mode == "perpage" else mode)
+    assert images, f"run `render`/`tiles` first for {form_dir}"
+    specs = ["gemini-3.5-flash", "codex:gpt-5.6-luna", "claude:sonnet"]
+    offline = []
+    for spec in specs:
+        for enc in ("png", "auto"):
+            offline.append({"model": spec, "encoding": enc,
+                            **image_prep.summary(image_prep.prepare_all(images, spec, enc),
+                                                 spec, enc)})
+    print(f"{'model':22} {'enc':5} {'bytes':>10} {'tokens~':>8}")
+    for r in offline:
+        print(f"{r['model']:22} {r['encoding']:5} {r['image_bytes']:>10} {r['image_tokens_est']:>8}")
+
+    out_dir = form_dir / "outputs"
+    pairs = []
+    for auto in sorted(out_dir.glob("*__auto.json")):
+        base = auto.with_name(auto.name.replace("__auto.json", ".json"))
+        if not base.exists():
+            continue
+        png, enc = json.loads(base.read_text()), json.loads(auto.read_text())
+        if "error" in png or "error" in enc:
+            continue
+        pairs.append({
+            "tag": base.stem,
+            "bytes": [png.get("image_bytes"), enc.get("image_bytes")],
+            "in_tok": [png.get("in_tok"), enc.get("in_tok")],
+            **{f"d_{k}": round((enc.get(k) or 0) - (png.get(k) or 0), 3)
+               for k in ("recall", "num_f1", "all_f1")},
+        })
+    for p in pairs:
+        print(json.dumps(p))
+    if not pairs:
+        print("no png/auto output pairs yet: `run` with and without --encoding auto")
+    return {"offline": offline, "pairs": pairs}
+
+
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
-    ap.add_argument("cmd", choices=["render", "tiles", "run"])
+    ap.add_argument("cmd", choices=["render", "tiles", "run", "encoding"])
     ap.add_argument("--form", required=True, help="form dir with input.pdf + golden.xlsx")
     ap.add_argument("--provider"); ap.add_argument("--model")
     ap.add_argument("--mode", default="tiled", choices=["oneshot", "tiled", "perpage"])
     ap.add_argument("--endpoint", default=None, help="base URL for --provider local")
     ap.add_argument("--prompt-file", default=None,
                     help="override TRANSCRIBE_PROMPT (e.g. OCR-specialist models)")
+    ap.add_argument("--encoding", default="png", choices=["png", "auto"],
+                    help="auto: per-provider JPEG/grayscale/downscale (image_prep.py)")
     a = ap.parse_args()
+    ENCODING = a.encoding
     if a.prompt_file:
         TRANSCRIBE_PROMPT = PROMPT_OVERRIDE = Path(a.prompt_file).read_text()
     form_dir = Path(a.form).resolve()
@@ -422,6 +518,8 @@ if __name__ == "__main__":
         render_pages(form_dir)
     elif a.cmd == "tiles":
         render_tiles(form_dir)
+    elif a.cmd == "encoding":
+        encoding_report(form_dir, a.mode)
     else:
         assert a.provider and a.model, "--provider and --model required for run"
         run_one(form_dir, a.provider, a.model, a.mode, a.endpoint)
@@ -8,12 +8,14 @@ import os
 import shutil
 import sys
 import tempfile
-from datetime import datetime, timezone
 from pathlib import Path
 
 import boto3
 from PIL import Image
 
+from artifact_upload import ArtifactUpload
+from progress_events import ProgressReporter, event_log_from_env
+
 AWS_REGION = os.environ.get("AWS_REGION", "ap-south-1")
 JOBS_BUCKET = os.environ.get("JOBS_BUCKET", "formidable-storage")
 S3_PREFIX = os.environ.get("S3_PREFIX", "formidable")
@@ -69,6 +71,14 @@ def _modules():
             review_manifest, structured_pipeline)
 
 
+def _provider_cache_keys() -> list[str]:
+    """S3 object keys of the provider-cache entries this run wrote."""
+    cache = _modules()[-1].CACHE
+    if cache is None or not hasattr(cache.backend, "object_key"):
+        return []
+    return sorted(cache.backend.object_key(key) for key in cache.keys)
+
+
 def _as_pdf(source: Path, destination: Path) -> None:
     if source.suffix.casefold() == ".pdf":
         shutil.copy2(source, destination)
@@ -77,10 +87,17 @@ def _as_pdf(source: Path, destination: Path) -> None:
         image.convert("RGB").save(destination, "PDF", resolution=200)
 
 
-def _write_progress(s3, job_id: str, step: str, pct: int) -> None:
-    value = {"step": step, "pct": pct, "ts": datetime.now(timezone.utc).isoformat()}
-    s3.put_object(Bucket=JOBS_BUCKET, Key=_job_key(job_id, "progress.json"),
-                  Body=json.dumps(value).encode(), ContentType="application/json")
+def _progress_reporter(s3, dynamo, job_id: str) -> ProgressReporter:
+    def put_snapshot(value: dict) -> None:
+        s3.put_object(Bucket=JOBS_BUCKET, Key=_job_key(job_id, "progress.json"),
+                      Body=json.dumps(value).encode(), ContentType="application/json")
+
+    try:
+        event_log = event_log_from_env(lambda: dynamo)
+    except Exception as error:
+        log.warning("progress event log unavailable: %s", error)
+        event_log = None
+    return ProgressReporter(job_id, event_log, put_snapshot)
 
 
 def _update_job(dynamo, user_id: str, job_id: str, expression: str, values: dict,
@@ -153,12 +170,11 @@ def _build_crops(document: dict, form_dir: Path, workdir: Path) -> dict:
 
 def _run_agentic_primary(input_pdf: Path, primary_dir: Path, *, on_page=None) -> Path:
     """Run the frozen low workflow inside high without changing the low task."""
-    from worker import _run_codex
+    from worker import _install_render_tool, _run_codex
 
     primary_dir.mkdir(parents=True, exist_ok=True)
     shutil.copy2(input_pdf, primary_dir / "input.pdf")
-    shutil.copy2(Path(__file__).parent / "tools" / "render_page.py",
-                 primary_dir / "render_page.py")
+    _install_render_tool(primary_dir)
     ok, message = _run_codex(primary_dir, "input.pdf", on_page=on_page)
     output = primary_dir / "output.xlsx"
     if not ok or not output.exists():
@@ -413,9 +429,12 @@ def main() -> int:
     filename = os.environ.get("FILENAME", "input.pdf")
     user_id = os.environ["USER_ID"]
     notification = os.environ.get("NOTIFICATION_EMAIL", "")
+    # Identical forms across jobs reuse provider responses (see provider_cache.py).
+    os.environ.setdefault("PROVIDER_CACHE", f"s3://{JOBS_BUCKET}/{S3_PREFIX}/provider-cache")
     s3 = boto3.client("s3", region_name=AWS_REGION)
     dynamo = boto3.client("dynamodb", region_name=AWS_REGION)
     suffix = Path(input_key).suffix or ".pdf"
+    progress = _progress_reporter(s3, dynamo, job_id)
 
     with tempfile.TemporaryDirectory(prefix="formidable-high-") as temporary:
         workdir = Path(temporary)
@@ -423,31 +442,41 @@ def main() -> int:
         try:
             _update_job(dynamo, user_id, job_id, "SET #st = :s",
                         {":s": {"S": "processing"}}, {"#st": "status"})
-            _write_progress(s3, job_id, "Starting high-effort dual-reader pipeline…", 3)
+            progress.report("Starting high-effort dual-reader pipeline…", 3)
             s3.download_file(JOBS_BUCKET, input_key, str(source))
             _bootstrap_codex_auth()
-            _write_progress(s3, job_id, "Running the proven primary transcription…", 8)
+            progress.report("Running the proven primary transcription…", 8)
             run = process(source, workdir,
                           ecology_online=os.environ.get("HIGH_ECOLOGY_ONLINE", "1") != "0",
-                          primary_progress=lambda page: _write_progress(
-                              s3, job_id,
+                          primary_progress=lambda page: progress.report(
                               f"Primary transcribed {page} page{'s' if page != 1 else ''}…",
                               min(28, 8 + 4 * page)),
-                          progress=lambda page, total: _write_progress(
-                              s3, job_id,
-                              f"Consensus peers read page {page} of {total}…",
-                              30 + round(54 * page / max(1, total))))
-            _write_progress(s3, job_id, "Publishing review and analytics evidence…", 92)
-
-            for name in ("output.xlsx", "crops_manifest.json", "canonical.json",
-                         "review_manifest.json", "ecology_review.json", "analytics.json", "run.json"):
-                s3.upload_file(str(workdir / name), JOBS_BUCKET, _job_key(job_id, name))
+                          progress=lambda done, total: progress.report(
+                              f"Consensus peers read {done} of {total} pages…",
+                              30 + round(54 * done / max(1, total))))
+            progress.report("Publishing review and analytics evidence…", 92)
+
+            upload = ArtifactUpload(s3, JOBS_BUCKET)
+            for name in ("output.xlsx", "canonical.json", "ecology_review.json",
+                         "analytics.json", "run.json"):
+                upload.add(workdir / name, _job_key(job_id, name))
             for path in (workdir / "pages").glob("page_*.png"):
-                s3.upload_file(str(path), JOBS_BUCKET, _job_key(job_id, f"pages/{path.name}"))
+                upload.add(path, _job_key(job_id, f"pages/{path.name}"))
             for path in (workdir / "crops").glob("crop_*.png"):
-                s3.upload_file(str(path), JOBS_BUCKET, _job_key(job_id, f"crops/{path.name}"))
+                upload.add(path, _job_key(job_id, f"crops/{path.name}"))
             for path in (workdir / "evidence").glob("*.json"):
-                s3.upload_file(str(path), JOBS_BUCKET, _job_key(job_id, f"evidence/{path.name}"))
+                upload.add(path, _job_key(job_id, f"evidence/{path.name}"))
+            cached = _provider_cache_keys()
+            if cached:
+                # Lets DELETE /api/jobs/{id} remove this job's cached transcriptions.
+                (workdir / "provider_cache_keys.json").write_text(json.dumps(cached))
+                upload.add(workdir / "provider_cache_keys.json",
+                           _job_key(job_id, "provider_cache_keys.json"))
+            # Manifests last, so a reader never sees one naming a missing file.
+            for name in ("review_manifest.json", "crops_manifest.json"):
+                upload.add_last(workdir / name, _job_key(job_id, name))
+            # Raises UploadFailed before the manifests (and "complete") on failure.
+            upload.publish()
 
             manifest = json.loads((workdir / "crops_manifest.json").read_text())
             pages = len(manifest["pages"])
@@ -458,7 +487,7 @@ def main() -> int:
                          ":c": {"N": str(crops)},
                          ":h": {"S": json.dumps(run["review"], separators=(",", ":"))}},
                         {"#st": "status"})
-            _write_progress(s3, job_id, "Complete", 100)
+            progress.report("Complete", 100)
             _notify(notification, filename, job_id, True)
             return 0
         except Exception as error:
@@ -467,12 +496,13 @@ def main() -> int:
                 _update_job(dynamo, user_id, job_id, "SET #st = :s, #err = :e",
                             {":s": {"S": "failed"}, ":e": {"S": str(error)[:1000]}},
                             {"#st": "status", "#err": "error"})
-                _write_progress(s3, job_id, f"Failed: {error}", 100)
+                progress.report(f"Failed: {error}", 100)
                 _notify(notification, filename, job_id, False)
             except Exception:
                 log.exception("could not publish high worker failure")
             return 1
         finally:
+            progress.close()
             if LOG_PATH.exists():
                 try:
                     s3.upload_file(str(LOG_PATH), JOBS_BUCKET, _job_key(job_id, "run.log"))
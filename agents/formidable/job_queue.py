@@ -0,0 +1,77 @@
+"""Job queue between the API and the warm low-effort worker pool.
+
+With WORKER_QUEUE_URL set, main.py sends low-effort jobs here instead of
+starting a Fargate task per job, and `MODE=pool python3 worker.py` tasks
+(an ECS service of WORKER_POOL_SIZE) long-poll it and run them one at a
+time. A message is deleted only after its job finishes, so a worker killed
+mid-job leaves it to reappear after the queue's visibility timeout.
+
+Messages are the job's launch parameters as JSON: job_id, input_key,
+filename, user_id, notification_email.
+"""
+
+import json
+import threading
+from collections import deque
+
+WAIT_SECONDS = 20
+
+
+class SqsJobQueue:
+    def __init__(self, client, url: str):
+        self.client = client
+        self.url = url
+
+    def send(self, job: dict) -> dict:
+        return self.client.send_message(QueueUrl=self.url, MessageBody=json.dumps(job))
+
+    def receive(self, wait_seconds: int = WAIT_SECONDS) -> list[tuple[str, dict]]:
+        """Up to one (receipt, job), long-polling for wait_seconds."""
+        resp = self.client.receive_message(QueueUrl=self.url, MaxNumberOfMessages=1,
+                                           WaitTimeSeconds=wait_seconds)
+        return [(m["ReceiptHandle"], json.loads(m["Body"])) for m in resp.get("Messages", [])]
+
+    def delete(self, receipt: str) -> None:
+        self.client.delete_message(QueueUrl=self.url, ReceiptHandle=receipt)
+
+    def release(self, receipt: str) -> None:
+        """Make a received job visible again now (a draining worker won't run it)."""
+        self.client.change_message_visibility(QueueUrl=self.url, ReceiptHandle=receipt,
+                                              VisibilityTimeout=0)
+
+
+class MemoryJobQueue:
+    """In-process queue for tests and local runs; receive() doesn't block."""
+
+    def __init__(self):
+        self._jobs: deque[tuple[str, dict]] = deque()
+        self._inflight: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def send(self, job: dict) -> dict:
+        with self._lock:
+            self._next += 1
+            self._jobs.append((str(self._next), job))
+        return {"MessageId": str(self._next)}
+
+    def receive(self, wait_seconds: int = WAIT_SECONDS) -> list[tuple[str, dict]]:
+        with self._lock:
+            if not self._jobs:
+                return []
+            receipt, job = self._jobs.popleft()
+            self._inflight[receipt] = job
+            return [(receipt, job)]
+
+    def delete(self, receipt: str) -> None:
+        with self._lock:
+            self._inflight.pop(receipt, None)
+
+    def release(self, receipt: str) -> None:
+        with self._lock:
+            job = self._inflight.pop(receipt, None)
+            if job is not None:
+                self._jobs.appendleft((receipt, job))
+
+    def __len__(self) -> int:
+        return len(self._jobs) + len(self._inflight)
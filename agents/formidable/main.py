@@ -3,46 +3,107 @@
 Routes:
   GET  /vision/health
   POST /vision/extract          — submit a form (file + optional name), returns 202 + job_id
-  GET  /api/jobs                — list authenticated user's jobs (DynamoDB)
-  GET  /api/jobs/{id}/status    — poll job status (DynamoDB)
+  GET  /api/jobs                — list authenticated user's jobs, newest first (DynamoDB
+                                  created_at GSI); ?limit=/?cursor= page it via X-Next-Cursor
+  GET  /api/jobs/{id}           — one job including corrections (DynamoDB)
+  GET  /api/jobs/{id}/status    — poll job status (DynamoDB), with queue_position while waiting
+  GET  /api/jobs/{id}/bundle    — job + manifest + review manifest + presigned page/crop URLs
+  POST /api/jobs/{id}/urls      — presigned URLs for many pages/crops (default: whole manifest)
   GET  /api/jobs/{id}/manifest  — crops_manifest.json (S3, ownership-checked)
   GET  /api/jobs/{id}/pages/{f} — page PNG (S3, ownership-checked)
   GET  /api/jobs/{id}/crops/{f} — crop PNG (S3, ownership-checked)
   GET  /api/jobs/{id}/xlsx      — excel download (corrected if exists, else output)
-  POST /api/jobs/{id}/submit    — store corrections + write corrected.xlsx
-  POST /api/jobs/{id}/rerun     — reset failed job and re-launch Fargate
-  GET  /api/jobs/{id}/progress  — structured progress update (step, pct, ts)
-  DELETE /api/jobs/{id}         — delete job (S3 artifacts + DynamoDB record)
+  POST /api/jobs/{id}/submit    — store corrections (delta; corrected.xlsx built on /xlsx)
+  POST /api/jobs/{id}/rerun     — copy the job's input into a new job and queue it
+  GET  /api/jobs/{id}/progress  — structured progress update (seq, step, pct, ts);
+                                  ?after=<seq>&wait=<s> long-polls for a newer step
+  DELETE /api/jobs/{id}         — delete job (S3 artifacts, its provider-cache entries,
+                                  DynamoDB record)
+  POST /events                  — EventBridge tick (Lambda Web Adapter pass-through, no
+                                  API Gateway route): admit queued jobs
 """
 
-import io
+import base64
+import binascii
 import json
+import logging
 import os
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
-import boto3
-from botocore.exceptions import ClientError
 from fastapi import Body, FastAPI, File, Form, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.responses import JSONResponse, Response
+
+import xlsx_patch
+from admission import (THROTTLE_CODES, AdmissionGovernor, LaunchFailed, Throttled,
+                       store_from_env)
+from job_queue import SqsJobQueue
+from presigner import S3Presigner
+from progress_events import event_log_from_env
 
 JOBS_BUCKET  = os.environ.get("JOBS_BUCKET",  "formidable-storage")
 S3_PREFIX    = os.environ.get("S3_PREFIX",     "formidable")
 DYNAMO_TABLE = os.environ.get("DYNAMO_TABLE",  "formidable-jobs")
+# high_worker.py's provider_json cache (see high_pipeline/provider_cache.py).
+PROVIDER_CACHE_PREFIX = f"{S3_PREFIX}/provider-cache/"
 ECS_CLUSTER  = os.environ.get("ECS_CLUSTER",   "form-idable-agents")
 FARGATE_TASK = os.environ.get("FARGATE_TASK",  "formidable-worker")
 FARGATE_TASK_HIGH = os.environ.get("FARGATE_TASK_HIGH", "formidable-high-worker")
 ECS_SG_NAME  = os.environ.get("ECS_SG_NAME",   "form-idable-agents-sg")
 AWS_REGION   = os.environ.get("AWS_REGION",    "ap-south-1")
 ECS_SUBNET   = os.environ.get("ECS_SUBNET",    "")
-
-app = FastAPI(title="Formidable API")
+# Resolved by deploy/push.sh; ECS_SG_NAME is only looked up when unset.
+ECS_SG_ID    = os.environ.get("ECS_SG_ID",     "")
+# Build AWS clients (and resolve missing network config) while the Lambda
+# initializes, before the first request: auto (only in Lambda) | 1 | 0.
+WARM_START   = os.environ.get("WARM_START",    "auto")
+# Low-effort jobs go to the warm worker pool's queue when set (see
+# job_queue.py); otherwise each job gets its own Fargate task.
+WORKER_QUEUE_URL = os.environ.get("WORKER_QUEUE_URL", "")
+# GSI (user_id HASH, created_at RANGE) used to list jobs newest-first.
+JOBS_CREATED_INDEX = os.environ.get("JOBS_CREATED_INDEX", "user_id-created_at-index")
+
+# Seconds a job's ownership check (DynamoDB item) is reused across requests.
+OWNERSHIP_CACHE_TTL = float(os.environ.get("OWNERSHIP_CACHE_TTL", "30"))
+OWNERSHIP_CACHE_MAX = 1024
+# Presigned page/crop/xlsx URLs.
+ARTIFACT_URL_EXPIRY = 300
+# Most files one POST /api/jobs/{id}/urls call may sign.
+URL_BATCH_MAX = 1000
+# /progress long-polls stay under the API Gateway 30 s integration timeout.
+PROGRESS_MAX_WAIT = 25.0
+PROGRESS_POLL_INTERVAL = float(os.environ.get("PROGRESS_POLL_INTERVAL", "1.0"))
+
+JOBS_PAGE_DEFAULT = 50
+JOBS_PAGE_MAX     = 200
+# Attributes the job list needs; corrections (and input/email fields) are
+# only read on demand via GET /api/jobs/{id}.
+LIST_ATTRIBUTES = ("job_id", "name", "status", "review_state", "effort", "pages",
+                   "crops", "gps", "grid_no", "date", "created_at", "error")
+
+log = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    if WARM_START == "1" or (WARM_START == "auto" and os.environ.get("AWS_LAMBDA_FUNCTION_NAME")):
+        _warm_start()
+    yield
+
+
+app = FastAPI(title="Formidable API", lifespan=_lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ── AWS clients (module-level, reused across Lambda warm invocations) ──────────
@@ -51,36 +112,81 @@ _dynamo_client = None
 _ecs_client    = None
 _ec2_client    = None
 _sg_id_cache   = None
+_subnet_cache  = None
+_presigner_obj = None
+_event_log_obj = None
+_admission_obj = None
+_job_queue_obj = None
+
+
+def _client(service: str):
+    # boto3 costs ~0.3 s to import; only pay it once a client is needed.
+    import boto3
+    return boto3.client(service, region_name=AWS_REGION)
 
 
 def _s3():
     global _s3_client
     if _s3_client is None:
-        _s3_client = boto3.client("s3", region_name=AWS_REGION)
+        _s3_client = _client("s3")
     return _s3_client
 
 
 def _dynamo():
     global _dynamo_client
     if _dynamo_client is None:
-        _dynamo_client = boto3.client("dynamodb", region_name=AWS_REGION)
+        _dynamo_client = _client("dynamodb")
     return _dynamo_client
 
 
 def _ecs():
     global _ecs_client
     if _ecs_client is None:
-        _ecs_client = boto3.client("ecs", region_name=AWS_REGION)
+        _ecs_client = _client("ecs")
     return _ecs_client
 
 
 def _ec2():
     global _ec2_client
     if _ec2_client is None:
-        _ec2_client = boto3.client("ec2", region_name=AWS_REGION)
+        _ec2_client = _client("ec2")
     return _ec2_client
 
 
+def _job_queue() -> SqsJobQueue:
+    global _job_queue_obj
+    if _job_queue_obj is None:
+        _job_queue_obj = SqsJobQueue(_client("sqs"), WORKER_QUEUE_URL)
+    return _job_queue_obj
+
+
+def _presigner() -> S3Presigner:
+    """Local SigV4 signer; no URL memo, job artifact URLs live ARTIFACT_URL_EXPIRY seconds."""
+    global _presigner_obj
+    client = _s3()
+    if _presigner_obj is None or _presigner_obj.client is not client:
+        _presigner_obj = S3Presigner(client, max_entries=0)
+    return _presigner_obj
+
+
+def _event_log():
+    global _event_log_obj
+    if _event_log_obj is None:
+        _event_log_obj = event_log_from_env(_dynamo)
+    return _event_log_obj
+
+
+def _admission() -> AdmissionGovernor | None:
+    global _admission_obj
+    if _admission_obj is None:
+        store = store_from_env(_dynamo)
+        if store is None:
+            return None
+        _admission_obj = AdmissionGovernor(store, _launch_job, active_jobs=_active_jobs,
+                                           on_failed=_admission_failed)
+    return _admission_obj
+
+
 # ── Auth helpers ───────────────────────────────────────────────────────────────
 
 def _get_user_context(request: Request) -> tuple[str, str]:
@@ -114,6 +220,8 @@ def _job_key(job_id: str, suffix: str) -> str:
 
 
 def _s3_get(key: str) -> bytes:
+    from botocore.exceptions import ClientError
+
     try:
         obj = _s3().get_object(Bucket=JOBS_BUCKET, Key=key)
         return obj["Body"].read()
@@ -124,19 +232,82 @@ def _s3_get(key: str) -> bytes:
         raise HTTPException(500, str(e))
 
 
-def _check_ownership(user_id: str, job_id: str) -> dict:
-    """Fetch DynamoDB item; raise 403 if not found (wrong user or unknown job)."""
+def _s3_get_json_optional(key: str):
+    """Parsed JSON object at key, or None if it doesn't exist (yet)."""
+    try:
+        return json.loads(_s3_get(key))
+    except HTTPException as e:
+        if e.status_code == 404:
+            return None
+        raise
+
+
+def _presign_job_file(job_id: str, suffix: str, **params) -> str:
+    return _s3().generate_presigned_url(
+        "get_object",
+        Params={"Bucket": JOBS_BUCKET, "Key": _job_key(job_id, suffix), **params},
+        ExpiresIn=ARTIFACT_URL_EXPIRY,
+    )
+
+
+def _presign_job_files(job_id: str, folder: str, filenames: list[str]) -> dict[str, str]:
+    """{filename: presigned GET URL} for files under the job's folder, signed locally."""
+    keys = [_job_key(job_id, f"{folder}/{name}") for name in filenames]
+    urls = _presigner().presign_many([(JOBS_BUCKET, key) for key in keys], ARTIFACT_URL_EXPIRY)
+    return dict(zip(filenames, urls))
+
+
+def _manifest_files(manifest: dict | None) -> tuple[list[str], list[str]]:
+    """(page renders, crop files) listed in a crops_manifest.json."""
+    pages, crops = [], []
+    for page in (manifest or {}).get("pages", []):
+        if page.get("render"):
+            pages.append(page["render"])
+        crops += [crop["file"] for crop in page.get("crops", []) if crop.get("file")]
+    return pages, crops
+
+
+_ownership_cache: OrderedDict[tuple[str, str], tuple[float, dict]] = OrderedDict()
+_ownership_lock = threading.Lock()
+
+
+def _check_ownership(user_id: str, job_id: str, fresh: bool = False) -> dict:
+    """Fetch DynamoDB item; raise 403 if not found (wrong user or unknown job).
+
+    Items are cached per (user_id, job_id) for OWNERSHIP_CACHE_TTL seconds, so
+    the review UI's burst of artifact requests costs one GetItem. Routes that
+    report mutable fields (status, counts, corrections) pass fresh=True.
+    """
+    cache_key = (user_id, job_id)
+    now = time.monotonic()
+    if not fresh:
+        with _ownership_lock:
+            cached = _ownership_cache.get(cache_key)
+            if cached and cached[0] > now:
+                return cached[1]
     resp = _dynamo().get_item(
         TableName=DYNAMO_TABLE,
         Key={"user_id": {"S": user_id}, "job_id": {"S": job_id}},
     )
     item = resp.get("Item")
     if not item:
+        _forget_ownership(user_id, job_id)
         raise HTTPException(403, "job not found or access denied")
+    with _ownership_lock:
+        _ownership_cache[cache_key] = (now + OWNERSHIP_CACHE_TTL, item)
+        _ownership_cache.move_to_end(cache_key)
+        while len(_ownership_cache) > OWNERSHIP_CACHE_MAX:
+            _ownership_cache.popitem(last=False)
     return item
 
 
-def _item_to_job(item: dict) -> dict:
+def _forget_ownership(user_id: str, job_id: str):
+    """Drop a cached item after the job record changes or is deleted."""
+    with _ownership_lock:
+        _ownership_cache.pop((user_id, job_id), None)
+
+
+def _item_to_job(item: dict, full: bool = True) -> dict:
     def _s(k):  return item.get(k, {}).get("S") or None
     def _n(k):  return int(item.get(k, {}).get("N") or 0)
     def _l(k):
@@ -146,7 +317,7 @@ def _item_to_job(item: dict) -> dict:
         v = item.get(k, {}).get("M", {})
         return {kk: vv.get("S", "") for kk, vv in v.items()} if v else {}
 
-    return {
+    job = {
         "job_id":       _s("job_id"),
         "name":         _s("name") or "untitled",
         "status":       _s("status") or "queued",
@@ -159,14 +330,34 @@ def _item_to_job(item: dict) -> dict:
         "date":         _s("date"),
         "created_at":   _s("created_at"),
         "error":        _s("error"),
-        "corrections":  _m("corrections"),
     }
+    if full:
+        job["corrections"] = _m("corrections")
+    return job
+
+
+def _encode_cursor(last_key: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(last_key, separators=(",", ":")).encode()).decode()
+
+
+def _decode_cursor(cursor: str, user_id: str) -> dict:
+    """ExclusiveStartKey from a list cursor; 400 if malformed or another user's."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        owner = key["user_id"]["S"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(400, "invalid cursor")
+    if owner != user_id:
+        raise HTTPException(400, "invalid cursor")
+    return key
 
 
 # ── Fargate launch ─────────────────────────────────────────────────────────────
 
 def _sg_id() -> str:
     global _sg_id_cache
+    if ECS_SG_ID:
+        return ECS_SG_ID
     if _sg_id_cache is None:
         resp = _ec2().describe_security_groups(
             Filters=[{"Name": "group-name", "Values": [ECS_SG_NAME]}]
@@ -176,17 +367,38 @@ def _sg_id() -> str:
 
 
 def _get_subnet() -> str:
+    global _subnet_cache
     if ECS_SUBNET:
         return ECS_SUBNET
-    # Discover first subnet in the default VPC
-    vpcs = _ec2().describe_vpcs(Filters=[{"Name": "isDefault", "Values": ["true"]}])
-    vpc_id = vpcs["Vpcs"][0]["VpcId"]
-    subnets = _ec2().describe_subnets(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
-    return subnets["Subnets"][0]["SubnetId"]
+    if _subnet_cache is None:
+        # Discover first subnet in the default VPC
+        vpcs = _ec2().describe_vpcs(Filters=[{"Name": "isDefault", "Values": ["true"]}])
+        vpc_id = vpcs["Vpcs"][0]["VpcId"]
+        subnets = _ec2().describe_subnets(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
+        _subnet_cache = subnets["Subnets"][0]["SubnetId"]
+    return _subnet_cache
+
+
+def _warm_start():
+    """Do first-request work during Lambda init instead of on a user's request.
+
+    Creates the clients every route uses and, if the deploy didn't provide
+    ECS_SUBNET/ECS_SG_ID, resolves them now rather than on the first /start.
+    Failures are logged; the lazy getters retry on demand.
+    """
+    try:
+        _s3(), _dynamo(), _ecs()
+        if not (ECS_SUBNET and ECS_SG_ID):
+            _get_subnet(), _sg_id()
+    except Exception:
+        log.exception("warm start incomplete")
 
 
 def _launch_fargate(job_id: str, input_key: str, filename: str, user_id: str,
                     notification_email: str = "", effort: str = "low"):
+    if effort != "high" and WORKER_QUEUE_URL:
+        return _job_queue().send({"job_id": job_id, "input_key": input_key, "filename": filename,
+                                  "user_id": user_id, "notification_email": notification_email})
     env = [
         {"name": "JOB_ID",     "value": job_id},
         {"name": "INPUT_KEY",  "value": input_key},
@@ -212,33 +424,197 @@ def _launch_fargate(job_id: str, input_key: str, filename: str, user_id: str,
     )
 
 
+# ── Admission (queue + concurrency caps in front of run_task) ─────────────────
+
+def _launch_job(params: dict):
+    """_launch_fargate for the admission governor, with run_task errors classified."""
+    from botocore.exceptions import ClientError
+
+    try:
+        resp = _launch_fargate(**params)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in THROTTLE_CODES:
+            raise Throttled(str(e)) from e
+        raise LaunchFailed(str(e)) from e
+    if not resp.get("tasks") and resp.get("failures"):
+        reason = resp["failures"][0].get("reason", "unknown")
+        # "Capacity is unavailable at this time" and RESOURCE:* clear on their own.
+        if "capacity" in reason.lower() or reason.startswith("RESOURCE"):
+            raise Throttled(reason)
+        raise LaunchFailed(reason)
+    return resp
+
+
+def _active_jobs(entries: list[dict]) -> set[str]:
+    """Ids of admitted jobs whose record is still queued/processing."""
+    active = set()
+    for i in range(0, len(entries), 100):
+        keys = [{"user_id": {"S": e["user_id"]}, "job_id": {"S": e["job_id"]}}
+                for e in entries[i:i + 100]]
+        request = {DYNAMO_TABLE: {"Keys": keys, "ProjectionExpression": "job_id, #st",
+                                  "ExpressionAttributeNames": {"#st": "status"}}}
+        while request:
+            resp = _dynamo().batch_get_item(RequestItems=request)
+            for item in resp.get("Responses", {}).get(DYNAMO_TABLE, []):
+                if item.get("status", {}).get("S") in ("queued", "processing"):
+                    active.add(item["job_id"]["S"])
+            request = resp.get("UnprocessedKeys") or None
+    return active
+
+
+def _admission_failed(entry: dict, error: Exception):
+    log.error("launch failed for job %s: %s", entry["job_id"], error)
+    _dynamo().update_item(
+        TableName=DYNAMO_TABLE,
+        Key={"user_id": {"S": entry["user_id"]}, "job_id": {"S": entry["job_id"]}},
+        UpdateExpression="SET #st = :s, #err = :e",
+        ExpressionAttributeNames={"#st": "status", "#err": "error"},
+        ExpressionAttributeValues={":s": {"S": "failed"},
+                                   ":e": {"S": f"Could not start worker: {error}"}},
+    )
+    _forget_ownership(entry["user_id"], entry["job_id"])
+
+
+def _dispatch():
+    """Admit what the caps allow; errors leave jobs queued for the next tick."""
+    governor = _admission()
+    if governor is None:
+        return
+    try:
+        governor.dispatch()
+    except Exception:
+        log.exception("admission dispatch failed")
+
+
+def _queue_job(job_id: str, input_key: str, filename: str, user_id: str,
+               notification_email: str = "", effort: str = "low") -> int | None:
+    """Queue a job for launch; returns its queue position (None once launched)."""
+    params = {"job_id": job_id, "input_key": input_key, "filename": filename,
+              "user_id": user_id, "notification_email": notification_email, "effort": effort}
+    governor = _admission()
+    if governor is None:
+        _launch_fargate(**params)
+        return None
+    governor.submit(job_id, user_id, params)
+    _dispatch()
+    return governor.position(job_id)
+
+
 # ── Corrections / xlsx ─────────────────────────────────────────────────────────
 
-def _apply_corrections(job_id: str, corrections: dict):
-    """Apply user corrections to output.xlsx and upload as corrected.xlsx."""
-    import openpyxl
-    xlsx_bytes = _s3_get(_job_key(job_id, "output.xlsx"))
-    wb = openpyxl.load_workbook(io.BytesIO(xlsx_bytes))
-    ws = wb.active
-    for key, value in corrections.items():
+# Above this many changed cells a submit rewrites the whole corrections map
+# (one UpdateExpression is limited to 4 KB).
+CORRECTIONS_DELTA_MAX = 100
+# Submits retried after losing a corrections_version race before a 409.
+CORRECTIONS_ATTEMPTS = 3
+
+
+def _item_corrections(item: dict) -> dict:
+    return {k: v.get("S", "") for k, v in item.get("corrections", {}).get("M", {}).items()}
+
+
+def _save_corrections(user_id: str, job_id: str, item: dict, corrections: dict) -> tuple[int, dict]:
+    """Store a new corrections map as a delta; returns (version, delta).
+
+    DynamoDB only sets/removes the changed corrections.<cell> paths and bumps
+    corrections_version, on condition that the version is still the one the
+    delta was computed against. A concurrent submit fails that condition; the
+    item is re-read and the delta recomputed, up to CORRECTIONS_ATTEMPTS
+    times. corrected.xlsx is rebuilt from the stored map on the next download.
+    """
+    from botocore.exceptions import ClientError
+
+    for _ in range(CORRECTIONS_ATTEMPTS):
         try:
-            parts = key.split(":")
-            if len(parts) == 3:
-                page_str, row_str, col_str = parts
-                ws = wb.worksheets[max(0, int(page_str) - 1)]
-            else:
-                row_str, col_str = parts
-                ws = wb.active
-            # rowNum is 1-indexed xlsx row; colIdx is 0-indexed (SheetJS XLSX.utils.decode_cell)
-            ws.cell(row=int(row_str), column=int(col_str) + 1).value = value
-        except Exception:
-            pass
-    buf = io.BytesIO()
-    wb.save(buf)
+            return _update_corrections(user_id, job_id, item, corrections)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+        item = _check_ownership(user_id, job_id, fresh=True)
+    raise HTTPException(409, "corrections changed concurrently; reload and resubmit")
+
+
+def _update_corrections(user_id: str, job_id: str, item: dict,
+                        corrections: dict) -> tuple[int, dict]:
+    current = _item_corrections(item)
+    changed = {k: v for k, v in corrections.items() if current.get(k) != v}
+    removed = sorted(k for k in current if k not in corrections)
+    expected = int(item.get("corrections_version", {}).get("N") or 0)
+
+    names  = {"#rs": "review_state"}
+    values = {":rs": {"S": "reviewed"}}
+    sets   = ["#rs = :rs"]
+    remove = []
+    condition = {}
+    if changed or removed:
+        names["#cv"] = "corrections_version"
+        values.update({":one": {"N": "1"}, ":zero": {"N": "0"}})
+        sets.append("#cv = if_not_exists(#cv, :zero) + :one")
+        if expected:
+            values[":expected"] = {"N": str(expected)}
+            condition["ConditionExpression"] = "#cv = :expected"
+        else:
+            condition["ConditionExpression"] = "attribute_not_exists(#cv)"
+        if "corrections" not in item or len(changed) + len(removed) > CORRECTIONS_DELTA_MAX:
+            sets.append("corrections = :c")
+            values[":c"] = {"M": {k: {"S": v} for k, v in corrections.items()}}
+        else:
+            names["#c"] = "corrections"
+            for i, (key, value) in enumerate(changed.items()):
+                names[f"#k{i}"] = key
+                values[f":k{i}"] = {"S": value}
+                sets.append(f"#c.#k{i} = :k{i}")
+            for i, key in enumerate(removed):
+                names[f"#r{i}"] = key
+                remove.append(f"#c.#r{i}")
+    expression = "SET " + ", ".join(sets) + (" REMOVE " + ", ".join(remove) if remove else "")
+    resp = _dynamo().update_item(
+        TableName=DYNAMO_TABLE,
+        Key={"user_id": {"S": user_id}, "job_id": {"S": job_id}},
+        UpdateExpression=expression,
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+        ReturnValues="UPDATED_NEW",
+        **condition,
+    )
+    delta = {"set": changed, "removed": removed}
+    if not (changed or removed):
+        return expected, delta
+    return int(resp["Attributes"]["corrections_version"]["N"]), delta
+
+
+def _refresh_corrected(job_id: str, item: dict):
+    """Bring corrected.xlsx up to the item's corrections before it is served.
+
+    Jobs reviewed before corrections were versioned have no version; their
+    corrected.xlsx was written at submit time.
+    """
+    version = int(item.get("corrections_version", {}).get("N") or 0)
+    if version:
+        _materialize_corrected(job_id, _item_corrections(item), version)
+
+
+def _materialize_corrected(job_id: str, corrections: dict, version: int):
+    """Write corrected.xlsx for this corrections version unless it's current.
+
+    The workbook is output.xlsx with only the corrected cells patched; the
+    version is kept in the object's metadata.
+    """
+    from botocore.exceptions import ClientError
+
+    key = _job_key(job_id, "corrected.xlsx")
+    try:
+        head = _s3().head_object(Bucket=JOBS_BUCKET, Key=key)
+        if head.get("Metadata", {}).get("corrections-version") == str(version):
+            return
+    except ClientError:
+        pass
+    xlsx_bytes = _s3_get(_job_key(job_id, "output.xlsx"))
     _s3().put_object(
         Bucket=JOBS_BUCKET,
-        Key=_job_key(job_id, "corrected.xlsx"),
-        Body=buf.getvalue(),
+        Key=key,
+        Body=xlsx_patch.apply_corrections(xlsx_bytes, corrections),
+        Metadata={"corrections-version": str(version)},
     )
 
 
@@ -297,6 +673,8 @@ async def extract(request: Request, body: dict = Body(...)):
 def start_job(job_id: str, request: Request):
     """Step 3: called after client uploads to S3. Checks S3 first — if file missing,
     returns {needs_upload, upload_url} so the client can re-upload (crash recovery)."""
+    from botocore.exceptions import ClientError
+
     user_id = _get_user_id(request)
     item    = _check_ownership(user_id, job_id)
     input_key = item.get("input_key", {}).get("S", "")
@@ -323,36 +701,76 @@ def start_job(job_id: str, request: Request):
         ExpressionAttributeNames={"#st": "status"},
         ExpressionAttributeValues={":s": {"S": "queued"}},
     )
+    _forget_ownership(user_id, job_id)
     notification_email = item.get("notification_email", {}).get("S", "")
     effort = item.get("effort", {}).get("S", "low")
-    _launch_fargate(job_id, input_key, filename, user_id, notification_email, effort)
+    position = _queue_job(job_id, input_key, filename, user_id, notification_email, effort)
     task_family = FARGATE_TASK_HIGH if effort == "high" else FARGATE_TASK
-    return {"status": "queued", "effort": effort, "task_family": task_family}
+    return {"status": "queued", "effort": effort, "task_family": task_family,
+            "queue_position": position}
 
 
 @app.get("/api/jobs")
-def list_jobs(request: Request):
+def list_jobs(request: Request, limit: int | None = None, cursor: str = ""):
+    """The user's jobs, newest first, without corrections.
+
+    Reads the created_at GSI (so DynamoDB does the ordering) with a projection
+    of LIST_ATTRIBUTES. Without `limit` or `cursor` every job is returned, as
+    before pagination existed. With either, one page of at most `limit`
+    (default JOBS_PAGE_DEFAULT) is returned, and when more jobs remain the
+    X-Next-Cursor response header holds the cursor for the next page.
+    """
     user_id = _get_user_id(request)
-    resp = _dynamo().query(
-        TableName=DYNAMO_TABLE,
-        KeyConditionExpression="user_id = :uid",
-        ExpressionAttributeValues={":uid": {"S": user_id}},
-    )
-    jobs = [_item_to_job(item) for item in resp.get("Items", [])]
-    # The table sort key is job_id (a random UUID), so DynamoDB's own ordering is
-    # arbitrary. Order by submission time instead — created_at is ISO8601, so a
-    # lexicographic sort is chronological. Newest first.
-    jobs.sort(key=lambda j: j.get("created_at") or "", reverse=True)
-    return jobs
+    names = {f"#a{i}": attr for i, attr in enumerate(LIST_ATTRIBUTES)}
+    kwargs = {
+        "TableName": DYNAMO_TABLE,
+        "IndexName": JOBS_CREATED_INDEX,
+        "KeyConditionExpression": "user_id = :uid",
+        "ExpressionAttributeValues": {":uid": {"S": user_id}},
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+        "ScanIndexForward": False,
+    }
+    if limit is None and not cursor:
+        items = []
+        while True:
+            resp = _dynamo().query(**kwargs)
+            items += resp.get("Items", [])
+            if not resp.get("LastEvaluatedKey"):
+                return [_item_to_job(item, full=False) for item in items]
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    kwargs["Limit"] = max(1, min(limit or JOBS_PAGE_DEFAULT, JOBS_PAGE_MAX))
+    if cursor:
+        kwargs["ExclusiveStartKey"] = _decode_cursor(cursor, user_id)
+    resp = _dynamo().query(**kwargs)
+    jobs = [_item_to_job(item, full=False) for item in resp.get("Items", [])]
+    headers = {}
+    if resp.get("LastEvaluatedKey"):
+        headers["X-Next-Cursor"] = _encode_cursor(resp["LastEvaluatedKey"])
+    return JSONResponse(jobs, headers=headers)
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str, request: Request):
+    """Full job record, including corrections."""
+    user_id = _get_user_id(request)
+    return _item_to_job(_check_ownership(user_id, job_id, fresh=True))
 
 
 @app.get("/api/jobs/{job_id}/status")
 def get_status(job_id: str, request: Request):
     user_id = _get_user_id(request)
-    item    = _check_ownership(user_id, job_id)
+    item    = _check_ownership(user_id, job_id, fresh=True)
     j       = _item_to_job(item)
+    position = None
+    governor = _admission()
+    if j["status"] == "queued" and governor is not None:
+        # Waiting clients poll here, so this also admits jobs as slots free up.
+        _dispatch()
+        position = governor.position(job_id)
     return {"status": j["status"], "pages": j["pages"], "crops": j["crops"],
-            "error": j["error"], "effort": j["effort"]}
+            "error": j["error"], "effort": j["effort"], "queue_position": position}
 
 
 def _high_artifact(job_id: str, request: Request, filename: str):
@@ -381,51 +799,107 @@ def get_manifest(job_id: str, request: Request):
     return JSONResponse(json.loads(data))
 
 
+@app.get("/api/jobs/{job_id}/bundle")
+def get_bundle(job_id: str, request: Request):
+    """Everything the review UI needs to open a job, in one round trip.
+
+    Returns the full job record, crops_manifest.json, review_manifest.json
+    (high-effort jobs) and presigned URLs for every page render and crop the
+    manifest lists. Artifacts not written yet are null.
+    """
+    user_id = _get_user_id(request)
+    job = _item_to_job(_check_ownership(user_id, job_id, fresh=True))
+    names = ["crops_manifest.json"]
+    if job["effort"] == "high":
+        names.append("review_manifest.json")
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        docs = list(pool.map(lambda name: _s3_get_json_optional(_job_key(job_id, name)), names))
+    manifest = docs[0]
+    review_manifest = docs[1] if len(docs) > 1 else None
+
+    pages, crops = _manifest_files(manifest)
+    return {
+        "job": job,
+        "manifest": manifest,
+        "review_manifest": review_manifest,
+        "urls": {
+            "pages": _presign_job_files(job_id, "pages", pages),
+            "crops": _presign_job_files(job_id, "crops", crops),
+            "expires_in": ARTIFACT_URL_EXPIRY,
+        },
+    }
+
+
+def _filename_list(body: dict, field: str) -> list[str] | None:
+    names = body.get(field)
+    if names is None:
+        return None
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        raise HTTPException(400, f"{field} must be a list of filenames")
+    for name in names:
+        if not name or name in (".", "..") or "/" in name or "\\" in name:
+            raise HTTPException(400, f"invalid filename: {name!r}")
+    return list(dict.fromkeys(names))
+
+
+@app.post("/api/jobs/{job_id}/urls")
+def get_urls(job_id: str, request: Request, body: dict | None = Body(None)):
+    """Presigned URLs for many page renders and crops in one call.
+
+    Body: {"pages": [...], "crops": [...]} — either list may be omitted. With
+    neither, every page and crop in crops_manifest.json is signed.
+    """
+    user_id = _get_user_id(request)
+    _check_ownership(user_id, job_id)
+    body = body or {}
+    pages = _filename_list(body, "pages")
+    crops = _filename_list(body, "crops")
+    if pages is None and crops is None:
+        manifest = json.loads(_s3_get(_job_key(job_id, "crops_manifest.json")))
+        pages, crops = _manifest_files(manifest)
+    pages, crops = pages or [], crops or []
+    if len(pages) + len(crops) > URL_BATCH_MAX:
+        raise HTTPException(400, f"at most {URL_BATCH_MAX} files per request")
+    return {
+        "pages": _presign_job_files(job_id, "pages", pages),
+        "crops": _presign_job_files(job_id, "crops", crops),
+        "expires_in": ARTIFACT_URL_EXPIRY,
+    }
+
+
 @app.get("/api/jobs/{job_id}/pages/{filename}")
 def get_page(job_id: str, filename: str, request: Request):
     """Return a short-lived presigned S3 GET URL — avoids streaming large PNGs through Lambda."""
     user_id = _get_user_id(request)
     _check_ownership(user_id, job_id)
-    url = _s3().generate_presigned_url(
-        "get_object",
-        Params={"Bucket": JOBS_BUCKET, "Key": _job_key(job_id, f"pages/{filename}")},
-        ExpiresIn=300,
-    )
-    return {"url": url}
+    return {"url": _presign_job_files(job_id, "pages", [filename])[filename]}
 
 
 @app.get("/api/jobs/{job_id}/crops/{filename}")
 def get_crop(job_id: str, filename: str, request: Request):
     user_id = _get_user_id(request)
     _check_ownership(user_id, job_id)
-    url = _s3().generate_presigned_url(
-        "get_object",
-        Params={"Bucket": JOBS_BUCKET, "Key": _job_key(job_id, f"crops/{filename}")},
-        ExpiresIn=300,
-    )
-    return {"url": url}
+    return {"url": _presign_job_files(job_id, "crops", [filename])[filename]}
 
 
 @app.get("/api/jobs/{job_id}/xlsx")
 def get_xlsx(job_id: str, request: Request):
+    from botocore.exceptions import ClientError
+
     user_id = _get_user_id(request)
-    item    = _check_ownership(user_id, job_id)
+    item    = _check_ownership(user_id, job_id, fresh=True)
     display = item.get("name", {}).get("S", "output")
     safe_name = display.rsplit(".", 1)[0] + ".xlsx"
+    _refresh_corrected(job_id, item)
     for suffix in ("corrected.xlsx", "output.xlsx"):
         key = _job_key(job_id, suffix)
         try:
             _s3().head_object(Bucket=JOBS_BUCKET, Key=key)
         except ClientError:
             continue
-        url = _s3().generate_presigned_url(
-            "get_object",
-            Params={
-                "Bucket": JOBS_BUCKET,
-                "Key": key,
-                "ResponseContentDisposition": f'attachment; filename="{safe_name}"',
-            },
-            ExpiresIn=300,
+        url = _presign_job_file(
+            job_id, suffix,
+            ResponseContentDisposition=f'attachment; filename="{safe_name}"',
         )
         return {"url": url, "filename": safe_name}
     raise HTTPException(404, "xlsx not found")
@@ -433,26 +907,20 @@ def get_xlsx(job_id: str, request: Request):
 
 @app.post("/api/jobs/{job_id}/submit")
 async def submit_review(job_id: str, request: Request):
+    """Save review corrections ({"corrections": {cell: value}}, the full map).
+
+    Only the difference from the stored map is written; corrected.xlsx is
+    rebuilt on the next GET /api/jobs/{id}/xlsx.
+    """
     user_id = _get_user_id(request)
-    _check_ownership(user_id, job_id)
+    item    = _check_ownership(user_id, job_id, fresh=True)
     body        = await request.json()
     corrections = body.get("corrections", {})
 
-    corrections_dynamo = {k: {"S": v} for k, v in corrections.items()}
-    _dynamo().update_item(
-        TableName=DYNAMO_TABLE,
-        Key={"user_id": {"S": user_id}, "job_id": {"S": job_id}},
-        UpdateExpression="SET review_state = :rs, corrections = :c",
-        ExpressionAttributeValues={
-            ":rs": {"S": "reviewed"},
-            ":c":  {"M": corrections_dynamo},
-        },
-    )
-
-    if corrections:
-        _apply_corrections(job_id, corrections)
-
-    return {"status": "reviewed"}
+    version, delta = _save_corrections(user_id, job_id, item, corrections)
+    _forget_ownership(user_id, job_id)
+    return {"status": "reviewed", "corrections_version": version,
+            "changed": len(delta["set"]), "removed": len(delta["removed"])}
 
 
 @app.post("/api/jobs/{job_id}/rerun")
@@ -502,14 +970,38 @@ async def rerun_job(job_id: str, request: Request):
     _dynamo().put_item(TableName=DYNAMO_TABLE, Item=new_item)
 
     effort = new_item["effort"]["S"]
-    _launch_fargate(new_job_id, new_input_key, name, user_id, notification_email, effort)
-    return JSONResponse({"job_id": new_job_id, "status": "queued"}, status_code=202)
+    position = _queue_job(new_job_id, new_input_key, name, user_id, notification_email, effort)
+    return JSONResponse({"job_id": new_job_id, "status": "queued", "queue_position": position},
+                        status_code=202)
 
 
 @app.get("/api/jobs/{job_id}/progress")
-def get_progress(job_id: str, request: Request):
+def get_progress(job_id: str, request: Request, after: int = 0, wait: float = 0):
+    """Latest progress step: the newest event-log entry, else progress.json.
+
+    With ?wait=<s> (capped at PROGRESS_MAX_WAIT) and ?after=<seq> of the last
+    step the client saw, the request is held until a newer event is written,
+    re-reading the log every PROGRESS_POLL_INTERVAL; on timeout it answers
+    with the current step. This stands in for streaming, which the HTTP API
+    would buffer.
+    """
     user_id = _get_user_id(request)
     _check_ownership(user_id, job_id)
+    event_log = _event_log()
+    if event_log is not None:
+        deadline = time.monotonic() + min(max(wait, 0), PROGRESS_MAX_WAIT)
+        while True:
+            try:
+                event = event_log.latest(job_id)
+            except Exception as exc:
+                log.warning("progress event read failed: %s", exc)
+                event = None
+                break
+            if (event is not None and event["seq"] > after) or time.monotonic() >= deadline:
+                break
+            time.sleep(min(PROGRESS_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+        if event is not None:
+            return JSONResponse({k: event[k] for k in ("seq", "step", "pct", "ts")})
     try:
         data = _s3_get(_job_key(job_id, "progress.json"))
         return JSONResponse(json.loads(data))
@@ -522,6 +1014,18 @@ def get_progress(job_id: str, request: Request):
 def delete_job(job_id: str, request: Request):
     user_id = _get_user_id(request)
     _check_ownership(user_id, job_id)
+    # Drop it from the admission queue first so it can't launch mid-delete.
+    governor = _admission()
+    if governor is not None:
+        governor.cancel(job_id)
+
+    # Cached provider transcriptions live outside the job prefix; the high
+    # worker lists the ones this job wrote.
+    cached = [key for key in _s3_get_json_optional(_job_key(job_id, "provider_cache_keys.json")) or []
+              if key.startswith(PROVIDER_CACHE_PREFIX)]
+    for start in range(0, len(cached), 1000):
+        _s3().delete_objects(Bucket=JOBS_BUCKET, Delete={
+            "Objects": [{"Key": key} for key in cached[start:start + 1000]], "Quiet": True})
 
     # Delete all S3 artifacts under the job prefix
     prefix = _job_key(job_id, "")
@@ -535,19 +1039,29 @@ def delete_job(job_id: str, request: Request):
         TableName=DYNAMO_TABLE,
         Key={"user_id": {"S": user_id}, "job_id": {"S": job_id}},
     )
+    _forget_ownership(user_id, job_id)
     return {"status": "deleted"}
 
 
+@app.post("/events")
+def scheduled_tick():
+    """EventBridge schedule (see deploy/setup.sh): admit queued jobs even when
+    no client is polling. Lambda Web Adapter passes non-HTTP events here."""
+    _dispatch()
+    return {"status": "ok"}
+
+
 @app.get("/vision/jobs/{job_id}")
 def get_vision_job(job_id: str, request: Request):
     """Legacy polling endpoint kept for run_fargate.sh compatibility."""
     user_id = _get_user_id(request)
     try:
-        item = _check_ownership(user_id, job_id)
+        item = _check_ownership(user_id, job_id, fresh=True)
     except HTTPException:
         raise HTTPException(404, "job not found")
     j = _item_to_job(item)
     if j["status"] == "complete":
+        _refresh_corrected(job_id, item)
         try:
             data = _s3_get(_job_key(job_id, "corrected.xlsx"))
         except HTTPException:
@@ -13,7 +13,7 @@ import uuid
 
 import boto3
 from botocore.exceptions import ClientError
-from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi import Body, FastAPI, File, Form, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
@@ -143,7 +143,16 @@ def dev_reset():
 
 @app.get("/api/jobs")
 def list_jobs():
-    return MOCK_JOBS
+    # Like the real list view: no corrections (GET /api/jobs/{id} has them).
+    return [{k: v for k, v in j.items() if k != "corrections"} for j in MOCK_JOBS]
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = next((j for j in MOCK_JOBS if j["job_id"] == job_id), None)
+    if not job:
+        raise HTTPException(404, "job not found")
+    return job
 
 
 @app.get("/api/jobs/{job_id}/status")
@@ -152,7 +161,8 @@ def get_status(job_id: str):
     if not job:
         raise HTTPException(404, "job not found")
     return {"status": job["status"], "pages": job["pages"], "crops": job["crops"],
-            "error": job["error"], "effort": job.get("effort", "low")}
+            "error": job["error"], "effort": job.get("effort", "low"),
+            "queue_position": None}
 
 
 @app.get("/api/jobs/{job_id}/progress")
@@ -203,6 +213,28 @@ def get_analytics(job_id: str):
     return _high_artifact(job_id, "analytics.json")
 
 
+@app.get("/api/jobs/{job_id}/bundle")
+def get_bundle(job_id: str):
+    job = get_job(job_id)
+
+    def optional(suffix: str):
+        try:
+            return json.loads(_s3_get(job_id, suffix))
+        except HTTPException as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    manifest = optional("crops_manifest.json")
+    review_manifest = optional("review_manifest.json") if job.get("effort") == "high" else None
+    pages = {p["render"]: get_page(job_id, p["render"])["url"]
+             for p in (manifest or {}).get("pages", []) if p.get("render")}
+    crops = {c["file"]: get_crop(job_id, c["file"])["url"]
+             for p in (manifest or {}).get("pages", []) for c in p.get("crops", []) if c.get("file")}
+    return {"job": job, "manifest": manifest, "review_manifest": review_manifest,
+            "urls": {"pages": pages, "crops": crops, "expires_in": 300}}
+
+
 @app.get("/api/jobs/{job_id}/pages/{filename}")
 def get_page(job_id: str, filename: str):
     bucket, key = _s3_key(job_id, f"pages/{filename}")
@@ -225,6 +257,20 @@ def get_crop(job_id: str, filename: str):
     return {"url": url}
 
 
+@app.post("/api/jobs/{job_id}/urls")
+def get_urls(job_id: str, body: dict | None = Body(None)):
+    body = body or {}
+    pages, crops = body.get("pages"), body.get("crops")
+    if pages is None and crops is None:
+        manifest = json.loads(_s3_get(job_id, "crops_manifest.json"))
+        pages = [p["render"] for p in manifest.get("pages", []) if p.get("render")]
+        crops = [c["file"] for p in manifest.get("pages", []) for c in p.get("crops", [])
+                 if c.get("file")]
+    return {"pages": {n: get_page(job_id, n)["url"] for n in pages or []},
+            "crops": {n: get_crop(job_id, n)["url"] for n in crops or []},
+            "expires_in": 300}
+
+
 @app.get("/api/jobs/{job_id}/xlsx")
 def get_xlsx(job_id: str):
     job  = next((j for j in MOCK_JOBS if j["job_id"] == job_id), {})
@@ -301,4 +347,4 @@ def start_job(job_id: str):
     if not job:
         raise HTTPException(404, "job not found")
     job["status"] = "queued"
-    return {"status": "queued", "effort": job.get("effort", "low")}
+    return {"status": "queued", "effort": job.get("effort", "low"), "queue_position": None}
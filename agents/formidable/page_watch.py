@@ -0,0 +1,117 @@
+"""Watch a codex workdir for page renders as they are written.
+
+worker._run_codex used to glob page_*.png every 5 s. PageWatcher reports new
+matching files from a background thread as soon as they are closed (inotify
+IN_CLOSE_WRITE / IN_MOVED_TO, via libc) or, where inotify is unavailable,
+within PAGE_POLL_INTERVAL seconds by polling.
+
+  PAGE_WATCH          auto (inotify, else poll) | inotify | poll
+  PAGE_POLL_INTERVAL  seconds between scans in poll mode (default 1)
+
+on_change(names) is called on the watcher thread with the full set of
+matching names whenever it grows, and once more from stop() for files
+written just before the process exited.
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+PAGE_WATCH = os.environ.get("PAGE_WATCH", "auto")
+PAGE_POLL_INTERVAL = float(os.environ.get("PAGE_POLL_INTERVAL", "1"))
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_EVENT = struct.Struct("iIII")
+
+
+def _inotify_fd(directory: Path) -> int | None:
+    """An inotify fd watching directory for finished files, or None."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+def _event_names(buf: bytes):
+    offset = 0
+    while offset + _EVENT.size <= len(buf):
+        _, _, _, length = _EVENT.unpack_from(buf, offset)
+        start = offset + _EVENT.size
+        yield buf[start:start + length].rstrip(b"\0").decode(errors="replace")
+        offset = start + length
+
+
+class PageWatcher:
+    def __init__(self, directory, on_change, pattern: str = "page_*.png",
+                 mode: str = PAGE_WATCH, poll_interval: float = PAGE_POLL_INTERVAL):
+        self.directory = Path(directory)
+        self.on_change = on_change
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self._fd = _inotify_fd(self.directory) if mode in ("auto", "inotify") else None
+        if self._fd is None and mode == "inotify":
+            log.warning("inotify unavailable; polling %s", self.directory)
+        self.mode = "inotify" if self._fd is not None else "poll"
+        self._stop_r, self._stop_w = os.pipe()
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "PageWatcher":
+        self._scan()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        os.write(self._stop_w, b"x")
+        self._thread.join()
+        self._scan()
+        for fd in (self._fd, self._stop_r, self._stop_w):
+            if fd is not None:
+                os.close(fd)
+
+    def _scan(self) -> None:
+        current = {p.name for p in self.directory.glob(self.pattern)}
+        with self._lock:
+            if not current - self._seen:
+                return
+            self._seen |= current
+            names = set(self._seen)
+        try:
+            self.on_change(names)
+        except Exception:
+            log.exception("page watcher callback failed")
+
+    def _run(self) -> None:
+        watched = [self._stop_r] + ([self._fd] if self._fd is not None else [])
+        timeout = None if self._fd is not None else self.poll_interval
+        while True:
+            ready, _, _ = select.select(watched, [], [], timeout)
+            if self._stop_r in ready:
+                return
+            if self._fd is None:
+                self._scan()
+                continue
+            try:
+                names = list(_event_names(os.read(self._fd, 64 * 1024)))
+            except BlockingIOError:
+                continue
+            # A nameless event is a queue overflow: rescan to be safe.
+            if any(not name or fnmatch.fnmatch(name, self.pattern) for name in names):
+                self._scan()
@@ -0,0 +1,222 @@
+"""Job progress events: an append-only log the workers write and the API reads.
+
+Workers used to put a fresh progress.json on every step and clients polled it
+(GetItem + S3 GET per poll). Now each step is appended to a per-job event log,
+and GET /api/jobs/{id}/progress answers from its newest entry. progress.json is
+still written, throttled, as the fallback when the log is off or empty.
+
+The API Gateway HTTP API buffers Lambda responses, so progress is polled
+rather than streamed. Clients long-poll instead: ?after=<seq>&wait=<s> holds
+the request until an event newer than seq is written (or about 25 s pass,
+inside the 30 s integration timeout), so a step shows up within
+PROGRESS_POLL_INTERVAL of being published.
+
+Transports, picked by PROGRESS_EVENTS:
+
+  dynamo (default)  DynamoDB table PROGRESS_EVENTS_TABLE (job_id HASH, seq
+                    RANGE, expires_at TTL); the API reads the newest
+                    event with one consistent Query
+  file:<dir>        one JSON-lines file per job under <dir>, for local runs
+                    and tests (API and worker share the directory)
+  off               no event log; progress.json only
+
+ProgressReporter coalesces updates: at most one publish per
+PROGRESS_MIN_INTERVAL seconds, the latest pending step flushed by a trailing
+timer, and terminal steps (pct >= 100) published immediately.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+PROGRESS_EVENTS = os.environ.get("PROGRESS_EVENTS", "dynamo")
+PROGRESS_EVENTS_TABLE = os.environ.get("PROGRESS_EVENTS_TABLE", "formidable-job-events")
+PROGRESS_MIN_INTERVAL = float(os.environ.get("PROGRESS_MIN_INTERVAL", "1.0"))
+# Events expire a week after they are written (DynamoDB TTL).
+EVENT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class DynamoEventLog:
+    def __init__(self, client, table: str = PROGRESS_EVENTS_TABLE):
+        self.client = client
+        self.table = table
+
+    def append(self, job_id: str, event: dict) -> None:
+        self.client.put_item(
+            TableName=self.table,
+            Item={
+                "job_id":     {"S": job_id},
+                "seq":        {"N": str(event["seq"])},
+                "event":      {"S": json.dumps(event, separators=(",", ":"))},
+                "expires_at": {"N": str(int(time.time()) + EVENT_TTL_SECONDS)},
+            },
+            ConditionExpression="attribute_not_exists(seq)",
+        )
+
+    def read(self, job_id: str, after: int = 0) -> list[dict]:
+        """Events with seq > after, oldest first."""
+        events, start = [], None
+        while True:
+            args = dict(
+                TableName=self.table,
+                KeyConditionExpression="job_id = :j AND seq > :after",
+                ExpressionAttributeValues={":j": {"S": job_id}, ":after": {"N": str(after)}},
+                ProjectionExpression="event",
+                ConsistentRead=True,
+            )
+            if start:
+                args["ExclusiveStartKey"] = start
+            resp = self.client.query(**args)
+            events += [json.loads(item["event"]["S"]) for item in resp.get("Items", [])]
+            start = resp.get("LastEvaluatedKey")
+            if not start:
+                return events
+
+    def latest(self, job_id: str) -> dict | None:
+        """The newest event, or None if the job has none."""
+        resp = self.client.query(
+            TableName=self.table,
+            KeyConditionExpression="job_id = :j",
+            ExpressionAttributeValues={":j": {"S": job_id}},
+            ProjectionExpression="event",
+            ScanIndexForward=False,
+            Limit=1,
+            ConsistentRead=True,
+        )
+        items = resp.get("Items", [])
+        return json.loads(items[0]["event"]["S"]) if items else None
+
+
+class FileEventLog:
+    def __init__(self, root):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.jsonl"
+
+    def append(self, job_id: str, event: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self._lock, self._path(job_id).open("a") as f:
+            f.write(line)
+
+    def read(self, job_id: str, after: int = 0) -> list[dict]:
+        try:
+            lines = self._path(job_id).read_text().splitlines()
+        except FileNotFoundError:
+            return []
+        # A line may be half-written while the worker appends; skip it this time.
+        events = []
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+        return [e for e in events if e["seq"] > after]
+
+    def latest(self, job_id: str) -> dict | None:
+        events = self.read(job_id)
+        return events[-1] if events else None
+
+
+def event_log_from_env(dynamo_factory=None):
+    """Event log configured by PROGRESS_EVENTS (None when off).
+
+    dynamo_factory returns a DynamoDB client; it is only called for the
+    dynamo transport.
+    """
+    spec = os.environ.get("PROGRESS_EVENTS", PROGRESS_EVENTS)
+    if spec == "off":
+        return None
+    if spec.startswith("file:"):
+        return FileEventLog(spec[len("file:"):])
+    if dynamo_factory is None:
+        import boto3
+        region = os.environ.get("AWS_REGION", "ap-south-1")
+        dynamo_factory = lambda: boto3.client("dynamodb", region_name=region)  # noqa: E731
+    return DynamoEventLog(dynamo_factory(),
+                          os.environ.get("PROGRESS_EVENTS_TABLE", PROGRESS_EVENTS_TABLE))
+
+
+class ProgressReporter:
+    """Publishes (step, pct) updates for one job, coalescing bursts.
+
+    Each publish appends to the event log (if any) and calls write_snapshot
+    with the progress.json payload. Failures are logged, never raised: progress
+    must not break a job.
+    """
+
+    def __init__(self, job_id: str, event_log=None, write_snapshot=None,
+                 min_interval: float = PROGRESS_MIN_INTERVAL, clock=time.monotonic):
+        self.job_id = job_id
+        self.event_log = event_log
+        self.write_snapshot = write_snapshot
+        self.min_interval = min_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_sent = None
+        self._last_at = float("-inf")
+        self._pending = None
+        self._timer = None
+        self._seq = 0
+        self.published = 0
+
+    def report(self, step: str, pct: int) -> None:
+        with self._lock:
+            update = (step, pct)
+            if update == self._last_sent:
+                self._pending = None
+                return
+            wait = self._last_at + self.min_interval - self._clock()
+            if pct < 100 and wait > 0:
+                self._pending = update
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            self._pending = None
+            self._publish(update)
+
+    def flush(self) -> None:
+        """Publish the latest coalesced update, if any."""
+        with self._lock:
+            self._timer = None
+            if self._pending is not None:
+                update, self._pending = self._pending, None
+                self._publish(update)
+
+    def close(self) -> None:
+        with self._lock:
+            timer = self._timer
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+    def _publish(self, update: tuple[str, int]) -> None:
+        # Called with the lock held, so events stay in order.
+        step, pct = update
+        # Millisecond sequence numbers stay increasing if a job is retried.
+        self._seq = max(self._seq + 1, int(time.time() * 1000))
+        event = {"seq": self._seq, "step": step, "pct": pct,
+                 "ts": datetime.now(timezone.utc).isoformat()}
+        self._last_sent = update
+        self._last_at = self._clock()
+        self.published += 1
+        if self.event_log is not None:
+            try:
+                self.event_log.append(self.job_id, event)
+            except Exception as exc:
+                log.warning("progress event append failed: %s", exc)
+        if self.write_snapshot is not None:
+            try:
+                self.write_snapshot({k: event[k] for k in ("step", "pct", "ts")})
+            except Exception as exc:
+                log.warning("progress write failed: %s", exc)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for the admission queue and its /start, /status wiring."""
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+
+import admission
+import main
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 0.001          # distinct enqueue times, in submit order
+        return self.now
+
+
+class FakeECS:
+    """run_task that records launches; throttles the next `throttle` calls."""
+
+    def __init__(self):
+        self.launched = []
+        self.throttle = 0
+        self.failure = None
+
+    def run_task(self, **kwargs):
+        if self.throttle:
+            self.throttle -= 1
+            raise ClientError({"Error": {"Code": "ThrottlingException"}}, "RunTask")
+        if self.failure:
+            return {"tasks": [], "failures": [{"reason": self.failure}]}
+        env = kwargs["overrides"]["containerOverrides"][0]["environment"]
+        self.launched.append(next(e["value"] for e in env if e["name"] == "JOB_ID"))
+        return {"tasks": [{"taskArn": "arn"}], "failures": []}
+
+
+def _governor(ecs, active, clock, **caps):
+    def launch(params):
+        try:
+            ecs.run_task(overrides={"containerOverrides": [{"environment": [
+                {"name": "JOB_ID", "value": params["job_id"]}]}]})
+        except ClientError as e:
+            raise admission.Throttled(str(e)) from e
+
+    return admission.AdmissionGovernor(
+        admission.MemoryAdmissionStore(), launch,
+        active_jobs=lambda entries: {e["job_id"] for e in entries} & active,
+        clock=clock, **caps)
+
+
+def governor_test():
+    clock, ecs, active = Clock(), FakeECS(), set()
+    gov = _governor(ecs, active, clock, global_cap=4, user_cap=2)
+    # A burst of 6 from alice, then one each from bob and carol.
+    for i in range(6):
+        gov.submit(f"a{i}", "alice", {"job_id": f"a{i}"})
+    gov.submit("b0", "bob", {"job_id": "b0"})
+    gov.submit("c0", "carol", {"job_id": "c0"})
+    assert gov.position("c0") == 3           # fair share: behind a0 and b0, not a5
+
+    launched = gov.dispatch()
+    active.update(launched)
+    assert launched == ["a0", "b0", "c0", "a1"]      # global cap 4, alice capped at 2
+    assert gov.position("a2") == 1 and gov.position("a0") is None
+    assert gov.dispatch() == []                      # full
+
+    # a0 finishes: its slot is reconciled away and alice's next job runs.
+    active.discard("a0")
+    assert gov.dispatch() == ["a2"]
+    active.add("a2")
+
+    # Throttled: the job stays queued in place, launches back off.
+    active.discard("a1")
+    ecs.throttle = 1
+    assert gov.dispatch() == []
+    assert gov.position("a3") == 1 and gov.backoff_until > clock.now
+    assert "a3" not in {e["job_id"] for e in gov.store.running()}
+    assert gov.dispatch() == []                      # still backing off
+    clock.now = gov.backoff_until
+    assert gov.dispatch() == ["a3"] and gov._throttles == 0
+
+    # Cancelled jobs never launch.
+    active.update({"a3"})
+    gov.cancel("a4")
+    active.clear()
+    assert gov.dispatch() == ["a5"]
+    assert ecs.launched.count("a4") == 0
+
+    # The slot is held (with started_at) while run_task is in flight, and
+    # freed again when the launch fails.
+    store = admission.MemoryAdmissionStore()
+    seen, failures = [], []
+
+    def launch(params):
+        seen.append(store.running())
+        if params["job_id"] == "bad":
+            raise admission.LaunchFailed("no such task definition")
+    gov = admission.AdmissionGovernor(store, launch, clock=clock,
+                                      on_failed=lambda e, err: failures.append(e))
+    gov.submit("bad", "dave", {"job_id": "bad"})
+    gov.submit("good", "erin", {"job_id": "good"})
+    assert gov.dispatch() == ["good"]
+    assert [[e["job_id"] for e in running] for running in seen] == [["bad"], ["good"]]
+    assert all("started_at" in running[0] for running in seen)
+    assert [e["job_id"] for e in store.running()] == ["good"]
+    assert failures[0]["job_id"] == "bad" and "started_at" not in failures[0]
+
+
+class FakeAdmissionTable:
+    """put_item/query/delete_item over (kind, sk), with the claim's condition."""
+
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, TableName, Item):
+        self.items[(Item["kind"]["S"], Item["sk"]["S"])] = Item
+
+    def query(self, TableName, ExpressionAttributeValues, **kwargs):
+        kind = ExpressionAttributeValues[":k"]["S"]
+        return {"Items": [v for k, v in sorted(self.items.items()) if k[0] == kind]}
+
+    def delete_item(self, TableName, Key, ConditionExpression=None):
+        key = (Key["kind"]["S"], Key["sk"]["S"])
+        if ConditionExpression and key not in self.items:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "DeleteItem")
+        self.items.pop(key, None)
+
+
+def dynamo_store_test():
+    table = FakeAdmissionTable()
+    # Two Lambda instances sharing the table: only one claims each entry.
+    first = admission.DynamoAdmissionStore(table)
+    second = admission.DynamoAdmissionStore(table)
+    first.enqueue({"job_id": "b", "user_id": "u", "enqueued_at": 20.5, "params": {}})
+    first.enqueue({"job_id": "a", "user_id": "u", "enqueued_at": 3.25, "params": {}})
+    waiting = second.waiting()
+    assert [e["job_id"] for e in waiting] == ["a", "b"]      # oldest first
+    assert first.claim(waiting[0]) and not second.claim(waiting[0])
+    second.add_running(waiting[0])
+    assert [e["job_id"] for e in first.running()] == ["a"]
+    first.remove("b")
+    first.release("a")
+    assert table.items == {}
+
+
+class FakeDynamo:
+    def __init__(self, items):
+        self.items = {(i["user_id"]["S"], i["job_id"]["S"]): i for i in items}
+
+    def get_item(self, TableName, Key):
+        item = self.items.get((Key["user_id"]["S"], Key["job_id"]["S"]))
+        return {"Item": item} if item else {}
+
+    def update_item(self, TableName, Key, ExpressionAttributeValues, **kwargs):
+        item = self.items[(Key["user_id"]["S"], Key["job_id"]["S"])]
+        item["status"] = ExpressionAttributeValues[":s"]
+        if ":e" in ExpressionAttributeValues:
+            item["error"] = ExpressionAttributeValues[":e"]
+
+    def batch_get_item(self, RequestItems):
+        keys = RequestItems[main.DYNAMO_TABLE]["Keys"]
+        found = [self.items[(k["user_id"]["S"], k["job_id"]["S"])] for k in keys
+                 if (k["user_id"]["S"], k["job_id"]["S"]) in self.items]
+        return {"Responses": {main.DYNAMO_TABLE: found}}
+
+
+class FakeS3:
+    def head_object(self, Bucket, Key):
+        return {}
+
+
+def _item(job_id, status="uploading"):
+    return {"user_id": {"S": "dev-user"}, "job_id": {"S": job_id}, "name": {"S": "a.pdf"},
+            "status": {"S": status}, "effort": {"S": "low"}, "input_key": {"S": f"in/{job_id}"},
+            "created_at": {"S": "2026-06-01T00:00:00Z"}}
+
+
+def api_test():
+    dynamo, ecs = FakeDynamo([_item(f"j{i}") for i in range(4)]), FakeECS()
+    governor = admission.AdmissionGovernor(
+        admission.MemoryAdmissionStore(), main._launch_job, active_jobs=main._active_jobs,
+        on_failed=main._admission_failed, global_cap=10, user_cap=2)
+    originals = (main._dynamo, main._s3, main._ecs, main._admission_obj,
+                 main.ECS_SUBNET, main.ECS_SG_ID)
+    main._dynamo, main._s3, main._ecs = (lambda: dynamo), (lambda: FakeS3()), (lambda: ecs)
+    main._admission_obj, main.ECS_SUBNET, main.ECS_SG_ID = governor, "subnet-1", "sg-1"
+    main._ownership_cache.clear()
+    try:
+        client = TestClient(main.app)
+        starts = [client.post(f"/api/jobs/j{i}/start").json() for i in range(3)]
+        assert [s["queue_position"] for s in starts] == [None, None, 1]
+        assert ecs.launched == ["j0", "j1"]
+        status = client.get("/api/jobs/j2/status").json()
+        assert status["status"] == "queued" and status["queue_position"] == 1
+
+        # The worker finishing j0 frees a slot; the next status poll admits j2.
+        dynamo.items[("dev-user", "j0")]["status"] = {"S": "complete"}
+        assert client.get("/api/jobs/j2/status").json()["queue_position"] is None
+        assert ecs.launched == ["j0", "j1", "j2"]
+
+        # Throttled run_task leaves the job queued; the scheduled tick retries it.
+        dynamo.items[("dev-user", "j1")]["status"] = {"S": "failed"}
+        ecs.throttle = 1
+        assert client.post("/api/jobs/j3/start").json()["queue_position"] == 1
+        governor.backoff_until = 0
+        assert client.post("/events").status_code == 200
+        assert ecs.launched[-1] == "j3"
+
+        # A non-retryable run_task failure fails the job instead of queueing it.
+        dynamo.items[("dev-user", "j4")] = _item("j4")
+        dynamo.items[("dev-user", "j2")]["status"] = {"S": "complete"}
+        ecs.failure = "MISSING"
+        client.post("/api/jobs/j4/start")
+        assert dynamo.items[("dev-user", "j4")]["status"] == {"S": "failed"}
+        assert "MISSING" in dynamo.items[("dev-user", "j4")]["error"]["S"]
+    finally:
+        (main._dynamo, main._s3, main._ecs, main._admission_obj,
+         main.ECS_SUBNET, main.ECS_SG_ID) = originals
+        main._ownership_cache.clear()
+
+
+def main_test():
+    governor_test()
+    dynamo_store_test()
+    api_test()
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
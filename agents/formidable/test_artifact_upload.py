@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for the workers' concurrent artifact upload."""
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from artifact_upload import TRANSFER_CONFIG, ArtifactUpload, UploadFailed
+
+LATENCY = 0.02
+
+
+class FakeS3:
+    """upload_file with a fixed latency; fails keys in `flaky` once, `broken` always."""
+
+    def __init__(self, flaky=(), broken=()):
+        self.flaky = set(flaky)
+        self.broken = set(broken)
+        self.uploaded = []
+        self.content_types = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def upload_file(self, filename, bucket, key, ExtraArgs=None, Config=None):
+        assert Config is TRANSFER_CONFIG and Path(filename).exists()
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(LATENCY)
+            if key in self.broken:
+                raise OSError("connection reset")
+            if key in self.flaky:
+                self.flaky.discard(key)
+                raise OSError("slow down")
+            with self._lock:
+                self.uploaded.append(key)
+                self.content_types[key] = (ExtraArgs or {}).get("ContentType")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _job(tmp: Path, s3, n_crops: int, **kwargs) -> ArtifactUpload:
+    upload = ArtifactUpload(s3, "bucket", sleep=lambda _: None, **kwargs)
+    for i in range(n_crops):
+        path = tmp / f"crop_{i}.png"
+        path.write_bytes(b"png")
+        upload.add(path, f"crops/{path.name}")
+    manifest = tmp / "crops_manifest.json"
+    manifest.write_text("{}")
+    upload.add_last(manifest, "crops_manifest.json")
+    return upload
+
+
+def main_test():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        # Bounded concurrency, one retry absorbed, manifest strictly last.
+        s3 = FakeS3(flaky={"crops/crop_3.png"})
+        started = time.perf_counter()
+        assert _job(tmp, s3, 45, max_workers=8).publish() == 46
+        parallel = time.perf_counter() - started
+        assert 1 < s3.max_in_flight <= 8
+        assert len(s3.uploaded) == 46 and s3.uploaded[-1] == "crops_manifest.json"
+
+        # Content types follow the key's suffix unless given.
+        assert s3.content_types["crops/crop_0.png"] == "image/png"
+        assert s3.content_types["crops_manifest.json"] == "application/json"
+        s3 = FakeS3()
+        upload = ArtifactUpload(s3, "bucket")
+        (tmp / "metadata.upload.json").write_text("{}")
+        (tmp / "run.log").write_text("log")
+        upload.add(tmp / "metadata.upload.json", "metadata.json")
+        upload.add(tmp / "run.log", "run.log")
+        upload.add(tmp / "run.log", "notes", "text/plain")
+        upload.publish()
+        assert s3.content_types == {"metadata.json": "application/json", "run.log": None,
+                                    "notes": "text/plain"}
+
+        # A file that keeps failing stops the publish before the manifest.
+        s3 = FakeS3(broken={"crops/crop_7.png"})
+        try:
+            _job(tmp, s3, 45).publish()
+            raise AssertionError("expected UploadFailed")
+        except UploadFailed as exc:
+            assert list(exc.failures) == ["crops/crop_7.png"]
+        assert "crops_manifest.json" not in s3.uploaded and len(s3.uploaded) == 44
+
+        s3 = FakeS3()
+        started = time.perf_counter()
+        _job(tmp, s3, 45, max_workers=1).publish()
+        sequential = time.perf_counter() - started
+    print(f"46 uploads at {LATENCY * 1000:.0f} ms each: sequential {sequential:.2f}s, "
+          f"8 in flight {parallel:.2f}s")
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
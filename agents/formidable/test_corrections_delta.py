@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for delta corrections and lazily patched corrected.xlsx."""
+import io
+import re
+import zipfile
+
+import openpyxl
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+from openpyxl.styles import Font
+
+import main
+import xlsx_patch
+from test_job_bundle import FakeDynamo, FakeS3, _item
+
+
+class CorrectionsDynamo(FakeDynamo):
+    """Applies the conditional SET/REMOVE update expressions submit_review issues."""
+
+    def __init__(self, items):
+        super().__init__(items)
+        self.updates = []
+
+    def update_item(self, TableName, Key, UpdateExpression, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues=None, ConditionExpression=None):
+        self.updates.append(UpdateExpression)
+        item = self.items[(Key["user_id"]["S"], Key["job_id"]["S"])]
+        names, values = ExpressionAttributeNames or {}, ExpressionAttributeValues or {}
+        version = item.get("corrections_version")
+        if ConditionExpression and (
+                version is not None if ConditionExpression.startswith("attribute_not_exists")
+                else version != values[":expected"]):
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        set_part, _, remove_part = UpdateExpression.partition(" REMOVE ")
+        updated = {}
+        for target, expr in re.findall(r"([#\w.]+) = (if_not_exists\([^)]*\) \+ :\w+|:\w+)",
+                                       set_part):
+            path = [names.get(p, p) for p in target.split(".")]
+            if expr.startswith("if_not_exists"):
+                value = {"N": str(int(item.get(path[0], {"N": "0"})["N"]) + 1)}
+            else:
+                value = values[expr]
+            if len(path) == 1:
+                item[path[0]] = value
+            else:
+                item[path[0]]["M"][path[1]] = value  # KeyError like DynamoDB's ValidationException
+            updated[path[0]] = item[path[0]]
+        for target in filter(None, remove_part.split(", ")):
+            parent, key = (names.get(p, p) for p in target.split("."))
+            item[parent]["M"].pop(key, None)
+            updated[parent] = item[parent]
+        return {"Attributes": updated}
+
+
+class XlsxS3(FakeS3):
+    def __init__(self, objects):
+        super().__init__(objects)
+        self.metadata = {}
+        self.puts = []
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, Metadata=None, IfNoneMatch=None):
+        if IfNoneMatch == "*" and Key in self.objects:
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+        self.puts.append(Key)
+        self.objects[Key] = Body
+        self.metadata[Key] = Metadata or {}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"Metadata": self.metadata.get(Key, {})}
+
+
+def _workbook() -> bytes:
+    wb = openpyxl.Workbook()
+    first = wb.active
+    first.title = "Page 1"
+    for row in range(1, 8):
+        for col in range(1, 5):
+            if (row, col) != (3, 2):
+                first.cell(row=row, column=col, value=f"r{row}c{col}" if col % 2 else row * col)
+    first["A1"].font = Font(bold=True)
+    second = wb.create_sheet("Page 2")
+    second["B2"] = "second"
+    second["C5"] = 7
+    third = wb.create_sheet("Formulas")
+    third["A1"] = 2
+    third["B1"] = "=A1*2"
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _values(xlsx: bytes) -> list:
+    wb = openpyxl.load_workbook(io.BytesIO(xlsx))
+    return [[[c.value for c in row] for row in ws.iter_rows()] for ws in wb.worksheets]
+
+
+def _check_patch():
+    base = _workbook()
+    corrections = {
+        "1:1:0": "bold title",     # existing styled cell
+        "1:3:1": "was empty",      # missing cell inside a row
+        "1:2:6": "past the end",   # new cell after the last one
+        "1:10:0": "new row",       # row after the last one
+        "2:1:0": "before B2",      # row before the first row
+        "2:5:2": "<&> \"quoted\"",
+        "4:1:0": "missing sheet",  # skipped
+        "x:1": "bad key",          # skipped
+        "1:4:0": "ctrl\x01char",   # skipped (illegal in XML)
+    }
+    patched = xlsx_patch.apply_corrections(base, corrections)
+    expected = xlsx_patch._apply_openpyxl(base, xlsx_patch.parse_corrections(corrections))
+    assert _values(patched) == _values(expected)
+    assert openpyxl.load_workbook(io.BytesIO(patched))["Page 1"]["A1"].font.b
+
+    # Only the corrected sheets' XML changed.
+    with zipfile.ZipFile(io.BytesIO(base)) as before, zipfile.ZipFile(io.BytesIO(patched)) as after:
+        changed = {n for n in before.namelist() if before.read(n) != after.read(n)}
+    assert changed == {"xl/worksheets/sheet1.xml", "xl/worksheets/sheet2.xml"}
+
+    # Two-part keys go to the active sheet; formula cells fall back to openpyxl.
+    assert _values(xlsx_patch.apply_corrections(base, {"2:0": "active"}))[0][1][0] == "active"
+    formula = xlsx_patch.apply_corrections(base, {"3:1:1": "typed over"})
+    assert _values(formula)[2][0] == [2, "typed over"]
+
+
+def main_test():
+    _check_patch()
+
+    output_key = main._job_key("job", "output.xlsx")
+    corrected_key = main._job_key("job", "corrected.xlsx")
+    dynamo = CorrectionsDynamo([_item("job", "low")])
+    s3 = XlsxS3({output_key: _workbook()})
+    originals = main._dynamo, main._s3
+    main._dynamo, main._s3 = (lambda: dynamo), (lambda: s3)
+    main._ownership_cache.clear()
+    try:
+        client = TestClient(main.app)
+
+        def submit(corrections):
+            resp = client.post("/api/jobs/job/submit", json={"corrections": corrections})
+            assert resp.status_code == 200
+            return resp.json()
+
+        def corrected_values():
+            assert client.get("/api/jobs/job/xlsx").status_code == 200
+            return _values(s3.objects[corrected_key])
+
+        # First submit stores the map; nothing is materialized yet.
+        assert submit({"1:1:0": "a", "1:2:0": "b"})["corrections_version"] == 1
+        assert corrected_key not in s3.objects
+        assert corrected_values()[0][0][0] == "a"
+        puts = len(s3.puts)
+        assert client.get("/api/jobs/job/xlsx").status_code == 200
+        assert len(s3.puts) == puts                     # already current
+
+        # Resubmitting the same map writes no delta and keeps the version.
+        assert submit({"1:1:0": "a", "1:2:0": "b"}) == {
+            "status": "reviewed", "corrections_version": 1, "changed": 0, "removed": 0}
+
+        # A two-cell change touches two map paths and nothing in S3.
+        puts = len(s3.puts)
+        result = submit({"1:1:0": "a", "1:2:0": "B", "1:3:0": "c"})
+        assert result["corrections_version"] == 2 and result["changed"] == 2
+        assert dynamo.updates[-1].count("#c.#k") == 2 and "corrections = :c" not in dynamo.updates[-1]
+        assert len(s3.puts) == puts
+
+        # Removing a correction restores the original cell on the next download.
+        result = submit({"1:2:0": "B", "1:3:0": "c"})
+        assert result["removed"] == 1
+        values = corrected_values()
+        assert values[0][0][0] == "r1c1" and values[0][1][0] == "B"
+        item = dynamo.items[("dev-user", "job")]
+        assert main._item_corrections(item) == {"1:2:0": "B", "1:3:0": "c"}
+        assert client.get("/api/jobs/job").json()["corrections"] == {"1:2:0": "B", "1:3:0": "c"}
+
+        # A delta computed against a stale version is recomputed, not applied.
+        stale = {**item, "corrections": {"M": {}}, "corrections_version": {"N": "1"}}
+        version, delta = main._save_corrections("dev-user", "job", stale, {"1:3:0": "C"})
+        assert version == 4 and delta == {"set": {"1:3:0": "C"}, "removed": ["1:2:0"]}
+        assert main._item_corrections(item) == {"1:3:0": "C"}
+
+        # The legacy endpoint serves the current corrections, not a stale workbook.
+        dynamo.items[("dev-user", "job")]["status"] = {"S": "complete"}
+        main._ownership_cache.clear()
+        assert _values(client.get("/vision/jobs/job").content)[0][2][0] == "C"
+    finally:
+        main._dynamo, main._s3 = originals
+        main._ownership_cache.clear()
+
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
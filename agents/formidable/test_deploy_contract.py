@@ -5,6 +5,7 @@ from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent
 DEPLOY = ROOT / "deploy"
+SERVER = ROOT.parent.parent / "server"
 
 
 def text(path: Path) -> str:
@@ -15,6 +16,11 @@ def main_test():
     dockerfile = text(ROOT / "Dockerfile.high")
     assert "--from=pipeline" not in dockerfile
     assert "COPY high_pipeline ./high_pipeline" in dockerfile
+    assert "COPY progress_events.py ./" in dockerfile
+    assert "COPY job_queue.py ./" in dockerfile      # worker.py imports it
+    assert "COPY artifact_upload.py ./" in dockerfile
+    assert "COPY page_watch.py ./" in dockerfile
+    assert "COPY tools ./tools" in dockerfile         # render_page.py + pdf_renderer.py
 
     low_push = text(DEPLOY / "push.sh")
     assert "push_secrets.sh" not in low_push
@@ -39,6 +45,9 @@ def main_test():
     assert "assert_low_unchanged" in high
     assert "verify_prod.sh" in high and "verify_high.sh" in high
 
+    # Vendored from the server (separate build context); one SigV4 implementation.
+    assert text(ROOT / "presigner.py") == text(SERVER / "services" / "presigner.py")
+
     all_tiers = text(DEPLOY / "deploy_all.sh")
     assert "HIGH_SKIP_HANDLER=1" in all_tiers
     assert "verify_prod.sh" in all_tiers and "verify_high.sh" in all_tiers
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """No-AWS invariant: low stays on its original task; high is additive."""
 import main
+from job_queue import MemoryJobQueue
 
 
 class FakeECS:
@@ -29,6 +30,21 @@ def main_test():
     assert low["overrides"]["containerOverrides"][0]["name"] == "worker"
     assert high["taskDefinition"] == "formidable-high-worker"
     assert high["overrides"]["containerOverrides"][0]["name"] == "high-worker"
+
+    # With the warm pool on, low jobs go to its queue; high still gets a task.
+    queue = MemoryJobQueue()
+    originals = main._ecs, main._job_queue, main.WORKER_QUEUE_URL
+    try:
+        main._ecs, main._job_queue, main.WORKER_QUEUE_URL = (lambda: fake), (lambda: queue), "q"
+        main._get_subnet, main._sg_id = (lambda: "subnet-test"), (lambda: "sg-test")
+        main._launch_fargate("pooled", "input.pdf", "low.pdf", "user", effort="low")
+        main._launch_fargate("high2", "input.pdf", "high.pdf", "user", effort="high")
+    finally:
+        main._ecs, main._job_queue, main.WORKER_QUEUE_URL = originals
+        main._get_subnet, main._sg_id = original_subnet, original_sg
+    assert queue.receive()[0][1]["job_id"] == "pooled"
+    assert len(fake.calls) == 3 and fake.calls[-1]["taskDefinition"] == "formidable-high-worker"
+
     assert main._item_to_job({"job_id": {"S": "legacy"}})["effort"] == "low"
     assert main._item_to_job({"job_id": {"S": "new"}, "effort": {"S": "high"}})["effort"] == "high"
 
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Pooled HTTP client invariants against a local mock provider server."""
+import email.utils
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent
+os.environ.setdefault("FORMIDABLE_RENDER_TOOL", str(ROOT / "tools" / "render_page.py"))
+os.environ["GEMINI_API_KEY"] = os.environ["OPENROUTER_API_KEY"] = "test-key"
+sys.path.insert(0, str(ROOT / "high_pipeline"))
+import ecology_review  # noqa: E402
+import http_pool  # noqa: E402
+import structured_pipeline as structured  # noqa: E402
+import wide_bench  # noqa: E402
+from http_pool import HttpPool  # noqa: E402
+
+
+class MockProviders(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits: dict[str, int] = {}
+    peers: set = set()
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self):
+        cls = type(self)
+        path = self.path.split("?")[0]
+        with cls.lock:
+            cls.hits[path] = cls.hits.get(path, 0) + 1
+            cls.peers.add(self.client_address)
+            hit = cls.hits[path]
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        if path == "/echo":
+            return self._reply(200, {"hit": hit})
+        if path == "/throttled":
+            if hit == 1:
+                return self._reply(429, {"error": "slow down"}, {"Retry-After": "3"})
+            if hit == 2:
+                later = email.utils.formatdate(time.time() + 7, usegmt=True)
+                return self._reply(503, {"error": "overloaded"}, {"Retry-After": later})
+            return self._reply(200, {"hit": hit})
+        if path == "/down":
+            return self._reply(502, {"error": "bad gateway"})
+        if path == "/rejected":
+            return self._reply(400, {"error": "unknown field thinkingConfig"})
+        if path == "/slow":
+            with cls.lock:
+                cls.in_flight += 1
+                cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            time.sleep(0.05)
+            with cls.lock:
+                cls.in_flight -= 1
+            return self._reply(200, {"ok": True})
+        if path == "/crash":
+            # Read the whole request, then die without answering.
+            if hit == 1:
+                self.close_connection = True
+                return
+            return self._reply(200, {"hit": hit})
+        if path == "/hangup":
+            # Advertise keep-alive, then drop the socket anyway.
+            self._reply(200, {"hit": hit})
+            self.close_connection = True
+            return
+        if path.endswith(":generateContent"):
+            assert body["generationConfig"]["responseJsonSchema"]["type"] == "object"
+            if hit == 1:
+                return self._reply(429, {"error": "quota"}, {"Retry-After": "2"})
+            text = json.dumps({"page": 1, "value": "Shola grassland"})
+            return self._reply(200, {"candidates": [{"content": {"parts": [{"text": text}]}}],
+                                     "usageMetadata": {"promptTokenCount": 1000,
+                                                       "candidatesTokenCount": 100}})
+        if path.endswith("/chat/completions"):
+            assert self.headers["Authorization"] == "Bearer test-key"
+            return self._reply(200, {"choices": [{"message": {"content": '{"page": 2}'}}],
+                                     "usage": {"prompt_tokens": 10, "completion_tokens": 5,
+                                               "cost": 0.001}})
+        if path.endswith("/species/match"):
+            return self._reply(200, {"scientificName": "Rhododendron arboreum",
+                                     "matchType": "EXACT"})
+        return self._reply(404, {"error": path})
+
+    do_GET = do_POST = _handle
+
+
+def main_test():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockProviders)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        # Keep-alive: twenty calls, one connection.
+        sleeps = []
+        pool = HttpPool(sleep=sleeps.append)
+        for _ in range(20):
+            pool.post_json(f"{base}/echo", {"x": 1})
+        assert pool.connections_opened(base) == 1 and len(MockProviders.peers) == 1
+
+        # Retry-After as seconds, then as an HTTP date; capped by max_backoff.
+        assert pool.get_json(f"{base}/throttled")["hit"] == 3
+        assert sleeps[0] == 3 and 5 <= sleeps[1] <= 7
+        capped = HttpPool(sleep=sleeps.append, max_backoff=4)
+        MockProviders.hits.pop("/throttled")
+        capped.get_json(f"{base}/throttled")
+        assert sleeps[-1] == 4
+
+        # Exponential backoff without a hint, then urllib's HTTPError.
+        sleeps.clear()
+        try:
+            pool.get_json(f"{base}/down")
+            raise AssertionError("expected HTTPError")
+        except urllib.error.HTTPError as error:
+            assert error.code == 502 and b"bad gateway" in error.read()
+        assert len(sleeps) == 3 and sleeps[0] <= 1 <= sleeps[1] <= 2 <= sleeps[2] <= 4
+
+        # Client errors are not retried and keep the body readable.
+        try:
+            pool.post_json(f"{base}/rejected", {})
+            raise AssertionError("expected HTTPError")
+        except urllib.error.HTTPError as error:
+            assert error.code == 400 and b"thinkingConfig" in error.read()
+        assert MockProviders.hits["/rejected"] == 1
+
+        # A connection the server dropped is replaced, not surfaced.
+        opened = pool.connections_opened(base)
+        assert [pool.get_json(f"{base}/hangup")["hit"] for _ in range(3)] == [1, 2, 3]
+        assert pool.connections_opened(base) == opened + 2
+
+        # Once a request was sent on a reused connection, losing it is a
+        # counted attempt (the server may have acted on it), not a free resend.
+        once = HttpPool(attempts=1)
+        once.post_json(f"{base}/echo", {})
+        try:
+            once.post_json(f"{base}/crash", {})
+            raise AssertionError("expected URLError")
+        except urllib.error.URLError:
+            pass
+        assert MockProviders.hits["/crash"] == 1
+        MockProviders.hits.pop("/crash")
+        sleeps.clear()
+        pool.post_json(f"{base}/echo", {})
+        assert pool.post_json(f"{base}/crash", {})["hit"] == 2 and len(sleeps) == 1
+
+        # Per-host limit holds under concurrent callers.
+        narrow = HttpPool(max_per_host=2)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: narrow.get_json(f"{base}/slow"), range(8)))
+        assert MockProviders.max_in_flight == 2 and narrow.connections_opened(base) == 2
+
+        # Unreachable hosts become URLError after the configured attempts.
+        try:
+            HttpPool(attempts=2, sleep=sleeps.append).get_json("http://127.0.0.1:9/")
+            raise AssertionError("expected URLError")
+        except urllib.error.URLError:
+            pass
+
+        # Every provider function goes through the shared pool.
+        http_pool._shared = HttpPool(sleep=sleeps.append)
+        wide_bench.GEMINI_API = f"{base}/v1beta"
+        wide_bench.OPENROUTER_API = f"{base}/api/v1"
+        ecology_review.GBIF_MATCH = f"{base}/v1/species/match"
+        with tempfile.TemporaryDirectory() as tmp:
+            image = Path(tmp) / "page_1_overview.png"
+            Image.new("RGB", (8, 8), "white").save(image)
+            raw, meta = structured.gemini_json("gemini-x", "read", [image], {"type": "object"})
+            assert raw["value"] == "Shola grassland" and meta["in_tok"] == 1000
+            assert sleeps[-1] == 2
+            raw, meta = structured.openrouter_json("vendor/model", "read", [image],
+                                                   {"type": "object"})
+            assert raw == {"page": 2} and meta["cost_usd"] == 0.001 and meta["attempts"] == 1
+            gbif = ecology_review.GBIFClient(Path(tmp) / "gbif")
+            assert gbif.match("Rhododendron arboreum")[0]["matchType"] == "EXACT"
+            assert gbif.match("Rhododendron arboreum")[0]["matchType"] == "EXACT"
+            assert MockProviders.hits["/v1/species/match"] == 1
+        assert http_pool.shared().connections_opened(base) == 1
+    finally:
+        server.shutdown()
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for per-provider image encoding before vision calls."""
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import fitz
+import numpy as np
+from PIL import Image, ImageDraw
+
+ROOT = Path(__file__).resolve().parent
+os.environ.setdefault("FORMIDABLE_RENDER_TOOL", str(ROOT / "tools" / "render_page.py"))
+sys.path.insert(0, str(ROOT / "tools"))
+sys.path.insert(0, str(ROOT / "high_pipeline"))
+import image_prep  # noqa: E402
+import pdf_renderer  # noqa: E402
+import structured_pipeline as structured  # noqa: E402
+import wide_bench  # noqa: E402
+
+
+def _scan(path: Path, ink: tuple) -> None:
+    """A 300 dpi phone-scan-like page: off-white paper, ruled rows, handwriting."""
+    rng = np.random.default_rng(3)
+    paper = (rng.normal(236, 6, (3508, 2480, 1)) + rng.normal(0, 3, (3508, 2480, 3)))
+    paper = paper.clip(0, 255).astype(np.uint8)
+    scan = Image.fromarray(paper)
+    draw = ImageDraw.Draw(scan)
+    for row in range(40):
+        y = 300 + row * 75
+        draw.line((150, y, 2330, y), fill=(40, 40, 40), width=3)
+        draw.text((180, y + 20), f"{row:02d}  Syzygium cumini  12.5  X", fill=ink)
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    jpeg = path.with_suffix(".jpg")
+    scan.save(jpeg, quality=92)
+    page.insert_image(page.rect, filename=str(jpeg))
+    doc.save(str(path))
+
+
+def _crops(pdf: Path, out: Path) -> list[Path]:
+    out.mkdir()
+    crops = []
+    for index, box in enumerate([(.05, .1, .95, .22), (.05, .3, .95, .9), (0, 0, 1, 1)]):
+        crop = out / f"page_1_declared_{index}_table.png"
+        pdf_renderer.render(pdf, crop, page=1, bbox=box, zoom=10)
+        crops.append(crop)
+    return crops
+
+
+def main_test():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _scan(tmp / "pencil.pdf", ink=(30, 30, 30))
+        _scan(tmp / "red.pdf", ink=(200, 20, 20))
+        pencil = _crops(tmp / "pencil.pdf", tmp / "pencil")
+        red = _crops(tmp / "red.pdf", tmp / "red")
+
+        # Colourless renders go grayscale JPEG at the provider's size.
+        for spec in ("gemini-3.5-flash", "codex:gpt-5.6-luna", "claude:sonnet"):
+            prepared = image_prep.prepare_all(pencil, spec, "auto")
+            profile = image_prep.reader_profile(spec)
+            for item, source in zip(prepared, pencil):
+                assert item.mime == "image/jpeg" and item.grayscale
+                assert item.bytes < item.source_bytes / 2, (spec, item)
+                width, height = Image.open(source).size
+                assert (item.width, item.height) == image_prep.fit(width, height, profile)
+                assert min(item.width, item.height) <= profile.max_short
+        # Estimated tokens never go up: providers would have downscaled anyway.
+        for spec in ("gemini-3.5-flash", "codex:gpt-5.6-luna", "claude:sonnet"):
+            png = image_prep.summary(image_prep.prepare_all(pencil, spec, "png"), spec, "png")
+            auto = image_prep.summary(image_prep.prepare_all(pencil, spec, "auto"), spec, "auto")
+            assert auto["image_tokens_est"] <= png["image_tokens_est"]
+            assert png["image_bytes"] == png["image_source_bytes"] > auto["image_bytes"]
+
+        # Pixels stay close to the render where nothing was downscaled.
+        item = image_prep.prepare(pencil[0], image_prep.PROFILES["gemini"])
+        before = np.asarray(Image.open(pencil[0]).convert("L"), dtype=np.int16)
+        after = np.asarray(Image.open(item.path), dtype=np.int16)
+        assert before.shape == after.shape and np.abs(before - after).mean() < 3
+
+        # Coloured ink keeps its colour; png mode sends the render untouched.
+        assert not any(item.grayscale for item in image_prep.prepare_all(red, "gemini-x", "auto"))
+        assert [item.path for item in image_prep.prepare_all(red, "gemini-x", "png")] == red
+
+        # Both readers of a crop share one encode, even concurrently.
+        encodes = []
+        real_encode = image_prep.encode
+        lock = threading.Lock()
+
+        def counting(image, profile):
+            with lock:
+                encodes.append(profile.name)
+            return real_encode(image, profile)
+        image_prep.encode = counting
+        fresh = tmp / "fresh"
+        fresh.mkdir()
+        crop = fresh / "page_1_q0.png"
+        crop.write_bytes(red[0].read_bytes())
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            paths = set(executor.map(
+                lambda _: image_prep.prepare(crop, image_prep.PROFILES["openai"]).path, range(6)))
+        assert len(paths) == 1 and encodes == ["openai"]
+        crop.write_bytes(pencil[0].read_bytes())
+        image_prep.prepare(crop, image_prep.PROFILES["openai"])
+        assert encodes == ["openai", "openai"]      # re-rendered source is re-encoded
+        image_prep.encode = real_encode
+
+        # provider_json sends renders unchanged by default; with auto it sends
+        # encoded files. Either way it records what it sent.
+        seen = []
+
+        def fake_provider(model_spec, prompt, images, schema, *, thinking="minimal"):
+            seen.append([wide_bench._mime(image) for image in images])
+            return {"page": 1}, {"provider": "fake", "model": model_spec, "cost_usd": 0}
+        structured._provider_json = fake_provider
+        structured.CACHE = None
+        assert image_prep.IMAGE_ENCODING == os.environ.get("HIGH_IMAGE_ENCODING", "png")
+        image_prep.IMAGE_ENCODING = "png"
+        _raw, meta = structured.provider_json("codex:gpt-5.6-luna", "read", pencil, {})
+        assert seen[-1] == ["image/png"] * 3 and meta["image_encoding"] == "png"
+        assert meta["image_bytes"] == meta["image_source_bytes"]
+        image_prep.IMAGE_ENCODING = "auto"
+        _raw, meta = structured.provider_json("codex:gpt-5.6-luna", "read", pencil, {})
+        assert seen[-1] == ["image/jpeg"] * 3 and meta["image_encoding"] == "openai"
+        assert meta["image_bytes"] < meta["image_source_bytes"]
+
+        # The harness reports offline bytes/tokens and measured png-vs-auto deltas.
+        form = tmp / "form"
+        (form / "tiles").mkdir(parents=True)
+        (form / "outputs").mkdir()
+        for source in pencil[:2]:
+            (form / "tiles" / source.name.replace("declared", "h")).write_bytes(source.read_bytes())
+        base = {"form": "form", "recall": .80, "num_f1": .70, "all_f1": .75,
+                "in_tok": 5000, "image_bytes": 900000}
+        (form / "outputs" / "gemini__g__tiled.json").write_text(json.dumps(base))
+        (form / "outputs" / "gemini__g__tiled__auto.json").write_text(json.dumps(
+            {**base, "recall": .81, "in_tok": 4990, "image_bytes": 150000}))
+        wide_bench.print = lambda *args, **kwargs: None
+        report = wide_bench.encoding_report(form)
+        assert {row["encoding"] for row in report["offline"]} == {"png", "auto"}
+        assert report["pairs"] == [{"tag": "gemini__g__tiled", "bytes": [900000, 150000],
+                                    "in_tok": [5000, 4990], "d_recall": .01,
+                                    "d_num_f1": 0, "d_all_f1": 0}]
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Import-time checks for the Lambda handler (no AWS).
+
+Importing main is the cold-start floor of every new Lambda instance. It must
+not pull in modules that only some requests need: the check is on what a
+fresh interpreter has in sys.modules after `import main`, which doesn't
+depend on how fast the machine is. The import time is printed as a report;
+set IMPORT_BUDGET_MS to also fail above a budget (cumulative, as reported
+by python -X importtime).
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+IMPORT_BUDGET_MS = os.environ.get("IMPORT_BUDGET_MS")
+# Loaded on demand: AWS clients (first request or warm start), workbook code.
+DEFERRED = ("boto3", "botocore", "s3transfer", "openpyxl", "PIL", "fitz")
+
+
+def loaded_modules(module: str = "main") -> set[str]:
+    """Top-level packages in sys.modules after importing module in a fresh interpreter."""
+    code = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run([sys.executable, "-c", code],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    return {name.split(".")[0] for name in json.loads(proc.stdout)}
+
+
+def import_profile(module: str = "main") -> dict[str, int]:
+    """{module: cumulative import microseconds} for a fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    profile = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def main_test():
+    loaded = sorted(loaded_modules() & set(DEFERRED))
+    assert not loaded, f"imported eagerly: {loaded}"
+    total_ms = import_profile()["main"] / 1000
+    if IMPORT_BUDGET_MS:
+        assert total_ms < int(IMPORT_BUDGET_MS), f"import main took {total_ms:.0f} ms"
+        print(f"import main: {total_ms:.0f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    else:
+        print(f"import main: {total_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main_test()
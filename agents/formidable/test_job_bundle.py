@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for the ownership cache and GET /api/jobs/{id}/bundle."""
+import json
+
+import boto3
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+
+import main
+
+
+class FakeDynamo:
+    def __init__(self, items):
+        self.items = {(i["user_id"]["S"], i["job_id"]["S"]): i for i in items}
+        self.gets = 0
+
+    def get_item(self, TableName, Key):
+        self.gets += 1
+        item = self.items.get((Key["user_id"]["S"], Key["job_id"]["S"]))
+        return {"Item": item} if item else {}
+
+    def delete_item(self, TableName, Key):
+        self.items.pop((Key["user_id"]["S"], Key["job_id"]["S"]), None)
+
+
+class FakeS3:
+    """In-memory GetObject; presigning uses a real client with dummy credentials."""
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.gets = []
+        signer = boto3.client("s3", region_name=main.AWS_REGION,
+                              aws_access_key_id="AKIDEXAMPLE", aws_secret_access_key="secret")
+        self.meta = signer.meta
+        self._get_credentials = signer._get_credentials
+        self.generate_presigned_url = signer.generate_presigned_url
+
+    def get_object(self, Bucket, Key):
+        self.gets.append(Key)
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        data = self.objects[Key]
+        return {"Body": type("Body", (), {"read": lambda self: data})()}
+
+    def get_paginator(self, name):
+        return type("Paginator", (), {"paginate": lambda self, **kwargs: []})()
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete["Objects"]:
+            self.objects.pop(item["Key"], None)
+
+
+def _item(job_id, effort):
+    return {"user_id": {"S": "dev-user"}, "job_id": {"S": job_id}, "name": {"S": "a.pdf"},
+            "status": {"S": "complete"}, "effort": {"S": effort},
+            "created_at": {"S": "2026-06-01T00:00:00Z"}, "pages": {"N": "1"}}
+
+
+def main_test():
+    manifest = {"pages": [{"page": 1, "render": "page_1.png",
+                           "crops": [{"file": "crop_a.png"}, {"file": "crop_b.png"}]}]}
+    dynamo = FakeDynamo([_item("low-job", "low"), _item("high-job", "high"),
+                         _item("pending-job", "low")])
+    s3 = FakeS3({
+        main._job_key("low-job", "crops_manifest.json"): json.dumps(manifest).encode(),
+        main._job_key("high-job", "crops_manifest.json"): json.dumps(manifest).encode(),
+        main._job_key("high-job", "review_manifest.json"): b'{"fields": []}',
+    })
+    originals = main._dynamo, main._s3, main._admission
+    main._dynamo, main._s3, main._admission = (lambda: dynamo), (lambda: s3), (lambda: None)
+    main._ownership_cache.clear()
+    try:
+        client = TestClient(main.app)
+
+        # One GetItem, two GETs (high effort), every page/crop URL.
+        bundle = client.get("/api/jobs/high-job/bundle").json()
+        assert dynamo.gets == 1
+        assert sorted(s3.gets) == sorted([main._job_key("high-job", "crops_manifest.json"),
+                                          main._job_key("high-job", "review_manifest.json")])
+        assert bundle["job"]["status"] == "complete"
+        assert bundle["manifest"] == manifest
+        assert bundle["review_manifest"] == {"fields": []}
+        assert set(bundle["urls"]["pages"]) == {"page_1.png"}
+        assert set(bundle["urls"]["crops"]) == {"crop_a.png", "crop_b.png"}
+        assert bundle["urls"]["crops"]["crop_a.png"].startswith(
+            f"https://{main.JOBS_BUCKET}.s3.amazonaws.com/"
+            + main._job_key("high-job", "crops/crop_a.png") + "?")
+
+        # Low effort: no review manifest fetch. Not-yet-written manifest is null.
+        s3.gets.clear()
+        assert client.get("/api/jobs/low-job/bundle").json()["review_manifest"] is None
+        assert s3.gets == [main._job_key("low-job", "crops_manifest.json")]
+        pending = client.get("/api/jobs/pending-job/bundle").json()
+        assert pending["manifest"] is None and pending["urls"]["pages"] == {}
+
+        # Artifact routes after the bundle reuse the cached ownership check...
+        dynamo.gets = 0
+        for path in ("manifest", "pages/page_1.png", "crops/crop_a.png", "crops/crop_b.png"):
+            assert client.get(f"/api/jobs/low-job/{path}").status_code == 200
+        assert dynamo.gets == 0
+        # ...while status always reads DynamoDB.
+        client.get("/api/jobs/low-job/status")
+        assert dynamo.gets == 1
+
+        # Unknown jobs aren't cached; deleting drops the cached entry.
+        assert client.get("/api/jobs/missing/manifest").status_code == 403
+        assert ("dev-user", "missing") not in main._ownership_cache
+        assert client.delete("/api/jobs/low-job").status_code == 200
+        assert client.get("/api/jobs/low-job/manifest").status_code == 403
+
+        # Deleting a high job removes the provider-cache entries it listed, and
+        # nothing outside the cache prefix.
+        cached = [f"{main.PROVIDER_CACHE_PREFIX}ab.json", f"{main.PROVIDER_CACHE_PREFIX}cd.json"]
+        s3.objects.update({key: b"{}" for key in cached + ["other/keep.json"]})
+        s3.objects[main._job_key("high-job", "provider_cache_keys.json")] = json.dumps(
+            cached + ["other/keep.json"]).encode()
+        assert client.delete("/api/jobs/high-job").status_code == 200
+        assert not set(cached) & set(s3.objects) and "other/keep.json" in s3.objects
+    finally:
+        main._dynamo, main._s3, main._admission = originals
+        main._ownership_cache.clear()
+
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for GET /api/jobs: GSI order, projection, cursor pagination."""
+from fastapi.testclient import TestClient
+
+import main
+
+
+class FakeDynamo:
+    """Serves a query on the created_at GSI from an in-memory list of items."""
+
+    def __init__(self, items, page_size=4):
+        self.items = items
+        self.queries = []
+        self.page_size = page_size   # stands in for DynamoDB's 1 MB response cap
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        uid = kwargs["ExpressionAttributeValues"][":uid"]["S"]
+        # The index is sparse: items without created_at are not in it.
+        rows = sorted((i for i in self.items if i["user_id"]["S"] == uid and "created_at" in i),
+                      key=lambda i: i["created_at"]["S"],
+                      reverse=not kwargs.get("ScanIndexForward", True))
+        start = kwargs.get("ExclusiveStartKey")
+        if start:
+            ids = [r["job_id"]["S"] for r in rows]
+            rows = rows[ids.index(start["job_id"]["S"]) + 1:]
+        page = rows[:kwargs.get("Limit", self.page_size)]
+        attrs = set(kwargs["ExpressionAttributeNames"].values())
+        resp = {"Items": [{k: v for k, v in r.items() if k in attrs} for r in page]}
+        if len(rows) > len(page):
+            last = page[-1]
+            resp["LastEvaluatedKey"] = {k: last[k] for k in ("user_id", "job_id", "created_at")}
+        return resp
+
+
+def main_test():
+    items = [{
+        "user_id": {"S": "dev-user"}, "job_id": {"S": f"job-{i}"}, "name": {"S": f"{i}.pdf"},
+        "status": {"S": "complete"}, "created_at": {"S": f"2026-06-{i + 1:02d}T00:00:00Z"},
+        "pages": {"N": "2"}, "corrections": {"M": {"1:2": {"S": "x" * 1000}}},
+    } for i in range(7)]
+    items.append({**items[0], "user_id": {"S": "someone-else"}, "job_id": {"S": "other"}})
+    fake = FakeDynamo(items)
+    original = main._dynamo
+    main._dynamo = lambda: fake
+    try:
+        client = TestClient(main.app)
+        # No limit or cursor: every job, across index pages, with no cursor header.
+        resp = client.get("/api/jobs")
+        assert [job["job_id"] for job in resp.json()] == [f"job-{i}" for i in reversed(range(7))]
+        assert "x-next-cursor" not in resp.headers and len(fake.queries) == 2
+        assert "Limit" not in fake.queries[0]
+        fake.queries.clear()
+
+        seen, cursor = [], ""
+        while True:
+            resp = client.get("/api/jobs", params={"limit": 3, "cursor": cursor})
+            assert resp.status_code == 200
+            page = resp.json()
+            assert all("corrections" not in job for job in page)
+            seen += [job["job_id"] for job in page]
+            cursor = resp.headers.get("x-next-cursor", "")
+            if not cursor:
+                break
+        assert seen == [f"job-{i}" for i in reversed(range(7))]
+
+        query = fake.queries[0]
+        assert query["IndexName"] == main.JOBS_CREATED_INDEX
+        assert query["ScanIndexForward"] is False and query["Limit"] == 3
+        assert "corrections" not in query["ExpressionAttributeNames"].values()
+
+        assert client.get("/api/jobs", params={"limit": 10**6}).status_code == 200
+        assert fake.queries[-1]["Limit"] == main.JOBS_PAGE_MAX
+
+        forged = main._encode_cursor({"user_id": {"S": "someone-else"}, "job_id": {"S": "other"}})
+        assert client.get("/api/jobs", params={"cursor": forged}).status_code == 400
+        assert client.get("/api/jobs", params={"cursor": "%%%"}).status_code == 400
+    finally:
+        main._dynamo = original
+
+    full = main._item_to_job(items[0])
+    assert full["corrections"] == {"1:2": "x" * 1000}
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for POST /api/jobs/{id}/urls and the local presigner."""
+import datetime
+import json
+
+import botocore.auth
+from fastapi.testclient import TestClient
+
+import main
+from presigner import S3Presigner
+from test_job_bundle import FakeDynamo, FakeS3, _item
+
+
+def main_test():
+    now = datetime.datetime(2026, 10, 17, 12, 0, 0, tzinfo=datetime.timezone.utc)
+    botocore.auth.get_current_datetime = lambda: now.replace(tzinfo=None)
+
+    manifest = {"pages": [{"page": p, "render": f"page_{p}.png",
+                           "crops": [{"file": f"crop_{p}_{c}.png"} for c in range(20)]}
+                          for p in (1, 2)]}
+    dynamo = FakeDynamo([_item("job", "low")])
+    s3 = FakeS3({main._job_key("job", "crops_manifest.json"): json.dumps(manifest).encode()})
+
+    # Byte-identical to botocore, including keys that need escaping.
+    presigner = S3Presigner(s3, max_entries=0, now=lambda: now)
+    keys = [main._job_key("job", "crops/crop a+1.png"), "x/~y%z.png"]
+    expected = [s3.generate_presigned_url("get_object", Params={"Bucket": main.JOBS_BUCKET, "Key": k},
+                                          ExpiresIn=300) for k in keys]
+    assert presigner.presign_many([(main.JOBS_BUCKET, k) for k in keys], 300) == expected
+    assert presigner.presign_many([(main.JOBS_BUCKET, keys[0])], 300) == expected[:1]
+    assert (presigner.signed, presigner.reused) == (3, 0)      # no URL memo
+
+    originals = main._dynamo, main._s3
+    main._dynamo, main._s3 = (lambda: dynamo), (lambda: s3)
+    main._presigner_obj = presigner
+    main._ownership_cache.clear()
+    try:
+        client = TestClient(main.app)
+
+        # No body: every page and crop in the manifest, one ownership check.
+        resp = client.post("/api/jobs/job/urls")
+        assert resp.status_code == 200
+        urls = resp.json()
+        assert list(urls["pages"]) == ["page_1.png", "page_2.png"]
+        assert len(urls["crops"]) == 40 and urls["expires_in"] == main.ARTIFACT_URL_EXPIRY
+        assert dynamo.gets == 1
+        assert urls["crops"]["crop_2_3.png"] == s3.generate_presigned_url(
+            "get_object", ExpiresIn=main.ARTIFACT_URL_EXPIRY,
+            Params={"Bucket": main.JOBS_BUCKET, "Key": main._job_key("job", "crops/crop_2_3.png")})
+        # Single-file routes return the same signature.
+        single = client.get("/api/jobs/job/crops/crop_2_3.png").json()["url"]
+        assert single == urls["crops"]["crop_2_3.png"]
+
+        # Explicit lists: only those files, no manifest read.
+        s3.gets.clear()
+        urls = client.post("/api/jobs/job/urls", json={"crops": ["crop_1_0.png"]}).json()
+        assert urls["pages"] == {} and list(urls["crops"]) == ["crop_1_0.png"]
+        assert s3.gets == []
+
+        for bad in ({"crops": ["../other/x.png"]}, {"pages": "page_1.png"}, {"pages": [".."]},
+                    {"crops": [f"c{i}.png" for i in range(main.URL_BATCH_MAX + 1)]}):
+            assert client.post("/api/jobs/job/urls", json=bad).status_code == 400, bad
+        assert client.post("/api/jobs/other/urls").status_code == 403
+    finally:
+        main._dynamo, main._s3 = originals
+        main._presigner_obj = None
+        main._ownership_cache.clear()
+
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
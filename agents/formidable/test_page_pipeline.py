@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for page-parallel structured extraction."""
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import fitz
+
+ROOT = Path(__file__).resolve().parent
+os.environ.setdefault("FORMIDABLE_RENDER_TOOL", str(ROOT / "tools" / "render_page.py"))
+sys.path.insert(0, str(ROOT / "high_pipeline"))
+import structured_pipeline as structured  # noqa: E402
+
+PAGES = 6
+LATENCY = 0.05
+MODELS = ["codex:primary", "gemini-peer"]
+
+
+class FakeProviders:
+    """Answers structure/extract calls after a jittered delay, tracking overlap."""
+
+    def __init__(self):
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(7)
+
+    def __call__(self, model_spec, prompt, images, schema, *, thinking="minimal"):
+        provider = structured.provider_name(model_spec)
+        with self._lock:
+            self.in_flight[provider] = self.in_flight.get(provider, 0) + 1
+            self.max_in_flight[provider] = max(self.max_in_flight.get(provider, 0),
+                                               self.in_flight[provider])
+            delay = LATENCY * self._random.uniform(.5, 1.5)
+        try:
+            time.sleep(delay)
+            page = int(Path(images[0]).name.split("_")[1])
+            if schema is structured.STRUCTURE_SCHEMA:
+                raw = {"page": page, "tables": [], "free_text_regions": [],
+                       "metadata_fields": [{"id": "site", "label": "Site",
+                                            "bbox": [.1, .1, .4, .15]}]}
+            else:
+                raw = {"page": page, "tables": [], "free_text": [],
+                       "metadata": [{"field_id": "site", "value": f"{model_spec} p{page}",
+                                     "confidence": .9, "illegible": False,
+                                     "bbox": [.1, .1, .4, .15]}]}
+            return raw, {"provider": provider, "model": model_spec,
+                         "cost_usd": 0, "latency_s": round(delay, 3)}
+        finally:
+            with self._lock:
+                self.in_flight[provider] -= 1
+
+
+def _form(form_dir: Path) -> None:
+    doc = fitz.open()
+    for number in range(1, PAGES + 1):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((72, 100), f"Site ______ page {number}", fontsize=14)
+    doc.save(str(form_dir / "input.pdf"))
+
+
+def _run(form_dir: Path, tag: str, concurrency: int):
+    fake = FakeProviders()
+    structured._provider_json = fake
+    progress = []
+    started = time.perf_counter()
+    report = structured.run(form_dir, "codex:schema", MODELS, tag,
+                            page_concurrency=concurrency,
+                            progress_callback=lambda done, total: progress.append((done, total)))
+    return report, progress, fake, time.perf_counter() - started
+
+
+def main_test():
+    structured.print = lambda *args, **kwargs: None
+    structured._provider_slots["codex"] = threading.BoundedSemaphore(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        form_dir = Path(tmp)
+        _form(form_dir)
+
+        serial, _progress, _fake, serial_s = _run(form_dir, "serial", 1)
+        report, progress, fake, parallel_s = _run(form_dir, "parallel", 4)
+
+        # Pages overlap, but never more codex calls than its configured slots.
+        assert fake.max_in_flight["codex"] == 2
+        assert fake.max_in_flight["gemini"] > 1
+        assert parallel_s < serial_s
+
+        # Progress counts finished pages and only ever goes up.
+        assert progress == [(done, PAGES) for done in range(1, PAGES + 1)]
+
+        # Same calls and document as the serial run, in page then reader order.
+        stages = [(call["stage"], call["page"], call["model"]) for call in report["calls"]]
+        assert stages == [(call["stage"], call["page"], call["model"]) for call in serial["calls"]]
+        assert stages[:3] == [("structure", 1, "codex:schema"),
+                              ("extract", 1, "codex:primary"), ("extract", 1, "gemini-peer")]
+        documents = [json.loads((form_dir / "canonical_outputs" / tag / "canonical.json").read_text())
+                     for tag in ("serial", "parallel")]
+        assert documents[0]["pages"] == documents[1]["pages"]
+        site = documents[1]["pages"][4]["metadata_fields"][0]
+        assert [reading["model"] for reading in site["readings"]] == MODELS
+        assert report["wall_s"] < report["latency_s"]
+
+        # A failing page stops the run instead of yielding a partial document.
+        def broken(model_spec, prompt, images, schema, **kwargs):
+            if "page_3_" in Path(images[0]).name:
+                raise RuntimeError("provider down")
+            return fake(model_spec, prompt, images, schema, **kwargs)
+        structured._provider_json = broken
+        try:
+            structured.run(form_dir, "codex:schema", MODELS, "broken", page_concurrency=3)
+            raise AssertionError("expected the page failure to propagate")
+        except RuntimeError as error:
+            assert "provider down" in str(error)
+        assert not (form_dir / "canonical_outputs" / "broken" / "run.json").exists()
+    print(f"{PAGES} pages, 3 calls each at ~{LATENCY * 1000:.0f} ms: "
+          f"serial {serial_s:.2f}s, 4 pages in flight {parallel_s:.2f}s")
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for page detection and completion in worker._run_codex."""
+import os
+import stat
+import tempfile
+import time
+from pathlib import Path
+
+import worker
+from page_watch import PageWatcher
+
+# Stands in for `codex exec`: renders two pages 0.3 s apart, then exits.
+FAKE_CODEX = """#!/bin/sh
+cat > /dev/null
+sleep 0.3; echo png > page_1.png
+sleep 0.3; echo png > page_2.png; echo tmp > scratch.txt
+sleep 0.3; echo done > last_message.txt
+"""
+
+
+def _watch(tmp: Path, mode: str) -> list[tuple[float, int]]:
+    seen = []
+    watcher = PageWatcher(tmp, lambda names: seen.append((time.monotonic(), len(names))),
+                          mode=mode, poll_interval=0.2).start()
+    assert watcher.mode == mode
+    written = time.monotonic()
+    (tmp / "page_1.png").write_bytes(b"png")
+    (tmp / "notes.txt").write_text("ignored")
+    deadline = time.monotonic() + 2
+    while not seen and time.monotonic() < deadline:
+        time.sleep(0.01)
+    (tmp / "page_2.png").write_bytes(b"png")     # caught by stop()'s final scan
+    watcher.stop()
+    assert [n for _, n in seen] == [1, 2]
+    return [(at - written, n) for at, n in seen]
+
+
+def main_test():
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("inotify", "poll"):
+            (Path(tmp) / name).mkdir()
+        inotify = _watch(Path(tmp) / "inotify", "inotify")
+        poll = _watch(Path(tmp) / "poll", "poll")
+        assert inotify[0][0] < 0.1 and poll[0][0] <= 0.5
+
+        bin_dir, workdir = Path(tmp) / "bin", Path(tmp) / "work"
+        bin_dir.mkdir()
+        workdir.mkdir()
+        codex = bin_dir / "codex"
+        codex.write_text(FAKE_CODEX)
+        codex.chmod(codex.stat().st_mode | stat.S_IEXEC)
+        path = os.environ["PATH"]
+        os.environ["PATH"] = f"{bin_dir}{os.pathsep}{path}"
+        pages = []
+        try:
+            started = time.monotonic()
+            ok, msg = worker._run_codex(workdir, "input.pdf", on_page=pages.append)
+            elapsed = time.monotonic() - started
+        finally:
+            os.environ["PATH"] = path
+        # Completion is noticed as codex exits, not on the next 5 s poll.
+        assert ok and msg.strip() == "done" and pages == [1, 2]
+        assert elapsed < 2.0, elapsed
+    print(f"first page seen after {inotify[0][0] * 1000:.0f} ms (inotify), "
+          f"{poll[0][0] * 1000:.0f} ms (poll); codex run returned after {elapsed:.2f}s of ~0.9s")
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for the in-process PDF renderer behind render_page.py."""
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+from PIL import Image, ImageChops
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT / "tools"))
+sys.path.insert(0, str(ROOT / "high_pipeline"))
+import pdf_renderer  # noqa: E402
+import wide_bench  # noqa: E402
+import worker  # noqa: E402
+
+
+def _form(path: Path) -> None:
+    doc = fitz.open()
+    for width in (1240, 620):
+        scan = path.with_suffix(f".{width}.png")
+        Image.new("RGB", (width, width * 1414 // 1000), "white").save(scan)
+        page = doc.new_page(width=595, height=842)
+        page.insert_image(page.rect, filename=str(scan))
+        page.insert_text((72, 120), "Qty 12.5", fontsize=24)
+    doc.save(str(path))
+
+
+def _cli(pdf: Path, out: Path, page: int, bbox: str | None, zoom: float) -> None:
+    cmd = [sys.executable, str(ROOT / "tools" / "render_page.py"), str(pdf),
+           "--page", str(page), "--zoom", str(zoom), "--out", str(out)]
+    if bbox:
+        cmd += ["--bbox", bbox]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def _same(a: Path, b: Path) -> bool:
+    a, b = Image.open(a), Image.open(b)
+    return a.size == b.size and not ImageChops.difference(a, b).getbbox()
+
+
+def main_test():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdf = tmp / "input.pdf"
+        _form(pdf)
+
+        # The CLI is a thin wrapper: same pixels either way.
+        for page, bbox, zoom in [(1, None, 3), (1, (.1, .1, .6, .3), 10), (2, (0, .5, 1, 1), 8)]:
+            _cli(pdf, tmp / "cli.png", page, bbox and ",".join(map(str, bbox)), zoom)
+            size = pdf_renderer.render(pdf, tmp / "svc.png", page=page, bbox=bbox, zoom=zoom)
+            assert size == Image.open(tmp / "svc.png").size
+            assert _same(tmp / "cli.png", tmp / "svc.png"), (page, bbox, zoom)
+
+        # One open document per file; native scale per page, computed once.
+        renderer = pdf_renderer.renderer_for(pdf)
+        assert pdf_renderer.renderer_for(pdf) is renderer
+        assert renderer.native_scale(1) == 1240 / 595 and renderer.native_scale(2) == 620 / 595
+        extracted = []
+        renderer.doc.extract_image = lambda xref: extracted.append(xref)
+        sizes = [renderer.render(2, (.2, .2, .8, .8), zoom, tmp / "again.png") for zoom in (1, 8, 10)]
+        assert extracted == []
+        # Zoom is capped at the scan's native resolution.
+        assert sizes[0] < sizes[1] == sizes[2] and sizes[1][0] <= 0.6 * 620 + 1
+
+        # A rewritten file gets a fresh document.
+        _form(pdf)
+        assert pdf_renderer.renderer_for(pdf) is not renderer
+
+        # wide_bench renders through the shared renderer, not a subprocess.
+        before = pdf_renderer.renderer_for(pdf).renders
+        pages = wide_bench.render_pages(tmp)
+        assert [p.name for p in pages] == ["page_1.png", "page_2.png"]
+        assert pdf_renderer.renderer_for(pdf).renders == before + 2
+
+        # Codex workdirs get the CLI and the module it imports.
+        workdir = tmp / "work"
+        workdir.mkdir()
+        worker._install_render_tool(workdir)
+        assert {p.name for p in workdir.iterdir()} == {"render_page.py", "pdf_renderer.py"}
+        subprocess.run([sys.executable, str(workdir / "render_page.py"), str(pdf),
+                        "--out", str(tmp / "installed.png")], check=True, capture_output=True)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
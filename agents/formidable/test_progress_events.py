@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for progress coalescing and GET /api/jobs/{id}/progress."""
+import tempfile
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from progress_events import FileEventLog, ProgressReporter
+from test_job_bundle import FakeDynamo, _item
+
+
+def _check_coalescing(root):
+    clock = [0.0]
+    snapshots = []
+    log = FileEventLog(root)
+    reporter = ProgressReporter("job", log, snapshots.append, min_interval=1.0,
+                                clock=lambda: clock[0])
+    reporter.report("Starting", 5)
+    for page in range(1, 30):                  # a burst inside one interval
+        reporter.report(f"page {page}", 20 + page)
+    reporter.report("page 29", 49)             # duplicate of the pending update
+    assert reporter.published == 1
+    clock[0] = 1.5
+    reporter.flush()                           # what the trailing timer does
+    assert [s["step"] for s in snapshots] == ["Starting", "page 29"]
+    reporter.report("Saving", 85)              # coalesced...
+    reporter.report("Complete", 100)           # ...but terminal steps go out at once
+    reporter.close()
+    assert [s["step"] for s in snapshots] == ["Starting", "page 29", "Complete"]
+    events = log.read("job")
+    assert [e["pct"] for e in events] == [5, 49, 100]
+    assert [e["seq"] for e in events] == sorted({e["seq"] for e in events})
+    assert log.read("job", after=events[1]["seq"]) == events[2:]
+
+    # The trailing timer flushes a pending update without another report.
+    timed = ProgressReporter("timed", log, min_interval=0.05)
+    timed.report("a", 1)
+    timed.report("b", 2)
+    time.sleep(0.2)
+    assert [e["step"] for e in log.read("timed")] == ["a", "b"]
+
+    # A failing transport never raises into the worker.
+    class Broken:
+        def append(self, job_id, event):
+            raise OSError("down")
+    ProgressReporter("x", Broken(), lambda s: 1 / 0).report("step", 1)
+
+
+def main_test():
+    with tempfile.TemporaryDirectory() as root:
+        _check_coalescing(root)
+
+        log = FileEventLog(root)
+        dynamo = FakeDynamo([{**_item("live-job", "low"), "status": {"S": "processing"}},
+                             _item("queued-job", "low")])
+        originals = (main._dynamo, main._event_log_obj, main._s3_get)
+        main._dynamo, main._event_log_obj = (lambda: dynamo), log
+        main._s3_get = lambda key: (_ for _ in ()).throw(main.HTTPException(404))
+        main._ownership_cache.clear()
+        try:
+            client = TestClient(main.app)
+
+            # /progress answers from the newest event, without progress.json.
+            reporter = ProgressReporter("live-job", log, min_interval=0)
+            reporter.report("Starting job", 5)
+            reporter.report("Analysing page 1 of 2", 50)
+            body = client.get("/api/jobs/live-job/progress").json()
+            assert body["step"] == "Analysing page 1 of 2" and body["pct"] == 50 and body["ts"]
+            assert log.latest("live-job") == log.read("live-job")[-1]
+
+            # Long-poll: held until a step newer than `after` lands, else the cap.
+            seen = body["seq"]
+            originals_wait = (main.PROGRESS_MAX_WAIT, main.PROGRESS_POLL_INTERVAL)
+            main.PROGRESS_MAX_WAIT, main.PROGRESS_POLL_INTERVAL = 0.5, 0.02
+            try:
+                timer = threading.Timer(0.1, reporter.report, ("Analysing page 2 of 2", 75))
+                timer.start()
+                started = time.monotonic()
+                body = client.get(f"/api/jobs/live-job/progress?after={seen}&wait=5").json()
+                assert body["pct"] == 75 and body["seq"] > seen
+                assert time.monotonic() - started < 0.5
+                started = time.monotonic()
+                same = client.get(f"/api/jobs/live-job/progress?after={body['seq']}&wait=60")
+                assert 0.5 <= time.monotonic() - started < 2
+                assert same.json() == body
+            finally:
+                main.PROGRESS_MAX_WAIT, main.PROGRESS_POLL_INTERVAL = originals_wait
+
+            # No events yet: progress.json, else the queued placeholder.
+            assert client.get("/api/jobs/queued-job/progress").json()["pct"] == 0
+            main._event_log_obj = FileEventLog(f"{root}/empty")
+            main._s3_get = lambda key: b'{"step": "Saving", "pct": 85, "ts": "t"}'
+            assert client.get("/api/jobs/live-job/progress").json() == {
+                "step": "Saving", "pct": 85, "ts": "t"}
+            assert client.get("/api/jobs/unknown/progress").status_code == 403
+            # No SSE route: the HTTP API would buffer it.
+            assert client.get("/api/jobs/live-job/events").status_code in (404, 405)
+        finally:
+            main._dynamo, main._event_log_obj, main._s3_get = originals
+            main._ownership_cache.clear()
+
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
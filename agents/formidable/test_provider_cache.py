@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for the content-addressed provider_json cache."""
+import datetime
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fitz
+
+ROOT = Path(__file__).resolve().parent
+os.environ.setdefault("FORMIDABLE_RENDER_TOOL", str(ROOT / "tools" / "render_page.py"))
+sys.path.insert(0, str(ROOT / "high_pipeline"))
+import provider_cache  # noqa: E402
+import structured_pipeline as structured  # noqa: E402
+from provider_cache import DiskCache, ProviderCache, S3Cache, cache_key  # noqa: E402
+
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, model_spec, prompt, images, schema, *, thinking="minimal"):
+        self.calls.append(model_spec)
+        page = int(Path(images[0]).name.split("_")[1])
+        if schema is structured.STRUCTURE_SCHEMA:
+            raw = {"page": page, "tables": [], "free_text_regions": [],
+                   "metadata_fields": [{"id": "site", "label": "Site", "bbox": [.1, .1, .4, .15]}]}
+        else:
+            raw = {"page": page, "tables": [], "free_text": [],
+                   "metadata": [{"field_id": "site", "value": "Kudremukh", "confidence": .9,
+                                 "illegible": False, "bbox": [.1, .1, .4, .15]}]}
+        return raw, {"provider": "fake", "model": model_spec, "cost_usd": 0.01, "latency_s": 2.0}
+
+
+class FakeS3:
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.objects = {}
+        self._clock = 0
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        return {"Body": io.BytesIO(self.objects[Key][0])}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self._clock += 1
+        self.objects[Key] = (Body, datetime.datetime.fromtimestamp(self._clock))
+
+    def get_paginator(self, name):
+        s3 = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                yield {"Contents": [{"Key": key, "Size": len(body), "LastModified": modified}
+                                    for key, (body, modified) in s3.objects.items()
+                                    if key.startswith(Prefix)]}
+        return Paginator()
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete["Objects"]:
+            del self.objects[item["Key"]]
+
+
+class BrokenBackend:
+    name = "broken"
+    evictions = 0
+
+    def get(self, key):
+        raise OSError("disk gone")
+
+    def put(self, key, data):
+        raise OSError("disk gone")
+
+    def prune(self):
+        raise OSError("disk gone")
+
+
+def _form(form_dir: Path) -> None:
+    doc = fitz.open()
+    for number in (1, 2):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((72, 100), f"Site ______ page {number}", fontsize=14)
+    doc.save(str(form_dir / "input.pdf"))
+
+
+def main_test():
+    structured.print = lambda *args, **kwargs: None
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        # The key covers every input that changes the response.
+        image = tmp / "crop.png"
+        image.write_bytes(b"png-1")
+        base = cache_key("gemini-x", "prompt", {"a": 1}, [image], "minimal")
+        assert base == cache_key("gemini-x", "prompt", {"a": 1}, [image], "minimal")
+        assert base != cache_key("gemini-y", "prompt", {"a": 1}, [image], "minimal")
+        assert base != cache_key("gemini-x", "prompt!", {"a": 1}, [image], "minimal")
+        assert base != cache_key("gemini-x", "prompt", {"a": 2}, [image], "minimal")
+        assert base != cache_key("gemini-x", "prompt", {"a": 1}, [image], "high")
+        image.write_bytes(b"png-2")
+        assert base != cache_key("gemini-x", "prompt", {"a": 1}, [image], "minimal")
+
+        # Disk eviction is least-recently-used and bounded.
+        disk = DiskCache(tmp / "lru", max_bytes=250)
+        for name in "ab":
+            disk.put(name * 64, b"x" * 100)
+            time.sleep(0.01)
+        assert disk.get("a" * 64) == b"x" * 100
+        disk.put("c" * 64, b"x" * 100)
+        assert disk.get("b" * 64) is None and disk.evictions == 1
+        assert DiskCache(tmp / "lru", max_bytes=250)._sizes.keys() == {"a" * 64, "c" * 64}
+
+        # S3 drops the oldest writes down to the bound.
+        s3 = FakeS3()
+        bucket = S3Cache(s3, "formidable-storage", "formidable/provider-cache/", max_bytes=250)
+        for name in "abc":
+            bucket.put(name, b"x" * 100)
+        assert bucket.get("a") == b"x" * 100 and bucket.get("zz") is None
+        bucket.prune()
+        assert sorted(s3.objects) == ["formidable/provider-cache/b.json",
+                                      "formidable/provider-cache/c.json"]
+        assert bucket.object_key("b") == "formidable/provider-cache/b.json"
+        assert provider_cache.from_env("off") is None
+        assert provider_cache.from_env(str(tmp / "env")).backend.name == "disk"
+
+        # A rerun of the same form in another job pays nothing.
+        form_dir = tmp / "form"
+        form_dir.mkdir()
+        _form(form_dir)
+        fake = FakeProvider()
+        structured._provider_json = fake
+        structured.CACHE = ProviderCache(DiskCache(tmp / "cache"))
+        first = structured.run(form_dir, "codex:schema", ["codex:primary", "gemini-peer"], "job1")
+        assert len(fake.calls) == 6
+        assert first["provider_cache"]["misses"] == 6 and first["provider_cache"]["hits"] == 0
+        # Every entry the run wrote is listed, for removal when the job is deleted.
+        assert len(structured.CACHE.keys) == 6
+        structured.CACHE.keys.clear()
+        second = structured.run(form_dir, "codex:schema", ["codex:primary", "gemini-peer"], "job2")
+        assert len(fake.calls) == 6
+        # Hits are job1's entries: deleting job2 must not remove them.
+        assert structured.CACHE.keys == set()
+        stats = second["provider_cache"]
+        assert (stats["backend"], stats["hits"], stats["misses"]) == ("disk", 6, 0)
+        assert stats["saved_usd"] == 0.06 and second["cost_usd"] == 0
+        saved = json.loads((form_dir / "canonical_outputs" / "job2" / "run.json").read_text())
+        assert saved["provider_cache"] == stats
+        assert (json.loads((form_dir / "canonical_outputs" / "job1" / "canonical.json").read_text())["pages"]
+                == json.loads((form_dir / "canonical_outputs" / "job2" / "canonical.json").read_text())["pages"])
+
+        # An edited prompt is a different key, never stale JSON.
+        structured.EXTRACT_PROMPT += "\nReturn null for crossed-out values."
+        third = structured.run(form_dir, "codex:schema", ["codex:primary", "gemini-peer"], "job3")
+        assert (third["provider_cache"]["hits"], third["provider_cache"]["misses"]) == (2, 4)
+        assert sorted(fake.calls[6:]) == ["codex:primary"] * 2 + ["gemini-peer"] * 2
+
+        # A broken backend degrades to uncached calls.
+        structured.CACHE = ProviderCache(BrokenBackend())
+        fourth = structured.run(form_dir, "codex:schema", ["codex:primary"], "job4")
+        assert fourth["provider_cache"]["misses"] == 4 and fourth["provider_cache"]["errors"] > 0
+        assert fourth["validation_errors"] == []
+        structured.CACHE = None
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for the warm worker pool loop (worker.py MODE=pool)."""
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import worker
+from job_queue import MemoryJobQueue
+
+
+class FakeDynamo:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.updates = []
+
+    def get_item(self, TableName, Key, **kwargs):
+        status = self.statuses.get(Key["job_id"]["S"])
+        return {"Item": {"status": {"S": status}}} if status else {}
+
+    def update_item(self, Key, ExpressionAttributeValues, **kwargs):
+        self.updates.append((Key["job_id"]["S"], ExpressionAttributeValues[":s"]["S"]))
+
+
+class FakeSecrets:
+    calls = 0
+
+    def get_secret_value(self, SecretId):
+        FakeSecrets.calls += 1
+        return {"SecretString": '{"tokens": {}}'}
+
+
+def _job(job_id):
+    return {"job_id": job_id, "input_key": f"in/{job_id}.pdf", "filename": "a.pdf",
+            "user_id": "u", "notification_email": ""}
+
+
+def main_test():
+    originals = worker.WORK_ROOT, worker.LOG_PATH, worker.boto3.client
+    with tempfile.TemporaryDirectory() as tmp:
+        worker.WORK_ROOT = Path(tmp)
+        worker.LOG_PATH = Path(tmp) / "run.log"
+        try:
+            queue = MemoryJobQueue()
+            for job_id in ("done", "a", "boom", "b", "c"):
+                queue.send(_job(job_id))
+            dynamo = FakeDynamo({"done": "complete", "a": "queued", "boom": "queued",
+                                 "b": "queued", "c": "queued"})
+            stop = threading.Event()
+            s3 = object()
+            ran = []
+
+            def run_job(job_id, s3, dynamo, pooled, **kwargs):
+                # Each job starts with a clean /tmp and an empty run.log.
+                assert not list(worker.WORK_ROOT.glob("work-*"))
+                assert worker.LOG_PATH.read_text() == ""
+                assert pooled and kwargs["input_key"] == f"in/{job_id}.pdf"
+                ran.append((job_id, s3, dynamo))
+                (worker.WORK_ROOT / f"work-{job_id}").mkdir()   # left behind by a crash
+                worker.LOG_PATH.write_text(f"{job_id} log\n")
+                if job_id == "boom":
+                    raise RuntimeError("download failed")
+                if job_id == "b":
+                    stop.set()          # SIGTERM arrives during job b
+
+            (worker.WORK_ROOT / "work-stale").mkdir()
+            worker.LOG_PATH.write_text("previous job\n")
+            assert worker.run_pool(queue, s3, dynamo, "bucket", stop, run_job=run_job) == 2
+
+            # Already-complete job skipped; clients reused; crash marks the job
+            # failed and the loop carries on; b finishes, c stays queued.
+            assert [job_id for job_id, *_ in ran] == ["a", "boom", "b"]
+            assert all(c_s3 is s3 and c_dynamo is dynamo for _, c_s3, c_dynamo in ran)
+            assert dynamo.updates == [("boom", "failed")]
+            assert len(queue) == 1 and queue.receive()[0][1]["job_id"] == "c"
+            assert not list(worker.WORK_ROOT.glob("work-*"))
+
+            # A job received after SIGTERM goes back to the queue unrun.
+            queue = MemoryJobQueue()
+            queue.send(_job("late"))
+            stop = threading.Event()
+            late_queue_receive = queue.receive
+
+            def receive(wait_seconds):
+                stop.set()
+                return late_queue_receive(wait_seconds)
+
+            queue.receive = receive
+            assert worker.run_pool(queue, s3, dynamo, "bucket", stop, run_job=run_job) == 0
+            assert len(queue) == 1
+
+            # SIGTERM mid-job: the job is marked queued and its message released.
+            queue = MemoryJobQueue()
+            for job_id in ("long", "next"):
+                queue.send(_job(job_id))
+            dynamo = FakeDynamo({"long": "processing", "next": "queued"})
+            stop = threading.Event()
+
+            def interrupted(job_id, stop, **kwargs):
+                stop.set()
+                raise worker.Interrupted("worker shutting down")
+
+            assert worker.run_pool(queue, s3, dynamo, "bucket", stop, run_job=interrupted) == 0
+            assert dynamo.updates == [("long", "queued")]
+            assert [queue.receive()[0][1]["job_id"] for _ in range(2)] == ["long", "next"]
+
+            # A running codex is killed as soon as stop is set.
+            bin_dir = Path(tmp) / "bin"
+            bin_dir.mkdir()
+            (bin_dir / "codex").write_text("#!/bin/sh\ncat >/dev/null\nsleep 60\n")
+            (bin_dir / "codex").chmod(0o755)
+            workdir = Path(tmp) / "codex-work"
+            workdir.mkdir()
+            path = os.environ["PATH"]
+            os.environ["PATH"] = f"{bin_dir}:{path}"
+            stop = threading.Event()
+            threading.Timer(0.3, stop.set).start()
+            started = time.monotonic()
+            try:
+                worker._run_codex(workdir, "input.pdf", stop=stop)
+                raise AssertionError("codex was not interrupted")
+            except worker.Interrupted:
+                pass
+            finally:
+                os.environ["PATH"] = path
+            assert time.monotonic() - started < 5
+
+            # Credentials are fetched once per process, not per job.
+            worker._codex_auth_ready = False
+            worker.boto3.client = lambda *args, **kwargs: FakeSecrets()
+            home = Path.home
+            Path.home = staticmethod(lambda: Path(tmp))
+            try:
+                for _ in range(3):
+                    worker._bootstrap_codex_auth()
+            finally:
+                Path.home = home
+            assert FakeSecrets.calls == 1
+        finally:
+            worker.WORK_ROOT, worker.LOG_PATH, worker.boto3.client = originals
+            worker._codex_auth_ready = False
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
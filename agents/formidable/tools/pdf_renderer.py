@@ -0,0 +1,152 @@
+"""In-process PDF/image region renderer behind render_page.py.
+
+The High pipeline renders an overview, four quadrant tiles and up to eight
+declared crops per page. Run as one render_page.py process each, every call
+started Python, imported fitz, reopened the PDF and re-extracted the page's
+embedded images to find its native scale. PdfRenderer opens a PDF once,
+caches each page's native scale, and renders every requested region from
+that one fitz.Document:
+
+    renderer = renderer_for("input.pdf")
+    renderer.render(page, bbox, zoom, "crop.png")
+
+renderer_for() keeps the few most recently used documents open, keyed by
+path, size and mtime. A Document isn't thread-safe, so renders of one PDF
+are serialized; different PDFs render in parallel.
+
+Output is identical to the render_page.py CLI: the zoom is capped at native
+resolution, and the longest edge is capped at MAX_DIM.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import fitz  # pymupdf
+from PIL import Image
+
+MAX_DIM = 1568
+OPEN_DOCUMENTS_MAX = 4
+
+
+def _native_scale(page, rect) -> float:
+    """Pixels-per-point of the page's largest embedded image, if any."""
+    best_width = 0
+    for xref, *_ in page.get_images(full=True):
+        try:
+            base = page.parent.extract_image(xref)
+        except Exception:
+            continue
+        best_width = max(best_width, base.get("width", 0))
+    if best_width and rect.width:
+        return best_width / rect.width
+    return 1.0
+
+
+class PdfRenderer:
+    def __init__(self, path):
+        self.path = str(path)
+        self.doc = fitz.open(self.path)
+        self._native: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    @property
+    def page_count(self) -> int:
+        return self.doc.page_count
+
+    def native_scale(self, page_num: int) -> float:
+        with self._lock:
+            return self._native_scale(self.doc[page_num - 1])
+
+    def _native_scale(self, page) -> float:
+        scale = self._native.get(page.number)
+        if scale is None:
+            scale = self._native[page.number] = _native_scale(page, page.rect)
+        return scale
+
+    def render(self, page_num: int, bbox, zoom: float, out_path) -> tuple[int, int]:
+        """Render a 1-indexed page, or its bbox (fractions x0,y0,x1,y1), to a PNG."""
+        with self._lock:
+            page = self.doc[page_num - 1]
+            rect = page.rect
+            if bbox:
+                x0, y0, x1, y1 = bbox
+                clip = fitz.Rect(
+                    rect.x0 + x0 * rect.width, rect.y0 + y0 * rect.height,
+                    rect.x0 + x1 * rect.width, rect.y0 + y1 * rect.height,
+                )
+            else:
+                clip = rect
+
+            effective_zoom = min(zoom, self._native_scale(page))
+            out_w, out_h = clip.width * effective_zoom, clip.height * effective_zoom
+            longest = max(out_w, out_h)
+            if longest > MAX_DIM:
+                effective_zoom *= MAX_DIM / longest
+
+            pix = page.get_pixmap(matrix=fitz.Matrix(effective_zoom, effective_zoom), clip=clip)
+            pix.save(str(out_path))
+            self.renders += 1
+            return pix.width, pix.height
+
+    def close(self) -> None:
+        with self._lock:
+            self.doc.close()
+
+
+_renderers: OrderedDict[tuple, PdfRenderer] = OrderedDict()
+_renderers_lock = threading.Lock()
+
+
+def renderer_for(path) -> PdfRenderer:
+    """Shared PdfRenderer for a PDF, reopened if the file changed."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _renderers_lock:
+        renderer = _renderers.get(key)
+        if renderer is None:
+            renderer = _renderers[key] = PdfRenderer(path)
+            while len(_renderers) > OPEN_DOCUMENTS_MAX:
+                # Not closed here: another thread may still be rendering from
+                # it. The Document closes when the last reference goes.
+                _renderers.popitem(last=False)
+        _renderers.move_to_end(key)
+        return renderer
+
+
+def render_pdf(path, page_num, bbox, zoom, out_path):
+    return renderer_for(path).render(page_num, bbox, zoom, out_path)
+
+
+def render_image(path, bbox, zoom, out_path):
+    img = Image.open(path)
+    w, h = img.size
+
+    if bbox:
+        x0, y0, x1, y1 = bbox
+        crop = img.crop((int(x0 * w), int(y0 * h), int(x1 * w), int(y1 * h)))
+    else:
+        crop = img
+
+    # Native resolution for an image is 1.0 — never upscale beyond it.
+    effective_zoom = min(zoom, 1.0)
+    if effective_zoom != 1.0:
+        crop = crop.resize(
+            (max(1, int(crop.width * effective_zoom)), max(1, int(crop.height * effective_zoom))),
+            Image.LANCZOS,
+        )
+
+    longest = max(crop.width, crop.height)
+    if longest > MAX_DIM:
+        scale = MAX_DIM / longest
+        crop = crop.resize((int(crop.width * scale), int(crop.height * scale)), Image.LANCZOS)
+
+    crop.convert("RGB").save(out_path)
+    return crop.size
+
+
+def render(path, out_path, page: int = 1, bbox=None, zoom: float = 1.0) -> tuple[int, int]:
+    """Render a region of a PDF page or an image; returns the PNG's (width, height)."""
+    if str(path).lower().endswith(".pdf"):
+        return render_pdf(path, page, bbox, zoom, out_path)
+    return render_image(path, bbox, zoom, out_path)
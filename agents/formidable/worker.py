@@ -6,12 +6,21 @@ runs codex exec, uploads all artifacts to S3, updates DynamoDB.
 
 Entry: python3 worker.py
 Environment: JOB_ID, JOBS_BUCKET, INPUT_KEY, FILENAME, USER_ID, AWS_REGION
+
+Pool mode (MODE=pool, WORKER_QUEUE_URL): a long-running task that takes jobs
+from the queue (see job_queue.py) and runs handler() for each, reusing the
+codex credentials and boto3 clients. /tmp/work-* and run.log are reset between
+jobs. ECS allows at most 120 s between SIGTERM and SIGKILL, less than a
+codex run, so SIGTERM stops codex, marks the job queued again and releases
+its message for another worker; a job already past codex finishes its upload
+first.
 """
 
 import json
 import logging
 import os
 import shutil
+import signal
 import subprocess
 import threading
 import time
@@ -21,11 +30,21 @@ from pathlib import Path
 
 import boto3
 
+from artifact_upload import ArtifactUpload, UploadFailed
+from job_queue import SqsJobQueue
+from page_watch import PageWatcher
+from progress_events import ProgressReporter, event_log_from_env
+
 PROMPT_PATH    = Path(__file__).parent / "prompts" / "codex_prompt.md"
 RENDER_TOOL    = Path(__file__).parent / "tools" / "render_page.py"
 CODEX_TIMEOUT  = 540
+# on_tick (mid-run log flush) interval while codex runs.
+TICK_SECONDS   = 30
+# How often a running codex checks for a pool shutdown.
+STOP_POLL_SECONDS = 1
 DYNAMO_TABLE   = "formidable-jobs"
 S3_PREFIX      = "formidable"
+WORK_ROOT      = Path("/tmp")
 
 # ── Logging: file first, then S3 upload on exit ────────────────────────────────
 LOG_PATH = Path("/tmp/run.log")
@@ -37,7 +56,21 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 
 
+_codex_auth_ready = False
+
+
+class Interrupted(Exception):
+    """The pool is shutting down mid-job; the job goes back to the queue."""
+
+
 def _bootstrap_codex_auth() -> None:
+    """Write ~/.codex/auth.json from Secrets Manager, once per process.
+
+    codex refreshes auth.json itself, so later jobs in a pool worker reuse it.
+    """
+    global _codex_auth_ready
+    if _codex_auth_ready and (Path.home() / ".codex" / "auth.json").exists():
+        return
     secret_name = os.environ.get("CODEX_SECRET_NAME", "formidable/codex-auth")
     region      = os.environ.get("AWS_REGION", "ap-south-1")
     try:
@@ -49,11 +82,18 @@ def _bootstrap_codex_auth() -> None:
         (auth_dir / "auth.json").write_text(json.dumps(auth))
         if auth.get("OPENAI_API_KEY"):
             os.environ["OPENAI_API_KEY"] = auth["OPENAI_API_KEY"]
+        _codex_auth_ready = True
         log.info("codex credentials bootstrapped from Secrets Manager")
     except Exception as exc:
         log.warning("could not fetch codex auth: %s", exc)
 
 
+def _install_render_tool(workdir: Path) -> None:
+    """Copy render_page.py, and the renderer it wraps, into the codex workdir."""
+    for tool in (RENDER_TOOL, RENDER_TOOL.with_name("pdf_renderer.py")):
+        shutil.copy(str(tool), str(workdir / tool.name))
+
+
 def _build_prompt(input_name: str) -> str:
     template = PROMPT_PATH.read_text()
     return (
@@ -74,9 +114,12 @@ def _count_pdf_pages(input_path: Path) -> int:
         return 0
 
 
-def _run_codex(workdir: Path, input_name: str, on_page=None, on_tick=None) -> tuple[bool, str]:
-    """Run codex exec, calling on_page(seen) each time a new page_N.png appears,
-    and on_tick() every ~30 s (6 poll ticks) for mid-run log flushing."""
+def _run_codex(workdir: Path, input_name: str, on_page=None, on_tick=None,
+               stop: threading.Event | None = None) -> tuple[bool, str]:
+    """Run codex exec, calling on_page(seen) as soon as a new page_N.png is
+    written (from the watcher thread), and on_tick() every TICK_SECONDS for
+    mid-run log flushing. Returns as soon as codex exits; kills codex and
+    raises Interrupted once stop is set."""
     prompt        = _build_prompt(input_name)
     last_msg_path = workdir / "last_message.txt"
 
@@ -103,29 +146,43 @@ def _run_codex(workdir: Path, input_name: str, on_page=None, on_tick=None) -> tu
     # Drain stdout/stderr in threads to prevent pipe-buffer deadlock
     out_buf: list[str] = []
     err_buf: list[str] = []
-    threading.Thread(target=lambda: out_buf.append(proc.stdout.read()), daemon=True).start()
-    threading.Thread(target=lambda: err_buf.append(proc.stderr.read()), daemon=True).start()
+    readers = [
+        threading.Thread(target=lambda: out_buf.append(proc.stdout.read()), daemon=True),
+        threading.Thread(target=lambda: err_buf.append(proc.stderr.read()), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
 
     proc.stdin.write(prompt)
     proc.stdin.close()
 
-    # Poll for page_N.png files while codex runs
-    seen: set[str] = set()
-    deadline = time.time() + CODEX_TIMEOUT
-    tick = 0
-    while proc.poll() is None:
-        if time.time() > deadline:
-            proc.kill()
-            return False, f"codex timed out after {CODEX_TIMEOUT}s"
-        current = {f.name for f in workdir.glob("page_*.png")}
-        if new := current - seen:
-            seen = current
-            if on_page:
-                on_page(len(seen))
-        tick += 1
-        if on_tick and tick % 6 == 0:
-            on_tick()
-        time.sleep(5)
+    watcher = PageWatcher(workdir, lambda names: on_page(len(names)) if on_page else None)
+    watcher.start()
+    deadline  = time.monotonic() + CODEX_TIMEOUT
+    next_tick = time.monotonic() + TICK_SECONDS
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                proc.kill()
+                proc.wait()
+                return False, f"codex timed out after {CODEX_TIMEOUT}s"
+            if stop is not None and stop.is_set():
+                proc.kill()
+                proc.wait()
+                raise Interrupted("worker shutting down")
+            try:
+                proc.wait(timeout=min(STOP_POLL_SECONDS, remaining))
+                break
+            except subprocess.TimeoutExpired:
+                if time.monotonic() >= next_tick:
+                    next_tick += TICK_SECONDS
+                    if on_tick and remaining > TICK_SECONDS:
+                        on_tick()
+    finally:
+        watcher.stop()
+    for reader in readers:
+        reader.join(timeout=5)
 
     stdout = out_buf[0] if out_buf else ""
     stderr = err_buf[0] if err_buf else ""
@@ -304,36 +361,41 @@ def _send_notification_email(to_addr: str, job_name: str, success: bool) -> None
     _send_email(to_addr, subject, body_text, body_html)
 
 
-def handler(job_id: str, bucket: str, input_key: str, filename: str, user_id: str):
+def handler(job_id: str, bucket: str, input_key: str, filename: str, user_id: str,
+            notification_email: str | None = None, s3=None, dynamo=None,
+            pooled: bool = False, stop: threading.Event | None = None):
+    """Run one job. Pool workers pass their clients and pooled=True, which
+    keeps logging open for the next job, and their stop event: setting it
+    while codex runs raises Interrupted."""
     log.info("worker start job=%s input=%s user=%s", job_id, input_key, user_id)
-    notification_email = os.environ.get("NOTIFICATION_EMAIL", "")
+    if notification_email is None:
+        notification_email = os.environ.get("NOTIFICATION_EMAIL", "")
 
     region = os.environ.get("AWS_REGION", "ap-south-1")
-    s3     = boto3.client("s3",       region_name=region)
-    dynamo = boto3.client("dynamodb", region_name=region)
+    s3     = s3 or boto3.client("s3",       region_name=region)
+    dynamo = dynamo or boto3.client("dynamodb", region_name=region)
 
-    workdir = Path(f"/tmp/work-{uuid.uuid4().hex}")
+    workdir = WORK_ROOT / f"work-{uuid.uuid4().hex}"
     workdir.mkdir(parents=True, exist_ok=True)
 
     def _s3_prefix(suffix):
         return f"{S3_PREFIX}/jobs/{job_id}/{suffix}"
 
-    def _write_progress(step: str, pct: int):
-        """Upload progress.json to S3. Non-blocking — silently skips on failure."""
-        payload = json.dumps({
-            "step": step,
-            "pct":  pct,
-            "ts":   datetime.now(timezone.utc).isoformat(),
-        }).encode()
-        try:
-            s3.put_object(
-                Bucket=bucket,
-                Key=_s3_prefix("progress.json"),
-                Body=payload,
-                ContentType="application/json",
-            )
-        except Exception as exc:
-            log.warning("progress write failed: %s", exc)
+    def _put_progress(snapshot: dict):
+        s3.put_object(
+            Bucket=bucket,
+            Key=_s3_prefix("progress.json"),
+            Body=json.dumps(snapshot).encode(),
+            ContentType="application/json",
+        )
+
+    try:
+        event_log = event_log_from_env(lambda: dynamo)
+    except Exception as exc:
+        log.warning("progress event log unavailable: %s", exc)
+        event_log = None
+    progress = ProgressReporter(job_id, event_log, _put_progress)
+    _write_progress = progress.report
 
     try:
         # Mark processing in DynamoDB
@@ -355,7 +417,7 @@ def handler(job_id: str, bucket: str, input_key: str, filename: str, user_id: st
         _write_progress("Downloading form", 15)
 
         # Copy render tool into workdir
-        shutil.copy(str(RENDER_TOOL), str(workdir / "render_page.py"))
+        _install_render_tool(workdir)
 
         n_pages  = _count_pdf_pages(workdir / input_name)
         page_note = f": split into {n_pages} page{'s' if n_pages != 1 else ''}" if n_pages > 1 else ""
@@ -369,37 +431,46 @@ def handler(job_id: str, bucket: str, input_key: str, filename: str, user_id: st
         def _flush_log() -> None:
             _upload_log(s3, bucket, job_id, shutdown=False)
 
-        ok, msg = _run_codex(workdir, input_name,
-                             on_page=_on_page if n_pages else None,
-                             on_tick=_flush_log)
+        try:
+            ok, msg = _run_codex(workdir, input_name,
+                                 on_page=_on_page if n_pages else None,
+                                 on_tick=_flush_log, stop=stop)
+        except Interrupted:
+            log.info("job %s interrupted by shutdown", job_id)
+            _write_progress("Queued, waiting to start…", 0)
+            raise
 
         output_path   = workdir / "output.xlsx"
         manifest_path = workdir / "crops_manifest.json"
+        published     = False
 
         if ok and output_path.exists():
             _write_progress("Saving results", 85)
 
-            s3.upload_file(str(output_path), bucket, _s3_prefix("output.xlsx"))
-
             page_files = sorted(workdir.glob("page_*.png"))
             crop_files = sorted(workdir.glob("crop_*.png"))
+            meta = _parse_metadata(workdir)
+
+            upload = ArtifactUpload(s3, bucket)
+            upload.add(output_path, _s3_prefix("output.xlsx"))
             for f in page_files:
-                s3.upload_file(str(f), bucket, _s3_prefix(f"pages/{f.name}"))
+                upload.add(f, _s3_prefix(f"pages/{f.name}"))
             for f in crop_files:
-                s3.upload_file(str(f), bucket, _s3_prefix(f"crops/{f.name}"))
-
-            if manifest_path.exists():
-                s3.upload_file(str(manifest_path), bucket, _s3_prefix("crops_manifest.json"))
-
-            meta = _parse_metadata(workdir)
+                upload.add(f, _s3_prefix(f"crops/{f.name}"))
             if meta:
-                s3.put_object(
-                    Bucket=bucket,
-                    Key=_s3_prefix("metadata.json"),
-                    Body=json.dumps(meta).encode(),
-                    ContentType="application/json",
-                )
-
+                meta_path = workdir / "metadata.upload.json"
+                meta_path.write_text(json.dumps(meta))
+                upload.add(meta_path, _s3_prefix("metadata.json"), "application/json")
+            # The manifest goes last: once it exists, everything it names does.
+            if manifest_path.exists():
+                upload.add_last(manifest_path, _s3_prefix("crops_manifest.json"))
+            try:
+                upload.publish()
+                published = True
+            except UploadFailed as exc:
+                ok, msg = False, f"could not save results: {exc}"
+
+        if published:
             n_pages = len(page_files)
             n_crops = len(crop_files)
             log.info("complete pages=%d crops=%d meta=%s", n_pages, n_crops, meta)
@@ -430,6 +501,7 @@ def handler(job_id: str, bucket: str, input_key: str, filename: str, user_id: st
             _update_dynamo(dynamo, job_id, user_id,
                            "SET " + ", ".join(update_parts),
                            attr_values, attr_names)
+            _write_progress("Complete", 100)
             if notification_email:
                 _send_notification_email(notification_email, filename, success=True)
 
@@ -440,14 +512,114 @@ def handler(job_id: str, bucket: str, input_key: str, filename: str, user_id: st
                            "SET #st = :s, #e = :e",
                            {":s": {"S": "failed"}, ":e": {"S": error[:500]}},
                            {"#st": "status", "#e": "error"})
+            _write_progress("Failed", 100)
             if notification_email:
                 _send_notification_email(notification_email, filename, success=False)
 
     finally:
-        _upload_log(s3, bucket, job_id)
+        progress.close()
+        _upload_log(s3, bucket, job_id, shutdown=not pooled)
         shutil.rmtree(workdir, ignore_errors=True)
 
 
+# ── Pool mode ──────────────────────────────────────────────────────────────────
+
+def _reset_log() -> None:
+    """Start run.log afresh so a job's uploaded log holds only its own lines."""
+    for h in logging.getLogger().handlers:
+        h.flush()
+    try:
+        LOG_PATH.write_text("")
+    except OSError as exc:
+        print(f"[worker] WARNING: could not reset run.log: {exc}")
+
+
+def _clean_workdirs() -> None:
+    """Remove work dirs left by a job that died before its own cleanup."""
+    for path in WORK_ROOT.glob("work-*"):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _job_status(dynamo, job_id: str, user_id: str) -> str | None:
+    resp = dynamo.get_item(
+        TableName=DYNAMO_TABLE,
+        Key={"user_id": {"S": user_id}, "job_id": {"S": job_id}},
+        ProjectionExpression="#st",
+        ExpressionAttributeNames={"#st": "status"},
+    )
+    return resp.get("Item", {}).get("status", {}).get("S")
+
+
+def run_pool(queue, s3, dynamo, bucket: str, stop: threading.Event,
+             run_job=None, wait_seconds: int = 20) -> int:
+    """Run queued jobs until stop is set; returns the number run.
+
+    A job whose record is gone or already complete/failed (a redelivered
+    message) is dropped without running. A job interrupted by stop is marked
+    queued again and its message released for another worker.
+    """
+    run_job = run_job or handler
+    ran = 0
+    while not stop.is_set():
+        for receipt, job in queue.receive(wait_seconds):
+            if stop.is_set():
+                queue.release(receipt)
+                break
+            job_id, user_id = job["job_id"], job["user_id"]
+            _clean_workdirs()
+            _reset_log()
+            try:
+                status = _job_status(dynamo, job_id, user_id)
+                if status in (None, "complete", "failed"):
+                    log.info("pool: skipping job %s (status %s)", job_id, status)
+                else:
+                    run_job(job_id=job_id, bucket=bucket, input_key=job["input_key"],
+                            filename=job.get("filename", "input.pdf"), user_id=user_id,
+                            notification_email=job.get("notification_email", ""),
+                            s3=s3, dynamo=dynamo, pooled=True, stop=stop)
+                    ran += 1
+            except Interrupted:
+                log.info("pool: job %s back to the queue", job_id)
+                _update_dynamo(dynamo, job_id, user_id,
+                               "SET #st = :s",
+                               {":s": {"S": "queued"}},
+                               {"#st": "status"})
+                queue.release(receipt)
+                break
+            except Exception as exc:
+                log.exception("pool: job %s crashed", job_id)
+                _update_dynamo(dynamo, job_id, user_id,
+                               "SET #st = :s, #e = :e",
+                               {":s": {"S": "failed"}, ":e": {"S": f"worker error: {exc}"[:500]}},
+                               {"#st": "status", "#e": "error"})
+            queue.delete(receipt)
+    _clean_workdirs()
+    return ran
+
+
+def main_pool() -> int:
+    region = os.environ.get("AWS_REGION", "ap-south-1")
+    s3     = boto3.client("s3",       region_name=region)
+    dynamo = boto3.client("dynamodb", region_name=region)
+    queue  = SqsJobQueue(boto3.client("sqs", region_name=region),
+                         os.environ["WORKER_QUEUE_URL"])
+
+    stop = threading.Event()
+
+    def _drain(signum, frame):
+        # ECS sends SIGTERM on scale-in/deploy, then SIGKILL after stopTimeout
+        # (120 s at most on Fargate): a running codex is stopped and its job
+        # requeued rather than finished.
+        log.info("pool: SIGTERM, requeueing the current job")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, _drain)
+    _bootstrap_codex_auth()
+    ran = run_pool(queue, s3, dynamo, os.environ.get("JOBS_BUCKET", "formidable-storage"), stop)
+    log.info("pool: exiting after %d jobs", ran)
+    return 0
+
+
 def run_regression() -> int:
     """Nightly regression: run codex on a frozen golden form, tolerant-diff the
     result against the known-good xlsx, and email a report with the xlsx + page
@@ -501,7 +673,7 @@ def run_regression() -> int:
                     f"Error: {exc}\n\nRun regression/upload_golden.sh to (re)upload the fixture.")
             return _finish(False, "[FAIL] Formidable nightly regression — fixture missing", body, [])
 
-        shutil.copy(str(RENDER_TOOL), str(workdir / "render_page.py"))
+        _install_render_tool(workdir)
 
         ok, msg = _run_codex(workdir, input_name)
         output_path = workdir / "output.xlsx"
@@ -554,6 +726,8 @@ if __name__ == "__main__":
 
     if os.environ.get("MODE") == "regression":
         sys.exit(run_regression())
+    if os.environ.get("MODE") == "pool":
+        sys.exit(main_pool())
 
     _bootstrap_codex_auth()
     handler(
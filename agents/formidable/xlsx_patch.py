@@ -0,0 +1,194 @@
+"""Patch individual cells of an .xlsx without loading the workbook.
+
+Review corrections touch a handful of cells, but openpyxl parses and
+re-serializes every sheet, style and shared string to change them. Here only
+the worksheet XML of sheets with corrections is edited, as text: each target
+<c> element is replaced by an inline-string cell that keeps its style (or
+inserted in column order, creating the <row> if needed). Every other part of
+the package is copied unchanged.
+
+Corrections use the review UI's keys: "page:row:col" (1-based sheet, 1-based
+row, 0-based column) or "row:col" on the active sheet. Keys that don't parse
+or name a missing sheet are skipped, as before. Anything the text patcher
+doesn't handle (cells without r=, formula cells) falls back to openpyxl.
+"""
+
+import io
+import posixpath
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+_SHEET_RE = re.compile(r"<sheet\b[^>]*?/>")
+_ATTR_RE = re.compile(r'([\w:]+)="([^"]*)"')
+_REL_RE = re.compile(r"<Relationship\b[^>]*?/>")
+_ACTIVE_TAB_RE = re.compile(r'<workbookView\b[^>]*?\bactiveTab="(\d+)"')
+_SHEET_DATA_RE = re.compile(r"<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>", re.S)
+_ROW_RE = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+_CELL_RE = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+_SPANS_RE = re.compile(r'\sspans="[^"]*"')
+_ILLEGAL_RE = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]")
+
+
+class _Unsupported(Exception):
+    """The sheet XML needs the openpyxl fallback."""
+
+
+def parse_corrections(corrections: dict) -> dict[tuple, str]:
+    """{(sheet, row, col): value}; sheet is a 0-based index or None (active sheet)."""
+    cells = {}
+    for key, value in corrections.items():
+        try:
+            parts = key.split(":")
+            if len(parts) == 3:
+                sheet = max(0, int(parts[0]) - 1)
+                row, col = int(parts[1]), int(parts[2]) + 1
+            else:
+                row_str, col_str = parts
+                sheet, row, col = None, int(row_str), int(col_str) + 1
+        except (AttributeError, ValueError):
+            continue
+        if row < 1 or col < 1 or not isinstance(value, str) or _ILLEGAL_RE.search(value):
+            continue
+        cells[(sheet, row, col)] = value
+    return cells
+
+
+def column_letter(col: int) -> str:
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _column_number(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def _attrs(fragment: str) -> dict:
+    return dict(_ATTR_RE.findall(fragment))
+
+
+def _sheet_paths(zf: zipfile.ZipFile) -> tuple[list[str], int]:
+    """Worksheet part names in workbook order, and the active sheet index."""
+    workbook = zf.read("xl/workbook.xml").decode("utf-8")
+    rels = {}
+    for rel in _REL_RE.findall(zf.read("xl/_rels/workbook.xml.rels").decode("utf-8")):
+        attrs = _attrs(rel)
+        target = attrs.get("Target", "")
+        rels[attrs.get("Id")] = (target.lstrip("/") if target.startswith("/")
+                                 else posixpath.normpath(posixpath.join("xl", target)))
+    paths = [rels.get(_attrs(sheet).get("r:id")) for sheet in _SHEET_RE.findall(workbook)]
+    active = _ACTIVE_TAB_RE.search(workbook)
+    return paths, int(active.group(1)) if active else 0
+
+
+def _cell_xml(ref: str, attrs: str, value: str) -> str:
+    style = _attrs(attrs).get("s")
+    style_attr = f' s="{style}"' if style is not None else ""
+    return (f'<c r="{ref}"{style_attr} t="inlineStr">'
+            f'<is><t xml:space="preserve">{escape(value)}</t></is></c>')
+
+
+def _patch_row(row_num: int, body: str, values: dict[int, str]) -> str:
+    cells, pos, out = [], 0, []
+    for match in _CELL_RE.finditer(body):
+        ref = _attrs(match.group(1)).get("r")
+        if not ref:
+            raise _Unsupported("cell without r attribute")
+        col = _column_number(ref.rstrip("0123456789"))
+        cells.append((col, match))
+    pending = dict(sorted(values.items()))
+    for col, match in cells:
+        out.append(body[pos:match.start()])
+        for new_col in [c for c in pending if c < col]:
+            out.append(_cell_xml(f"{column_letter(new_col)}{row_num}", "", pending.pop(new_col)))
+        if col in pending:
+            if match.group(2) and "<f" in match.group(2):
+                raise _Unsupported("formula cell")
+            out.append(_cell_xml(f"{column_letter(col)}{row_num}", match.group(1),
+                                 pending.pop(col)))
+        else:
+            out.append(match.group(0))
+        pos = match.end()
+    out.append(body[pos:])
+    for new_col, value in pending.items():
+        out.append(_cell_xml(f"{column_letter(new_col)}{row_num}", "", value))
+    return "".join(out)
+
+
+def patch_sheet_xml(xml: str, values: dict[tuple[int, int], str]) -> str:
+    """Sheet XML with {(row, col): value} written as inline strings."""
+    by_row: dict[int, dict[int, str]] = {}
+    for (row, col), value in values.items():
+        by_row.setdefault(row, {})[col] = value
+    data = _SHEET_DATA_RE.search(xml)
+    if data is None:
+        raise _Unsupported("no sheetData")
+    body = data.group(1) or ""
+
+    out, pos = [], 0
+    for match in _ROW_RE.finditer(body):
+        row_attrs = match.group(1)
+        row_num = int(_attrs(row_attrs).get("r", 0))
+        if not row_num:
+            raise _Unsupported("row without r attribute")
+        out.append(body[pos:match.start()])
+        for new_row in sorted(r for r in by_row if r < row_num):
+            out.append(f'<row r="{new_row}">{_patch_row(new_row, "", by_row.pop(new_row))}</row>')
+        if row_num in by_row:
+            cells = _patch_row(row_num, match.group(2) or "", by_row.pop(row_num))
+            # spans is only a load hint, and may no longer cover the row.
+            out.append(f"<row{_SPANS_RE.sub('', row_attrs)}>{cells}</row>")
+        else:
+            out.append(match.group(0))
+        pos = match.end()
+    out.append(body[pos:])
+    for new_row in sorted(by_row):
+        out.append(f'<row r="{new_row}">{_patch_row(new_row, "", by_row[new_row])}</row>')
+    return f"{xml[:data.start()]}<sheetData>{''.join(out)}</sheetData>{xml[data.end():]}"
+
+
+def _apply_openpyxl(xlsx: bytes, cells: dict[tuple, str]) -> bytes:
+    import openpyxl
+    wb = openpyxl.load_workbook(io.BytesIO(xlsx))
+    for (sheet, row, col), value in cells.items():
+        try:
+            ws = wb.active if sheet is None else wb.worksheets[sheet]
+            ws.cell(row=row, column=col).value = value
+        except Exception:
+            pass
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def apply_corrections(xlsx: bytes, corrections: dict) -> bytes:
+    """output.xlsx bytes with review corrections applied."""
+    cells = parse_corrections(corrections)
+    try:
+        with zipfile.ZipFile(io.BytesIO(xlsx)) as zf:
+            paths, active = _sheet_paths(zf)
+            edits: dict[str, dict[tuple[int, int], str]] = {}
+            for (sheet, row, col), value in cells.items():
+                index = active if sheet is None else sheet
+                if index >= len(paths):
+                    continue
+                if paths[index] is None:
+                    raise _Unsupported("sheet part not found")
+                edits.setdefault(paths[index], {})[(row, col)] = value
+            patched = {
+                path: patch_sheet_xml(zf.read(path).decode("utf-8"), values).encode("utf-8")
+                for path, values in edits.items()
+            }
+            buf = io.BytesIO()
+            with zipfile.ZipFile(buf, "w") as out:
+                for info in zf.infolist():
+                    out.writestr(info, patched.get(info.filename) or zf.read(info))
+            return buf.getvalue()
+    except (_Unsupported, KeyError, zipfile.BadZipFile):
+        return _apply_openpyxl(xlsx, cells)
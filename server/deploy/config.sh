@@ -16,6 +16,12 @@ export LAMBDA_ROLE_NAME="form-idable-lambda-role"
 # API Gateway
 export APIGW_NAME="form-idable-api"
 
+# S3 bucket the server writes to: staged PDFs for async Textract jobs
+# (textract-jobs/), format=url workbooks (workbooks/), the s3 Textract cache
+# (textract-cache/) and persisted sessions indexes (sessions-index/).
+# Must match the ARNs in lambda-policy.json.
+export SERVER_BUCKET="form-idable-server-data"
+
 # Cognito — fetch from S3 auth config (override URL via AUTH_CONFIG_URL env var)
 export AUTH_CONFIG_URL="${AUTH_CONFIG_URL:-https://fomomon.s3.ap-south-1.amazonaws.com/auth_config.json}"
 
@@ -17,7 +17,7 @@ docker push "${ECR_URI}:latest"
 echo "=== Lambda function: ${LAMBDA_FUNCTION} ==="
 ROLE_ARN=$(aws iam get-role --role-name "$LAMBDA_ROLE_NAME" --query 'Role.Arn' --output text)
 
-LAMBDA_ENV='Variables={AWS_LWA_REMOVE_BASE_PATH=/prod}'
+LAMBDA_ENV="Variables={AWS_LWA_REMOVE_BASE_PATH=/prod,TEXTRACT_JOBS_BUCKET=${SERVER_BUCKET},TEXTRACT_CACHE_BUCKET=${SERVER_BUCKET},SESSIONS_INDEX_BUCKET=${SERVER_BUCKET}}"
 
 if aws lambda get-function --function-name "$LAMBDA_FUNCTION" --region "$AWS_REGION" &>/dev/null; then
   echo "  updating function code..."
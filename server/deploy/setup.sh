@@ -1,5 +1,5 @@
 #!/usr/bin/env bash
-# One-time idempotent infra setup: ECR, IAM, API Gateway + JWT authorizer.
+# One-time idempotent infra setup: ECR, S3, IAM, API Gateway + JWT authorizer.
 set -euo pipefail
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 source "$SCRIPT_DIR/config.sh"
@@ -124,6 +124,35 @@ else
   echo "  created"
 fi
 
+# ── 1b. Server data bucket ─────────────────────────────────────
+echo "→ S3 bucket: ${SERVER_BUCKET}"
+if aws s3api head-bucket --bucket "$SERVER_BUCKET" &>/dev/null; then
+  echo "  already exists"
+else
+  aws s3api create-bucket \
+    --bucket "$SERVER_BUCKET" \
+    --create-bucket-configuration "LocationConstraint=${AWS_REGION}" \
+    --region "$AWS_REGION" \
+    --output text >/dev/null
+  aws s3api put-public-access-block \
+    --bucket "$SERVER_BUCKET" \
+    --public-access-block-configuration \
+      "BlockPublicAcls=true,IgnorePublicAcls=true,BlockPublicPolicy=true,RestrictPublicBuckets=true"
+  echo "  created"
+fi
+# Staged PDFs are deleted once their job is read; expire leftovers (jobs never
+# polled to completion), workbooks, whose URLs last an hour, and batch page
+# images uploaded for /api/upload/batch/s3.
+aws s3api put-bucket-lifecycle-configuration \
+  --bucket "$SERVER_BUCKET" \
+  --lifecycle-configuration '{"Rules": [
+    {"ID": "textract-jobs", "Status": "Enabled", "Filter": {"Prefix": "textract-jobs/"}, "Expiration": {"Days": 2}},
+    {"ID": "workbooks", "Status": "Enabled", "Filter": {"Prefix": "workbooks/"}, "Expiration": {"Days": 1}},
+    {"ID": "uploads", "Status": "Enabled", "Filter": {"Prefix": "uploads/"}, "Expiration": {"Days": 1}},
+    {"ID": "textract-cache", "Status": "Enabled", "Filter": {"Prefix": "textract-cache/"}, "Expiration": {"Days": 30}}
+  ]}'
+echo "  lifecycle rules applied"
+
 # ── 2. IAM role ─────────────────────────────────────────────────
 ROLE_ARN="arn:aws:iam::${AWS_ACCOUNT_ID}:role/${LAMBDA_ROLE_NAME}"
 echo "→ IAM role: ${LAMBDA_ROLE_NAME}"
@@ -149,6 +178,10 @@ echo "  applied"
 ROLE_ARN=$(aws iam get-role --role-name "$LAMBDA_ROLE_NAME" --query 'Role.Arn' --output text)
 
 # ── 3. API Gateway HTTP API ─────────────────────────────────────
+# Gateway CORS replaces the app's CORSMiddleware headers, so every header a
+# browser client reads must be exposed here (X-Next-Cursor: agents/formidable
+# job listing, which shares this gateway).
+CORS_CONFIG="AllowOrigins=*,AllowMethods=GET,POST,OPTIONS,AllowHeaders=content-type,authorization,ExposeHeaders=X-Form-Summary,X-Form-Pages,X-Next-Cursor,MaxAge=3600"
 echo "→ API Gateway: ${APIGW_NAME}"
 APIGW_ID=$(aws apigatewayv2 get-apis --region "$AWS_REGION" \
   --query "Items[?Name=='${APIGW_NAME}'].ApiId | [0]" --output text 2>/dev/null || echo "None")
@@ -157,12 +190,18 @@ if [ "$APIGW_ID" = "None" ] || [ -z "$APIGW_ID" ]; then
   APIGW_ID=$(aws apigatewayv2 create-api \
     --name "$APIGW_NAME" \
     --protocol-type HTTP \
-    --cors-configuration "AllowOrigins=*,AllowMethods=GET,POST,OPTIONS,AllowHeaders=content-type,authorization,ExposeHeaders=X-Form-Summary,MaxAge=3600" \
+    --cors-configuration "$CORS_CONFIG" \
     --region "$AWS_REGION" \
     --query 'ApiId' --output text)
   echo "  created: ${APIGW_ID}"
 else
   echo "  already exists: ${APIGW_ID}"
+  aws apigatewayv2 update-api \
+    --api-id "$APIGW_ID" \
+    --cors-configuration "$CORS_CONFIG" \
+    --region "$AWS_REGION" \
+    --output text >/dev/null
+  echo "  CORS configuration updated"
 fi
 
 # ── 4. JWT authorizer ───────────────────────────────────────────
@@ -237,6 +276,7 @@ create_route "GET /api/health" "false"
 create_route "POST /api/{proxy+}" "true"
 create_route "GET /api/sessions/{org}" "true"
 create_route "GET /api/sites/{org}" "true"
+create_route "GET /api/upload/pdf/{job_id}" "true"
 
 # ── 7. Stage (prod, auto-deploy) ────────────────────────────────
 echo "→ Stage: prod"
@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from routers import analyze, sessions, upload
+from services.textract_cache import default_cache
 
 app = FastAPI(title="form-idable API")
 
@@ -11,7 +12,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Form-Summary"],
+    expose_headers=["X-Form-Summary", "X-Form-Pages"],
 )
 
 app.include_router(analyze.router, prefix="/api")
@@ -21,4 +22,4 @@ app.include_router(upload.router, prefix="/api")
 
 @app.get("/api/health")
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "textract_cache": default_cache().stats()}
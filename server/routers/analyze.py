@@ -22,7 +22,7 @@ textract = TextractService()
 async def analyze_image(image: UploadFile = File(...)):
     """Analyze an image: send to Textract, parse with textractor, return diagnostics."""
     image_bytes = await image.read()
-    textract_response = textract.analyze_sync(image_bytes)
+    textract_response = await textract.analyze(image_bytes)
     result = extract(textract_response)
     return result
 
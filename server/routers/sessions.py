@@ -4,11 +4,12 @@ import logging
 
 from fastapi import APIRouter, HTTPException
 
+from services.aws_executor import run_blocking
 from services.sessions_service import SessionsService
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-_service = SessionsService()
+_service = SessionsService.from_env()
 
 
 @router.get("/sessions/{org}")
@@ -20,7 +21,7 @@ async def get_sessions(org: str, bucket: str = "fomomon"):
     processing form images via POST /api/upload (Textract).
     """
     try:
-        return _service.get_sessions(org, bucket)
+        return await run_blocking(_service.get_sessions, org, bucket)
     except Exception:
         logger.exception("Failed to fetch sessions for org=%s bucket=%s", org, bucket)
         raise HTTPException(status_code=500, detail="Failed to fetch sessions")
@@ -33,7 +34,7 @@ async def get_sites(org: str, bucket: str = "fomomon"):
     Sites contain GPS locations, site names, and reference images.
     """
     try:
-        return _service.get_sites(org, bucket)
+        return await run_blocking(_service.get_sites, org, bucket)
     except Exception:
         logger.exception("Failed to fetch sites for org=%s bucket=%s", org, bucket)
         raise HTTPException(status_code=500, detail="Failed to fetch sites config")
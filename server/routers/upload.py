@@ -1,14 +1,38 @@
 """
 Upload endpoint: accepts an image or raw Textract JSON,
 runs extraction + Excel generation, returns JSON payload.
+
+Page images reach /upload/batch either in the multipart body (small batches:
+Lambda caps request bodies at 6 MB) or, for phone-photo batches, through S3:
+/upload/batch/urls hands out presigned PUT URLs and /upload/batch/s3 has
+Textract read the uploaded images in place.
+
+Endpoints that return a workbook take `?format=`:
+  json  (default) workbook base64-encoded in the JSON body
+  xlsx  workbook streamed as the body, summary in the X-Form-Summary header
+        (and, for batches and PDF jobs, per-page status in X-Form-Pages)
+  url   workbook uploaded to S3; JSON body with a presigned `xlsx_url`
 """
 
+import asyncio
+import json
 import logging
+import os
+import uuid
+from functools import partial
+from pathlib import Path
+from typing import Literal
 
+from botocore.exceptions import ClientError
 from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
 
+from services import textract_jobs
+from services.aws_executor import run_blocking
+from services.s3_service import S3Service
 from services.table_extractor import extract
-from services.upload_payload import build_upload_payload
+from services.excel_service import iter_xlsx, to_xlsx_sheets
+from services.upload_payload import build_batch_parts, build_upload_parts, encode_xlsx
 from services.textract_service import TextractService
 
 logger = logging.getLogger(__name__)
@@ -16,27 +40,290 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 textract = TextractService()
 
+# Textract AnalyzeDocument has a low per-account TPS quota; cap how many
+# pages of one batch are in flight at once.
+BATCH_CONCURRENCY = int(os.environ.get("TEXTRACT_BATCH_CONCURRENCY", "8"))
+BATCH_MAX_IMAGES = int(os.environ.get("UPLOAD_BATCH_MAX_IMAGES", "50"))
+# Multipart batches travel in the request body, which Lambda rejects above
+# 6 MB (the HTTP API above 10 MB); a few phone photos exceed that. Bigger
+# batches go through S3 (/upload/batch/urls, then /upload/batch/s3).
+BATCH_MAX_BYTES = int(os.environ.get("UPLOAD_BATCH_MAX_BYTES", str(5 * 1024 * 1024)))
+
+# Async PDF jobs: Textract reads the document from S3, so it is staged here first.
+JOBS_BUCKET = os.environ.get("TEXTRACT_JOBS_BUCKET", "")
+JOBS_PREFIX = os.environ.get("TEXTRACT_JOBS_PREFIX", "textract-jobs/")
+# Upper bound on server-side long polling, well under the Lambda timeout.
+MAX_JOB_WAIT = 20
+# S3 batches: page images are PUT under this prefix of TEXTRACT_JOBS_BUCKET.
+IMAGES_PREFIX = os.environ.get("UPLOAD_IMAGES_PREFIX", "uploads/")
+IMAGES_URL_EXPIRY = 900
+
+ResponseFormat = Literal["json", "xlsx", "url"]
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# format=url: workbooks are uploaded here and handed out as presigned GET URLs.
+XLSX_BUCKET = os.environ.get("UPLOAD_XLSX_BUCKET", JOBS_BUCKET)
+XLSX_PREFIX = os.environ.get("UPLOAD_XLSX_PREFIX", "workbooks/")
+XLSX_URL_EXPIRY = int(os.environ.get("UPLOAD_XLSX_URL_EXPIRY", "3600"))
+# format=xlsx: per-page error messages are cut to this length in X-Form-Pages.
+MAX_HEADER_ERROR = 200
+
+_s3 = None
+_jobs = None
+
+
+def _s3_service() -> S3Service:
+    global _s3
+    if _s3 is None:
+        _s3 = S3Service()
+    return _s3
+
+
+def _job_store() -> textract_jobs.JobStore:
+    global _jobs
+    if _jobs is None:
+        _jobs = textract_jobs.JobStore(_s3_service(), JOBS_BUCKET, JOBS_PREFIX)
+    return _jobs
+
+
+def _page_statuses(pages: list[dict]) -> list[dict]:
+    """Per-page outcome for the X-Form-Pages header: page, filename, status, sheet or error.
+
+    Rows and bboxes are left out to keep the header small; errors are truncated.
+    """
+    statuses = []
+    for page in pages:
+        status = {key: page[key] for key in ("page", "filename", "status", "sheet") if key in page}
+        if "error" in page:
+            status["error"] = page["error"][:MAX_HEADER_ERROR]
+        statuses.append(status)
+    return statuses
+
+
+async def _workbook_response(payload: dict, sheets: list[tuple[str, dict]],
+                             format: ResponseFormat):
+    """Return payload (rows/pages + summary) with the workbook in the requested format."""
+    if not sheets and format != "json":
+        raise HTTPException(502, "no pages were extracted")
+    if format == "xlsx":
+        headers = {
+            "X-Form-Summary": json.dumps(payload["summary"], separators=(",", ":")),
+            "Content-Disposition": 'attachment; filename="form.xlsx"',
+        }
+        if "pages" in payload:
+            headers["X-Form-Pages"] = json.dumps(_page_statuses(payload["pages"]),
+                                                 separators=(",", ":"))
+        return StreamingResponse(iter_xlsx(sheets), media_type=XLSX_MEDIA_TYPE,
+                                 headers=headers)
+    if format == "url":
+        if not XLSX_BUCKET:
+            raise HTTPException(503, "UPLOAD_XLSX_BUCKET is not configured")
+        key = f"{XLSX_PREFIX}{uuid.uuid4()}.xlsx"
+        data = await run_blocking(to_xlsx_sheets, sheets)
+        try:
+            await run_blocking(_s3_service().put_bytes, XLSX_BUCKET, key, data,
+                               XLSX_MEDIA_TYPE)
+        except Exception as e:
+            logger.exception("Failed to upload workbook to s3://%s/%s", XLSX_BUCKET, key)
+            raise HTTPException(status_code=502, detail=f"S3 error: {e}")
+        return {
+            "xlsx_url": _s3_service().presign_get(XLSX_BUCKET, key, XLSX_URL_EXPIRY),
+            "xlsx_expires_in": XLSX_URL_EXPIRY,
+            **payload,
+        }
+    return {"xlsx": await run_blocking(encode_xlsx, sheets), **payload}
+
 
 @router.post("/upload")
-async def upload_image(image: UploadFile = File(...)):
+async def upload_image(image: UploadFile = File(...), format: ResponseFormat = "json"):
     """Upload an image → Textract → extract → return workbook + bboxes."""
     image_bytes = await image.read()
     try:
-        textract_response = textract.analyze_sync(image_bytes)
+        textract_response = await textract.analyze(image_bytes)
     except Exception as e:
         logger.exception("Textract call failed")
         raise HTTPException(status_code=502, detail=f"Textract error: {e}")
-    result = extract(textract_response)
-    return build_upload_payload(result)
+    result = await run_blocking(extract, textract_response)
+    return await _workbook_response(*build_upload_parts(result), format)
+
+
+async def _batch_response(sources: list[tuple[str, object]], format: ResponseFormat):
+    """Analyze (filename, analyze) pages concurrently → one workbook, one sheet per page.
+
+    analyze() returns the page's Textract response. Pages are analyzed at most
+    TEXTRACT_BATCH_CONCURRENCY at a time and extracted as each response
+    arrives, so the batch takes roughly as long as its slowest page. A failed
+    page is reported in `pages` and left out of the workbook; the request
+    only fails if every page does.
+    """
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def process(filename: str, analyze) -> dict:
+        page = {"filename": filename}
+        try:
+            async with limit:
+                textract_response = await analyze()
+            page["result"] = await run_blocking(extract, textract_response)
+        except Exception as e:
+            logger.exception("Batch page failed: %s", filename)
+            page["error"] = str(e)
+        return page
+
+    pages = await asyncio.gather(*(process(filename, analyze) for filename, analyze in sources))
+    if not any("result" in page for page in pages):
+        raise HTTPException(502, f"Textract error on every page: {pages[0].get('error')}")
+    return await _workbook_response(*build_batch_parts(pages), format)
+
+
+@router.post("/upload/batch")
+async def upload_batch(images: list[UploadFile] = File(...), format: ResponseFormat = "json"):
+    """Upload many page images → parallel Textract → one workbook, one sheet per page.
+
+    The images travel in the request body, so the batch must stay under
+    UPLOAD_BATCH_MAX_BYTES (the gateway rejects bodies over 6 MB anyway);
+    use /upload/batch/urls and /upload/batch/s3 for phone-photo batches.
+    """
+    if not images or len(images) > BATCH_MAX_IMAGES:
+        raise HTTPException(400, f"send between 1 and {BATCH_MAX_IMAGES} images")
+    if sum(image.size or 0 for image in images) > BATCH_MAX_BYTES:
+        raise HTTPException(413, f"batch is over {BATCH_MAX_BYTES} bytes; upload the images "
+                                 "through /api/upload/batch/urls and /api/upload/batch/s3")
+
+    async def analyze(image: UploadFile) -> dict:
+        return await textract.analyze(await image.read())
+
+    return await _batch_response([(image.filename, partial(analyze, image)) for image in images],
+                                 format)
+
+
+@router.post("/upload/batch/urls")
+async def batch_upload_urls(request: Request):
+    """Presigned PUT URLs for a batch's page images ({"filenames": [...]}).
+
+    The client PUTs each image to its `url`, then posts the `key`s to
+    /upload/batch/s3. Images expire with the bucket's lifecycle rule.
+    """
+    if not JOBS_BUCKET:
+        raise HTTPException(503, "TEXTRACT_JOBS_BUCKET is not configured")
+    filenames = (await request.json()).get("filenames") or []
+    if not 1 <= len(filenames) <= BATCH_MAX_IMAGES:
+        raise HTTPException(400, f"send between 1 and {BATCH_MAX_IMAGES} filenames")
+    batch_id = uuid.uuid4()
+    uploads = []
+    for index, filename in enumerate(filenames):
+        key = f"{IMAGES_PREFIX}{batch_id}/{index}{Path(str(filename)).suffix.lower()}"
+        uploads.append({"filename": filename, "key": key,
+                        "url": _s3_service().presign_put(JOBS_BUCKET, key, IMAGES_URL_EXPIRY)})
+    return {"uploads": uploads, "expires_in": IMAGES_URL_EXPIRY}
+
+
+@router.post("/upload/batch/s3")
+async def upload_batch_s3(request: Request, format: ResponseFormat = "json"):
+    """Same as /upload/batch for images uploaded through /upload/batch/urls.
+
+    Body: {"images": [{"key": ..., "filename": ...}, ...]}, in page order.
+    Textract reads each image from S3, so the request body stays small.
+    """
+    if not JOBS_BUCKET:
+        raise HTTPException(503, "TEXTRACT_JOBS_BUCKET is not configured")
+    images = (await request.json()).get("images") or []
+    if not 1 <= len(images) <= BATCH_MAX_IMAGES:
+        raise HTTPException(400, f"send between 1 and {BATCH_MAX_IMAGES} images")
+    keys = [image.get("key") if isinstance(image, dict) else None for image in images]
+    if not all(isinstance(key, str) and key.startswith(IMAGES_PREFIX) for key in keys):
+        raise HTTPException(400, "each image needs a `key` from /api/upload/batch/urls")
+    return await _batch_response(
+        [(image.get("filename") or key, partial(textract.analyze_s3, JOBS_BUCKET, key))
+         for image, key in zip(images, keys)],
+        format)
+
+
+@router.post("/upload/pdf", status_code=202)
+async def upload_pdf(document: UploadFile = File(...)):
+    """Upload a multi-page PDF → S3 → async Textract job. Returns the job id.
+
+    Poll GET /api/upload/pdf/{job_id} for the result.
+    """
+    if not JOBS_BUCKET:
+        raise HTTPException(503, "TEXTRACT_JOBS_BUCKET is not configured")
+    data = await document.read()
+    key = f"{JOBS_PREFIX}{uuid.uuid4()}.pdf"
+    try:
+        await run_blocking(_s3_service().put_bytes, JOBS_BUCKET, key, data, "application/pdf")
+        job_id = await run_blocking(textract.start_document_job, JOBS_BUCKET, key)
+    except Exception as e:
+        logger.exception("Failed to start Textract job for %s", document.filename)
+        raise HTTPException(status_code=502, detail=f"Textract error: {e}")
+    try:
+        await run_blocking(_job_store().record, job_id, key)
+    except Exception:
+        # The job still runs; only the cleanup of its staged PDF is lost.
+        logger.exception("Failed to record Textract job %s", job_id)
+    return {"job_id": job_id, "status": textract_jobs.IN_PROGRESS}
+
+
+def _extract_pages(job_id: str, blocks: list[dict]) -> list[dict]:
+    """Run the extractor on each page of a finished job (CPU-bound: call off the loop)."""
+    pages = []
+    for number, page_response in enumerate(textract_jobs.split_pages(blocks), 1):
+        try:
+            pages.append({"filename": f"page {number}", "result": extract(page_response)})
+        except Exception as e:
+            logger.exception("Extraction failed for job %s page %d", job_id, number)
+            pages.append({"filename": f"page {number}", "error": str(e)})
+    return pages
+
+
+@router.get("/upload/pdf/{job_id}")
+async def get_pdf_job(job_id: str, wait: float = 0, format: ResponseFormat = "json"):
+    """Job status; once finished, the workbook payload (one sheet per page).
+
+    `wait` (seconds, max 20) long-polls with backoff before answering, so
+    clients can poll less often; only the probes use the AWS pool. A finished
+    job is extracted once and answered from its stored result afterwards (see
+    textract_jobs.JobStore). An unknown or expired job id is a 404.
+    """
+    if not JOBS_BUCKET:
+        raise HTTPException(503, "TEXTRACT_JOBS_BUCKET is not configured")
+    wait = max(0.0, min(wait, MAX_JOB_WAIT))
+    store = _job_store()
+    try:
+        finished = await run_blocking(store.finished, job_id)
+    except Exception:
+        logger.exception("Failed to read stored result of Textract job %s", job_id)
+        finished = None
+    if finished is None:
+        try:
+            job = await textract.wait_document_job(job_id, wait)
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "InvalidJobIdException":
+                raise HTTPException(404, f"unknown or expired Textract job: {job_id}")
+            logger.exception("Failed to fetch Textract job %s", job_id)
+            raise HTTPException(status_code=502, detail=f"Textract error: {e}")
+        except Exception as e:
+            logger.exception("Failed to fetch Textract job %s", job_id)
+            raise HTTPException(status_code=502, detail=f"Textract error: {e}")
+        if job["status"] == textract_jobs.IN_PROGRESS:
+            return {"job_id": job_id, "status": job["status"]}
+        finished = {"status": job["status"], "warnings": job["warnings"], "error": job["error"]}
+        if job["status"] != textract_jobs.FAILED:
+            finished["pages"] = await run_blocking(_extract_pages, job_id, job["blocks"])
+        await run_blocking(store.finish, job_id, finished)
+
+    status = finished["status"]
+    if status == textract_jobs.FAILED:
+        return {"job_id": job_id, "status": status, "error": finished["error"]}
+    payload, sheets = build_batch_parts(finished["pages"])
+    payload = {"job_id": job_id, "status": status, "warnings": finished["warnings"], **payload}
+    return await _workbook_response(payload, sheets, format)
 
 
 @router.post("/upload/json")
-async def upload_json(request: Request):
+async def upload_json(request: Request, format: ResponseFormat = "json"):
     """Accept raw Textract JSON → extract → return workbook + bboxes.
 
     Useful for testing with existing files from cloud/output/ without
     spending on Textract API calls.
     """
     textract_response = await request.json()
-    result = extract(textract_response)
-    return build_upload_payload(result)
+    result = await run_blocking(extract, textract_response)
+    return await _workbook_response(*build_upload_parts(result), format)
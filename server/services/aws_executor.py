@@ -0,0 +1,37 @@
+"""
+Bounded thread pool for blocking boto3 calls made from async routes.
+
+boto3 is synchronous: calling it directly inside an `async def` route stalls
+the event loop (and every other request on the worker, /api/health included)
+for the whole Textract/S3 round trip. Routes hand those calls to run_blocking()
+instead, which runs them on a dedicated pool capped at AWS_MAX_CONCURRENCY
+threads. Calls beyond the cap queue in the pool rather than on the event loop.
+
+boto3 clients are thread-safe; their HTTP pool is sized to the same cap via
+client_config() so threads don't wait on connections.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.config import Config
+
+AWS_MAX_CONCURRENCY = int(os.environ.get("AWS_MAX_CONCURRENCY", "32"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=AWS_MAX_CONCURRENCY,
+    thread_name_prefix="aws",
+)
+
+
+def client_config(**kwargs) -> Config:
+    """botocore Config whose connection pool matches the executor size."""
+    return Config(max_pool_connections=AWS_MAX_CONCURRENCY, **kwargs)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call on the AWS pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
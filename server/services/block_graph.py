@@ -0,0 +1,370 @@
+"""
+Single-pass Textract block graph: a fast stand-in for textractor's Document.
+
+textractor's Document.open builds a full entity graph (layouts, lines, reading
+order, linearization configs) for every response, most of which extract()
+never reads. On dense tree-plot responses that parsing dominates CPU time.
+parse() indexes Blocks by Id once and builds only what table_extractor reads:
+
+    doc.tables      tables with table_cells / _get_table_cells / words /
+                    row_count / column_count, cells with text / confidence /
+                    row_index / col_index / col_span / is_column_header / bbox
+    doc.key_values  key-value pairs with key (words) and value (text, words)
+    doc.counts      block / entity / text type counts for diagnostics
+
+Semantics follow textractor (see test/test_block_graph_parity.py):
+  - confidences are Block Confidence / 100
+  - tables and key-values are taken per PAGE from the page's CHILD ids
+  - key-values whose value holds a selection element are checkboxes, not
+    key-values; the rest are sorted by (bottom, left) per page
+  - cell and value text is linearized the way textractor does it: words are
+    grouped by their LINE, lines are ordered top-to-bottom / left-to-right
+    and joined with single spaces
+
+parse() returns None for constructs it does not reproduce (a key-value
+checkbox inside a table cell); callers fall back to textractor. One known
+divergence: when Textract leaves words outside any LINE, textractor's layout
+de-duplication pass can drop them from table cells (run-to-run dependent);
+the block graph always keeps them.
+"""
+
+from collections import defaultdict
+from functools import cmp_to_key
+
+from textractor.data.constants import TextTypes
+
+_TEXT_TYPES = {"PRINTED": TextTypes.PRINTED, "HANDWRITING": TextTypes.HANDWRITING}
+_SELECTED_TEXT = {"SELECTED": "[X]", "NOT_SELECTED": "[ ]"}
+_OVERLAP_RATIO = 0.5
+
+
+class _Box:
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(self, x: float, y: float, width: float, height: float):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def of(cls, block: dict) -> "_Box":
+        bb = block["Geometry"]["BoundingBox"]
+        return cls(bb["Left"], bb["Top"], bb["Width"], bb["Height"])
+
+    @classmethod
+    def enclosing(cls, boxes: list["_Box"]) -> "_Box":
+        x1 = min(b.x for b in boxes)
+        y1 = min(b.y for b in boxes)
+        x2 = max(b.x + b.width for b in boxes)
+        y2 = max(b.y + b.height for b in boxes)
+        return cls(x1, y1, x2 - x1, y2 - y1)
+
+
+class Word:
+    __slots__ = ("id", "text", "confidence", "text_type", "bbox", "line")
+
+    def __init__(self, block: dict):
+        self.id = block["Id"]
+        self.text = block.get("Text")
+        self.confidence = block["Confidence"] / 100
+        self.text_type = _TEXT_TYPES[block.get("TextType")]
+        self.bbox = _Box.of(block)
+        self.line = None  # (line id, line bbox), filled in by parse()
+
+
+class _Element:
+    """A linearization unit: one LINE's words within a cell, or a checkbox."""
+
+    __slots__ = ("text", "bbox")
+
+    def __init__(self, text: str, bbox: _Box):
+        self.text = text
+        self.bbox = bbox
+
+
+def _compare_boxes(a: _Element, b: _Element) -> int:
+    ha, hb = a.bbox.height, b.bbox.height
+    delta = (ha + hb) / 3.5
+    ay_mid = a.bbox.y + ha / 2.0
+    by_mid = b.bbox.y + hb / 2.0
+    if abs(ay_mid - by_mid) < delta:
+        return 1 if a.bbox.x > b.bbox.x else -1
+    return 1 if ay_mid > by_mid else -1
+
+
+def _group_horizontally(elements: list[_Element]) -> list[list[_Element]]:
+    """Group elements into visual rows by vertical overlap (textractor heuristic)."""
+    ordered = sorted(elements, key=cmp_to_key(_compare_boxes))
+    if not ordered:
+        return []
+
+    def overlap(a, b):
+        top = max(a.bbox.y, b.bbox.y)
+        bottom = min(a.bbox.y + a.bbox.height, b.bbox.y + b.bbox.height)
+        return max(bottom - top, 0)
+
+    groups = []
+    current = [ordered[0]]
+    for element in ordered[1:]:
+        max_height = max(e.bbox.height for e in current)
+        if sum(overlap(element, e) for e in current) / max_height >= _OVERLAP_RATIO:
+            current.append(element)
+        else:
+            groups.append(current)
+            current = [element]
+    groups.append(current)
+    return groups
+
+
+def _linearize(words: list[Word], extra: list[_Element] = ()) -> str:
+    """Space-joined text of words (plus checkbox elements) in reading order."""
+    by_line = {}
+    for word in words:
+        line_id, line_box = word.line
+        entry = by_line.get(line_id)
+        if entry is None:
+            by_line[line_id] = entry = (line_box, [])
+        entry[1].append(word)
+    elements = list(extra) + [
+        _Element(" ".join(w.text for w in sorted(line_words, key=lambda w: w.bbox.x)), line_box)
+        for line_box, line_words in by_line.values()
+    ]
+    texts = []
+    for group in _group_horizontally(elements):
+        texts.extend(e.text for e in sorted(group, key=lambda e: e.bbox.x))
+    if not texts:
+        return ""
+    output = " ".join(texts) + " "
+    output = output.replace("\n", " ")
+    while "  " in output:
+        output = output.replace("  ", " ")
+    return output
+
+
+class Cell:
+    __slots__ = ("row_index", "col_index", "col_span", "confidence",
+                 "is_column_header", "bbox", "_words", "_checkboxes", "_text")
+
+    def __init__(self, block: dict, words: list[Word], checkboxes: list[_Element]):
+        self.row_index = block["RowIndex"]
+        self.col_index = block["ColumnIndex"]
+        self.col_span = block["ColumnSpan"]
+        self.confidence = block["Confidence"] / 100
+        self.is_column_header = "COLUMN_HEADER" in (block.get("EntityTypes") or [])
+        self.bbox = _Box.of(block)
+        self._words = words
+        self._checkboxes = checkboxes
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = _linearize(self._words, self._checkboxes)
+        return self._text
+
+    @property
+    def words(self) -> list:
+        # Checkboxes linearize to a PRINTED pseudo-word in textractor.
+        return self._words + [_CHECKBOX_WORD] * len(self._checkboxes)
+
+
+class _CheckboxWord:
+    __slots__ = ()
+    text_type = TextTypes.PRINTED
+
+
+_CHECKBOX_WORD = _CheckboxWord()
+
+
+class Table:
+    __slots__ = ("table_cells", "_rows")
+
+    def __init__(self, cells: list[Cell]):
+        self.table_cells = sorted(cells, key=lambda c: (c.row_index, c.col_index))
+        self._rows = None
+
+    def _get_table_cells(self, row_wise: bool = True) -> dict[int, list[Cell]]:
+        """Cells grouped by row index, each row ordered by column (computed once)."""
+        if self._rows is None:
+            rows = defaultdict(list)
+            for cell in self.table_cells:
+                rows[cell.row_index].append(cell)
+            self._rows = {
+                index: sorted(cells, key=lambda c: c.col_index)
+                for index, cells in rows.items()
+            }
+        return self._rows
+
+    @property
+    def words(self) -> list:
+        return [w for cell in self.table_cells for w in cell.words]
+
+    @property
+    def row_count(self) -> int:
+        return max((c.row_index for c in self.table_cells), default=0)
+
+    @property
+    def column_count(self) -> int:
+        return max((c.col_index for c in self.table_cells), default=0)
+
+
+class Value:
+    __slots__ = ("words", "_text")
+
+    def __init__(self, words: list[Word]):
+        self.words = words
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = _linearize(self.words)
+        return self._text
+
+
+class KeyValue:
+    __slots__ = ("key", "value", "bbox")
+
+    def __init__(self, key: list[Word], value: Value, bbox: _Box):
+        self.key = key
+        self.value = value
+        self.bbox = bbox
+
+
+class BlockGraph:
+    __slots__ = ("tables", "key_values", "counts")
+
+    def __init__(self):
+        self.tables: list[Table] = []
+        self.key_values: list[KeyValue] = []
+        self.counts = {
+            "block_types": defaultdict(int),
+            "entity_types": defaultdict(int),
+            "text_types": defaultdict(int),
+        }
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _children(block: dict, rel_type: str = "CHILD") -> list[str]:
+    for rel in block.get("Relationships") or []:
+        if rel["Type"] == rel_type:
+            return rel["Ids"]
+    return []
+
+
+def parse(textract_response: dict) -> BlockGraph | None:
+    """Index Blocks once and build tables + key-values. None if unsupported."""
+    try:
+        return _parse(textract_response)
+    except _Unsupported:
+        return None
+
+
+def _parse(textract_response: dict) -> BlockGraph:
+    graph = BlockGraph()
+    counts = graph.counts
+    blocks_by_id = {}
+    by_type = defaultdict(list)
+    kv_value_children = set()
+
+    # The one pass over Blocks: index by Id / type and count for diagnostics.
+    for block in textract_response.get("Blocks", []):
+        block_type = block["BlockType"]
+        blocks_by_id[block["Id"]] = block
+        by_type[block_type].append(block)
+        counts["block_types"][block_type] += 1
+        for et in block.get("EntityTypes", []):
+            counts["entity_types"][et] += 1
+        if block_type == "WORD":
+            counts["text_types"][block.get("TextType", "UNKNOWN")] += 1
+        elif block_type == "KEY_VALUE_SET" and "VALUE" in (block.get("EntityTypes") or []):
+            kv_value_children.update(_children(block))
+
+    pages = by_type["PAGE"]
+    multi_page = len(pages) > 1
+    pages = sorted(pages, key=lambda p: p["Page"] if multi_page else 1)
+    page_children = [set(_children(page)) for page in pages]
+
+    words: dict[str, Word] = {}
+
+    def word(word_id: str) -> Word | None:
+        w = words.get(word_id)
+        if w is None:
+            block = blocks_by_id.get(word_id)
+            if block is None:
+                return None
+            w = words[word_id] = Word(block)
+        return w
+
+    def words_of(ids: list[str]) -> list[Word]:
+        out = []
+        for word_id in ids:
+            block = blocks_by_id.get(word_id)
+            if block is not None and block["BlockType"] == "WORD":
+                out.append(word(word_id))
+        return out
+
+    # Words take the bbox of their LINE for linearization (last page/line wins,
+    # as in textractor); words outside any page LINE stand alone.
+    for children in page_children:
+        for line in by_type["LINE"]:
+            if line["Id"] in children:
+                line_ref = (line["Id"], _Box.of(line))
+                for w in words_of(_children(line)):
+                    w.line = line_ref
+
+    for children in page_children:
+        page_kvs = []
+        for block in by_type["KEY_VALUE_SET"]:
+            if block["Id"] not in children:
+                continue
+            entity_types = block.get("EntityTypes") or []
+            if not entity_types or entity_types[0] != "KEY":
+                continue
+            value_ids = _children(block, "VALUE")
+            value_block = blocks_by_id.get(value_ids[0]) if value_ids else None
+            if value_block is None:
+                continue
+            value_child_blocks = [
+                blocks_by_id[i] for i in _children(value_block) if i in blocks_by_id
+            ]
+            if any(b["BlockType"] not in ("WORD", "SIGNATURE") for b in value_child_blocks):
+                continue  # a checkbox, reported separately by textractor
+            value = Value([word(b["Id"]) for b in value_child_blocks if b["BlockType"] == "WORD"])
+            bbox = _Box.enclosing([_Box.of(block), _Box.of(value_block)])
+            page_kvs.append(KeyValue(words_of(_children(block)), value, bbox))
+        page_kvs.sort(key=lambda kv: (kv.bbox.y + kv.bbox.height, kv.bbox.x))
+        graph.key_values.extend(page_kvs)
+
+        for block in by_type["TABLE"]:
+            if block["Id"] not in children:
+                continue
+            cells = []
+            for cell_id in _children(block):
+                cell_block = blocks_by_id.get(cell_id)
+                if cell_block is None or cell_block["BlockType"] != "CELL":
+                    continue
+                checkboxes = []
+                cell_words = []
+                for child_id in _children(cell_block):
+                    child = blocks_by_id.get(child_id)
+                    if child is None:
+                        continue
+                    if child["BlockType"] == "WORD":
+                        cell_words.append(word(child_id))
+                    elif child["BlockType"] == "SELECTION_ELEMENT":
+                        if child_id in kv_value_children:
+                            raise _Unsupported("key-value checkbox inside a table cell")
+                        checkboxes.append(_Element(
+                            _SELECTED_TEXT[child["SelectionStatus"]], _Box.of(child)))
+                cells.append(Cell(cell_block, cell_words, checkboxes))
+            graph.tables.append(Table(cells))
+
+    for w in words.values():
+        if w.line is None:
+            w.line = (w.id, w.bbox)
+    return graph
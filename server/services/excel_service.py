@@ -7,12 +7,23 @@ Color rules:
   - confidence >= 85%: no extra formatting
 
 Universal fields appear as key-value rows above the data table.
+
+Each sheet is laid out once as plain rows (tracking column widths as it
+goes). By default those rows are streamed through openpyxl's write-only mode
+with one shared style per style combination; XLSX_WRITE_ONLY=0 writes the
+same rows into an in-memory Workbook instead.
 """
 
+import os
+import tempfile
+from copy import copy
 from io import BytesIO
+from typing import BinaryIO, Iterator
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Border, Font, PatternFill, Side, Alignment
+from openpyxl.utils import get_column_letter
 
 
 # --- Styles ---
@@ -41,6 +52,12 @@ STYLE_UF_KEY = {
 STYLE_LEGEND = {
     "font": Font(italic=True, color="666666", size=9),
 }
+STYLE_LEGEND_RED = {
+    "font": Font(italic=True, color="CC0000", size=9),
+}
+STYLE_LEGEND_ORANGE = {
+    "font": Font(italic=True, color="CC8800", size=9),
+}
 SYSTEM_SERIAL_HEADER = "(Good Shepherd) Row ID"
 
 _SYSTEM_SIDE = Side(style="dotted", color="AAAAAA")
@@ -58,14 +75,25 @@ STYLE_SYSTEM_CELL = {
 }
 
 
-def _apply_confidence_style(cell, confidence: float):
-    """Apply red/orange styling based on confidence score (0-100 scale)."""
+WRITE_ONLY = os.environ.get("XLSX_WRITE_ONLY", "1") != "0"
+_MAX_WIDTH = 40
+_STREAM_CHUNK = 64 * 1024
+
+
+def _confidence_style(confidence: float) -> dict | None:
+    """Red/orange style for a confidence score (0-100 scale), None if high."""
     if confidence < 70:
-        cell.border = STYLE_RED["border"]
-        cell.fill = STYLE_RED["fill"]
-    elif confidence < 85:
-        cell.border = STYLE_ORANGE["border"]
-        cell.fill = STYLE_ORANGE["fill"]
+        return STYLE_RED
+    if confidence < 85:
+        return STYLE_ORANGE
+    return None
+
+
+def _apply_styles(cell, styles):
+    """Set each style dict's attributes (font, fill, border, alignment) on cell, in order."""
+    for style in styles:
+        for attr, obj in style.items():
+            setattr(cell, attr, obj)
 
 
 def to_xlsx(extracted: dict) -> bytes:
@@ -80,112 +108,170 @@ def to_xlsx(extracted: dict) -> bytes:
     Returns:
         Excel file as bytes.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Form Data"
-    current_row = 1
-    system_serial = 1
+    return to_xlsx_sheets([("Form Data", extracted)])
 
-    # --- Legend ---
-    ws.cell(row=current_row, column=1, value="Confidence legend:")
-    ws.cell(row=current_row, column=1).font = STYLE_LEGEND["font"]
 
-    legend_red = ws.cell(row=current_row, column=2, value="Red = low (<70%)")
-    legend_red.font = Font(italic=True, color="CC0000", size=9)
-    _apply_confidence_style(legend_red, 50)
+def to_xlsx_sheets(sheets: list[tuple[str, dict]], write_only: bool | None = None) -> bytes:
+    """
+    Write several extracted pages into one workbook, one sheet per page.
+
+    Args:
+        sheets: (sheet title, extract() result) pairs, in sheet order.
+        write_only: stream rows through openpyxl's write-only mode instead of
+            building the whole Workbook in memory. Defaults to WRITE_ONLY.
+
+    Returns:
+        Excel file as bytes.
+    """
+    buf = BytesIO()
+    write_xlsx(sheets, buf, write_only=write_only)
+    return buf.getvalue()
+
+
+def write_xlsx(sheets: list[tuple[str, dict]], fileobj: BinaryIO,
+               write_only: bool | None = None):
+    """Write the workbook for sheets into a writable binary file object."""
+    if write_only is None:
+        write_only = WRITE_ONLY
+    if not write_only:
+        wb = Workbook()
+        wb.remove(wb.active)
+        for title, extracted in sheets:
+            _write_sheet(wb.create_sheet(title=title), extracted)
+        wb.save(fileobj)
+        return
+
+    wb = Workbook(write_only=True)
+    styles = _StyleCache()
+    for title, extracted in sheets:
+        rows, widths = _layout_sheet(extracted)
+        ws = wb.create_sheet(title=title)
+        # Column widths go into the sheet header, so they must be set before
+        # the first row is appended.
+        for col_letter, width in widths.items():
+            ws.column_dimensions[col_letter].width = width
+        for row in rows:
+            ws.append([styles.cell(ws, *c) if isinstance(c, tuple) else c for c in row])
+    wb.save(fileobj)
+
+
+def iter_xlsx(sheets: list[tuple[str, dict]], chunk_size: int = _STREAM_CHUNK) -> Iterator[bytes]:
+    """Yield the workbook in chunks, spooling through a temp file rather than one bytes copy."""
+    with tempfile.SpooledTemporaryFile(max_size=chunk_size) as spool:
+        write_xlsx(sheets, spool)
+        spool.seek(0)
+        while chunk := spool.read(chunk_size):
+            yield chunk
+
+
+class _StyleCache:
+    """Per-workbook template cells, one per style combination, shared by every cell using it.
+
+    Setting border/fill/font on each cell looks the style objects up in the
+    workbook's style tables every time; copying the template's style indices
+    does that once per combination.
+    """
+
+    def __init__(self):
+        self._templates = {}
 
-    legend_orange = ws.cell(row=current_row, column=3, value="Orange = mid (70-85%)")
-    legend_orange.font = Font(italic=True, color="CC8800", size=9)
-    _apply_confidence_style(legend_orange, 75)
+    def cell(self, ws, value, *styles: dict) -> WriteOnlyCell:
+        key = tuple(id(style) for style in styles)
+        template = self._templates.get(key)
+        if template is None:
+            template = WriteOnlyCell(ws)
+            _apply_styles(template, styles)
+            self._templates[key] = template
+        cell = WriteOnlyCell(ws, value)
+        cell._style = copy(template._style)
+        return cell
 
-    legend_ok = ws.cell(row=current_row, column=4, value="No highlight = high (85%+)")
-    legend_ok.font = STYLE_LEGEND["font"]
 
-    current_row += 2
+def _layout_sheet(extracted: dict) -> tuple[list[list], dict[str, float]]:
+    """Lay out one page as rows: the single source of cell values, styles and widths.
+
+    Rows hold plain values or (value, *styles) tuples, starting at row 1;
+    widths are the longest value in each column + 3, capped. Both the
+    write-only path and _write_sheet write exactly these rows.
+    """
+    rows = []
+    lengths = {}
+    max_col = 0
+
+    def add(row: list):
+        nonlocal max_col
+        max_col = max(max_col, len(row))
+        for col_idx, c in enumerate(row, 1):
+            value = c[0] if isinstance(c, tuple) else c
+            if value:
+                lengths[col_idx] = max(lengths.get(col_idx, 0), len(str(value)))
+        rows.append(row)
+
+    def styled(value, *styles):
+        styles = tuple(s for s in styles if s)
+        return (value, *styles) if styles else value
+
+    system_serial = 1
+
+    # --- Legend ---
+    add([
+        styled("Confidence legend:", STYLE_LEGEND),
+        styled("Red = low (<70%)", STYLE_LEGEND_RED, _confidence_style(50)),
+        styled("Orange = mid (70-85%)", STYLE_LEGEND_ORANGE, _confidence_style(75)),
+        styled("No highlight = high (85%+)", STYLE_LEGEND),
+    ])
+    rows.append([])
 
     # --- Universal fields (key-value pairs) ---
     kv_pairs = extracted.get("key_value_pairs", [])
     if kv_pairs:
         for kv in kv_pairs:
-            key_cell = ws.cell(row=current_row, column=1, value=kv["key"])
-            key_cell.font = STYLE_UF_KEY["font"]
-            _apply_confidence_style(key_cell, kv["key_confidence"])
-
-            val_cell = ws.cell(row=current_row, column=2, value=kv["value"])
-            _apply_confidence_style(val_cell, kv["value_confidence"])
-
-            current_row += 1
-        current_row += 1  # blank row after universal fields
+            add([
+                styled(kv["key"], STYLE_UF_KEY, _confidence_style(kv["key_confidence"])),
+                styled(kv["value"], _confidence_style(kv["value_confidence"])),
+            ])
+        rows.append([])
 
     # --- Tables ---
     for table in extracted.get("tables", []):
-        headers = table.get("column_headers", [])
-        data_rows = table.get("data_rows", [])
-
-        # Build ordered header list by column_index
-        header_list = sorted(headers, key=lambda h: h["column_index"])
+        header_list = sorted(table.get("column_headers", []), key=lambda h: h["column_index"])
         header_texts = [h["text"] for h in header_list]
+        add([styled(h["text"], STYLE_HEADER) for h in header_list]
+            + [styled(SYSTEM_SERIAL_HEADER, STYLE_SYSTEM_HEADER)])
 
-        # Write header row
-        for col_idx, h in enumerate(header_list, 1):
-            hcell = ws.cell(row=current_row, column=col_idx, value=h["text"])
-            hcell.font = STYLE_HEADER["font"]
-            hcell.fill = STYLE_HEADER["fill"]
-        system_header_col = len(header_list) + 1
-        system_hcell = ws.cell(
-            row=current_row,
-            column=system_header_col,
-            value=SYSTEM_SERIAL_HEADER,
-        )
-        system_hcell.font = STYLE_SYSTEM_HEADER["font"]
-        system_hcell.fill = STYLE_SYSTEM_HEADER["fill"]
-        system_hcell.border = STYLE_SYSTEM_HEADER["border"]
-        system_hcell.alignment = STYLE_SYSTEM_HEADER["alignment"]
-        current_row += 1
-
-        # Write data rows
-        for row_data in data_rows:
-            cells_by_header = {}
-            for c in row_data.get("_cells", []):
-                cells_by_header[c["header"]] = c
-
-            for col_idx, header_text in enumerate(header_texts, 1):
+        for row_data in table.get("data_rows", []):
+            cells_by_header = {c["header"]: c for c in row_data.get("_cells", [])}
+            row = []
+            for header_text in header_texts:
                 cell_info = cells_by_header.get(header_text)
                 if cell_info:
-                    dcell = ws.cell(
-                        row=current_row, column=col_idx, value=cell_info["text"],
-                    )
-                    _apply_confidence_style(dcell, cell_info["confidence"])
+                    row.append(styled(cell_info["text"], _confidence_style(cell_info["confidence"])))
                 else:
-                    ws.cell(row=current_row, column=col_idx, value="")
+                    row.append("")
 
             row_serial = row_data.get("_system_serial")
             if row_serial is None:
                 row_serial = system_serial
                 row_data["_system_serial"] = row_serial
             system_serial += 1
-            system_cell = ws.cell(
-                row=current_row,
-                column=system_header_col,
-                value=row_serial,
-            )
-            system_cell.font = STYLE_SYSTEM_CELL["font"]
-            system_cell.fill = STYLE_SYSTEM_CELL["fill"]
-            system_cell.border = STYLE_SYSTEM_CELL["border"]
-            system_cell.alignment = STYLE_SYSTEM_CELL["alignment"]
-            current_row += 1
-
-        current_row += 1  # blank row between tables
-
-    # Auto-width columns
-    for col in ws.columns:
-        max_len = 0
-        col_letter = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_len = max(max_len, len(str(cell.value)))
-        ws.column_dimensions[col_letter].width = min(max_len + 3, 40)
-
-    buf = BytesIO()
-    wb.save(buf)
-    return buf.getvalue()
+            row.append(styled(row_serial, STYLE_SYSTEM_CELL))
+            add(row)
+
+        rows.append([])
+
+    widths = {
+        get_column_letter(col_idx): min(lengths.get(col_idx, 0) + 3, _MAX_WIDTH)
+        for col_idx in range(1, max_col + 1)
+    }
+    return rows, widths
+
+
+def _write_sheet(ws, extracted: dict):
+    """Write one page into a normal (in-memory) worksheet, from _layout_sheet's rows."""
+    rows, widths = _layout_sheet(extracted)
+    for row_idx, row in enumerate(rows, 1):
+        for col_idx, c in enumerate(row, 1):
+            value, *styles = c if isinstance(c, tuple) else (c,)
+            _apply_styles(ws.cell(row=row_idx, column=col_idx, value=value), styles)
+    for col_letter, width in widths.items():
+        ws.column_dimensions[col_letter].width = width
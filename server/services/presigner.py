@@ -0,0 +1,163 @@
+"""
+Local SigV4 presigner for S3 GET URLs.
+
+botocore's generate_presigned_url rebuilds a request, resolves the endpoint
+and re-derives the SigV4 signing key for every URL, which dominates
+/api/sessions time for orgs with thousands of images. S3Presigner signs the
+same query-string URLs directly:
+
+  - the signing key (HMAC chain over date/region/service) is derived once
+    per batch and reused while the date and credentials stay the same
+  - URLs are memoized per (bucket, key, expiry) and reused across requests
+    until less than PRESIGN_MIN_REMAINING seconds of validity are left, or
+    the credentials rotate
+
+Falls back to botocore when the client's credentials can't be read.
+max_entries=0 turns the URL memo off (short-lived URLs gain nothing from it).
+
+This file is the only SigV4 implementation in the repo. The server and
+agents/formidable are built from separate Docker contexts, so formidable
+carries a verbatim copy at agents/formidable/presigner.py; its
+test_deploy_contract.py fails if the two differ. Edit server/services/
+presigner.py and copy it over.
+"""
+
+import datetime
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import quote, urlsplit
+
+PRESIGN_MIN_REMAINING = int(os.environ.get("PRESIGN_MIN_REMAINING", "86400"))
+PRESIGN_CACHE_MAX_ENTRIES = int(os.environ.get("PRESIGN_CACHE_MAX_ENTRIES", "50000"))
+
+_ALGORITHM = "AWS4-HMAC-SHA256"
+_TIMESTAMP = "%Y%m%dT%H%M%SZ"
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def signing_key(secret_key: str, date: str, region: str, service: str = "s3") -> bytes:
+    """SigV4 signing key for one day/region/service."""
+    k_date = _hmac(("AWS4" + secret_key).encode("utf-8"), date)
+    return _hmac(_hmac(_hmac(k_date, region), service), "aws4_request")
+
+
+def _credentials(client):
+    # boto3 has no public accessor for a client's (refreshable) credentials.
+    getter = getattr(client, "_get_credentials", None)
+    return getter() if getter else None
+
+
+class S3Presigner:
+    def __init__(self, client, min_remaining: int = PRESIGN_MIN_REMAINING,
+                 max_entries: int = PRESIGN_CACHE_MAX_ENTRIES, now=None):
+        self.client = client
+        self.min_remaining = min_remaining
+        self.max_entries = max_entries
+        self._now = now or (lambda: datetime.datetime.now(datetime.timezone.utc))
+        self.region = client.meta.region_name or "us-east-1"
+        endpoint = urlsplit(client.meta.endpoint_url)
+        self._scheme, self._host = endpoint.scheme, endpoint.netloc
+        s3_config = client.meta.config.s3 or {}
+        self._path_style = (s3_config.get("addressing_style") == "path"
+                            or not self._host.endswith("amazonaws.com"))
+        self._key_cache: tuple[tuple[str, str], bytes] | None = None
+        self._urls: OrderedDict[tuple, tuple[str, float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.signed = 0
+        self.reused = 0
+
+    def presign_get(self, bucket: str, key: str, expires_in: int) -> str:
+        """Presigned GET URL for s3://bucket/key, memoized until near expiry."""
+        return self.presign_many([(bucket, key)], expires_in)[0]
+
+    def presign_many(self, objects: list[tuple[str, str]], expires_in: int) -> list[str]:
+        """Presigned GET URLs for (bucket, key) pairs, in order.
+
+        Credentials are read and the signing key derived once for the batch.
+        """
+        credentials = _credentials(self.client)
+        if credentials is None:
+            return [self._botocore_presign(b, k, expires_in) for b, k in objects]
+        creds = credentials.get_frozen_credentials()
+        now = self._now()
+        now_ts = now.timestamp()
+        amz_date = now.strftime(_TIMESTAMP)
+        date = amz_date[:8]
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        key = self._signing_key(creds.secret_key, date)
+        base_query = {
+            "X-Amz-Algorithm": _ALGORITHM,
+            "X-Amz-Credential": f"{creds.access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if creds.token:
+            base_query["X-Amz-Security-Token"] = creds.token
+        canonical_query = "&".join(
+            f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}"
+            for k, v in sorted(base_query.items())
+        )
+        query = "&".join(
+            f"{k}={quote(v, safe='-_.~')}" for k, v in base_query.items()
+        )
+
+        urls = []
+        with self._lock:
+            for bucket, object_key in objects:
+                cache_key = (bucket, object_key, expires_in)
+                cached = self._urls.get(cache_key)
+                if (cached and cached[2] == creds.access_key
+                        and cached[1] - now_ts > self.min_remaining):
+                    self._urls.move_to_end(cache_key)
+                    self.reused += 1
+                    urls.append(cached[0])
+                    continue
+                host, path = self._location(bucket, object_key)
+                canonical_request = (
+                    f"GET\n{path}\n{canonical_query}\nhost:{host}\n\nhost\nUNSIGNED-PAYLOAD"
+                )
+                string_to_sign = (
+                    f"{_ALGORITHM}\n{amz_date}\n{scope}\n"
+                    + hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+                )
+                signature = hmac.new(key, string_to_sign.encode("utf-8"),
+                                     hashlib.sha256).hexdigest()
+                url = f"{self._scheme}://{host}{path}?{query}&X-Amz-Signature={signature}"
+                self._urls[cache_key] = (url, now_ts + expires_in, creds.access_key)
+                self._urls.move_to_end(cache_key)
+                self.signed += 1
+                urls.append(url)
+            while len(self._urls) > self.max_entries:
+                self._urls.popitem(last=False)
+        return urls
+
+    def _signing_key(self, secret_key: str, date: str) -> bytes:
+        cached = self._key_cache
+        if cached and cached[0] == (secret_key, date):
+            return cached[1]
+        key = signing_key(secret_key, date, self.region)
+        self._key_cache = ((secret_key, date), key)
+        return key
+
+    def _location(self, bucket: str, key: str) -> tuple[str, str]:
+        """(host, canonical path) for an object, matching botocore's addressing."""
+        encoded = quote(key, safe="/~")
+        if self._path_style or "." in bucket or bucket.lower() != bucket:
+            return self._host, f"/{bucket}/{encoded}"
+        # Like botocore, virtual-hosted presigned URLs use the global host;
+        # it resolves to the bucket's region.
+        return f"{bucket}.s3.amazonaws.com", f"/{encoded}"
+
+    def _botocore_presign(self, bucket: str, key: str, expires_in: int) -> str:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket, "Key": key},
+            ExpiresIn=expires_in,
+        )
@@ -1,11 +1,18 @@
-"""Shared S3 utilities: JSON fetching, listing, and presigned URL generation."""
+"""Shared S3 utilities: JSON fetching, listing, and presigned URL generation.
 
+Presigned URLs are signed locally by services/presigner.py and memoized
+across requests until close to expiry.
+"""
+
+import functools
 import json
 import logging
 import re
 
 import boto3
-from botocore.config import Config
+
+from services.aws_executor import client_config
+from services.presigner import S3Presigner
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +28,17 @@ S3_URL_RE = re.compile(
 
 
 class S3Service:
-    def __init__(self):
-        self.s3 = boto3.client("s3", config=Config(signature_version="s3v4"))
+    def __init__(self, client=None):
+        self.s3 = client or boto3.client("s3", config=client_config(signature_version="s3v4"))
+        self.presigner = S3Presigner(self.s3)
 
     def list_json_keys(self, bucket: str, prefix: str) -> list[str]:
         """List all *.json keys under prefix, handling pagination."""
-        keys: list[str] = []
+        return [obj["Key"] for obj in self.list_json_objects(bucket, prefix)]
+
+    def list_json_objects(self, bucket: str, prefix: str) -> list[dict]:
+        """List *.json objects under prefix (Key, ETag, LastModified, Size), in key order."""
+        objects: list[dict] = []
         continuation_token = None
         while True:
             kwargs = {"Bucket": bucket, "Prefix": prefix}
@@ -34,49 +46,79 @@ class S3Service:
                 kwargs["ContinuationToken"] = continuation_token
             resp = self.s3.list_objects_v2(**kwargs)
             for obj in resp.get("Contents", []):
-                k = obj["Key"]
-                if k.endswith(".json"):
-                    keys.append(k)
+                if obj["Key"].endswith(".json"):
+                    objects.append(obj)
             if resp.get("IsTruncated"):
                 continuation_token = resp.get("NextContinuationToken")
             else:
                 break
-        return keys
+        return objects
 
     def get_json(self, bucket: str, key: str) -> dict | list:
         """Download and parse a single JSON object."""
         resp = self.s3.get_object(Bucket=bucket, Key=key)
         return json.loads(resp["Body"].read())
 
+    def put_bytes(self, bucket: str, key: str, data: bytes,
+                  content_type: str = "application/octet-stream"):
+        """Upload raw bytes to s3://bucket/key."""
+        self.s3.put_object(Bucket=bucket, Key=key, Body=data, ContentType=content_type)
+
+    def delete(self, bucket: str, key: str):
+        """Delete s3://bucket/key (no error if it is already gone)."""
+        self.s3.delete_object(Bucket=bucket, Key=key)
+
+    def presign_put(self, bucket: str, key: str, expires_in: int) -> str:
+        """Presigned PUT URL for uploading straight to s3://bucket/key."""
+        return self.s3.generate_presigned_url(
+            "put_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=expires_in)
+
     def presign_url(self, https_url: str) -> str:
         """Replace an S3 HTTPS URL with a presigned GET URL (7-day expiry).
 
         Returns original URL unchanged if not a recognized S3 URL.
         """
-        m = S3_URL_RE.match(https_url)
-        if not m:
+        location = _parse_s3_url(https_url)
+        if not location:
             return https_url
-        bucket = m.group(1) or m.group(3)
-        key = m.group(2) or m.group(4)
-        return self.s3.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": bucket, "Key": key},
-            ExpiresIn=PRESIGN_EXPIRY,
-        )
+        return self.presign_get(*location)
+
+    def presign_get(self, bucket: str, key: str, expires_in: int = PRESIGN_EXPIRY) -> str:
+        """Presigned GET URL for s3://bucket/key (signed locally, no S3 call)."""
+        return self.presigner.presign_get(bucket, key, expires_in)
 
     def presign_session(self, session: dict) -> dict:
         """Presign portraitImageUrl and landscapeImageUrl fields."""
-        for field in ("portraitImageUrl", "landscapeImageUrl"):
-            url = session.get(field)
-            if url:
-                session[field] = self.presign_url(url)
-        return session
+        return self.presign_sessions([session])[0]
+
+    def presign_sessions(self, sessions: list[dict]) -> list[dict]:
+        """Presign image URLs of many sessions in one signing batch."""
+        self._presign_fields(sessions, ("portraitImageUrl", "landscapeImageUrl"))
+        return sessions
 
     def presign_sites(self, sites: dict) -> dict:
         """Presign image URLs in sites.json (reference/ghost images)."""
-        for site in sites.get("sites", []):
-            for field in ("referenceImageUrl", "ghostImageUrl"):
-                url = site.get(field)
-                if url:
-                    site[field] = self.presign_url(url)
+        self._presign_fields(sites.get("sites", []), ("referenceImageUrl", "ghostImageUrl"))
         return sites
+
+    def _presign_fields(self, records: list[dict], fields: tuple[str, ...]):
+        """Replace S3 URLs in records[*][field] with presigned URLs, signed as one batch."""
+        targets = []
+        for record in records:
+            for field in fields:
+                url = record.get(field)
+                location = _parse_s3_url(url) if url else None
+                if location:
+                    targets.append((record, field, location))
+        urls = self.presigner.presign_many([t[2] for t in targets], PRESIGN_EXPIRY)
+        for (record, field, _), url in zip(targets, urls):
+            record[field] = url
+
+
+@functools.lru_cache(maxsize=65536)
+def _parse_s3_url(https_url: str) -> tuple[str, str] | None:
+    """(bucket, key) of an S3 HTTPS URL, or None if it isn't one."""
+    m = S3_URL_RE.match(https_url)
+    if not m:
+        return None
+    return m.group(1) or m.group(3), m.group(2) or m.group(4)
@@ -0,0 +1,105 @@
+"""
+Materialized per-org sessions index, so /api/sessions only fetches what changed.
+
+Sessions are append-only uploads from the phone app. The index maps each
+session key to its S3 ETag and the cleaned session record (before presigning).
+A request lists {org}/sessions/ once, downloads only keys whose ETag is new or
+changed, drops keys that disappeared, and serves the rest from the index. A
+warm request is a single ListObjectsV2 pass.
+
+The index lives in process memory (per Lambda instance), for the most
+recently used SESSIONS_INDEX_MEMORY_ORGS orgs. With SESSIONS_INDEX_BUCKET set it is also persisted to S3 so cold instances start
+from it instead of downloading every session:
+
+  SESSIONS_INDEX              on | off                    (default: on)
+  SESSIONS_INDEX_MEMORY_ORGS  orgs kept in memory         (default: 16)
+  SESSIONS_INDEX_BUCKET       bucket for the shared index (default: memory only)
+  SESSIONS_INDEX_PREFIX       key prefix                  (default: sessions-index/)
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_VERSION = 1
+
+
+class SessionsIndex:
+    """Index entries per (bucket, org): {key: {"etag", "last_modified", "session"}}.
+
+    `session` is None for files that exist but don't parse, so they aren't
+    re-downloaded until their ETag changes. Only the last memory_entries orgs
+    used are kept in memory; the rest reload from S3 (or start empty).
+    """
+
+    def __init__(self, s3_service=None, bucket: str = "", prefix: str = "sessions-index/",
+                 memory_entries: int = 16):
+        self.s3 = s3_service
+        self.bucket = bucket
+        self.prefix = prefix
+        self.memory_entries = memory_entries
+        self._entries: OrderedDict[tuple[str, str], dict[str, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, bucket: str, org: str) -> str:
+        return f"{self.prefix}{bucket}/{org}.json"
+
+    def load(self, bucket: str, org: str) -> dict[str, dict]:
+        """Entries for an org: from memory, else from the S3 copy, else empty."""
+        with self._lock:
+            entries = self._entries.get((bucket, org))
+            if entries is not None:
+                self._entries.move_to_end((bucket, org))
+        if entries is not None:
+            return entries
+        if not self.bucket:
+            return {}
+        try:
+            stored = self.s3.get_json(self.bucket, self._key(bucket, org))
+        except Exception as e:
+            logger.info("No stored sessions index for %s/%s (%s)", bucket, org, e)
+            return {}
+        if stored.get("version") != _VERSION:
+            return {}
+        entries = stored["entries"]
+        with self._lock:
+            if (bucket, org) not in self._entries:
+                self._remember(bucket, org, entries)
+        return entries
+
+    def save(self, bucket: str, org: str, entries: dict[str, dict]):
+        """Replace an org's entries in memory and, if configured, in S3."""
+        with self._lock:
+            self._remember(bucket, org, entries)
+        if not self.bucket:
+            return
+        body = json.dumps({"version": _VERSION, "entries": entries}, separators=(",", ":"))
+        try:
+            self.s3.put_bytes(self.bucket, self._key(bucket, org), body.encode(),
+                              "application/json")
+        except Exception:
+            # The in-memory index still serves this instance.
+            logger.exception("Failed to store sessions index for %s/%s", bucket, org)
+
+    def _remember(self, bucket: str, org: str, entries: dict[str, dict]):
+        # Caller holds self._lock.
+        self._entries[(bucket, org)] = entries
+        self._entries.move_to_end((bucket, org))
+        while len(self._entries) > self.memory_entries:
+            self._entries.popitem(last=False)
+
+
+def index_from_env(s3_service) -> SessionsIndex | None:
+    """SessionsIndex configured from SESSIONS_INDEX* env vars (None if off)."""
+    if os.environ.get("SESSIONS_INDEX", "on") == "off":
+        return None
+    return SessionsIndex(
+        s3_service,
+        bucket=os.environ.get("SESSIONS_INDEX_BUCKET", ""),
+        prefix=os.environ.get("SESSIONS_INDEX_PREFIX", "sessions-index/"),
+        memory_entries=int(os.environ.get("SESSIONS_INDEX_MEMORY_ORGS", "16")),
+    )
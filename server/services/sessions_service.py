@@ -1,52 +1,138 @@
 """Business logic for fetching sessions and sites config from S3."""
 
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from botocore.exceptions import ClientError
+
+from services.aws_executor import AWS_MAX_CONCURRENCY
 from services.s3_service import S3Service
+from services.sessions_index import SessionsIndex, index_from_env
 
 logger = logging.getLogger(__name__)
 
 # Fields to drop from raw session data (local device paths, upload flags).
 _DROP_FIELDS = {"portraitImagePath", "landscapeImagePath", "isUploaded"}
 
+# Session JSONs are downloaded on their own pool: get_sessions already runs on
+# the AWS pool (run_blocking), so fanning out there could starve it. Capped at
+# AWS_MAX_CONCURRENCY so every worker gets a pooled S3 connection.
+FETCH_CONCURRENCY = min(int(os.environ.get("SESSIONS_FETCH_CONCURRENCY", "16")),
+                        AWS_MAX_CONCURRENCY)
+FETCH_ATTEMPTS = int(os.environ.get("SESSIONS_FETCH_ATTEMPTS", "3"))
+_RETRY_DELAY = 0.2
+# S3 error codes worth retrying (besides any 5xx).
+_RETRYABLE_CODES = {"SlowDown", "Throttling", "RequestTimeout", "RequestTimeTooSkewed"}
+
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix="sessions")
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in _RETRYABLE_CODES or status >= 500
+    return True
+
+
+class _Unparseable(Exception):
+    """A session file that downloaded but isn't valid JSON."""
+
 
 class SessionsService:
-    def __init__(self, s3_service: S3Service | None = None):
+    def __init__(self, s3_service: S3Service | None = None,
+                 index: SessionsIndex | None = None):
         self.s3 = s3_service or S3Service()
+        self.index = index
+
+    @classmethod
+    def from_env(cls) -> "SessionsService":
+        """Service with the sessions index configured from SESSIONS_INDEX* env vars."""
+        s3 = S3Service()
+        return cls(s3, index_from_env(s3))
 
     def get_sessions(self, org: str, bucket: str = "fomomon") -> list[dict]:
         """Fetch all sessions from S3, strip survey data, presign image URLs.
 
         1. List s3://{bucket}/{org}/sessions/*.json
-        2. Download each to memory
+        2. Download new or changed ones (by ETag against the sessions index;
+           all of them without an index), FETCH_CONCURRENCY at a time, retried
         3. Strip responses (survey data comes from form images)
         4. Drop device-local fields
         5. Presign portraitImageUrl + landscapeImageUrl
-        6. Return combined list
+        6. Return combined list, in key order
         """
         prefix = f"{org}/sessions/"
-        keys = self.s3.list_json_keys(bucket, prefix)
-        logger.info("Found %d session files under s3://%s/%s", len(keys), bucket, prefix)
+        objects = self.s3.list_json_objects(bucket, prefix)
+        logger.info("Found %d session files under s3://%s/%s", len(objects), bucket, prefix)
+
+        known = self.index.load(bucket, org) if self.index else {}
+        stale = [obj for obj in objects
+                 if known.get(obj["Key"], {}).get("etag") != obj.get("ETag")]
+        downloaded = dict(zip(
+            (obj["Key"] for obj in stale),
+            _fetch_pool.map(lambda obj: self._fetch_entry(bucket, obj), stale),
+        ))
+
+        entries = {}
+        for obj in objects:
+            key = obj["Key"]
+            # A failed download keeps serving the previously indexed version.
+            entry = downloaded.get(key) or known.get(key)
+            if entry is not None:
+                entries[key] = entry
+        if self.index and (stale or len(entries) != len(known)):
+            logger.info("Sessions index %s/%s: %d fetched, %d total",
+                        bucket, org, len(stale), len(entries))
+            self.index.save(bucket, org, entries)
 
-        sessions: list[dict] = []
-        for key in keys:
+        return self.s3.presign_sessions([
+            dict(entry["session"])
+            for entry in entries.values()
+            if entry["session"] is not None
+        ])
+
+    def _fetch_entry(self, bucket: str, obj: dict) -> dict | None:
+        """Index entry for one listed object; None if it couldn't be downloaded."""
+        key = obj["Key"]
+        try:
+            session = self._download(bucket, key)
+        except _Unparseable:
+            logger.exception("Skipping unparseable s3://%s/%s", bucket, key)
+            session = None
+        except Exception:
+            logger.exception("Failed to download s3://%s/%s", bucket, key)
+            return None
+        last_modified = obj.get("LastModified")
+        return {
+            "etag": obj.get("ETag"),
+            "last_modified": last_modified.isoformat() if last_modified else None,
+            "session": session,
+        }
+
+    def _download(self, bucket: str, key: str) -> dict:
+        """Download and clean one session (unsigned), retrying transient errors."""
+        for attempt in range(1, FETCH_ATTEMPTS + 1):
             try:
                 session = self.s3.get_json(bucket, key)
-            except Exception:
-                logger.exception("Failed to download s3://%s/%s", bucket, key)
-                continue
-
-            # Strip survey responses — answers come from form image processing.
-            session["responses"] = []
+                break
+            except ValueError as e:
+                raise _Unparseable(key) from e
+            except Exception as e:
+                if attempt == FETCH_ATTEMPTS or not _is_retryable(e):
+                    raise
+                time.sleep(_RETRY_DELAY * 2 ** (attempt - 1))
 
-            # Drop device-local fields.
-            for field in _DROP_FIELDS:
-                session.pop(field, None)
+        # Strip survey responses — answers come from form image processing.
+        session["responses"] = []
 
-            session = self.s3.presign_session(session)
-            sessions.append(session)
+        # Drop device-local fields.
+        for field in _DROP_FIELDS:
+            session.pop(field, None)
 
-        return sessions
+        return session
 
     def get_sites(self, org: str, bucket: str = "fomomon") -> dict:
         """Fetch sites.json from S3 and presign reference/ghost image URLs.
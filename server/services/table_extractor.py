@@ -3,14 +3,23 @@ Extracts structured table data from a Textract response using the textractor lib
 
 Layer 0+1 processing: uses vanilla Textract output parsed by amazon-textract-textractor.
 No custom preprocessor logic. See docs/preprocessing.md for the layer model.
+
+TABLE_EXTRACTOR=blockgraph swaps textractor's Document.open for the single-pass
+parser in services/block_graph.py (same output, a fraction of the CPU); it
+falls back to textractor for responses it does not handle.
 """
 
+import os
 from collections import defaultdict
 from typing import Any
 
 from textractor.entities.document import Document
 from textractor.data.constants import TextTypes
 
+from services import block_graph
+
+TABLE_EXTRACTOR = os.environ.get("TABLE_EXTRACTOR", "textractor")
+
 
 def _cell_bbox(cell) -> dict[str, float] | None:
     """Return normalized bbox for a table cell if available."""
@@ -41,21 +50,32 @@ def _merge_bboxes(bboxes: list[dict[str, float]]) -> dict[str, float] | None:
     }
 
 
-def extract(textract_response: dict) -> dict:
+def extract(textract_response: dict, fast: bool | None = None) -> dict:
     """
     Parse a raw Textract API response and extract structured table data.
 
+    Args:
+        fast: use the single-pass block graph instead of textractor.
+            Defaults to TABLE_EXTRACTOR == "blockgraph".
+
     Returns a dict with:
         - tables: list of table dicts, each with headers, rows, and per-cell confidence
         - key_value_pairs: list of form field dicts (universal fields)
         - diagnostics: block/entity type counts for debugging
     """
-    doc = Document.open(textract_response)
+    if fast is None:
+        fast = TABLE_EXTRACTOR == "blockgraph"
+    doc = block_graph.parse(textract_response) if fast else None
+    if doc is not None:
+        counts = doc.counts
+    else:
+        doc = Document.open(textract_response)
+        counts = _count_blocks(textract_response)
 
     result = {
         "tables": [],
         "key_value_pairs": [],
-        "diagnostics": _build_diagnostics(textract_response, doc),
+        "diagnostics": _build_diagnostics(counts, doc),
     }
 
     # Extract tables
@@ -190,9 +210,10 @@ def _extract_table(table) -> dict:
     for h in headers:
         col_to_header[h["column_index"]] = h["text"]
 
+    rows_by_index = table._get_table_cells(row_wise=True)
+
     # Fallback: if no COLUMN_HEADER detected, use first row as header
     if not headers:
-        rows_by_index = table._get_table_cells(row_wise=True)
         if rows_by_index:
             first_row_idx = min(rows_by_index.keys())
             header_row_indices.add(first_row_idx)
@@ -210,7 +231,6 @@ def _extract_table(table) -> dict:
 
     # Extract data rows (skip header rows)
     data_rows = []
-    rows_by_index = table._get_table_cells(row_wise=True)
     for row_idx in sorted(rows_by_index.keys()):
         if row_idx in header_row_indices:
             continue
@@ -255,8 +275,8 @@ def _extract_table(table) -> dict:
     }
 
 
-def _build_diagnostics(textract_response: dict, doc: Document) -> dict:
-    """Build a diagnostic summary of what Textract returned."""
+def _count_blocks(textract_response: dict) -> dict:
+    """Count block, entity and word text types in a Textract response."""
     blocks = textract_response.get("Blocks", [])
 
     block_types = defaultdict(int)
@@ -272,9 +292,18 @@ def _build_diagnostics(textract_response: dict, doc: Document) -> dict:
             text_types[tt] += 1
 
     return {
-        "block_types": dict(block_types),
-        "entity_types": dict(entity_types),
-        "text_types": dict(text_types),
+        "block_types": block_types,
+        "entity_types": entity_types,
+        "text_types": text_types,
+    }
+
+
+def _build_diagnostics(counts: dict, doc) -> dict:
+    """Build a diagnostic summary of what Textract returned."""
+    return {
+        "block_types": dict(counts["block_types"]),
+        "entity_types": dict(counts["entity_types"]),
+        "text_types": dict(counts["text_types"]),
         "table_count": len(doc.tables),
         "key_value_count": len(doc.key_values),
     }
@@ -0,0 +1,268 @@
+"""
+Content-addressed cache for Textract AnalyzeDocument responses.
+
+Re-uploading the same photo should not pay Textract twice. Responses are keyed
+by SHA-256 of the image bytes plus the requested feature types, so a repeated
+image goes straight to table_extractor.extract.
+
+Backends:
+  - sqlite: local file (default /tmp, the only writable path in Lambda),
+            LRU eviction by last access + TTL
+  - s3:     shared across Lambda instances, TTL checked on read
+            (size is bounded by a bucket lifecycle rule, not here)
+  - memory: in-process LRU, mainly for tests
+  - off:    no caching
+
+Configured via env vars:
+  TEXTRACT_CACHE              sqlite | s3 | memory | off   (default: sqlite)
+  TEXTRACT_CACHE_PATH         sqlite file                  (default: /tmp/textract_cache.sqlite3)
+  TEXTRACT_CACHE_BUCKET       s3 bucket                    (required for s3)
+  TEXTRACT_CACHE_PREFIX       s3 key prefix                (default: textract-cache/)
+  TEXTRACT_CACHE_MAX_ENTRIES  LRU size for sqlite/memory   (default: 500)
+  TEXTRACT_CACHE_TTL          seconds, 0 = never expire    (default: 30 days)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+
+
+def cache_key(image_bytes: bytes, feature_types: list[str]) -> str:
+    """SHA-256 over the image bytes and the sorted feature types."""
+    h = hashlib.sha256()
+    h.update(image_bytes)
+    h.update(b"\0")
+    h.update(",".join(sorted(feature_types)).encode())
+    return h.hexdigest()
+
+
+def _expired(stored_at: float, ttl: int) -> bool:
+    return ttl > 0 and time.time() - stored_at > ttl
+
+
+class MemoryCacheBackend:
+    """In-process LRU + TTL. Entries are lost when the process exits."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: int = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, payload = entry
+            if _expired(stored_at, self.ttl):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key: str, payload: str):
+        with self._lock:
+            self._entries[key] = (time.time(), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SqliteCacheBackend:
+    """Local disk cache. LRU by last access time, TTL by insert time."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl: int = DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, stored_at = row
+            if _expired(stored_at, self.ttl):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            return payload
+
+    def put(self, key: str, payload: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            if self.ttl > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE stored_at < ?", (now - self.ttl,)
+                )
+            # Keep only the most recently accessed max_entries rows.
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+
+class S3CacheBackend:
+    """Shared cache in S3: one JSON object per key. TTL checked via LastModified."""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "textract-cache/",
+                 ttl: int = DEFAULT_TTL, client=None):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.ttl = ttl
+        self.s3 = client or boto3.client("s3")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}.json"
+
+    def get(self, key: str) -> str | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            resp = self.s3.get_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+        if _expired(resp["LastModified"].timestamp(), self.ttl):
+            return None
+        return resp["Body"].read().decode()
+
+    def put(self, key: str, payload: str):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            Body=payload.encode(),
+            ContentType="application/json",
+        )
+
+
+class TextractCache:
+    """Wraps a backend with hit/miss counters. Backend errors never fail a request."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, key: str) -> dict | None:
+        if self.backend is None:
+            return None
+        try:
+            payload = self.backend.get(key)
+        except Exception:
+            logger.exception("Textract cache read failed for %s", key)
+            self._count("errors")
+            payload = None
+        if payload is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(payload)
+
+    def put(self, key: str, response: dict):
+        if self.backend is None:
+            return
+        # ResponseMetadata is per-call (request id, headers) — not worth caching.
+        body = {k: v for k, v in response.items() if k != "ResponseMetadata"}
+        try:
+            self.backend.put(key, json.dumps(body))
+        except Exception:
+            logger.exception("Textract cache write failed for %s", key)
+            self._count("errors")
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name if self.backend is not None else "off",
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+def _backend_from_env():
+    kind = os.environ.get("TEXTRACT_CACHE", "sqlite").strip().lower()
+    ttl = int(os.environ.get("TEXTRACT_CACHE_TTL", DEFAULT_TTL))
+    max_entries = int(os.environ.get("TEXTRACT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    if kind == "off":
+        return None
+    if kind == "memory":
+        return MemoryCacheBackend(max_entries=max_entries, ttl=ttl)
+    if kind == "s3":
+        bucket = os.environ.get("TEXTRACT_CACHE_BUCKET", "")
+        if not bucket:
+            logger.warning("TEXTRACT_CACHE=s3 but TEXTRACT_CACHE_BUCKET unset; cache disabled")
+            return None
+        prefix = os.environ.get("TEXTRACT_CACHE_PREFIX", "textract-cache/")
+        return S3CacheBackend(bucket, prefix=prefix, ttl=ttl)
+    path = os.environ.get("TEXTRACT_CACHE_PATH", "/tmp/textract_cache.sqlite3")
+    try:
+        return SqliteCacheBackend(path, max_entries=max_entries, ttl=ttl)
+    except sqlite3.Error:
+        logger.exception("Could not open Textract cache at %s; cache disabled", path)
+        return None
+
+
+_default_cache: TextractCache | None = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> TextractCache:
+    """Process-wide cache shared by every TextractService (so counters add up)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = TextractCache(_backend_from_env())
+        return _default_cache
@@ -0,0 +1,176 @@
+"""
+Async (multi-page) Textract jobs: StartDocumentAnalysis / GetDocumentAnalysis.
+
+AnalyzeDocument only accepts single images under 10 MB. PDFs are uploaded to
+S3, analyzed as an async job, and the finished job's Blocks (paged through
+NextToken) are split back into one AnalyzeDocument-shaped response per page,
+so table_extractor.extract() runs unchanged on each page.
+
+Functions take the boto3 Textract client as an argument so tests can pass a
+stand-in that replays recorded responses (see test/textract_replay.py).
+JobStore keeps each job's staged PDF key and, once finished, its extracted
+pages, so polls after the first don't re-fetch and re-parse every page.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Shared with AnalyzeDocument (textract_service.py).
+FEATURE_TYPES = ["TABLES", "FORMS", "LAYOUT"]
+
+# Job statuses reported by GetDocumentAnalysis.
+IN_PROGRESS = "IN_PROGRESS"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+PARTIAL_SUCCESS = "PARTIAL_SUCCESS"
+
+
+def start_job(client, bucket: str, key: str) -> str:
+    """Start analysis of s3://bucket/key and return the Textract JobId."""
+    resp = client.start_document_analysis(
+        DocumentLocation={"S3Object": {"Bucket": bucket, "Name": key}},
+        FeatureTypes=FEATURE_TYPES,
+    )
+    return resp["JobId"]
+
+
+def get_job(client, job_id: str) -> dict:
+    """Fetch job status; once finished, page through NextToken and merge Blocks.
+
+    Returns {"status", "pages", "blocks", "warnings", "error"}. `blocks` is
+    empty until the job has finished.
+    """
+    resp = client.get_document_analysis(JobId=job_id)
+    status = resp["JobStatus"]
+    job = {
+        "status": status,
+        "pages": resp.get("DocumentMetadata", {}).get("Pages", 0),
+        "blocks": [],
+        "warnings": [],
+        "error": resp.get("StatusMessage"),
+    }
+    if status not in (SUCCEEDED, PARTIAL_SUCCESS):
+        return job
+
+    while True:
+        job["blocks"].extend(resp.get("Blocks", []))
+        job["warnings"].extend(resp.get("Warnings", []))
+        token = resp.get("NextToken")
+        if not token:
+            break
+        resp = client.get_document_analysis(JobId=job_id, NextToken=token)
+    return job
+
+
+async def wait_for_job(probe, job_id: str, timeout: float, initial_delay: float = 1.0,
+                       max_delay: float = 8.0, sleep=asyncio.sleep) -> dict:
+    """Await probe(job_id) with exponential backoff until the job finishes or timeout elapses.
+
+    probe is an async get_job (run on the AWS pool); the waits between probes
+    are asyncio sleeps, so a long poll holds no pool thread while it waits.
+    Returns the last job dict; its status is still IN_PROGRESS on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        job = await probe(job_id)
+        remaining = deadline - time.monotonic()
+        if job["status"] != IN_PROGRESS or remaining <= 0:
+            return job
+        await sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+def split_pages(blocks: list[dict]) -> list[dict]:
+    """Split merged job Blocks into per-page AnalyzeDocument-style responses.
+
+    Each page's blocks are renumbered to Page 1 so the extractor treats every
+    page as its own single-page document. Returned in page order.
+    """
+    by_page = defaultdict(list)
+    for block in blocks:
+        by_page[block.get("Page", 1)].append({**block, "Page": 1})
+    return [
+        {"DocumentMetadata": {"Pages": 1}, "Blocks": by_page[page]}
+        for page in sorted(by_page)
+    ]
+
+
+class JobStore:
+    """Per-job record in the jobs bucket: the staged PDF, then the finished result.
+
+    A job's record lives at {prefix}{job_id}.json. upload_pdf writes
+    {"document": <staged PDF key>}. The first poll that sees the job finish
+    extracts its pages once, overwrites the record with the result
+    ({"status", "warnings", "error", "pages"}) and deletes the staged PDF.
+    Later polls answer from the record without calling Textract; the last
+    few finished jobs are also kept in memory.
+    """
+
+    def __init__(self, s3_service, bucket: str, prefix: str, memory_entries: int = 16):
+        self.s3 = s3_service
+        self.bucket = bucket
+        self.prefix = prefix
+        self.memory_entries = memory_entries
+        self._finished: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}{job_id}.json"
+
+    def _load(self, job_id: str) -> dict | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.s3.get_json(self.bucket, self._key(job_id))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+
+    def record(self, job_id: str, document_key: str):
+        """Remember where a new job's PDF was staged."""
+        self.s3.put_bytes(self.bucket, self._key(job_id),
+                          json.dumps({"document": document_key}).encode(), "application/json")
+
+    def finished(self, job_id: str) -> dict | None:
+        """The stored result of a finished job, or None if it was not stored yet."""
+        with self._lock:
+            if job_id in self._finished:
+                self._finished.move_to_end(job_id)
+                return self._finished[job_id]
+        stored = self._load(job_id)
+        if stored is None or "status" not in stored:
+            return None
+        self._remember(job_id, stored)
+        return stored
+
+    def finish(self, job_id: str, result: dict):
+        """Store a finished job's result and delete its staged PDF.
+
+        S3 errors are logged, not raised: the caller already has the result,
+        and the next poll just extracts again.
+        """
+        self._remember(job_id, result)
+        try:
+            staged = self._load(job_id) or {}
+            self.s3.put_bytes(self.bucket, self._key(job_id),
+                              json.dumps(result, separators=(",", ":")).encode(),
+                              "application/json")
+            if staged.get("document"):
+                self.s3.delete(self.bucket, staged["document"])
+        except Exception:
+            logger.exception("Failed to store result of Textract job %s", job_id)
+
+    def _remember(self, job_id: str, result: dict):
+        with self._lock:
+            self._finished[job_id] = result
+            self._finished.move_to_end(job_id)
+            while len(self._finished) > self.memory_entries:
+                self._finished.popitem(last=False)
@@ -1,14 +1,70 @@
+from functools import partial
+
 import boto3
 
+from services import textract_jobs
+from services.aws_executor import client_config, run_blocking
+from services.textract_cache import TextractCache, cache_key, default_cache
+from services.textract_jobs import FEATURE_TYPES
+
 
 class TextractService:
-    def __init__(self, region: str = "ap-south-1"):
-        self.client = boto3.client("textract", region_name=region)
+    def __init__(self, region: str = "ap-south-1", cache: TextractCache | None = None):
+        # Adaptive retries back off client-side when batch fan-out hits the TPS quota.
+        self.client = boto3.client(
+            "textract",
+            region_name=region,
+            config=client_config(retries={"max_attempts": 6, "mode": "adaptive"}),
+        )
+        self.cache = cache if cache is not None else default_cache()
 
     def analyze_sync(self, image_bytes: bytes) -> dict:
-        """Synchronous Textract call for images < 10MB."""
+        """Synchronous Textract call for images < 10MB.
+
+        Responses are cached by image content, so re-uploading the same photo
+        skips the Textract call.
+        """
+        key = cache_key(image_bytes, FEATURE_TYPES)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
         response = self.client.analyze_document(
             Document={"Bytes": image_bytes},
-            FeatureTypes=["TABLES", "FORMS", "LAYOUT"],
+            FeatureTypes=FEATURE_TYPES,
         )
+        self.cache.put(key, response)
         return response
+
+    async def analyze(self, image_bytes: bytes) -> dict:
+        """analyze_sync on the AWS thread pool, for use from async routes."""
+        return await run_blocking(self.analyze_sync, image_bytes)
+
+    def analyze_s3_sync(self, bucket: str, key: str) -> dict:
+        """Synchronous Textract call on an image already in S3 (read by Textract, not cached)."""
+        return self.client.analyze_document(
+            Document={"S3Object": {"Bucket": bucket, "Name": key}},
+            FeatureTypes=FEATURE_TYPES,
+        )
+
+    async def analyze_s3(self, bucket: str, key: str) -> dict:
+        """analyze_s3_sync on the AWS thread pool, for use from async routes."""
+        return await run_blocking(self.analyze_s3_sync, bucket, key)
+
+    def start_document_job(self, bucket: str, key: str) -> str:
+        """Start an async multi-page analysis of an S3 object; returns the JobId."""
+        return textract_jobs.start_job(self.client, bucket, key)
+
+    def get_document_job(self, job_id: str) -> dict:
+        """Job status plus merged Blocks once finished (see textract_jobs.get_job)."""
+        return textract_jobs.get_job(self.client, job_id)
+
+    async def wait_document_job(self, job_id: str, wait: float = 0) -> dict:
+        """get_document_job on the AWS thread pool, for use from async routes.
+
+        With wait > 0, probes with backoff for up to `wait` seconds first,
+        sleeping on the event loop between probes.
+        """
+        probe = partial(run_blocking, self.get_document_job)
+        if wait > 0:
+            return await textract_jobs.wait_for_job(probe, job_id, timeout=wait)
+        return await probe(job_id)
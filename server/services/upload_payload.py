@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import base64
 
-from services.excel_service import to_xlsx
+from services.excel_service import to_xlsx_sheets
 
 
 def build_summary(result: dict) -> dict:
@@ -35,12 +35,63 @@ def _attach_system_rows(result: dict) -> list[dict]:
     return rows
 
 
-def build_upload_payload(result: dict) -> dict:
-    """Construct JSON response with workbook bytes and row bboxes."""
-    rows = _attach_system_rows(result)
-    xlsx_bytes = to_xlsx(result)
-    return {
-        "xlsx": base64.b64encode(xlsx_bytes).decode("ascii"),
-        "rows": rows,
+def encode_xlsx(sheets: list[tuple[str, dict]]) -> str | None:
+    """Base64 workbook for the JSON response format (None if no sheets)."""
+    return base64.b64encode(to_xlsx_sheets(sheets)).decode("ascii") if sheets else None
+
+
+def build_upload_parts(result: dict) -> tuple[dict, list[tuple[str, dict]]]:
+    """Split an upload response into its JSON part (rows, summary) and workbook sheets.
+
+    Rows are numbered before the sheets are written, so the workbook can be
+    encoded, streamed or uploaded afterwards with matching system serials.
+    """
+    payload = {
+        "rows": _attach_system_rows(result),
         "summary": build_summary(result),
     }
+    return payload, [("Form Data", result)]
+
+
+def build_batch_parts(pages: list[dict]) -> tuple[dict, list[tuple[str, dict]]]:
+    """Build the batch response parts: JSON (pages, summary) and workbook sheets.
+
+    Args:
+        pages: in upload order, each {"filename", "result"} on success or
+            {"filename", "error"} on failure.
+
+    System serials restart at 1 on each sheet, matching the per-sheet row walk.
+    """
+    sheets = []
+    page_entries = []
+    total_rows = 0
+    total_flagged = 0
+    for index, page in enumerate(pages, 1):
+        entry = {"page": index, "filename": page.get("filename")}
+        result = page.get("result")
+        if result is None:
+            entry.update({"status": "failed", "error": page.get("error", "unknown error")})
+            page_entries.append(entry)
+            continue
+        sheet = f"Page {index}"
+        summary = build_summary(result)
+        total_rows += summary["rowCount"]
+        total_flagged += summary["flaggedCount"]
+        entry.update({
+            "status": "ok",
+            "sheet": sheet,
+            "rows": _attach_system_rows(result),
+            "summary": summary,
+        })
+        sheets.append((sheet, result))
+        page_entries.append(entry)
+
+    return {
+        "pages": page_entries,
+        "summary": {
+            "pageCount": len(pages),
+            "failedCount": len(pages) - len(sheets),
+            "rowCount": total_rows,
+            "flaggedCount": total_flagged,
+        },
+    }, sheets
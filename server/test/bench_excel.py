@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Benchmark: write-only vs in-memory workbook generation (peak memory, latency).
+
+Builds workbooks from the recorded layouts, and from a synthetic large form
+(the recorded tables repeated) to show how the two paths scale:
+
+    python test/bench_excel.py [--repeat 20] [--scale 40]
+"""
+import argparse
+import copy
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+from services.excel_service import to_xlsx_sheets  # noqa: E402
+from services.table_extractor import extract  # noqa: E402
+
+LAYOUTS = HERE / "forms" / "layouts"
+
+
+def _measure(sheets, write_only: bool, repeat: int) -> tuple[float, float, int]:
+    """Return (median ms, peak MiB, output bytes) for one path."""
+    times = []
+    for _ in range(repeat):
+        data = copy.deepcopy(sheets)
+        start = time.perf_counter()
+        out = to_xlsx_sheets(data, write_only=write_only)
+        times.append(time.perf_counter() - start)
+    data = copy.deepcopy(sheets)
+    tracemalloc.start()
+    to_xlsx_sheets(data, write_only=write_only)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times.sort()
+    return times[len(times) // 2] * 1000, peak / 2**20, len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scale", type=int, default=40,
+                        help="times to repeat the recorded tables in the large form")
+    args = parser.parse_args()
+
+    pages = [extract(json.loads(p.read_text())) for p in sorted(LAYOUTS.glob("*_layout.json"))]
+    large = {
+        "key_value_pairs": [kv for page in pages for kv in page["key_value_pairs"]],
+        "tables": [t for _ in range(args.scale) for page in pages for t in page["tables"]],
+    }
+    cases = {
+        "single page": [("Form Data", pages[0])],
+        f"{len(pages)}-page batch": [(f"Page {i}", p) for i, p in enumerate(pages, 1)],
+        f"large form ({len(large['tables'])} tables)": [("Form Data", large)],
+    }
+
+    print(f"{'case':<28} {'path':<11} {'median ms':>10} {'peak MiB':>9} {'bytes':>9}")
+    for name, sheets in cases.items():
+        for label, write_only in (("in-memory", False), ("write-only", True)):
+            ms, peak, size = _measure(sheets, write_only, args.repeat)
+            print(f"{name:<28} {label:<11} {ms:>10.1f} {peak:>9.2f} {size:>9}")
+
+
+if __name__ == "__main__":
+    main()
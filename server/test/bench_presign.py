@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: presigned URLs per second, botocore vs the local presigner.
+
+    python test/bench_presign.py [--urls 5000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+import boto3  # noqa: E402
+
+from services.aws_executor import client_config  # noqa: E402
+from services.presigner import S3Presigner  # noqa: E402
+from services.s3_service import PRESIGN_EXPIRY  # noqa: E402
+
+
+def _rate(fn, count: int) -> float:
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=5000)
+    args = parser.parse_args()
+
+    client = boto3.client("s3", region_name="ap-south-1", aws_access_key_id="AKIDEXAMPLE",
+                          aws_secret_access_key="secret", aws_session_token="token",
+                          config=client_config(signature_version="s3v4"))
+    objects = [("fomomonguest", f"ncf/photos/session_{i:05d}_portrait.jpg")
+               for i in range(args.urls)]
+
+    def botocore_loop():
+        for bucket, key in objects:
+            client.generate_presigned_url("get_object", Params={"Bucket": bucket, "Key": key},
+                                          ExpiresIn=PRESIGN_EXPIRY)
+
+    presigner = S3Presigner(client)
+    rows = [
+        ("botocore generate_presigned_url", _rate(botocore_loop, args.urls)),
+        ("local presigner, batch (signing)",
+         _rate(lambda: presigner.presign_many(objects, PRESIGN_EXPIRY), args.urls)),
+        ("local presigner, batch (memoized)",
+         _rate(lambda: presigner.presign_many(objects, PRESIGN_EXPIRY), args.urls)),
+    ]
+    for label, rate in rows:
+        print(f"{label:<36} {rate:>12,.0f} URLs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Benchmark: GET /api/sessions fetch time vs key count and fetch concurrency.
+
+Runs SessionsService against the local S3 stand-in (test/s3_standin.py) with
+a fixed per-request latency standing in for the S3 round trip:
+
+    python test/bench_sessions.py [--latency 0.02] [--keys 100 500 2000]
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from s3_standin import S3StandIn  # noqa: E402
+from services import sessions_service  # noqa: E402
+from services.s3_service import S3Service  # noqa: E402
+from services.sessions_service import SessionsService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per S3 request")
+    parser.add_argument("--keys", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16, 32])
+    args = parser.parse_args()
+
+    session = {
+        "sessionId": "s", "siteId": "G14R1-2025", "latitude": 10.31, "longitude": 76.83,
+        "portraitImageUrl": "https://fomomon.s3.ap-south-1.amazonaws.com/ncf/p.jpg",
+        "landscapeImageUrl": "https://fomomon.s3.ap-south-1.amazonaws.com/ncf/l.jpg",
+        "responses": [{"q": "a"}] * 20, "timestamp": "2025-09-04T13:12:28",
+    }
+    print(f"latency {args.latency * 1000:.0f} ms/request")
+    print(f"{'keys':>6} " + " ".join(f"{f'x{c} (s)':>9}" for c in args.concurrency))
+    with S3StandIn(latency=args.latency) as s3:
+        service = SessionsService(S3Service(s3.client(max_pool_connections=max(args.concurrency))))
+        for count in args.keys:
+            s3.objects.clear()
+            for i in range(count):
+                s3.put("fomomon", f"ncf/sessions/s{i:05d}.json",
+                       json.dumps({**session, "sessionId": f"s{i}"}).encode())
+            timings = []
+            for concurrency in args.concurrency:
+                sessions_service._fetch_pool = ThreadPoolExecutor(concurrency)
+                start = time.perf_counter()
+                sessions = service.get_sessions("ncf")
+                timings.append(time.perf_counter() - start)
+                assert len(sessions) == count
+            print(f"{count:>6} " + " ".join(f"{t:>9.2f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Local S3 stand-in: a threaded HTTP server speaking the S3 calls the server uses.
+
+Handles path-style ListObjectsV2, GetObject, HeadObject, PutObject and
+DeleteObject against an in-memory dict, with optional per-request latency so
+concurrency effects show up the way they do against real S3. Point a real
+boto3 client at it:
+
+    with S3StandIn(latency=0.02) as s3:
+        s3.put("fomomon", "ncf/sessions/a.json", b"{}")
+        client = s3.client()
+        client.get_object(Bucket="fomomon", Key="ncf/sessions/a.json")
+
+`requests` counts calls by operation ("list", "get", "head", "put", "delete").
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+_PAGE_SIZE = 1000
+
+
+class _Object:
+    def __init__(self, data: bytes, content_type: str):
+        self.data = data
+        self.content_type = content_type
+        self.etag = '"%s"' % hashlib.md5(data).hexdigest()
+        self.modified = time.time()
+
+
+class S3StandIn:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects: dict[tuple[str, str], _Object] = {}
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def put(self, bucket: str, key: str, data: bytes, content_type: str = "application/json"):
+        with self._lock:
+            self.objects[(bucket, key)] = _Object(data, content_type)
+
+    def _count(self, operation: str):
+        with self._lock:
+            self.requests[operation] += 1
+
+    def client(self, **config):
+        """A boto3 S3 client bound to this stand-in (dummy credentials)."""
+        import boto3
+        from botocore.config import Config
+
+        return boto3.client(
+            "s3",
+            endpoint_url=self.endpoint_url,
+            region_name="ap-south-1",
+            aws_access_key_id="standin",
+            aws_secret_access_key="standin",
+            config=Config(s3={"addressing_style": "path"}, signature_version="s3v4", **config),
+        )
+
+    def _list(self, bucket: str, query: dict) -> bytes:
+        prefix = query.get("prefix", [""])[0]
+        token = query.get("continuation-token", [""])[0]
+        with self._lock:
+            keys = sorted(k for b, k in self.objects if b == bucket and k.startswith(prefix))
+            keys = [k for k in keys if k > token]
+            page, rest = keys[:_PAGE_SIZE], keys[_PAGE_SIZE:]
+            contents = "".join(
+                "<Contents><Key>%s</Key><ETag>%s</ETag><LastModified>%s</LastModified>"
+                "<Size>%d</Size></Contents>" % (
+                    escape(k), escape(obj.etag),
+                    time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(obj.modified)),
+                    len(obj.data))
+                for k in page
+                for obj in [self.objects[(bucket, k)]]
+            )
+        truncated = "true" if rest else "false"
+        next_token = f"<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>" if rest else ""
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>"
+            f"<KeyCount>{len(page)}</KeyCount><MaxKeys>{_PAGE_SIZE}</MaxKeys>"
+            f"<IsTruncated>{truncated}</IsTruncated>{next_token}{contents}"
+            "</ListBucketResult>"
+        ).encode()
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _target(self):
+                url = urlsplit(self.path)
+                bucket, _, key = url.path.lstrip("/").partition("/")
+                return bucket, unquote(key), parse_qs(url.query)
+
+            def _send(self, status: int, body: bytes = b"", headers: dict | None = None):
+                self.send_response(status)
+                headers = {"Content-Length": str(len(body)), **(headers or {})}
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _object_or_404(self, bucket, key):
+                obj = standin.objects.get((bucket, key))
+                if obj is None:
+                    self._send(404, b"<Error><Code>NoSuchKey</Code></Error>",
+                               {"Content-Type": "application/xml"})
+                return obj
+
+            def _headers(self, obj):
+                return {
+                    "Content-Type": obj.content_type,
+                    "ETag": obj.etag,
+                    "Last-Modified": formatdate(obj.modified, usegmt=True),
+                }
+
+            def do_GET(self):
+                time.sleep(standin.latency)
+                bucket, key, query = self._target()
+                if not key:
+                    standin._count("list")
+                    self._send(200, standin._list(bucket, query), {"Content-Type": "application/xml"})
+                    return
+                standin._count("get")
+                obj = self._object_or_404(bucket, key)
+                if obj is not None:
+                    self._send(200, obj.data, self._headers(obj))
+
+            def do_HEAD(self):
+                time.sleep(standin.latency)
+                standin._count("head")
+                bucket, key, _ = self._target()
+                obj = self._object_or_404(bucket, key)
+                if obj is not None:
+                    self._send(200, b"", {**self._headers(obj), "Content-Length": str(len(obj.data))})
+
+            def do_PUT(self):
+                time.sleep(standin.latency)
+                standin._count("put")
+                bucket, key, _ = self._target()
+                length = int(self.headers.get("Content-Length", 0))
+                data = self.rfile.read(length)
+                standin.put(bucket, key, data,
+                            self.headers.get("Content-Type", "application/octet-stream"))
+                self._send(200, b"", {"ETag": standin.objects[(bucket, key)].etag})
+
+            def do_DELETE(self):
+                time.sleep(standin.latency)
+                standin._count("delete")
+                bucket, key, _ = self._target()
+                with standin._lock:
+                    standin.objects.pop((bucket, key), None)
+                self._send(204)
+
+        return Handler
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Parity: the block-graph extractor must match textractor on recorded responses.
+
+Needs the server requirements (textractor) but no AWS. Besides the recorded
+layouts it checks variants that exercise the less common paths: no
+COLUMN_HEADER cells, table checkboxes and a multi-page document.
+
+Responses with words outside any LINE are deliberately not compared:
+textractor's final layout pass (DocumentEntity.visit) then drops words from
+cells depending on layout reading order, and is not deterministic across runs.
+"""
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from services import block_graph  # noqa: E402
+from services.table_extractor import extract  # noqa: E402
+from textract_replay import ReplayTextractClient  # noqa: E402
+
+LAYOUTS = HERE / "forms" / "layouts"
+
+
+def _without_column_headers(response):
+    response = copy.deepcopy(response)
+    for block in response["Blocks"]:
+        if block["BlockType"] == "CELL":
+            block["EntityTypes"] = [
+                t for t in block.get("EntityTypes", []) if t != "COLUMN_HEADER"
+            ]
+    return response
+
+
+def _with_table_checkboxes(response):
+    response = copy.deepcopy(response)
+    cells = [b for b in response["Blocks"] if b["BlockType"] == "CELL"]
+    for index, cell in enumerate(cells[::7]):
+        checkbox_id = f"checkbox-{index}"
+        response["Blocks"].append({
+            "BlockType": "SELECTION_ELEMENT",
+            "Id": checkbox_id,
+            "Confidence": 90.0,
+            "SelectionStatus": "SELECTED" if index % 2 else "NOT_SELECTED",
+            "Geometry": copy.deepcopy(cell["Geometry"]),
+        })
+        rels = cell.setdefault("Relationships", [])
+        if not rels:
+            rels.append({"Type": "CHILD", "Ids": []})
+        rels[0]["Ids"].append(checkbox_id)
+    return response
+
+
+def _multi_page(responses):
+    client = ReplayTextractClient.from_pages(responses, blocks_per_response=10**9)
+    merged = client.responses[0]
+    return {"DocumentMetadata": merged["DocumentMetadata"], "Blocks": merged["Blocks"]}
+
+
+def main_test():
+    recorded = [json.loads(p.read_text()) for p in sorted(LAYOUTS.glob("*_layout.json"))]
+    assert recorded
+
+    cases = {}
+    for index, response in enumerate(recorded):
+        cases[f"layout {index}"] = response
+        cases[f"layout {index} no headers"] = _without_column_headers(response)
+        cases[f"layout {index} checkboxes"] = _with_table_checkboxes(response)
+    cases["multi-page"] = _multi_page(recorded)
+
+    slow_total = fast_total = 0.0
+    for name, response in cases.items():
+        assert block_graph.parse(response) is not None, name
+        start = time.perf_counter()
+        expected = extract(copy.deepcopy(response), fast=False)
+        middle = time.perf_counter()
+        actual = extract(copy.deepcopy(response), fast=True)
+        slow_total += middle - start
+        fast_total += time.perf_counter() - middle
+        assert actual == expected, name
+
+    print(f"{len(cases)} responses identical; textractor {slow_total * 1000:.0f} ms, "
+          f"block graph {fast_total * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""The write-only workbook path must match the in-memory Workbook path cell for cell."""
+import copy
+import json
+import sys
+from io import BytesIO
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+from openpyxl import load_workbook  # noqa: E402
+
+from services.excel_service import iter_xlsx, to_xlsx_sheets  # noqa: E402
+from services.table_extractor import extract  # noqa: E402
+
+LAYOUTS = HERE / "forms" / "layouts"
+
+
+def _snapshot(xlsx: bytes) -> dict:
+    wb = load_workbook(BytesIO(xlsx))
+    sheets = {}
+    for ws in wb.worksheets:
+        cells = {
+            cell.coordinate: (cell.value, repr(cell.font), repr(cell.fill),
+                              repr(cell.border), repr(cell.alignment))
+            for row in ws.iter_rows() for cell in row
+            if cell.value is not None or cell.has_style
+        }
+        widths = {k: d.width for k, d in ws.column_dimensions.items() if d.customWidth}
+        sheets[ws.title] = (cells, widths)
+    return sheets
+
+
+def main_test():
+    extracted = [extract(json.loads(p.read_text()))
+                 for p in sorted(LAYOUTS.glob("*_layout.json"))]
+    assert extracted
+    # A kv pair without a value and a low-confidence key exercise the
+    # combined/empty styled cells.
+    extracted[0]["key_value_pairs"].append(
+        {"key": "Remarks", "value": None, "key_confidence": 60, "value_confidence": 50})
+    sheets = [(f"Page {i}", page) for i, page in enumerate(extracted, 1)]
+
+    legacy = to_xlsx_sheets(copy.deepcopy(sheets), write_only=False)
+    streamed = to_xlsx_sheets(copy.deepcopy(sheets), write_only=True)
+    expected, actual = _snapshot(legacy), _snapshot(streamed)
+    assert list(actual) == list(expected)
+    for title in expected:
+        assert expected[title][1], title
+        assert actual[title][1] == expected[title][1], title
+        assert actual[title][0] == expected[title][0], title
+
+    chunks = list(iter_xlsx(copy.deepcopy(sheets), chunk_size=4096))
+    assert len(chunks) > 1
+    assert _snapshot(b"".join(chunks)) == expected
+
+    print(f"{len(sheets)} sheets identical")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -49,6 +49,16 @@ for f in 000_layout.json 001_layout.json 002_layout.json; do
   fi
 done
 
+if [ -f "$DATA_DIR/layouts/000_layout.json" ]; then
+  echo "  curl -s -X POST '${SERVER_URL}/api/upload/json?format=xlsx' -H 'Content-Type: application/json' -d @${DATA_DIR}/layouts/000_layout.json -o /tmp/test_local_000_layout.xlsx"
+  CTYPE=$(curl -s -X POST "${SERVER_URL}/api/upload/json?format=xlsx" \
+    -H "Content-Type: application/json" \
+    -d @"${DATA_DIR}/layouts/000_layout.json" \
+    -o /tmp/test_local_000_layout.xlsx -w "%{content_type}")
+  check "POST /api/upload/json?format=xlsx → xlsx body" \
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" "$CTYPE"
+fi
+
 echo ""
 echo "=== Image → Excel (Textract) ==="
 if [ -f "$DATA_DIR/handwritten.jpg" ]; then
@@ -59,6 +69,17 @@ if [ -f "$DATA_DIR/handwritten.jpg" ]; then
   check "POST /api/upload (handwritten.jpg) → 200" "200" "$STATUS"
 fi
 
+echo ""
+echo "=== Image batch → Excel (Textract, parallel) ==="
+if [ -f "$DATA_DIR/images/segmented_000.jpg" ] && [ -f "$DATA_DIR/images/segmented_002.png" ]; then
+  echo "  curl -s -X POST '${SERVER_URL}/api/upload/batch' -F 'images=@${DATA_DIR}/images/segmented_000.jpg' -F 'images=@${DATA_DIR}/images/segmented_002.png' -o /tmp/test_local_batch.json"
+  STATUS=$(curl -s -X POST "${SERVER_URL}/api/upload/batch" \
+    -F "images=@${DATA_DIR}/images/segmented_000.jpg" \
+    -F "images=@${DATA_DIR}/images/segmented_002.png" \
+    -o /tmp/test_local_batch.json -w "%{http_code}")
+  check "POST /api/upload/batch (2 pages) → 200" "200" "$STATUS"
+fi
+
 echo ""
 echo "=== Sessions endpoint (requires AWS creds for S3) ==="
 echo "  curl -s '${SERVER_URL}/api/sessions/ncf' | python3 -m json.tool | head -20"
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Local presigner: byte-identical to botocore, memoized until near expiry."""
+import datetime
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+import boto3  # noqa: E402
+import botocore.auth  # noqa: E402
+
+from services.aws_executor import client_config  # noqa: E402
+from services.presigner import S3Presigner  # noqa: E402
+from services.s3_service import S3Service  # noqa: E402
+
+WEEK = 604800
+OBJECTS = [
+    ("fomomonguest", "ncf/photos/G14R1 portrait+1.jpg"),
+    ("forestfomo-images", "t4gc/2025/a~b%20c.png"),
+    ("my.dotted.bucket", "k.jpg"),
+]
+
+
+def _client(region: str, token: str | None = None, secret: str = "secret"):
+    return boto3.client("s3", region_name=region, aws_access_key_id="AKIDEXAMPLE",
+                        aws_secret_access_key=secret, aws_session_token=token,
+                        config=client_config(signature_version="s3v4"))
+
+
+def main_test():
+    now = datetime.datetime(2026, 10, 17, 12, 0, 0, tzinfo=datetime.timezone.utc)
+    clock = [now]
+    botocore.auth.get_current_datetime = lambda: clock[0].replace(tzinfo=None)
+
+    for region in ("ap-south-1", "us-east-1"):
+        for token in (None, "session/token+="):
+            client = _client(region, token)
+            presigner = S3Presigner(client, now=lambda: clock[0])
+            expected = [
+                client.generate_presigned_url(
+                    "get_object", Params={"Bucket": b, "Key": k}, ExpiresIn=WEEK)
+                for b, k in OBJECTS
+            ]
+            assert presigner.presign_many(OBJECTS, WEEK) == expected, (region, token)
+
+    client = _client("ap-south-1")
+    presigner = S3Presigner(client, min_remaining=86400, now=lambda: clock[0])
+    first = presigner.presign_many(OBJECTS, WEEK)
+    clock[0] = now + datetime.timedelta(days=5)
+    assert presigner.presign_many(OBJECTS, WEEK) == first
+    assert (presigner.signed, presigner.reused) == (3, 3)
+    # Less than a day of validity left: signed again.
+    clock[0] = now + datetime.timedelta(days=6, hours=1)
+    assert presigner.presign_get(*OBJECTS[0], WEEK) != first[0]
+    assert presigner.signed == 4
+
+    # S3Service batches session fields through the presigner.
+    service = S3Service(client)
+    service.presigner = presigner
+    sessions = [{"portraitImageUrl": f"https://{b}.s3.ap-south-1.amazonaws.com/{k}",
+                 "landscapeImageUrl": "file:///local.jpg"} for b, k in OBJECTS]
+    signed = service.presign_sessions(sessions)
+    assert all("X-Amz-Signature=" in s["portraitImageUrl"] for s in signed)
+    assert all(s["landscapeImageUrl"] == "file:///local.jpg" for s in signed)
+
+    print("presigned URLs identical to botocore; memoized until near expiry")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Concurrent session fetch against the local S3 stand-in: order, cleanup, retry."""
+import json
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from s3_standin import S3StandIn  # noqa: E402
+from services import sessions_service  # noqa: E402
+from services.s3_service import S3Service  # noqa: E402
+from services.sessions_service import SessionsService  # noqa: E402
+
+
+class FlakyS3Service(S3Service):
+    """Fails the first download of every key with a connection error."""
+
+    def __init__(self, client):
+        super().__init__(client)
+        self.failed = set()
+
+    def get_json(self, bucket, key):
+        if key not in self.failed:
+            self.failed.add(key)
+            raise ConnectionError("connection reset")
+        return super().get_json(bucket, key)
+
+
+def main_test():
+    sessions_service._RETRY_DELAY = 0
+    with S3StandIn(latency=0.002) as s3:
+        for i in range(120):
+            s3.put("fomomon", f"ncf/sessions/s{i:04d}.json", json.dumps({
+                "sessionId": f"s{i}",
+                "responses": [{"q": 1}],
+                "isUploaded": True,
+                "portraitImageUrl": f"https://fomomon.s3.ap-south-1.amazonaws.com/ncf/p{i}.jpg",
+            }).encode())
+        s3.put("fomomon", "ncf/sessions/s0050.json", b"{not json")
+        s3.put("fomomon", "ncf/sessions/readme.txt", b"ignored")
+
+        sessions = SessionsService(S3Service(s3.client())).get_sessions("ncf")
+        assert [s["sessionId"] for s in sessions] == [f"s{i}" for i in range(120) if i != 50]
+        assert all(s["responses"] == [] and "isUploaded" not in s for s in sessions)
+        assert "X-Amz-Signature=" in sessions[0]["portraitImageUrl"]
+        # The corrupt file is not retried.
+        assert s3.requests["get"] == 120
+
+        flaky = FlakyS3Service(s3.client())
+        retried = SessionsService(flaky).get_sessions("ncf")
+        assert [s["sessionId"] for s in retried] == [s["sessionId"] for s in sessions]
+        assert len(flaky.failed) == 120
+
+    print(f"{len(sessions)} sessions in key order, transient failures retried")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Sessions index against the local S3 stand-in: warm requests only list."""
+import json
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from s3_standin import S3StandIn  # noqa: E402
+from services.s3_service import S3Service  # noqa: E402
+from services.sessions_index import SessionsIndex  # noqa: E402
+from services.sessions_service import SessionsService  # noqa: E402
+
+
+def _session(i: int, **extra) -> bytes:
+    return json.dumps({
+        "sessionId": f"s{i}",
+        "responses": [{"q": 1}],
+        "portraitImageUrl": f"https://fomomon.s3.ap-south-1.amazonaws.com/ncf/p{i}.jpg",
+        **extra,
+    }).encode()
+
+
+def main_test():
+    with S3StandIn() as s3:
+        for i in range(40):
+            s3.put("fomomon", f"ncf/sessions/s{i:03d}.json", _session(i))
+        s3.put("fomomon", "ncf/sessions/broken.json", b"{not json")
+
+        s3_service = S3Service(s3.client())
+        service = SessionsService(s3_service, SessionsIndex(s3_service, bucket="index-bucket"))
+
+        def fetch():
+            before = dict(s3.requests)
+            sessions = service.get_sessions("ncf")
+            delta = {op: s3.requests[op] - before.get(op, 0) for op in ("list", "get", "put")}
+            return sessions, delta
+
+        cold, delta = fetch()
+        assert [s["sessionId"] for s in cold] == [f"s{i}" for i in range(40)]
+        # 40 sessions + the broken file + the (missing) stored index.
+        assert delta == {"list": 1, "get": 42, "put": 1}
+
+        warm, delta = fetch()
+        assert delta == {"list": 1, "get": 0, "put": 0}
+        assert [s["sessionId"] for s in warm] == [s["sessionId"] for s in cold]
+        assert "X-Amz-Signature=" in warm[0]["portraitImageUrl"]
+        assert all(s["responses"] == [] for s in warm)
+
+        # Append one, edit one, delete one: only the first two are downloaded.
+        s3.put("fomomon", "ncf/sessions/s040.json", _session(40))
+        s3.put("fomomon", "ncf/sessions/s005.json", _session(5, siteId="edited"))
+        del s3.objects[("fomomon", "ncf/sessions/s010.json")]
+        changed, delta = fetch()
+        assert delta == {"list": 1, "get": 2, "put": 1}
+        ids = [s["sessionId"] for s in changed]
+        assert "s10" not in ids and ids[-1] == "s40" and len(ids) == 40
+        assert changed[5]["siteId"] == "edited"
+
+        # A cold instance starts from the stored index: one extra GET, not 40.
+        fresh = SessionsService(s3_service, SessionsIndex(s3_service, bucket="index-bucket"))
+        before = s3.requests["get"]
+        assert [s["sessionId"] for s in fresh.get_sessions("ncf")] == ids
+        assert s3.requests["get"] - before == 1
+
+        # Memory holds only the most recent orgs; an evicted org reloads from S3.
+        bounded = SessionsIndex(s3_service, bucket="index-bucket", memory_entries=2)
+        for org in ("a", "b", "c"):
+            bounded.save("fomomon", org, {f"{org}/sessions/x.json": {"etag": org}})
+        assert list(bounded._entries) == [("fomomon", "b"), ("fomomon", "c")]
+        bounded.load("fomomon", "b")
+        before = s3.requests["get"]
+        assert bounded.load("fomomon", "a") == {"a/sessions/x.json": {"etag": "a"}}
+        assert s3.requests["get"] - before == 1
+        assert list(bounded._entries) == [("fomomon", "b"), ("fomomon", "a")]
+
+    print("warm request: 1 list, 0 gets")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for the content-addressed Textract response cache."""
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.textract_cache import (  # noqa: E402
+    MemoryCacheBackend,
+    SqliteCacheBackend,
+    TextractCache,
+    cache_key,
+)
+
+
+def main_test():
+    features = ["TABLES", "FORMS", "LAYOUT"]
+    assert cache_key(b"img", features) == cache_key(b"img", list(reversed(features)))
+    assert cache_key(b"img", features) != cache_key(b"img", ["TABLES"])
+    assert cache_key(b"img", features) != cache_key(b"img2", features)
+
+    response = {"Blocks": [{"Id": "1", "BlockType": "PAGE"}],
+                "ResponseMetadata": {"RequestId": "abc"}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in (MemoryCacheBackend(max_entries=2),
+                        SqliteCacheBackend(str(Path(tmp) / "cache.sqlite3"), max_entries=2)):
+            cache = TextractCache(backend)
+            assert cache.get("a") is None
+            cache.put("a", response)
+            assert cache.get("a") == {"Blocks": response["Blocks"]}
+
+            # LRU: touching "a" makes "b" the eviction victim.
+            cache.put("b", response)
+            cache.get("a")
+            cache.put("c", response)
+            assert cache.get("b") is None
+            assert cache.get("a") is not None and cache.get("c") is not None
+            assert cache.stats() == {"backend": backend.name, "hits": 4,
+                                     "misses": 2, "errors": 0}
+
+        expired = TextractCache(MemoryCacheBackend(ttl=1))
+        expired.backend._entries["old"] = (0.0, "{}")
+        assert expired.get("old") is None
+
+    off = TextractCache(None)
+    off.put("a", response)
+    assert off.get("a") is None
+    assert off.stats()["backend"] == "off"
+
+
+if __name__ == "__main__":
+    main_test()
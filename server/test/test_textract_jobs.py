@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""No-AWS invariants for the async PDF job path, replaying recorded layouts."""
+import asyncio
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+from botocore.exceptions import ClientError  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+from routers import upload  # noqa: E402
+from s3_standin import S3StandIn  # noqa: E402
+from services import textract_jobs  # noqa: E402
+from services.aws_executor import run_blocking  # noqa: E402
+from services.s3_service import S3Service  # noqa: E402
+from textract_replay import ReplayTextractClient  # noqa: E402
+
+
+class ReplayTextractService:
+    """TextractService's job methods over a replay client."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def start_document_job(self, bucket, key):
+        return textract_jobs.start_job(self.client, bucket, key)
+
+    async def wait_document_job(self, job_id, wait=0):
+        if job_id == "expired":
+            raise ClientError({"Error": {"Code": "InvalidJobIdException"}}, "GetDocumentAnalysis")
+        return await run_blocking(textract_jobs.get_job, self.client, job_id)
+
+
+def _route_test(layouts):
+    """Upload, poll until done: the staged PDF is deleted and later polls skip Textract."""
+    client = ReplayTextractClient.from_pages(layouts, blocks_per_response=500,
+                                             in_progress_polls=1)
+    upload.textract = ReplayTextractService(client)
+    with S3StandIn() as s3:
+        upload._s3 = S3Service(s3.client())
+        upload._jobs = None
+        upload.JOBS_BUCKET = "jobs-bucket"
+        api = TestClient(app)
+        started = api.post("/api/upload/pdf",
+                           files={"document": ("form.pdf", b"%PDF-1.7", "application/pdf")})
+        assert started.status_code == 202
+        job_id = started.json()["job_id"]
+        [pdf_key] = [k for _, k in s3.objects if k.endswith(".pdf")]
+
+        assert api.get(f"/api/upload/pdf/{job_id}").json()["status"] == textract_jobs.IN_PROGRESS
+        assert ("jobs-bucket", pdf_key) in s3.objects
+        first = api.get(f"/api/upload/pdf/{job_id}").json()
+        assert first["status"] == textract_jobs.SUCCEEDED and first["summary"]["pageCount"] == 3
+        assert ("jobs-bucket", pdf_key) not in s3.objects and s3.requests["delete"] == 1
+        textract_calls = len(client.calls)
+
+        # Same instance: answered from memory. Cold instance: from the stored record.
+        assert api.get(f"/api/upload/pdf/{job_id}").json() == first
+        upload._jobs = None
+        assert api.get(f"/api/upload/pdf/{job_id}").json() == first
+        assert len(client.calls) == textract_calls
+
+        assert api.get("/api/upload/pdf/expired").status_code == 404
+
+
+def main_test():
+    layouts = [
+        json.loads((HERE / "forms" / "layouts" / name).read_text())
+        for name in ("000_layout.json", "001_layout.json", "002_layout.json")
+    ]
+    client = ReplayTextractClient.from_pages(layouts, blocks_per_response=500,
+                                             in_progress_polls=3)
+
+    job_id = textract_jobs.start_job(client, "bucket", "textract-jobs/a.pdf")
+    assert client.calls[0][1]["DocumentLocation"]["S3Object"] == {
+        "Bucket": "bucket", "Name": "textract-jobs/a.pdf"}
+
+    # Probes run on the AWS pool; the backoff waits don't hold a pool thread.
+    sleeps, probe_threads = [], []
+
+    async def sleep(delay):
+        assert threading.current_thread() is threading.main_thread()
+        sleeps.append(delay)
+
+    async def probe(job_id):
+        return await run_blocking(record_probe, job_id)
+
+    def record_probe(job_id):
+        probe_threads.append(threading.current_thread().name)
+        return textract_jobs.get_job(client, job_id)
+
+    job = asyncio.run(textract_jobs.wait_for_job(probe, job_id, timeout=60, sleep=sleep))
+    assert job["status"] == textract_jobs.SUCCEEDED
+    assert sleeps == [1.0, 2.0, 4.0]
+    assert len(probe_threads) == 4 and all(name.startswith("aws") for name in probe_threads)
+    assert len(job["blocks"]) == sum(len(layout["Blocks"]) for layout in layouts)
+    next_tokens = [c[1]["NextToken"] for c in client.calls if c[0] == "get_document_analysis"]
+    assert next_tokens[-1] is not None and next_tokens.count(None) == 4
+
+    pages = textract_jobs.split_pages(job["blocks"])
+    assert len(pages) == 3
+    for page, layout in zip(pages, layouts):
+        assert [b["Id"] for b in page["Blocks"]] == [b["Id"] for b in layout["Blocks"]]
+        assert {b["Page"] for b in page["Blocks"]} == {1}
+
+    pending = textract_jobs.get_job(ReplayTextractClient([], in_progress_polls=1), job_id)
+    assert pending["status"] == textract_jobs.IN_PROGRESS and pending["blocks"] == []
+
+    _route_test(layouts)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
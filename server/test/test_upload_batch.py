@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""/api/upload/batch with one failing page, replaying recorded layouts, no AWS."""
+import asyncio
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from main import app  # noqa: E402
+from routers import upload  # noqa: E402
+from services import table_extractor  # noqa: E402
+
+
+class FakeTextract:
+    """Maps image bytes to a recorded layout; b"throttled" raises like a spent quota.
+
+    analyze_s3 reads the image from `objects`, as Textract reads the bucket.
+    """
+
+    def __init__(self, layouts: dict[bytes, dict]):
+        self.layouts = layouts
+        self.objects = {}
+
+    async def analyze(self, image_bytes: bytes) -> dict:
+        await asyncio.sleep(0)
+        if image_bytes not in self.layouts:
+            raise RuntimeError("ProvisionedThroughputExceededException")
+        return self.layouts[image_bytes]
+
+    async def analyze_s3(self, bucket: str, key: str) -> dict:
+        return await self.analyze(self.objects[(bucket, key)])
+
+
+class FakeS3:
+    def presign_put(self, bucket, key, expires_in):
+        return f"https://{bucket}.s3.amazonaws.com/{key}?X-Amz-Expires={expires_in}"
+
+
+def main_test():
+    layouts = {
+        f"image-{index}".encode(): json.loads((HERE / "forms" / "layouts" / name).read_text())
+        for index, name in enumerate(("000_layout.json", "001_layout.json"))
+    }
+    upload.textract = FakeTextract(layouts)
+
+    # Extraction runs on the worker pool, not on the event loop's thread.
+    threads = []
+    real_extract = upload.extract
+
+    def recording_extract(response):
+        threads.append(threading.current_thread().name)
+        return real_extract(response)
+    upload.extract = recording_extract
+
+    client = TestClient(app)
+    files = [
+        ("images", ("a.jpg", b"image-0", "image/jpeg")),
+        ("images", ("b.jpg", b"throttled", "image/jpeg")),
+        ("images", ("c.jpg", b"image-1", "image/jpeg")),
+    ]
+    response = client.post("/api/upload/batch", files=files)
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert payload["xlsx"]
+    pages = payload["pages"]
+    assert [page["status"] for page in pages] == ["ok", "failed", "ok"]
+    assert [page["filename"] for page in pages] == ["a.jpg", "b.jpg", "c.jpg"]
+    assert "ProvisionedThroughputExceeded" in pages[1]["error"] and "sheet" not in pages[1]
+    assert [pages[0]["sheet"], pages[2]["sheet"]] == ["Page 1", "Page 3"]
+    assert payload["summary"]["pageCount"] == 3 and payload["summary"]["failedCount"] == 1
+    expected_rows = sum(
+        len(table["data_rows"])
+        for layout in layouts.values()
+        for table in table_extractor.extract(layout)["tables"]
+    )
+    assert payload["summary"]["rowCount"] == expected_rows
+    assert len(threads) == 2 and all(name.startswith("aws") for name in threads)
+
+    # format=xlsx reports the failed page in X-Form-Pages.
+    as_xlsx = client.post("/api/upload/batch?format=xlsx", files=files)
+    assert as_xlsx.status_code == 200
+    assert json.loads(as_xlsx.headers["x-form-summary"]) == payload["summary"]
+    statuses = json.loads(as_xlsx.headers["x-form-pages"])
+    assert [status["status"] for status in statuses] == ["ok", "failed", "ok"]
+    assert statuses[1]["filename"] == "b.jpg" and statuses[1]["error"] == pages[1]["error"]
+    assert statuses[2]["sheet"] == "Page 3" and "rows" not in statuses[2]
+
+    # Every page failing is an error, not an empty workbook.
+    response = client.post("/api/upload/batch", files=[files[1]])
+    assert response.status_code == 502
+
+    # A body over the byte cap is refused with a pointer to the S3 path.
+    cap = upload.BATCH_MAX_BYTES
+    upload.BATCH_MAX_BYTES = 10
+    response = client.post("/api/upload/batch", files=files)
+    assert response.status_code == 413 and "/api/upload/batch/urls" in response.text
+    upload.BATCH_MAX_BYTES = cap
+
+    # The S3 path: presigned PUTs, then Textract reads the uploaded keys.
+    upload._s3, upload.JOBS_BUCKET = FakeS3(), "jobs-bucket"
+    urls = client.post("/api/upload/batch/urls",
+                       json={"filenames": ["a.jpg", "b.jpg", "c.JPG"]}).json()
+    keys = [item["key"] for item in urls["uploads"]]
+    assert all(key.startswith(upload.IMAGES_PREFIX) for key in keys)
+    assert keys[2].endswith("/2.jpg") and len({key.rsplit("/", 1)[0] for key in keys}) == 1
+    assert urls["uploads"][0]["url"].startswith(f"https://jobs-bucket.s3.amazonaws.com/{keys[0]}?")
+    for key, (_, (_, data, _)) in zip(keys, files):
+        upload.textract.objects[("jobs-bucket", key)] = data
+    from_s3 = client.post("/api/upload/batch/s3", json={"images": [
+        {"key": key, "filename": name} for key, name in zip(keys, ["a.jpg", "b.jpg", "c.jpg"])]})
+    assert from_s3.status_code == 200, from_s3.text
+    assert [page["status"] for page in from_s3.json()["pages"]] == ["ok", "failed", "ok"]
+    assert from_s3.json()["summary"] == payload["summary"]
+    assert client.post("/api/upload/batch/s3", json={"images": [
+        {"key": "textract-cache/secret.json"}]}).status_code == 400
+    assert client.post("/api/upload/batch/urls", json={"filenames": []}).status_code == 400
+    upload.extract = real_extract
+    print("ok")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Workbook response formats of /api/upload/json (json, xlsx, url), no AWS."""
+import base64
+import json
+import os
+import sys
+import threading
+from io import BytesIO
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-south-1")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from openpyxl import load_workbook  # noqa: E402
+
+from main import app  # noqa: E402
+from routers import upload  # noqa: E402
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_bytes(self, bucket, key, data, content_type="application/octet-stream"):
+        self.objects[(bucket, key)] = (data, content_type)
+
+    def presign_get(self, bucket, key, expires_in):
+        return f"https://{bucket}.s3.amazonaws.com/{key}?X-Amz-Expires={expires_in}"
+
+
+def _record_threads(fn, threads: list):
+    def wrapped(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return fn(*args, **kwargs)
+    return wrapped
+
+
+def _cells(xlsx: bytes) -> list:
+    ws = load_workbook(BytesIO(xlsx)).active
+    return [[c.value for c in row] for row in ws.iter_rows()]
+
+
+def main_test():
+    client = TestClient(app)
+    # Workbooks are built on the AWS pool, not the event loop.
+    threads = []
+    upload.encode_xlsx = _record_threads(upload.encode_xlsx, threads)
+    upload.to_xlsx_sheets = _record_threads(upload.to_xlsx_sheets, threads)
+    body = (HERE / "forms" / "layouts" / "000_layout.json").read_bytes()
+    headers = {"Content-Type": "application/json"}
+
+    as_json = client.post("/api/upload/json", content=body, headers=headers)
+    assert as_json.status_code == 200
+    payload = as_json.json()
+    xlsx = base64.b64decode(payload["xlsx"])
+
+    as_xlsx = client.post("/api/upload/json?format=xlsx", content=body, headers=headers)
+    assert as_xlsx.status_code == 200
+    assert as_xlsx.headers["content-type"] == upload.XLSX_MEDIA_TYPE
+    assert json.loads(as_xlsx.headers["x-form-summary"]) == payload["summary"]
+    assert _cells(as_xlsx.content) == _cells(xlsx)
+    assert len(as_xlsx.content) < len(as_json.content)
+
+    s3 = FakeS3()
+    upload._s3, upload.XLSX_BUCKET = s3, "workbooks-bucket"
+    as_url = client.post("/api/upload/json?format=url", content=body, headers=headers)
+    assert as_url.status_code == 200
+    url_payload = as_url.json()
+    assert "xlsx" not in url_payload
+    assert url_payload["rows"] == payload["rows"]
+    assert url_payload["summary"] == payload["summary"]
+    [(bucket, key)] = s3.objects
+    assert bucket == "workbooks-bucket" and key.startswith(upload.XLSX_PREFIX)
+    assert url_payload["xlsx_url"].startswith(f"https://{bucket}.s3.amazonaws.com/{key}")
+    assert _cells(s3.objects[(bucket, key)][0]) == _cells(xlsx)
+
+    assert client.post("/api/upload/json?format=csv", content=body,
+                       headers=headers).status_code == 422
+
+    assert len(threads) == 2 and all(t.startswith("aws") for t in threads), threads
+
+    print(f"json {len(as_json.content)} B, xlsx {len(as_xlsx.content)} B, "
+          f"url {len(as_url.content)} B")
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,64 @@
+"""Local stand-in for the Textract async job API that replays recorded responses.
+
+Record a job once (every GetDocumentAnalysis page, in NextToken order) into a
+directory as get_000.json, get_001.json, ... and replay it without AWS:
+
+    client = ReplayTextractClient.from_dir("recordings/form_a")
+    job = textract_jobs.get_job(client, textract_jobs.start_job(client, "b", "k"))
+
+`in_progress_polls` makes the first N status polls report IN_PROGRESS, to
+exercise client backoff.
+"""
+import json
+from pathlib import Path
+
+
+class ReplayTextractClient:
+    def __init__(self, responses: list[dict], in_progress_polls: int = 0):
+        self.responses = responses
+        self.in_progress_polls = in_progress_polls
+        self.calls = []
+
+    @classmethod
+    def from_dir(cls, path, in_progress_polls: int = 0):
+        files = sorted(Path(path).glob("get_*.json"))
+        return cls([json.loads(f.read_text()) for f in files], in_progress_polls)
+
+    @classmethod
+    def from_pages(cls, page_responses: list[dict], blocks_per_response: int = 1000,
+                   in_progress_polls: int = 0):
+        """Build a recording from single-page AnalyzeDocument responses.
+
+        Blocks get their Page number and are chunked into NextToken pages,
+        the way GetDocumentAnalysis returns them.
+        """
+        blocks = [
+            {**block, "Page": number}
+            for number, page in enumerate(page_responses, 1)
+            for block in page["Blocks"]
+        ]
+        chunks = [blocks[i:i + blocks_per_response]
+                  for i in range(0, len(blocks), blocks_per_response)] or [[]]
+        responses = []
+        for index, chunk in enumerate(chunks):
+            resp = {
+                "JobStatus": "SUCCEEDED",
+                "DocumentMetadata": {"Pages": len(page_responses)},
+                "Blocks": chunk,
+            }
+            if index + 1 < len(chunks):
+                resp["NextToken"] = f"token-{index + 1}"
+            responses.append(resp)
+        return cls(responses, in_progress_polls)
+
+    def start_document_analysis(self, **kwargs):
+        self.calls.append(("start_document_analysis", kwargs))
+        return {"JobId": "replay-job"}
+
+    def get_document_analysis(self, JobId, NextToken=None, **kwargs):
+        self.calls.append(("get_document_analysis", {"JobId": JobId, "NextToken": NextToken}))
+        if NextToken is None and self.in_progress_polls > 0:
+            self.in_progress_polls -= 1
+            return {"JobStatus": "IN_PROGRESS"}
+        index = int(NextToken.split("-")[1]) if NextToken else 0
+        return self.responses[index]